@@ -0,0 +1,60 @@
+"""benchmarks for datasets used to train and evaluate models"""
+import tempfile
+
+import numpy as np
+
+from vak.datasets import WindowDataset
+from vak.labels import to_map
+from vak.transforms import StandardizeSpect
+
+from . import common
+
+
+class TimeWindowDatasetGetitem:
+    params = ([88, 176, 370], [1000, 10000])
+    param_names = ['window_size', 'n_timebins']
+    n_items = 100
+
+    def setup(self, window_size, n_timebins):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        df, annots = common.spect_files(self.tmp_dir.name, n_files=10, n_timebins=n_timebins)
+        spect_id_vector, spect_inds_vector, x_inds = WindowDataset.spect_vectors_from_df(df, window_size)
+        labelmap = to_map(set(common.LABELSET), map_unlabeled=True)
+        self.dataset = WindowDataset(root='dummy.csv',
+                                     x_inds=x_inds,
+                                     spect_id_vector=spect_id_vector,
+                                     spect_inds_vector=spect_inds_vector,
+                                     spect_paths=df['spect_path'].values,
+                                     annots=annots,
+                                     labelmap=labelmap,
+                                     timebin_dur=common.TIMEBIN_DUR,
+                                     window_size=window_size,
+                                     transform=StandardizeSpect.fit_df(df))
+        rng = np.random.default_rng(0)
+        self.inds = rng.choice(len(self.dataset), size=self.n_items, replace=False)
+
+    def teardown(self, window_size, n_timebins):
+        self.tmp_dir.cleanup()
+
+    def time_getitem(self, window_size, n_timebins):
+        """time to get 100 random windows, as when shuffling training data"""
+        for ind in self.inds:
+            self.dataset[ind]
+
+
+class TimeStandardizeSpectFitDf:
+    params = [10, 100]
+    param_names = ['n_files']
+
+    def setup(self, n_files):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.df, _ = common.spect_files(self.tmp_dir.name, n_files=n_files, n_timebins=2000)
+
+    def teardown(self, n_files):
+        self.tmp_dir.cleanup()
+
+    def time_fit_df(self, n_files):
+        StandardizeSpect.fit_df(self.df)
+
+    def peakmem_fit_df(self, n_files):
+        StandardizeSpect.fit_df(self.df)
@@ -0,0 +1,44 @@
+"""benchmarks for converting between annotated segments and labeled time bins"""
+import numpy as np
+
+from vak import labeled_timebins
+from vak.labels import to_map
+
+from . import common
+
+
+class TimeLabeledTimebins:
+    params = [10, 100, 1000]
+    param_names = ['n_segments']
+
+    def setup(self, n_segments):
+        # 1 s per segment on average, like birdsong bouts with gaps
+        dur = n_segments
+        labels, self.onsets_s, self.offsets_s = common.segments(n_segments, dur)
+        self.labelmap = to_map(set(common.LABELSET), map_unlabeled=True)
+        self.labels_int = [self.labelmap[label] for label in labels]
+        self.t = np.arange(int(dur / common.TIMEBIN_DUR)) * common.TIMEBIN_DUR
+        self.lbl_tb = labeled_timebins.label_timebins(self.labels_int,
+                                                      self.onsets_s,
+                                                      self.offsets_s,
+                                                      self.t,
+                                                      unlabeled_label=self.labelmap['unlabeled'])
+
+    def time_label_timebins(self, n_segments):
+        labeled_timebins.label_timebins(self.labels_int,
+                                        self.onsets_s,
+                                        self.offsets_s,
+                                        self.t,
+                                        unlabeled_label=self.labelmap['unlabeled'])
+
+    def time_lbl_tb2segments(self, n_segments):
+        labeled_timebins.lbl_tb2segments(self.lbl_tb,
+                                         self.labelmap,
+                                         self.t)
+
+    def time_lbl_tb2segments_clean_up(self, n_segments):
+        labeled_timebins.lbl_tb2segments(self.lbl_tb,
+                                         self.labelmap,
+                                         self.t,
+                                         min_segment_dur=0.01,
+                                         majority_vote=True)
@@ -0,0 +1,26 @@
+"""benchmarks for metrics"""
+import numpy as np
+
+from vak.metrics.distance.functional import levenshtein, segment_error_rate
+
+from . import common
+
+
+class TimeLevenshtein:
+    params = [10, 100, 1000]
+    param_names = ['length']
+
+    def setup(self, length):
+        rng = np.random.default_rng(0)
+        self.source = ''.join(rng.choice(list(common.LABELSET), size=length))
+        # about one edit every ten labels, like predictions from a trained model
+        target = list(self.source)
+        for ind in rng.choice(length, size=max(length // 10, 1), replace=False):
+            target[ind] = rng.choice(list(common.LABELSET))
+        self.target = ''.join(target)
+
+    def time_levenshtein(self, length):
+        levenshtein(self.source, self.target)
+
+    def time_segment_error_rate(self, length):
+        segment_error_rate(self.source, self.target)
@@ -0,0 +1,80 @@
+"""end-to-end benchmark of predicting annotations with a model,
+on the .cbin files bundled with the tests"""
+import json
+from pathlib import Path
+import tempfile
+
+import vak.core
+import vak.models
+from vak.labels import to_map
+
+from . import common
+
+WINDOW_SIZE = 88
+MODEL_CONFIG_MAP = {
+    'TweetyNet': {
+        'network': {},
+        'optimizer': {'lr': 0.001},
+        'loss': {},
+        'metrics': {},
+    }
+}
+
+
+class TimePredict:
+    timeout = 1200
+
+    def setup_cache(self):
+        """prepare dataset and save a checkpoint once, shared by all repeats.
+        The network is not trained, since only the time to predict matters here."""
+        cache_dir = Path(tempfile.mkdtemp(prefix='vak-bench-predict-'))
+        spect_params = vak.config.spect_params.SpectParamsConfig(fft_size=512,
+                                                                 step_size=64,
+                                                                 freq_cutoffs=[500, 10000],
+                                                                 thresh=6.25,
+                                                                 transform_type='log_spect')
+        _, csv_path = vak.core.prep(data_dir=common.CBIN_DIR,
+                                    purpose='predict',
+                                    output_dir=cache_dir,
+                                    audio_format='cbin',
+                                    spect_params=spect_params)
+
+        labelmap = to_map(set(common.LABELSET), map_unlabeled=True)
+        labelmap_path = cache_dir.joinpath('labelmap.json')
+        with labelmap_path.open('w') as fp:
+            json.dump(labelmap, fp)
+
+        dataset = vak.datasets.VocalDataset.from_csv(csv_path=csv_path,
+                                                     split='predict',
+                                                     labelmap=labelmap,
+                                                     item_transform=vak.transforms.get_defaults(
+                                                         'predict', window_size=WINDOW_SIZE)
+                                                     )
+        models_map = vak.models.from_model_config_map(MODEL_CONFIG_MAP,
+                                                      num_classes=len(labelmap),
+                                                      input_shape=dataset.shape[1:])
+        checkpoint_path = cache_dir.joinpath('checkpoint.pt')
+        models_map['TweetyNet'].save(checkpoint_path)
+        return {
+            'csv_path': str(csv_path),
+            'labelmap_path': str(labelmap_path),
+            'checkpoint_path': str(checkpoint_path),
+        }
+
+    def setup(self, cache):
+        self.output_dir = tempfile.TemporaryDirectory()
+
+    def teardown(self, cache):
+        self.output_dir.cleanup()
+
+    def time_predict(self, cache):
+        vak.core.predict(csv_path=cache['csv_path'],
+                         checkpoint_path=cache['checkpoint_path'],
+                         labelmap_path=Path(cache['labelmap_path']),
+                         model_config_map=MODEL_CONFIG_MAP,
+                         window_size=WINDOW_SIZE,
+                         num_workers=0,
+                         device='cpu',
+                         output_dir=self.output_dir.name,
+                         min_segment_dur=0.01,
+                         majority_vote=True)
@@ -0,0 +1,54 @@
+"""benchmarks for making spectrograms"""
+import tempfile
+
+import vak.config.spect_params
+import vak.io.audio
+import vak.spect
+
+from . import common
+
+
+class TimeSpectrogram:
+    params = ([1, 10, 60], [None, [500, 10000]])
+    param_names = ['dur', 'freq_cutoffs']
+
+    def setup(self, dur, freq_cutoffs):
+        self.dat = common.audio(dur)
+
+    def time_spectrogram(self, dur, freq_cutoffs):
+        vak.spect.spectrogram(self.dat,
+                              common.SAMP_FREQ,
+                              fft_size=512,
+                              step_size=64,
+                              thresh=6.25,
+                              transform_type='log_spect',
+                              freq_cutoffs=freq_cutoffs)
+
+    def peakmem_spectrogram(self, dur, freq_cutoffs):
+        self.time_spectrogram(dur, freq_cutoffs)
+
+
+class TimeToSpect:
+    """make spectrograms from the .cbin files bundled with the tests"""
+    timeout = 300
+    params = ['numpy', 'torch']
+    param_names = ['backend']
+
+    def setup(self, backend):
+        self.audio_files = sorted(str(path) for path in common.CBIN_DIR.glob('*.cbin'))
+        self.spect_params = vak.config.spect_params.SpectParamsConfig(fft_size=512,
+                                                                      step_size=64,
+                                                                      freq_cutoffs=[500, 10000],
+                                                                      thresh=6.25,
+                                                                      transform_type='log_spect',
+                                                                      backend=backend)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def teardown(self, backend):
+        self.tmp_dir.cleanup()
+
+    def time_to_spect(self, backend):
+        vak.io.audio.to_spect(audio_format='cbin',
+                              spect_params=self.spect_params,
+                              output_dir=self.tmp_dir.name,
+                              audio_files=self.audio_files)
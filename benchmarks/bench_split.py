@@ -0,0 +1,35 @@
+"""benchmarks for splitting datasets"""
+import random
+
+import numpy as np
+
+from vak.split.algorithms import brute_force
+
+from . import common
+
+
+class TimeBruteForce:
+    params = [50, 500]
+    param_names = ['n_files']
+
+    def setup(self, n_files):
+        # brute_force uses the random module
+        random.seed(0)
+        rng = np.random.default_rng(0)
+        self.durs = rng.uniform(5, 15, size=n_files).tolist()
+        self.labels = [
+            rng.choice(list(common.LABELSET), size=5).tolist() for _ in range(n_files)
+        ]
+        self.labelset = set(common.LABELSET)
+        total_dur = sum(self.durs)
+        self.train_dur = total_dur * 0.5
+        self.val_dur = total_dur * 0.1
+        self.test_dur = total_dur * 0.2
+
+    def time_brute_force(self, n_files):
+        brute_force(self.durs,
+                    self.labels,
+                    self.labelset,
+                    self.train_dur,
+                    self.val_dur,
+                    self.test_dur)
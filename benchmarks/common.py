@@ -0,0 +1,55 @@
+"""helper functions used by benchmarks, to generate synthetic data
+and to find the data bundled with the tests"""
+from pathlib import Path
+
+import crowsetta
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).parent
+TEST_DATA_ROOT = HERE.parent.joinpath('tests', 'test_data')
+# bundled .cbin audio files with .not.mat annotations, same as used by tests/setup_scripts
+CBIN_DIR = TEST_DATA_ROOT.joinpath('cbins', 'gy6or6', '032312')
+
+SAMP_FREQ = 32000
+N_FREQ_BINS = 257
+TIMEBIN_DUR = 0.002
+LABELSET = 'iabcdefghjk'
+
+
+def audio(dur, samp_freq=SAMP_FREQ, seed=0):
+    """returns ``dur`` seconds of noise with tones, as float64, like audio loaded by vak"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(dur * samp_freq)) / samp_freq
+    return rng.normal(scale=0.1, size=t.shape) + np.sin(2 * np.pi * 3000 * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+
+
+def segments(n_segments, dur, labelset=LABELSET, seed=0):
+    """returns labels, onsets, and offsets of ``n_segments`` non-overlapping segments in ``dur`` seconds"""
+    rng = np.random.default_rng(seed)
+    edges = np.sort(rng.choice(np.arange(1, int(dur / TIMEBIN_DUR)), size=n_segments * 2, replace=False))
+    onsets_s = edges[::2] * TIMEBIN_DUR
+    offsets_s = edges[1::2] * TIMEBIN_DUR
+    labels = rng.choice(list(labelset), size=n_segments).tolist()
+    return labels, onsets_s, offsets_s
+
+
+def spect_files(dir_path, n_files, n_timebins, seed=0):
+    """saves ``n_files`` .spect.npz files in dir_path, each with spectrograms of ``n_timebins`` time bins,
+    and returns a DataFrame representing them with columns 'spect_path', 'duration', 'split' as made by vak prep,
+    along with a list of annotations (crowsetta.Annotation) for each file"""
+    rng = np.random.default_rng(seed)
+    records = []
+    annots = []
+    for ind in range(n_files):
+        spect_path = Path(dir_path).joinpath(f'{ind}.wav.spect.npz')
+        np.savez(spect_path,
+                 s=rng.random((N_FREQ_BINS, n_timebins)),
+                 t=np.arange(n_timebins) * TIMEBIN_DUR,
+                 f=np.linspace(0, SAMP_FREQ / 2, N_FREQ_BINS))
+        dur = n_timebins * TIMEBIN_DUR
+        labels, onsets_s, offsets_s = segments(n_segments=max(int(dur), 1) * 4, dur=dur, seed=ind)
+        seq = crowsetta.Sequence.from_keyword(labels=labels, onsets_s=onsets_s, offsets_s=offsets_s)
+        annots.append(crowsetta.Annotation(seq=seq, annot_file='annot.csv', audio_file=f'{ind}.wav'))
+        records.append({'spect_path': str(spect_path), 'duration': dur, 'split': 'train'})
+    return pd.DataFrame.from_records(records), annots
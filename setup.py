@@ -26,21 +26,22 @@ DESCRIPTION = about['__summary__']
 URL = about['__uri__']
 EMAIL = about['__email__']
 AUTHOR = about['__author__']
-REQUIRES_PYTHON = '>=3.6.0'
+REQUIRES_PYTHON = '>=3.7.0'
 VERSION = about['__version__']
 LICENSE = about['__license__']
 
 REQUIRED = [
     'attrs',
     'crowsetta>=2.2.0',
-    'dask[bag]',
     'evfuncs',
     'joblib',
     'matplotlib',
-    'numpy',
-    'scipy',
+    'numpy>=1.20',
+    'scipy>=1.4',
+    'soundfile',
     'pandas',
     'tensorboard>=2.2.0',
+    'threadpoolctl',
     'toml',
     'torch',
     'torchvision',
@@ -49,6 +50,7 @@ REQUIRED = [
 ]
 
 dev_deps = [
+    'asv',
     'twine',
 ]
 
@@ -171,7 +173,7 @@ setup(
         'Development Status :: 4 - Beta',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: Implementation :: CPython',
     ],
     # $ setup.py publish support.
@@ -17,6 +17,7 @@ from . import config
 from . import csv
 from . import datasets
 from . import device
+from . import distributed
 from . import engine
 from . import entry_points
 from . import files
@@ -24,11 +25,16 @@ from . import io
 from . import labels
 from . import labeled_timebins
 from . import logging
+from . import manifest
+from . import memory
 from . import metrics
 from . import models
+from . import parallel
 from . import plot
+from . import profiling
 from . import spect
 from . import summary_writer
+from . import testing
 from . import timebins
 from . import transforms
 from . import split
@@ -45,6 +51,7 @@ __all__ = [
     'csv',
     'datasets',
     'device',
+    'distributed',
     'engine',
     'entry_points',
     'files',
@@ -52,13 +59,18 @@ __all__ = [
     'labels',
     'labeled_timebins',
     'logging',
+    'manifest',
+    'memory',
     'metrics',
     'Model',
     'models',
+    'parallel',
     'plot',
+    'profiling',
     'spect',
     'split',
     'summary_writer',
+    'testing',
     'timebins',
     'transforms',
     'validation',
@@ -17,6 +17,7 @@ def get_parser():
         'predict',
         'finetune',
         'learncurve',
+        'profile',
     ]
 
     parser = argparse.ArgumentParser(description='vak command-line interface',
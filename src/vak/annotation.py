@@ -119,7 +119,8 @@ def files_from_dir(annot_dir, annot_format):
         )
 
     format_module = getattr(crowsetta.formats, annot_format)
-    ext = format_module.meta.ext
+    # some formats specify extension with a leading period, e.g. '.phn', but from_dir adds one
+    ext = format_module.meta.ext.lstrip('.')
     annot_files = files.from_dir(annot_dir, ext)
     return annot_files
 
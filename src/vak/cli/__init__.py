@@ -3,5 +3,6 @@ creating learning curves, etc."""
 from .prep import prep
 from .learncurve import learning_curve
 from .predict import predict
+from .profile import profile
 from .cli import cli
 from .train import train
@@ -3,6 +3,7 @@ from .train import train
 from .learncurve import learning_curve
 from .predict import predict
 from .prep import prep
+from .profile import profile
 
 
 def cli(command, config_file):
@@ -11,7 +12,7 @@ def cli(command, config_file):
     Parameters
     ----------
     command : string
-        One of {'prep', 'train', 'eval', 'predict', 'finetune', 'learncurve'}
+        One of {'prep', 'train', 'eval', 'predict', 'finetune', 'learncurve', 'profile'}
     config_file : str, Path
         path to a config.toml file
     """
@@ -30,6 +31,9 @@ def cli(command, config_file):
     elif command == 'learncurve':
         learning_curve(toml_path=config_file)
 
+    elif command == 'profile':
+        profile(toml_path=config_file)
+
     elif command == 'finetune':
         raise NotImplementedError
 
@@ -4,6 +4,7 @@ from pathlib import Path
 from .. import config
 from .. import core
 from .. import logging
+from .. import manifest
 
 
 def eval(toml_path):
@@ -37,15 +38,16 @@ def eval(toml_path):
 
     model_config_map = config.models.map_from_path(toml_path, cfg.eval.models)
 
-    core.eval(cfg.eval.csv_path,
-              model_config_map,
-              checkpoint_path=cfg.eval.checkpoint_path,
-              labelmap_path=cfg.eval.labelmap_path,
-              output_dir=cfg.eval.output_dir,
-              window_size=cfg.dataloader.window_size,
-              num_workers=cfg.eval.num_workers,
-              spect_scaler_path=cfg.eval.spect_scaler_path,
-              spect_key=cfg.spect_params.spect_key,
-              timebins_key=cfg.spect_params.timebins_key,
-              device=cfg.eval.device,
-              logger=logger)
+    with manifest.record('eval', toml_path, Path(cfg.eval.output_dir), timenow, logger=logger):
+        core.eval(cfg.eval.csv_path,
+                  model_config_map,
+                  checkpoint_path=cfg.eval.checkpoint_path,
+                  labelmap_path=cfg.eval.labelmap_path,
+                  output_dir=cfg.eval.output_dir,
+                  window_size=cfg.dataloader.window_size,
+                  num_workers=cfg.eval.num_workers,
+                  spect_scaler_path=cfg.eval.spect_scaler_path,
+                  spect_key=cfg.spect_params.spect_key,
+                  timebins_key=cfg.spect_params.timebins_key,
+                  device=cfg.eval.device,
+                  logger=logger)
@@ -5,6 +5,7 @@ from datetime import datetime
 from .. import config
 from .. import core
 from .. import logging
+from .. import manifest
 
 
 def learning_curve(toml_path):
@@ -53,23 +54,34 @@ def learning_curve(toml_path):
 
     model_config_map = config.models.map_from_path(toml_path, cfg.learncurve.models)
 
-    core.learning_curve(model_config_map,
-                        cfg.learncurve.train_set_durs,
-                        cfg.learncurve.num_replicates,
-                        cfg.learncurve.csv_path,
-                        cfg.prep.labelset,
-                        cfg.dataloader.window_size,
-                        cfg.learncurve.batch_size,
-                        cfg.learncurve.num_epochs,
-                        cfg.learncurve.num_workers,
-                        results_path=results_path,
-                        spect_key=cfg.spect_params.spect_key,
-                        timebins_key=cfg.spect_params.timebins_key,
-                        normalize_spectrograms=cfg.learncurve.normalize_spectrograms,
-                        shuffle=cfg.learncurve.shuffle,
-                        val_step=cfg.learncurve.val_step,
-                        ckpt_step=cfg.learncurve.ckpt_step,
-                        patience=cfg.learncurve.patience,
-                        device=cfg.learncurve.device,
-                        logger=logger,
-                        )
+    with manifest.record('learncurve', toml_path, results_path, timenow, logger=logger):
+        core.learning_curve(model_config_map,
+                            cfg.learncurve.train_set_durs,
+                            cfg.learncurve.num_replicates,
+                            cfg.learncurve.csv_path,
+                            cfg.prep.labelset,
+                            cfg.dataloader.window_size,
+                            cfg.learncurve.batch_size,
+                            cfg.learncurve.num_epochs,
+                            cfg.learncurve.num_workers,
+                            results_path=results_path,
+                            spect_key=cfg.spect_params.spect_key,
+                            timebins_key=cfg.spect_params.timebins_key,
+                            normalize_spectrograms=cfg.learncurve.normalize_spectrograms,
+                            shuffle=cfg.learncurve.shuffle,
+                            val_step=cfg.learncurve.val_step,
+                            ckpt_step=cfg.learncurve.ckpt_step,
+                            patience=cfg.learncurve.patience,
+                            device=cfg.learncurve.device,
+                            num_processes=cfg.learncurve.num_processes,
+                            fast_val_num_windows=cfg.learncurve.fast_val_num_windows,
+                            full_val_every=cfg.learncurve.full_val_every,
+                            cache_val_data=cfg.learncurve.cache_val_data,
+                            val_cache_max_mb=cfg.learncurve.val_cache_max_mb,
+                            background_val=cfg.learncurve.background_val,
+                            lockstep=cfg.learncurve.lockstep,
+                            step_timing=cfg.learncurve.step_timing,
+                            profiler_trace_steps=cfg.learncurve.profiler_trace_steps,
+                            getitem_timing=cfg.learncurve.getitem_timing,
+                            logger=logger,
+                            )
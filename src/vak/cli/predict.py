@@ -4,6 +4,7 @@ from pathlib import Path
 from .. import config
 from .. import core
 from .. import logging
+from .. import manifest
 
 
 def predict(toml_path):
@@ -37,18 +38,19 @@ def predict(toml_path):
 
     model_config_map = config.models.map_from_path(toml_path, cfg.predict.models)
 
-    core.predict(csv_path=cfg.predict.csv_path,
-                 checkpoint_path=cfg.predict.checkpoint_path,
-                 labelmap_path=cfg.predict.labelmap_path,
-                 model_config_map=model_config_map,
-                 window_size=cfg.dataloader.window_size,
-                 num_workers=cfg.predict.num_workers,
-                 spect_key=cfg.spect_params.spect_key,
-                 timebins_key=cfg.spect_params.timebins_key,
-                 spect_scaler_path=cfg.predict.spect_scaler_path,
-                 device=cfg.predict.device,
-                 annot_csv_filename=cfg.predict.annot_csv_filename,
-                 output_dir=cfg.predict.output_dir,
-                 min_segment_dur=cfg.predict.min_segment_dur,
-                 majority_vote=cfg.predict.majority_vote,
-                 logger=logger)
+    with manifest.record('predict', toml_path, Path(cfg.prep.output_dir), timenow, logger=logger):
+        core.predict(csv_path=cfg.predict.csv_path,
+                     checkpoint_path=cfg.predict.checkpoint_path,
+                     labelmap_path=cfg.predict.labelmap_path,
+                     model_config_map=model_config_map,
+                     window_size=cfg.dataloader.window_size,
+                     num_workers=cfg.predict.num_workers,
+                     spect_key=cfg.spect_params.spect_key,
+                     timebins_key=cfg.spect_params.timebins_key,
+                     spect_scaler_path=cfg.predict.spect_scaler_path,
+                     device=cfg.predict.device,
+                     annot_csv_filename=cfg.predict.annot_csv_filename,
+                     output_dir=cfg.predict.output_dir,
+                     min_segment_dur=cfg.predict.min_segment_dur,
+                     majority_vote=cfg.predict.majority_vote,
+                     logger=logger)
@@ -7,6 +7,7 @@ import toml
 from .. import config
 from .. import core
 from .. import logging
+from .. import manifest
 
 
 def prep(toml_path):
@@ -27,6 +28,11 @@ def prep(toml_path):
     -----
     Saves a .csv file representing the dataset generated from data_dir.
 
+    If the config file has more than one [[SPECT_PARAMS]] table, a dataset is prepared
+    for each, and a copy of the config file is saved for each dataset,
+    '{config file name}_spect_params_{index}.toml', with just that table and
+    the csv_path option set to that dataset. The config file itself is not changed.
+
     Datasets are used to train neural networks that segment audio files into
     vocalizations, and then predict labels for those segments.
     The function also prepares datasets so neural networks can predict the
@@ -50,7 +56,7 @@ def prep(toml_path):
     will be 'predict' or 'test' (respectively).
     """
     toml_path = Path(toml_path)
-    cfg = config.parse.from_toml(toml_path, sections=['PREP', 'SPECTROGRAM', 'DATALOADER'])
+    cfg = config.parse.from_toml(toml_path, sections=['PREP', 'SPECT_PARAMS', 'DATALOADER'])
 
     if cfg.prep is None:
         raise ValueError(
@@ -93,20 +99,42 @@ def prep(toml_path):
     logger.info(f'determined that config file has section: {section}\nWill add csv_path option to that section')
 
     purpose = section.lower()
-    vak_df, csv_path = core.prep(data_dir=cfg.prep.data_dir,
-                                 purpose=purpose,
-                                 audio_format=cfg.prep.audio_format,
-                                 spect_format=cfg.prep.spect_format,
-                                 spect_params=cfg.spect_params,
-                                 annot_format=cfg.prep.annot_format,
-                                 annot_file=cfg.prep.annot_file,
-                                 labelset=cfg.prep.labelset,
-                                 output_dir=cfg.prep.output_dir,
-                                 train_dur=cfg.prep.train_dur,
-                                 val_dur=cfg.prep.val_dur,
-                                 test_dur=cfg.prep.test_dur,
-                                 logger=logger,
-                                 )
+    with manifest.record('prep', toml_path, Path(cfg.prep.output_dir), timenow, logger=logger):
+        vak_df, csv_path = core.prep(data_dir=cfg.prep.data_dir,
+                                     purpose=purpose,
+                                     audio_format=cfg.prep.audio_format,
+                                     spect_format=cfg.prep.spect_format,
+                                     spect_params=cfg.spect_params,
+                                     annot_format=cfg.prep.annot_format,
+                                     annot_file=cfg.prep.annot_file,
+                                     labelset=cfg.prep.labelset,
+                                     output_dir=cfg.prep.output_dir,
+                                     train_dur=cfg.prep.train_dur,
+                                     val_dur=cfg.prep.val_dur,
+                                     test_dur=cfg.prep.test_dur,
+                                     spect_cache_dir=cfg.prep.spect_cache_dir,
+                                     spect_cache_key=cfg.prep.spect_cache_key,
+                                     spect_cache_max_mb=cfg.prep.spect_cache_max_mb,
+                                     num_workers=cfg.prep.num_workers,
+                                     chunksize=cfg.prep.chunksize,
+                                     threads_per_worker=cfg.prep.threads_per_worker,
+                                     spect_container=cfg.prep.spect_container,
+                                     convert_spect_format=cfg.prep.convert_spect_format,
+                                     logger=logger,
+                                     )
+
+    if type(csv_path) is list:
+        # one dataset for each [[SPECT_PARAMS]] table: save a config file for each,
+        # with just that table and the csv_path to that dataset, and leave this file unchanged
+        spect_params_tables = config_toml['SPECT_PARAMS']
+        for ind, (spect_params_table, dataset_csv_path) in enumerate(zip(spect_params_tables, csv_path)):
+            config_toml['SPECT_PARAMS'] = spect_params_table
+            config_toml[section]['csv_path'] = str(dataset_csv_path)
+            dataset_toml_path = toml_path.parent.joinpath(f'{toml_path.stem}_spect_params_{ind}{toml_path.suffix}')
+            logger.info(f'saving config file for dataset {dataset_csv_path}: {dataset_toml_path}')
+            with dataset_toml_path.open('w') as fp:
+                toml.dump(config_toml, fp)
+        return
 
     # use config and section from above to add csv_path to config.toml file
     config_toml[section]['csv_path'] = str(csv_path)
@@ -0,0 +1,224 @@
+from datetime import datetime
+import os
+from pathlib import Path
+import shutil
+
+import pandas as pd
+import toml
+
+from .. import config
+from .. import files
+from .. import logging
+from .. import profiling
+from ..annotation import recursive_stem
+from ..io import audio
+from .eval import eval
+from .learncurve import learning_curve
+from .predict import predict
+from .prep import prep
+from .train import train
+
+
+COMMAND_FUNCTION_MAP = {
+    'prep': prep,
+    'train': train,
+    'eval': eval,
+    'predict': predict,
+    'learncurve': learning_curve,
+}
+
+# option in each section that sets where outputs are saved;
+# set to the directory with profiling results so that profiling does not add files to other directories
+OUTPUT_DIR_OPTIONS = {
+    'PREP': 'output_dir',
+    'TRAIN': 'root_results_dir',
+    'LEARNCURVE': 'root_results_dir',
+    'EVAL': 'output_dir',
+    'PREDICT': 'output_dir',
+}
+
+
+def _stem(path):
+    try:
+        return recursive_stem(path)
+    except ValueError:  # e.g. spectrogram file whose name does not include an audio extension
+        return Path(path).stem
+
+
+def _link(src, dst):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.symlink(Path(src).resolve(), dst)
+    except OSError:  # e.g. no permission to make symbolic links on Windows
+        shutil.copy(src, dst)
+
+
+def subset_data_dir(data_dir, audio_format, spect_format, max_files, subset_dir):
+    """make a directory with the first ``max_files`` audio or spectrogram files in data_dir,
+    along with any other files whose names start with the same stem,
+    e.g. annotation files or .rec files that go with .cbin audio files.
+    Files are symbolic links to the originals when possible, and are copied otherwise.
+
+    Parameters
+    ----------
+    data_dir : str, pathlib.Path
+        directory with audio or spectrogram files, from [PREP] section of config
+    audio_format : str
+        format of audio files. If None, spect_format is used.
+    spect_format : str
+        format of spectrogram files
+    max_files : int
+        maximum number of audio or spectrogram files
+    subset_dir : str, pathlib.Path
+        directory where subset is made
+
+    Returns
+    -------
+    subset_dir : pathlib.Path
+    """
+    data_dir, subset_dir = Path(data_dir), Path(subset_dir)
+    if audio_format is not None:
+        source_files = audio.files_from_dir(data_dir, audio_format)
+    else:
+        source_files = files.from_dir(data_dir, spect_format)
+
+    for source_file in source_files[:max_files]:
+        source_file = Path(source_file)
+        stem = _stem(source_file)
+        for path in source_file.parent.iterdir():
+            if path.is_file() and (path.name == source_file.name or path.name.startswith(f'{stem}.')):
+                _link(path, subset_dir.joinpath(path.relative_to(data_dir)))
+    return subset_dir
+
+
+def subset_csv(csv_path, max_files, subset_csv_path):
+    """save a dataset .csv file with only the first ``max_files`` rows from each split"""
+    vak_df = pd.read_csv(csv_path)
+    vak_df = vak_df.groupby('split', sort=False).head(max_files)
+    vak_df.to_csv(subset_csv_path, index=False)
+    return subset_csv_path
+
+
+def bounded_config(toml_path, profile_cfg, profile_dir):
+    """make a copy of a config.toml file used to profile a command,
+    that saves outputs in profile_dir and is limited to max_files
+
+    Parameters
+    ----------
+    toml_path : str, pathlib.Path
+        path to a configuration file in TOML format, with a [PROFILE] section
+    profile_cfg : vak.config.profile.ProfileConfig
+        represents [PROFILE] section of config.toml file
+    profile_dir : pathlib.Path
+        directory where profiling results are saved
+
+    Returns
+    -------
+    bounded_toml_path : pathlib.Path
+        path to copy of config.toml file, in profile_dir
+    """
+    with Path(toml_path).open('r') as fp:
+        config_toml = toml.load(fp)
+    del config_toml['PROFILE']
+
+    for section, option in OUTPUT_DIR_OPTIONS.items():
+        if section in config_toml:
+            config_toml[section][option] = str(profile_dir)
+
+    for section in ('TRAIN', 'LEARNCURVE'):
+        if section in config_toml:
+            # torch.profiler is already running, and can't be started again by StepTimer
+            config_toml[section].pop('profiler_trace_steps', None)
+
+    for section in ('TRAIN', 'LEARNCURVE'):
+        if section in config_toml and 'num_processes' in config_toml[section]:
+            # processes started by distributed training don't see the profiler,
+            # so they would not stop after max_steps, and are not profiled either
+            config_toml[section]['num_processes'] = 1
+
+    if profile_cfg.single_process:
+        for section in ('PREP', 'TRAIN', 'LEARNCURVE', 'EVAL', 'PREDICT'):
+            if section in config_toml:
+                config_toml[section]['num_workers'] = 0
+
+    if profile_cfg.max_files is not None:
+        command_section = profile_cfg.command.upper()
+        if profile_cfg.command == 'prep':
+            prep_section = config_toml['PREP']
+            prep_section['data_dir'] = str(
+                subset_data_dir(prep_section['data_dir'],
+                                prep_section.get('audio_format'),
+                                prep_section.get('spect_format'),
+                                profile_cfg.max_files,
+                                profile_dir.joinpath('data_dir'))
+            )
+        elif profile_cfg.command in ('train', 'eval', 'predict'):
+            csv_path = Path(config_toml[command_section]['csv_path'])
+            config_toml[command_section]['csv_path'] = str(
+                subset_csv(csv_path,
+                           profile_cfg.max_files,
+                           profile_dir.joinpath(f'{csv_path.stem}_max_files_{profile_cfg.max_files}.csv'))
+            )
+
+    bounded_toml_path = profile_dir.joinpath(Path(toml_path).name)
+    with bounded_toml_path.open('w') as fp:
+        toml.dump(config_toml, fp)
+    return bounded_toml_path
+
+
+def profile(toml_path):
+    """profile a vak command with the options in a config.toml file.
+    Function called by command-line interface.
+
+    Runs the command set by the ``command`` option in the [PROFILE] section
+    under cProfile and torch.profiler, with training limited to ``max_steps``
+    and datasets limited to ``max_files``. The command runs on a copy of the
+    config.toml file, so that all its outputs are saved in a new directory
+    in the ``output_dir`` of the [PROFILE] section, along with
+    a ranked report of hotspots grouped by module and files
+    for making flamegraphs; see ``vak.profiling.Profiler.save``.
+
+    Parameters
+    ----------
+    toml_path : str, Path
+        path to a configuration file in TOML format, with a [PROFILE] section
+        and the sections needed for the command that is profiled.
+
+    Returns
+    -------
+    None
+    """
+    toml_path = Path(toml_path)
+    cfg = config.parse.from_toml(toml_path, sections=['PROFILE'])
+
+    if cfg.profile is None:
+        raise ValueError(
+            f'profile called with a config.toml file that does not have a PROFILE section: {toml_path}'
+        )
+
+    timenow = datetime.now().strftime('%y%m%d_%H%M%S')
+    profile_dir = Path(cfg.profile.output_dir).joinpath(f'profile_{cfg.profile.command}_{timenow}')
+    profile_dir.mkdir()
+    logger = logging.get_logger(log_dst=profile_dir,
+                                caller='profile',
+                                timestamp=timenow,
+                                logger_name=__name__)
+    logger.info(f'Profiling {cfg.profile.command} command, saving results in: {profile_dir}')
+
+    bounded_toml_path = bounded_config(toml_path, cfg.profile, profile_dir)
+    logger.info(f'Running {cfg.profile.command} command with config: {bounded_toml_path}')
+
+    command_function = COMMAND_FUNCTION_MAP[cfg.profile.command]
+    torch_profiler = cfg.profile.torch_profiler and cfg.profile.command != 'prep'
+    profiler = profiling.Profiler(max_steps=cfg.profile.max_steps, torch_profiler=torch_profiler)
+    try:
+        with profiler:
+            command_function(toml_path=bounded_toml_path)
+    finally:
+        # save profile of whatever ran, even if command failed
+        report = profiler.save(profile_dir,
+                               name=cfg.profile.command,
+                               top_n=cfg.profile.top_n,
+                               sort_by=cfg.profile.sort_by,
+                               logger=logger)
+        logger.info(f'hotspots:\n{report}')
@@ -5,6 +5,7 @@ from datetime import datetime
 from .. import config
 from .. import core
 from .. import logging
+from .. import manifest
 
 
 def train(toml_path):
@@ -52,21 +53,32 @@ def train(toml_path):
 
     model_config_map = config.models.map_from_path(toml_path, cfg.train.models)
 
-    core.train(model_config_map,
-               cfg.train.csv_path,
-               cfg.prep.labelset,
-               cfg.dataloader.window_size,
-               cfg.train.batch_size,
-               cfg.train.num_epochs,
-               cfg.train.num_workers,
-               results_path=results_path,
-               spect_key=cfg.spect_params.spect_key,
-               timebins_key=cfg.spect_params.timebins_key,
-               normalize_spectrograms=cfg.train.normalize_spectrograms,
-               shuffle=cfg.train.shuffle,
-               val_step=cfg.train.val_step,
-               ckpt_step=cfg.train.ckpt_step,
-               patience=cfg.train.patience,
-               device=cfg.train.device,
-               logger=logger,
-               )
+    with manifest.record('train', toml_path, results_path, timenow, logger=logger):
+        core.train(model_config_map,
+                   cfg.train.csv_path,
+                   cfg.prep.labelset,
+                   cfg.dataloader.window_size,
+                   cfg.train.batch_size,
+                   cfg.train.num_epochs,
+                   cfg.train.num_workers,
+                   results_path=results_path,
+                   spect_key=cfg.spect_params.spect_key,
+                   timebins_key=cfg.spect_params.timebins_key,
+                   normalize_spectrograms=cfg.train.normalize_spectrograms,
+                   shuffle=cfg.train.shuffle,
+                   val_step=cfg.train.val_step,
+                   ckpt_step=cfg.train.ckpt_step,
+                   patience=cfg.train.patience,
+                   device=cfg.train.device,
+                   num_processes=cfg.train.num_processes,
+                   fast_val_num_windows=cfg.train.fast_val_num_windows,
+                   full_val_every=cfg.train.full_val_every,
+                   cache_val_data=cfg.train.cache_val_data,
+                   val_cache_max_mb=cfg.train.val_cache_max_mb,
+                   background_val=cfg.train.background_val,
+                   lockstep=cfg.train.lockstep,
+                   step_timing=cfg.train.step_timing,
+                   profiler_trace_steps=cfg.train.profiler_trace_steps,
+                   getitem_timing=cfg.train.getitem_timing,
+                   logger=logger,
+                   )
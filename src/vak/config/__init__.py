@@ -7,5 +7,6 @@ from .learncurve import parse_learncurve_config, LearncurveConfig
 from .parse import Config
 from .prep import parse_prep_config, PrepConfig
 from .predict import parse_predict_config, PredictConfig
+from .profile import parse_profile_config, ProfileConfig
 from .spect_params import parse_spect_params_config, SpectParamsConfig
 from .train import parse_train_config, TrainConfig
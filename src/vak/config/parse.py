@@ -10,10 +10,11 @@ from .eval import parse_eval_config, EvalConfig
 from .learncurve import parse_learncurve_config, LearncurveConfig
 from .predict import parse_predict_config, PredictConfig
 from .prep import parse_prep_config, PrepConfig
+from .profile import parse_profile_config, ProfileConfig
 from .spect_params import parse_spect_params_config, SpectParamsConfig
 from .train import parse_train_config, TrainConfig
 
-from .validators import are_sections_valid, are_options_valid
+from .validators import are_sections_valid, are_options_valid, is_spect_params_config
 
 
 @attr.s
@@ -24,8 +25,10 @@ class Config:
     ----------
     prep : vak.config.prep.PrepConfig
         represents [PREP] section of config.toml file
-    spect : vak.config.spectrogram.SpectConfig
-        represents [SPECTROGRAM] section of config.toml file
+    spect_params : vak.config.spect_params.SpectParamsConfig
+        represents [SPECT_PARAMS] section of config.toml file.
+        A list of SpectParamsConfig if the file has an array of [[SPECT_PARAMS]] tables,
+        that can only be used with the "prep" command.
     dataloader : vak.config.dataloader.DataLoaderConfig
         represents [DATALOADER] section of config.toml file
     train : vak.config.train.TrainConfig
@@ -36,8 +39,10 @@ class Config:
         represents [PREDICT] section of config.toml file.
     learncurve : vak.config.learncurve.LearncurveConfig
         represents [LEARNCURVE] section of config.toml file
+    profile : vak.config.profile.ProfileConfig
+        represents [PROFILE] section of config.toml file
     """
-    spect_params = attr.ib(validator=instance_of(SpectParamsConfig), default=SpectParamsConfig())
+    spect_params = attr.ib(validator=is_spect_params_config, default=SpectParamsConfig())
     dataloader = attr.ib(validator=instance_of(DataLoaderConfig), default=DataLoaderConfig())
 
     prep = attr.ib(validator=optional(instance_of(PrepConfig)), default=None)
@@ -45,6 +50,7 @@ class Config:
     eval = attr.ib(validator=optional(instance_of(EvalConfig)), default=None)
     predict = attr.ib(validator=optional(instance_of(PredictConfig)), default=None)
     learncurve = attr.ib(validator=optional(instance_of(LearncurveConfig)), default=None)
+    profile = attr.ib(validator=optional(instance_of(ProfileConfig)), default=None)
 
 
 SECTION_PARSERS = {
@@ -55,6 +61,7 @@ SECTION_PARSERS = {
     'TRAIN': parse_train_config,
     'LEARNCURVE': parse_learncurve_config,
     'PREDICT': parse_predict_config,
+    'PROFILE': parse_profile_config,
 }
 
 
@@ -109,6 +116,18 @@ def from_toml(toml_path, sections=None):
 
     if sections is None:
         sections = list(SECTION_PARSERS.keys())
+
+    if type(config_toml.get('SPECT_PARAMS')) is list:
+        other_sections = [section_name for section_name in ('TRAIN', 'EVAL', 'PREDICT', 'LEARNCURVE')
+                          if section_name in sections and section_name in config_toml]
+        if other_sections:
+            raise ValueError(
+                f"config file '{toml_path.name}' has more than one [[SPECT_PARAMS]] table, "
+                "that can only be used to prepare datasets with the 'prep' command, "
+                f"but the {other_sections} section(s) need a single [SPECT_PARAMS] table. "
+                "Use one of the config files with a single [SPECT_PARAMS] table that 'prep' saves "
+                "for each dataset it prepares"
+            )
     config_dict = {}
     for section_name in sections:
         if section_name in config_toml:
@@ -3,7 +3,8 @@ import attr
 from attr import converters, validators
 from attr.validators import instance_of
 
-from .converters import expanded_user_path, labelset_from_toml_value
+from ..constants import VALID_CONVERT_SPECT_FORMATS, VALID_SPECT_CACHE_KEYS
+from .converters import bool_from_str, expanded_user_path, labelset_from_toml_value
 from .validators import is_a_directory, is_a_file, is_audio_format, is_annot_format, is_spect_format
 
 
@@ -34,6 +35,23 @@ def is_valid_duration(instance, attribute, value):
         )
 
 
+def is_positive(instance, attribute, value):
+    """check if value is greater than zero"""
+    if not value > 0:
+        raise ValueError(
+            f'value specified for {attribute.name} of {type(instance)} must be greater than zero, was {value}'
+        )
+
+
+def is_non_negative(instance, attribute, value):
+    """check if value is greater than or equal to zero"""
+    if not value >= 0:
+        raise ValueError(
+            f'value specified for {attribute.name} of {type(instance)} must be greater than or equal to zero, '
+            f'was {value}'
+        )
+
+
 @attr.s
 class PrepConfig:
     """class to represent [PREP] section of config.toml file
@@ -46,7 +64,7 @@ class PrepConfig:
         Path to location where data sets should be saved. Default is None,
         in which case data sets are saved in the current working directory.
     audio_format : str
-        format of audio files. One of {'wav', 'cbin'}.
+        format of audio files. One of {'wav', 'cbin', 'flac'}.
     spect_format : str
         format of files containg spectrograms as 2-d matrices.
         One of {'mat', 'npy'}.
@@ -70,6 +88,49 @@ class PrepConfig:
         total duration of validation set, in seconds.
     test_dur : float
         total duration of test set, in seconds.
+    spect_cache_dir : str
+        path to directory where spectrograms made from audio files are cached.
+        Spectrograms are only made for audio files that do not already have
+        a spectrogram made with the same [SPECT_PARAMS] in the cache, so
+        running prep again, e.g. with a different config file or after it was
+        interrupted, re-uses spectrograms. Default is None, in which case
+        spectrograms are not cached.
+    spect_cache_key : str
+        how to find spectrograms made from audio files in the cache.
+        One of {'stat', 'content'}. 'stat' uses the path, size, and time last modified
+        of each audio file; 'content' uses the path and a hash of the file contents,
+        which is slower but re-uses spectrograms when files are modified without
+        changing their contents. Default is 'stat'.
+    spect_cache_max_mb : float
+        maximum size of the spectrogram cache, in megabytes. After making spectrograms,
+        the least recently used files in the cache are removed until it is under
+        this size. Default is None, in which case files are never removed.
+    num_workers : int
+        number of worker processes used to make spectrograms from audio files
+        and to validate spectrogram files. Files are assigned to workers largest first,
+        so that one long file does not finish long after all the others. If 0,
+        all work is done in the main process. Default is None, in which case
+        it is the number of CPUs.
+    chunksize : int
+        number of files sent to a worker process at a time. Default is None,
+        in which case files are split into about four chunks per worker.
+    threads_per_worker : int
+        maximum number of threads each worker process uses for numerical libraries,
+        e.g. numpy and torch, so that workers do not compete for CPUs.
+        Default is None, in which case CPUs are divided evenly among workers.
+    spect_container : bool
+        if True, save all spectrograms made from audio files in a single container file,
+        'spectrograms_generated_{timestamp}.spectpack' in output_dir,
+        instead of a directory with one file for each audio file.
+        See ``vak.files.container``. Default is False.
+    convert_spect_format : str
+        format to convert spectrogram files to, when the dataset is made from
+        spectrogram files, i.e. when spect_format is specified. One of {'npz', 'spectpack'}.
+        E.g., .mat files are slow to load, and can't be memory-mapped, so converting
+        them once when preparing the dataset makes training faster.
+        The dataset refers to converted files, saved in output_dir,
+        and original files are not changed. Default is None,
+        in which case files are not converted.
     """
     data_dir = attr.ib(converter=expanded_user_path, validator=is_a_directory)
     output_dir = attr.ib(converter=expanded_user_path, validator=is_a_directory)
@@ -94,6 +155,24 @@ class PrepConfig:
                        validator=validators.optional(is_valid_duration),
                        default=None)
 
+    spect_cache_dir = attr.ib(converter=converters.optional(expanded_user_path), default=None)
+    spect_cache_key = attr.ib(validator=validators.in_(VALID_SPECT_CACHE_KEYS), default='stat')
+    spect_cache_max_mb = attr.ib(converter=converters.optional(float),
+                                 validator=validators.optional(is_positive),
+                                 default=None)
+    num_workers = attr.ib(converter=converters.optional(int),
+                          validator=validators.optional(is_non_negative),
+                          default=None)
+    chunksize = attr.ib(converter=converters.optional(int),
+                        validator=validators.optional(is_positive),
+                        default=None)
+    threads_per_worker = attr.ib(converter=converters.optional(int),
+                                 validator=validators.optional(is_positive),
+                                 default=None)
+    spect_container = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
+    convert_spect_format = attr.ib(validator=validators.optional(validators.in_(VALID_CONVERT_SPECT_FORMATS)),
+                                   default=None)
+
 
 REQUIRED_PREP_OPTIONS = [
     'data_dir',
@@ -0,0 +1,121 @@
+"""parses [PROFILE] section of config"""
+import attr
+from attr import converters, validators
+from attr.validators import instance_of
+
+from .converters import bool_from_str, expanded_user_path
+from .validators import is_a_directory
+
+VALID_PROFILE_COMMANDS = (
+    'prep',
+    'train',
+    'eval',
+    'predict',
+    'learncurve',
+)
+
+VALID_SORT_BY = (
+    'tottime',
+    'cumtime',
+)
+
+
+def is_profile_command(instance, attribute, value):
+    """check if valid command to profile"""
+    if value not in VALID_PROFILE_COMMANDS:
+        raise ValueError(
+            f'{value} is not a valid command to profile. Valid commands are: {VALID_PROFILE_COMMANDS}'
+        )
+
+
+def is_positive_int(instance, attribute, value):
+    """check if value is an integer greater than zero"""
+    if value < 1:
+        raise ValueError(
+            f'value specified for {attribute.name} of {type(instance)} must be greater than zero, was {value}'
+        )
+
+
+@attr.s
+class ProfileConfig:
+    """class that represents [PROFILE] section of config.toml file
+
+    Attributes
+    ----------
+    command : str
+        command to profile, using the other sections of the same config.toml file.
+        One of {'prep', 'train', 'eval', 'predict', 'learncurve'}.
+    output_dir : str
+        path to directory where a sub-directory with profiling results is saved.
+        Outputs of the profiled command, e.g. checkpoints or spectrogram files,
+        are also saved in that sub-directory.
+    max_steps : int
+        maximum number of training steps for each model, when command is 'train' or 'learncurve'.
+        Default is 50.
+    max_files : int
+        maximum number of files to use. When command is 'prep', the number of audio
+        or spectrogram files in data_dir. When command is 'train', 'eval', or 'predict',
+        the number of files from each split of the dataset. Ignored when command is 'learncurve',
+        since training subsets are made from durations. Default is None, in which case all files are used.
+    torch_profiler : bool
+        if True, also profile with torch.profiler, to find which operators take the most time
+        on the CPU and GPU. Not used when command is 'prep'. Default is True.
+    single_process : bool
+        if True, do all work in the profiled process, by setting num_workers to 0.
+        Otherwise time spent in other processes, e.g. loading data in DataLoader workers,
+        does not appear in the profile. Default is True.
+        Distributed training is always turned off, by setting num_processes to 1,
+        because training in other processes would not be limited to max_steps.
+    top_n : int
+        number of functions to show in each ranked list of hotspots. Default is 30.
+    sort_by : str
+        how to rank functions in the list of hotspots in all modules.
+        One of {'tottime', 'cumtime'}. Default is 'tottime', the time spent
+        in the function itself, excluding calls to other functions.
+    """
+    command = attr.ib(validator=[instance_of(str), is_profile_command])
+    output_dir = attr.ib(converter=expanded_user_path, validator=is_a_directory)
+
+    max_steps = attr.ib(converter=int, validator=is_positive_int, default=50)
+    max_files = attr.ib(converter=converters.optional(int),
+                        validator=validators.optional(is_positive_int),
+                        default=None)
+    torch_profiler = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=True)
+    single_process = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=True)
+    top_n = attr.ib(converter=int, validator=is_positive_int, default=30)
+    sort_by = attr.ib(validator=validators.in_(VALID_SORT_BY), default='tottime')
+
+
+REQUIRED_PROFILE_OPTIONS = [
+    'command',
+    'output_dir',
+]
+
+
+def parse_profile_config(config_obj, config_path):
+    """parse [PROFILE] section of config.toml file
+
+    Parameters
+    ----------
+    config_obj : ConfigParser
+        containing config.toml file already loaded by parse function
+    config_path : str
+        path to config.toml file (used for error messages)
+
+    Returns
+    -------
+    profile_config : vak.config.profile.ProfileConfig
+        instance of ProfileConfig class that represents [PROFILE] section
+        of config.toml file
+    """
+    profile_section = dict(
+        config_obj['PROFILE'].items()
+    )
+
+    for required_option in REQUIRED_PROFILE_OPTIONS:
+        if required_option not in profile_section:
+            raise KeyError(
+                f"the '{required_option}' option is required but was not found in the "
+                f"PROFILE section of the config.toml file: {config_path}"
+            )
+    return ProfileConfig(**profile_section)
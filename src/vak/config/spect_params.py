@@ -3,6 +3,10 @@ import attr
 from attr import converters, validators
 from attr.validators import instance_of
 
+from .converters import bool_from_str
+from .. import constants
+from ..spect import VALID_FREQ_SCALES
+
 
 def freq_cutoffs_validator(instance, attribute, value):
     if len(value) != 2:
@@ -26,6 +30,62 @@ def is_valid_transform_type(instance, attribute, value):
         )
 
 
+VALID_BACKENDS = {'numpy', 'torch'}
+
+
+def is_valid_backend(instance, attribute, value):
+    if value not in VALID_BACKENDS:
+        raise ValueError(
+            f'Value for `backend`, {value}, in [SPECT_PARAMS] '
+            'section of .toml file is not recognized. Must be one '
+            f'of the following: {VALID_BACKENDS}'
+        )
+
+
+def is_valid_spect_dtype(instance, attribute, value):
+    if value not in constants.VALID_SPECT_DTYPES:
+        raise ValueError(
+            f'Value for `spect_dtype`, {value}, in [SPECT_PARAMS] '
+            'section of .toml file is not recognized. Must be one '
+            f'of the following: {constants.VALID_SPECT_DTYPES}'
+        )
+
+
+def is_valid_freq_scale(instance, attribute, value):
+    if value not in VALID_FREQ_SCALES:
+        raise ValueError(
+            f'Value for `freq_scale`, {value}, in [SPECT_PARAMS] '
+            'section of .toml file is not recognized. Must be one '
+            f'of the following: {VALID_FREQ_SCALES}'
+        )
+
+
+def freq_reduction_validator(instance, attribute, value):
+    """check that options for reducing frequency bins are used together correctly.
+    Validates ``freq_decimate``, the last of those options, so all are already set"""
+    if instance.freq_scale is not None and instance.num_freqbins is None:
+        raise ValueError(
+            f'freq_scale is {instance.freq_scale}, but num_freqbins was not specified'
+        )
+    if instance.num_freqbins is not None and instance.freq_scale is None:
+        raise ValueError(
+            'num_freqbins was specified, but freq_scale was not; '
+            f'specify freq_scale, one of {VALID_FREQ_SCALES}'
+        )
+    if instance.freq_scale is not None and value is not None:
+        raise ValueError(
+            'freq_scale and freq_decimate can not both be specified, unclear how to reduce frequency bins'
+        )
+
+
+def is_positive_int(instance, attribute, value):
+    """check if value is an integer greater than zero"""
+    if value < 1:
+        raise ValueError(
+            f'value specified for {attribute.name} of {type(instance)} must be greater than zero, was {value}'
+        )
+
+
 @attr.s
 class SpectParamsConfig:
     """represents parameters for making spectrograms from audio and saving in files
@@ -45,6 +105,10 @@ class SpectParamsConfig:
         'log_spect' transforms the spectrogram to log(spectrogram), and
         'log_spect_plus_one' does the same thing but adds one to each element.
         Default is None. If None, no transform is applied.
+    zero_phase_filter : bool
+        if True, bandpass filter audio forwards and backwards, so that the filtered
+        audio has no phase shift. Only used if freq_cutoffs is specified.
+        Default is False, in which case audio is filtered once, forwards.
     thresh: int
         threshold minimum power for log spectrogram.
     spect_key : str
@@ -56,6 +120,50 @@ class SpectParamsConfig:
     audio_path_key : str
         key for accessing path to source audio file for spectogram in files.
         Default is 'audio_path'.
+    backend : str
+        one of {'numpy', 'torch'}. With 'numpy', each spectrogram is computed by itself,
+        in parallel across files. With 'torch', audio files are grouped into batches
+        of ``batch_size`` files, that are padded to the same length, and spectrograms
+        for each batch are computed at once with ``torch.stft``. Faster for many short
+        audio files. Both give the same spectrograms, within float32 precision.
+        Default is 'numpy'.
+    batch_size : int
+        number of audio files in each batch, when backend is 'torch'. Default is 32.
+    num_threads : int
+        number of threads used by ``torch`` to compute spectrograms, when backend is 'torch'.
+        Default is None, in which case ``torch`` uses its default number of threads.
+    spect_dtype : str
+        data type used to save spectrograms in files. One of {'float32', 'float16', 'uint8'}.
+        'float16' halves the size of files, and works for spectrograms transformed
+        with 'log_spect'. 'uint8' quarters it, by quantizing each spectrogram
+        to 256 levels between its minimum and maximum. Spectrograms are always loaded
+        as float32. Default is 'float32'.
+    lean_schema : bool
+        if True, don't save vectors of frequency bins and time bins in spectrogram files,
+        only the parameters needed to compute them when files are loaded.
+        Default is False.
+    compress : bool
+        if True, compress spectrogram files. Makes files smaller, but slower to save and load.
+        Default is False.
+    stream_min_mb : float
+        audio files this size in megabytes or larger are memory-mapped, and their spectrograms
+        are computed one chunk of audio at a time and written to disk as they are computed,
+        so that memory used does not depend on the length of recordings.
+        Spectrograms are the same as when audio files are loaded all at once.
+        Not used when zero_phase_filter is True, since filtering backwards needs the whole signal.
+        Default is None, in which case audio files are always loaded all at once.
+    freq_scale : str
+        one of {'mel', 'log'}. If specified, frequency bins are reduced to ``num_freqbins`` bins,
+        by averaging power with triangular filters spaced on the mel scale or log scale
+        between freq_cutoffs. Fewer frequency bins make networks faster to train and run,
+        since the height of their input is the number of frequency bins.
+        The vector of frequency bins saved in files is the center of each filter.
+        See ``vak.spect.freq_filterbank``. Default is None, in which case frequency bins are not reduced.
+    num_freqbins : int
+        number of frequency bins in spectrograms, when freq_scale is specified. Default is None.
+    freq_decimate : int
+        if specified, frequency bins are reduced by averaging power in groups of this many
+        adjacent bins. Can't be used with freq_scale. Default is None.
     """
     fft_size = attr.ib(converter=int, validator=instance_of(int), default=512)
     step_size = attr.ib(converter=int, validator=instance_of(int), default=64)
@@ -66,10 +174,30 @@ class SpectParamsConfig:
                      default=None)
     transform_type = attr.ib(validator=validators.optional([instance_of(str), is_valid_transform_type]),
                              default=None)
+    zero_phase_filter = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
     spect_key = attr.ib(validator=instance_of(str), default='s')
     freqbins_key = attr.ib(validator=instance_of(str), default='f')
     timebins_key = attr.ib(validator=instance_of(str), default='t')
     audio_path_key = attr.ib(validator=instance_of(str), default='audio_path')
+    backend = attr.ib(validator=[instance_of(str), is_valid_backend], default='numpy')
+    batch_size = attr.ib(converter=int, validator=is_positive_int, default=32)
+    num_threads = attr.ib(converter=converters.optional(int),
+                          validator=validators.optional(is_positive_int),
+                          default=None)
+    spect_dtype = attr.ib(validator=[instance_of(str), is_valid_spect_dtype], default='float32')
+    lean_schema = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
+    compress = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
+    stream_min_mb = attr.ib(converter=converters.optional(float),
+                            validator=validators.optional(instance_of(float)),
+                            default=None)
+    freq_scale = attr.ib(validator=validators.optional([instance_of(str), is_valid_freq_scale]),
+                         default=None)
+    num_freqbins = attr.ib(converter=converters.optional(int),
+                           validator=validators.optional(is_positive_int),
+                           default=None)
+    freq_decimate = attr.ib(converter=converters.optional(int),
+                            validator=[validators.optional(is_positive_int), freq_reduction_validator],
+                            default=None)
 
 
 def parse_spect_params_config(config_toml, toml_path):
@@ -86,11 +214,18 @@ def parse_spect_params_config(config_toml, toml_path):
     -------
     spect_params_config : vak.config.spect_params.SpectParamsConfig
         instance with attributes set to values specified by config.toml section
-        or to defaults.
+        or to defaults. If the file has more than one [[SPECT_PARAMS]] table,
+        a list of instances, one for each table, in the order they appear in the file.
     """
     # return defaults if config doesn't have SPECT_PARAMS section
     spect_params_section = {}
     if 'SPECT_PARAMS' in config_toml:
+        if type(config_toml['SPECT_PARAMS']) is list:
+            if len(config_toml['SPECT_PARAMS']) == 0:
+                raise ValueError(
+                    f"no tables in [[SPECT_PARAMS]] array in config file '{toml_path}'"
+                )
+            return [SpectParamsConfig(**table) for table in config_toml['SPECT_PARAMS']]
         spect_params_section.update(
             config_toml['SPECT_PARAMS'].items()
         )
@@ -55,6 +55,41 @@ class TrainConfig:
         number of validation steps to wait without performance on the
         validation set improving before stopping the training.
         Default is None, in which case training only stops after the specified number of epochs.
+    num_processes : int
+        number of processes to use for data-parallel training on CPU,
+        with torch.distributed and the 'gloo' backend. Default is 1.
+        If greater than 1, device must be 'cpu'.
+    fast_val_num_windows : int
+        number of windows in a fixed subset of the validation set, drawn so that
+        all classes are represented. If specified, only this subset is used at each validation step,
+        to decide whether to save the max-val-acc checkpoint and whether to stop early.
+        Default is None, in which case the entire validation set is used.
+    full_val_every : int
+        when fast_val_num_windows is specified, compute metrics on the entire
+        validation set every ``full_val_every`` validation steps. Default is None,
+        in which case the entire validation set is only used at the end of training.
+    cache_val_data : bool
+        if True, transform every item in the validation set once before training and cache the results,
+        so that validation steps only need to run the network. Default is False.
+    val_cache_max_mb : float
+        maximum size in megabytes of the validation set cache to hold in memory.
+        Items that do not fit are saved as memory-mapped arrays in a temporary directory.
+        Default is None, in which case the entire cache is held in memory.
+    background_val : bool
+        if True, compute metrics on the validation set in a separate process from a checkpoint snapshot,
+        so training does not wait for validation. Default is False.
+    lockstep : bool
+        if True, train all models in lockstep, feeding each batch of training data to every model,
+        so data is loaded once instead of once per model. Default is False.
+    step_timing : bool
+        if True, record wall time of each phase of every training step, and save them
+        in a csv file and to the summary writer. Default is False.
+    profiler_trace_steps : list
+        of two ints, [start, stop]. If specified, torch.profiler records global steps
+        start through stop - 1 and a Chrome trace is saved in the results directory. Default is None.
+    getitem_timing : bool
+        if True, record time spent loading, labeling, and transforming each window of training data,
+        in each DataLoader worker. Default is False.
     """
     # required
     models = attr.ib(converter=comma_separated_list,
@@ -83,10 +118,23 @@ class TrainConfig:
 
     val_step = attr.ib(converter=converters.optional(int),
                              validator=validators.optional(instance_of(int)), default=None)
+    cache_val_data = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
+    val_cache_max_mb = attr.ib(converter=converters.optional(float),
+                               validator=validators.optional(instance_of(float)), default=None)
+    background_val = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
+    lockstep = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
+    step_timing = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
+    profiler_trace_steps = attr.ib(validator=validators.optional(instance_of(list)), default=None)
+    getitem_timing = attr.ib(converter=bool_from_str, validator=instance_of(bool), default=False)
     ckpt_step = attr.ib(converter=converters.optional(int),
                               validator=validators.optional(instance_of(int)), default=None)
     patience = attr.ib(converter=converters.optional(int),
                        validator=validators.optional(instance_of(int)), default=None)
+    num_processes = attr.ib(converter=int, validator=instance_of(int), default=1)
+    fast_val_num_windows = attr.ib(converter=converters.optional(int),
+                                   validator=validators.optional(instance_of(int)), default=None)
+    full_val_every = attr.ib(converter=converters.optional(int),
+                             validator=validators.optional(instance_of(int)), default=None)
 
 
 REQUIRED_TRAIN_OPTIONS = [
@@ -25,6 +25,23 @@ def is_a_file(instance, attribute, value):
         )
 
 
+def is_spect_params_config(instance, attribute, value):
+    """check if given value is a SpectParamsConfig, or a list of them,
+    parsed from an array of [[SPECT_PARAMS]] tables"""
+    # import here to avoid circular import
+    from .spect_params import SpectParamsConfig
+
+    if type(value) is list:
+        if len(value) > 0 and all(isinstance(element, SpectParamsConfig) for element in value):
+            return
+    elif isinstance(value, SpectParamsConfig):
+        return
+    raise TypeError(
+        f'{attribute.name} of {type(instance)} must be a SpectParamsConfig or a non-empty list of them, '
+        f'but got: {value}'
+    )
+
+
 def is_valid_model_name(instance, attribute, value):
     MODEL_NAMES = [model_name for model_name, model_builder in models.find()]
     for model_name in value:
@@ -84,7 +101,11 @@ def are_sections_valid(config_dict, toml_path):
 
 
 def are_options_valid(config_dict, section, toml_path):
-    user_options = set(config_dict[section].keys())
+    if type(config_dict[section]) is list:
+        # array of tables, e.g. [[SPECT_PARAMS]], check options in each table
+        user_options = set(option for table in config_dict[section] for option in table.keys())
+    else:
+        user_options = set(config_dict[section].keys())
     valid_options = set(VALID_OPTIONS[section])
     if not user_options.issubset(valid_options):
         invalid_options = user_options - valid_options
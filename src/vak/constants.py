@@ -5,6 +5,7 @@ from functools import partial
 
 import crowsetta
 import numpy as np
+import soundfile
 from evfuncs import load_cbin
 from scipy.io import wavfile, loadmat
 
@@ -17,8 +18,41 @@ def swap_return_tuple_elements(func):
 
 
 load_cbin = swap_return_tuple_elements(load_cbin)
+
+# data types that samples are decoded to from compressed audio files, by subtype,
+# so that samples have the same values as in a .wav file with the same subtype
+SOUNDFILE_SUBTYPE_DTYPE_MAP = {
+    'PCM_S8': 'uint8',
+    'PCM_16': 'int16',
+    'PCM_24': 'int32',
+    'PCM_32': 'int32',
+}
+
+
+def int16_to_uint8(dat):
+    """convert 8-bit samples decoded by soundfile as int16, i.e. signed and scaled by 256,
+    to unsigned samples offset by 128, as in 8-bit .wav files read by ``scipy.io.wavfile.read``.
+    soundfile can't decode samples to uint8."""
+    return ((dat >> 8) + 128).astype(np.uint8)
+
+
+def load_flac(flac_path):
+    """load a .flac file, with soundfile.
+    Returns samples with the data type of samples in a .wav file with the same subtype,
+    e.g. int16 for 16-bit files, so spectrograms are the same as for .wav files.
+    24-bit samples are int32, left-justified, and 8-bit samples are uint8, offset by 128,
+    as returned by ``scipy.io.wavfile.read``."""
+    dtype = SOUNDFILE_SUBTYPE_DTYPE_MAP.get(soundfile.info(flac_path).subtype, 'float32')
+    if dtype == 'uint8':
+        dat, samp_freq = soundfile.read(flac_path, dtype='int16')
+        return samp_freq, int16_to_uint8(dat)
+    dat, samp_freq = soundfile.read(flac_path, dtype=dtype)
+    return samp_freq, dat
+
+
 AUDIO_FORMAT_FUNC_MAP = {
     'cbin': load_cbin,
+    'flac': load_flac,
     'wav': wavfile.read
 }
 
@@ -29,7 +63,17 @@ SPECT_FORMAT_LOAD_FUNCTION_MAP = {
     'mat': partial(loadmat, squeeze_me=True),
     'npz': np.load,
 }
-VALID_SPECT_FORMATS = list(SPECT_FORMAT_LOAD_FUNCTION_MAP.keys())
+# format of single file that contains all spectrograms in a dataset, see vak.files.container
+SPECT_CONTAINER_FORMAT = 'spectpack'
+VALID_SPECT_FORMATS = list(SPECT_FORMAT_LOAD_FUNCTION_MAP.keys()) + [SPECT_CONTAINER_FORMAT]
+# formats that spectrogram files can be converted to by vak prep, see vak.io.dataframe.from_files
+VALID_CONVERT_SPECT_FORMATS = ('npz', SPECT_CONTAINER_FORMAT)
+
+# data types for spectrograms saved in files, see vak.files.spect.encode
+VALID_SPECT_DTYPES = ('float32', 'float16', 'uint8')
+
+# how spectrograms made from audio files are found in cache, see vak.io.spect_cache
+VALID_SPECT_CACHE_KEYS = ('stat', 'content')
 
 # ---- annotation files ----
 VALID_ANNOT_FORMATS = crowsetta.formats._INSTALLED
@@ -6,6 +6,8 @@ import joblib
 import pandas as pd
 import torch.utils.data
 
+from .. import manifest
+from .. import memory
 from .. import models
 from .. import transforms
 from ..datasets.vocal_dataset import VocalDataset
@@ -106,13 +108,15 @@ def eval(csv_path,
         f'creating dataset for evaluation from: {csv_path}',
         logger=logger, level='info',
     )
-    val_dataset = VocalDataset.from_csv(csv_path=csv_path,
-                                        split=split,
-                                        labelmap=labelmap,
-                                        spect_key=spect_key,
-                                        timebins_key=timebins_key,
-                                        item_transform=item_transform,
-                                        )
+    with memory.stage('make dataset'):
+        val_dataset = VocalDataset.from_csv(csv_path=csv_path,
+                                            split=split,
+                                            labelmap=labelmap,
+                                            spect_key=spect_key,
+                                            timebins_key=timebins_key,
+                                            item_transform=item_transform,
+                                            )
+    manifest.count_files('spectrogram files in dataset', val_dataset.spect_paths)
     val_data = torch.utils.data.DataLoader(dataset=val_dataset,
                                            shuffle=False,
                                            # batch size 1 because each spectrogram reshaped into a batch of windows
@@ -137,8 +141,9 @@ def eval(csv_path,
             f'running evaluation for model: {model_name}'
         )
         model.load(checkpoint_path)
-        metric_vals = model.evaluate(eval_data=val_data,
-                                     device=device)
+        with memory.stage(f'evaluate {model_name}'):
+            metric_vals = model.evaluate(eval_data=val_data,
+                                         device=device)
         # create a "DataFrame" with just one row which we will save as a csv;
         # the idea is to be able to concatenate csvs from multiple runs of eval
         row = OrderedDict(
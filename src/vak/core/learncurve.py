@@ -35,6 +35,16 @@ def learning_curve(model_config_map,
                    ckpt_step=None,
                    patience=None,
                    device=None,
+                   num_processes=1,
+                   fast_val_num_windows=None,
+                   full_val_every=None,
+                   cache_val_data=False,
+                   val_cache_max_mb=None,
+                   background_val=False,
+                   lockstep=False,
+                   step_timing=False,
+                   profiler_trace_steps=None,
+                   getitem_timing=False,
                    logger=None,
                    ):
     """generate learning curve, by training models on training sets across a
@@ -104,6 +114,36 @@ def learning_curve(model_config_map,
         number of validation steps to wait without performance on the
         validation set improving before stopping the training.
         Default is None, in which case training only stops after the specified number of epochs.
+    num_processes : int
+        number of processes to use for data-parallel training on CPU.
+        Default is 1. See vak.core.train for details.
+    fast_val_num_windows : int
+        number of windows in a fixed subset of the validation set
+        used at each validation step. Default is None. See vak.core.train for details.
+    full_val_every : int
+        compute metrics on entire validation set every ``full_val_every`` validation steps,
+        when using fast_val_num_windows. Default is None. See vak.core.train for details.
+    cache_val_data : bool
+        if True, cache transformed items from validation set before training.
+        Default is False. See vak.core.train for details.
+    val_cache_max_mb : float
+        maximum size in megabytes of validation set cache to hold in memory.
+        Default is None. See vak.core.train for details.
+    background_val : bool
+        if True, compute metrics on validation set in a separate process.
+        Default is False. See vak.core.train for details.
+    lockstep : bool
+        if True, train all models in lockstep, sharing one pass through the training data.
+        Default is False. See vak.core.train for details.
+    step_timing : bool
+        if True, record wall time of each phase of every training step.
+        Default is False. See vak.core.train for details.
+    profiler_trace_steps : list
+        of two ints, [start, stop], range of global steps to record with torch.profiler.
+        Default is None. See vak.core.train for details.
+    getitem_timing : bool
+        if True, record time to get each window of training data, in each DataLoader worker.
+        Default is False. See vak.core.train for details.
 
     Other Parameters
     ----------------
@@ -264,6 +304,16 @@ def learning_curve(model_config_map,
                   ckpt_step=ckpt_step,
                   patience=patience,
                   device=device,
+                  num_processes=num_processes,
+                  fast_val_num_windows=fast_val_num_windows,
+                  full_val_every=full_val_every,
+                  cache_val_data=cache_val_data,
+                  val_cache_max_mb=val_cache_max_mb,
+                  background_val=background_val,
+                  lockstep=lockstep,
+                  step_timing=step_timing,
+                  profiler_trace_steps=profiler_trace_steps,
+                  getitem_timing=getitem_timing,
                   logger=logger,
                   **window_dataset_kwargs
                   )
@@ -13,6 +13,8 @@ from .. import files
 from .. import io
 from .. import labeled_timebins
 from ..logging import log_or_print
+from .. import manifest
+from .. import memory
 from .. import models
 from .. import transforms
 from ..datasets import VocalDataset
@@ -128,13 +130,15 @@ def predict(csv_path,
         labelmap = json.load(f)
 
     log_or_print(f'loading dataset to predict from csv path: {csv_path}', logger=logger, level='info')
-    pred_dataset = VocalDataset.from_csv(csv_path=csv_path,
-                                         split='predict',
-                                         labelmap=labelmap,
-                                         spect_key=spect_key,
-                                         timebins_key=timebins_key,
-                                         item_transform=item_transform,
-                                         )
+    with memory.stage('make dataset'):
+        pred_dataset = VocalDataset.from_csv(csv_path=csv_path,
+                                             split='predict',
+                                             labelmap=labelmap,
+                                             spect_key=spect_key,
+                                             timebins_key=timebins_key,
+                                             item_transform=item_transform,
+                                             )
+    manifest.count_files('spectrogram files in dataset', pred_dataset.spect_paths)
 
     pred_data = torch.utils.data.DataLoader(dataset=pred_dataset,
                                             shuffle=False,
@@ -177,38 +181,40 @@ def predict(csv_path,
         model.load(checkpoint_path)
         log_or_print(f'running predict method of {model_name}',
                      logger=logger, level='info')
-        pred_dict = model.predict(pred_data=pred_data,
-                                  device=device)
+        with memory.stage(f'predict {model_name}'):
+            pred_dict = model.predict(pred_data=pred_data,
+                                      device=device)
 
         # ----------------  converting to annotations ------------------------------------------------------------------
-        progress_bar = tqdm(pred_data)
-
-        annots = []
-        log_or_print('converting predictions to annotations',
-                     logger=logger, level='info')
-        for ind, batch in enumerate(progress_bar):
-            padding_mask, spect_path = batch['padding_mask'], batch['spect_path']
-            padding_mask = np.squeeze(padding_mask)
-            if isinstance(spect_path, list) and len(spect_path) == 1:
-                spect_path = spect_path[0]
-            y_pred = pred_dict[spect_path]
-            y_pred = torch.argmax(y_pred, dim=1)  # assumes class dimension is 1
-            y_pred = torch.flatten(y_pred).cpu().numpy()[padding_mask]
-
-            spect_dict = files.spect.load(spect_path)
-            t = spect_dict[timebins_key]
-            labels, onsets_s, offsets_s = labeled_timebins.lbl_tb2segments(y_pred,
-                                                                           labelmap=labelmap,
-                                                                           t=t,
-                                                                           min_segment_dur=min_segment_dur,
-                                                                           majority_vote=majority_vote)
-            seq = crowsetta.Sequence.from_keyword(labels=labels,
-                                                  onsets_s=onsets_s,
-                                                  offsets_s=offsets_s)
-
-            audio_fname = files.spect.find_audio_fname(spect_path)
-            annot = crowsetta.Annotation(seq=seq, audio_file=audio_fname, annot_file=annot_csv_path.name)
-            annots.append(annot)
-
-        crowsetta.csv.annot2csv(annot=annots,
-                                csv_filename=annot_csv_path)
+        with memory.stage(f'convert predictions to annotations for {model_name}'):
+            progress_bar = tqdm(pred_data)
+
+            annots = []
+            log_or_print('converting predictions to annotations',
+                         logger=logger, level='info')
+            for ind, batch in enumerate(progress_bar):
+                padding_mask, spect_path = batch['padding_mask'], batch['spect_path']
+                padding_mask = np.squeeze(padding_mask)
+                if isinstance(spect_path, list) and len(spect_path) == 1:
+                    spect_path = spect_path[0]
+                y_pred = pred_dict[spect_path]
+                y_pred = torch.argmax(y_pred, dim=1)  # assumes class dimension is 1
+                y_pred = torch.flatten(y_pred).cpu().numpy()[padding_mask]
+
+                spect_dict = files.spect.load(spect_path)
+                t = spect_dict[timebins_key]
+                labels, onsets_s, offsets_s = labeled_timebins.lbl_tb2segments(y_pred,
+                                                                               labelmap=labelmap,
+                                                                               t=t,
+                                                                               min_segment_dur=min_segment_dur,
+                                                                               majority_vote=majority_vote)
+                seq = crowsetta.Sequence.from_keyword(labels=labels,
+                                                      onsets_s=onsets_s,
+                                                      offsets_s=offsets_s)
+
+                audio_fname = files.spect.find_audio_fname(spect_path)
+                annot = crowsetta.Annotation(seq=seq, audio_file=audio_fname, annot_file=annot_csv_path.name)
+                annots.append(annot)
+
+            crowsetta.csv.annot2csv(annot=annots,
+                                    csv_filename=annot_csv_path)
@@ -2,6 +2,8 @@ from datetime import datetime
 from pathlib import Path
 import warnings
 
+from .. import memory
+from .. import parallel
 from .. import split
 from ..io import dataframe
 from ..logging import log_or_print
@@ -26,6 +28,14 @@ def prep(data_dir,
          train_dur=None,
          val_dur=None,
          test_dur=None,
+         spect_cache_dir=None,
+         spect_cache_key='stat',
+         spect_cache_max_mb=None,
+         num_workers=None,
+         chunksize=None,
+         threads_per_worker=None,
+         spect_container=False,
+         convert_spect_format=None,
          logger=None,
          ):
     """prepare datasets from vocalizations.
@@ -42,13 +52,17 @@ def prep(data_dir,
         Path to location where data sets should be saved.
         Default is None, in which case data sets to `data_dir`.
     audio_format : str
-        format of audio files. One of {'wav', 'cbin'}.
+        format of audio files. One of {'wav', 'cbin', 'flac'}.
         Default is None, but either audio_format or spect_format must be specified.
     spect_format : str
         format of files containg spectrograms as 2-d matrices. One of {'mat', 'npz'}.
         Default is None, but either audio_format or spect_format must be specified.
-    spect_params : dict, vak.config.SpectParams
+    spect_params : dict, vak.config.SpectParams, or list of them
         parameters for creating spectrograms. Default is None.
+        If a list, a dataset is prepared for each set of parameters,
+        with spectrograms made in one pass through the audio files.
+        All datasets have the same split: each audio file is in the same
+        split in every dataset.
     annot_format : str
         format of annotations. Any format that can be used with the
         crowsetta library is valid. Default is None.
@@ -68,6 +82,35 @@ def prep(data_dir,
         total duration of validation set, in seconds. Default is None.
     test_dur : float
         total duration of test set, in seconds. Default is None.
+    spect_cache_dir : str
+        path to directory where spectrogram files are cached, so they are only made once
+        for the same audio file and spect_params. Default is None, in which case
+        spectrograms are not cached. See ``vak.io.spect_cache``.
+    spect_cache_key : str
+        how to find spectrograms made from audio files in the cache, one of {'stat', 'content'}.
+        See ``vak.io.spect_cache.audio_hash``. Default is 'stat'.
+    spect_cache_max_mb : float
+        maximum size of spectrogram cache in megabytes. Default is None, in which case
+        files are never removed from the cache.
+    num_workers : int
+        number of worker processes used to make spectrograms and validate spectrogram files.
+        If 0, all work is done in the main process. Default is None,
+        in which case it is the number of CPUs.
+    chunksize : int
+        number of files sent to a worker process at a time. Default is None,
+        in which case files are split into about four chunks per worker.
+    threads_per_worker : int
+        maximum number of threads each worker process uses for numerical libraries.
+        Default is None, in which case CPUs are divided evenly among workers.
+    spect_container : bool
+        if True, save all spectrograms made from audio files in a single container file,
+        instead of one file for each audio file. See ``vak.files.container``.
+        Default is False.
+    convert_spect_format : str
+        format to convert spectrogram files to, when spect_format is specified.
+        One of {'npz', 'spectpack'}. Converted files are saved in output_dir,
+        and original files are not changed. Default is None, in which case
+        files are not converted.
 
     Other Parameters
     ----------------
@@ -77,9 +120,12 @@ def prep(data_dir,
     Returns
     -------
     vak_df : pandas.DataFrame
-        that represents a dataset of vocalizations
+        that represents a dataset of vocalizations.
+        If spect_params is a list, a list of DataFrames, one for each set of parameters.
     csv_path : Path
-        to csv saved from vak_df
+        to csv saved from vak_df. If spect_params is a list, a list of paths,
+        '{data_dir name}_prep_{time stamp}_{index}.csv',
+        where index is the index of the parameters in the list.
 
     Notes
     -----
@@ -171,7 +217,11 @@ def prep(data_dir,
     data_dir_name = data_dir.name
     timenow = datetime.now().strftime('%y%m%d_%H%M%S')
     csv_fname_stem = f'{data_dir_name}_prep_{timenow}'
-    csv_path = output_dir.joinpath(f'{csv_fname_stem}.csv')
+    multiple_params = type(spect_params) in (list, tuple)
+    if multiple_params:
+        csv_paths = [output_dir.joinpath(f'{csv_fname_stem}_{ind}.csv') for ind in range(len(spect_params))]
+    else:
+        csv_paths = [output_dir.joinpath(f'{csv_fname_stem}.csv')]
 
     # ---- figure out if we're going to split into train / val / test sets ---------------------------------------------
     # catch case where user specified duration for just training set, raise a helpful error instead of failing silently
@@ -199,25 +249,40 @@ def prep(data_dir,
             do_split = True
 
     # ---- actually make the dataset -----------------------------------------------------------------------------------
-    vak_df = dataframe.from_files(labelset=labelset,
-                                  data_dir=data_dir,
-                                  annot_format=annot_format,
-                                  output_dir=output_dir,
-                                  annot_file=annot_file,
-                                  audio_format=audio_format,
-                                  spect_format=spect_format,
-                                  spect_params=spect_params,
-                                  logger=logger)
+    vak_dfs = dataframe.from_files(labelset=labelset,
+                                   data_dir=data_dir,
+                                   annot_format=annot_format,
+                                   output_dir=output_dir,
+                                   annot_file=annot_file,
+                                   audio_format=audio_format,
+                                   spect_format=spect_format,
+                                   spect_params=spect_params,
+                                   spect_cache_dir=spect_cache_dir,
+                                   spect_cache_key=spect_cache_key,
+                                   spect_cache_max_mb=spect_cache_max_mb,
+                                   executor=parallel.Executor(num_workers, chunksize, threads_per_worker),
+                                   spect_container=spect_container,
+                                   convert_spect_format=convert_spect_format,
+                                   logger=logger)
+    if not multiple_params:
+        vak_dfs = [vak_dfs]
 
     if do_split:
         # save before splitting, jic duration args are not valid (we can't know until we make dataset)
-        vak_df.to_csv(csv_path)
-        vak_df = split.dataframe(vak_df,
-                                 labelset=labelset,
-                                 train_dur=train_dur,
-                                 val_dur=val_dur,
-                                 test_dur=test_dur,
-                                 logger=logger)
+        for vak_df, csv_path in zip(vak_dfs, csv_paths):
+            vak_df.to_csv(csv_path)
+        with memory.stage('split dataset'):
+            vak_dfs[0] = split.dataframe(vak_dfs[0],
+                                         labelset=labelset,
+                                         train_dur=train_dur,
+                                         val_dur=val_dur,
+                                         test_dur=test_dur,
+                                         logger=logger)
+        # use the same split for datasets made with other spect_params,
+        # so that results with each can be compared
+        audio_split_map = dict(zip(vak_dfs[0]['audio_path'], vak_dfs[0]['split']))
+        for ind in range(1, len(vak_dfs)):
+            vak_dfs[ind]['split'] = vak_dfs[ind]['audio_path'].map(audio_split_map)
 
     elif do_split is False:  # add a split column, but assign everything to the same 'split'
         # ideally we would just say split=purpose in call to add_split_col, but
@@ -227,9 +292,12 @@ def prep(data_dir,
         elif purpose == 'predict':
             split_name = 'predict'
 
-        vak_df = dataframe.add_split_col(vak_df, split=split_name)
+        vak_dfs = [dataframe.add_split_col(vak_df, split=split_name) for vak_df in vak_dfs]
 
-    log_or_print(msg=f'saving dataset as a .csv file: {csv_path}', logger=logger, level='info')
-    vak_df.to_csv(csv_path, index=False)  # index is False to avoid having "Unnamed: 0" column when loading
+    for vak_df, csv_path in zip(vak_dfs, csv_paths):
+        log_or_print(msg=f'saving dataset as a .csv file: {csv_path}', logger=logger, level='info')
+        vak_df.to_csv(csv_path, index=False)  # index is False to avoid having "Unnamed: 0" column when loading
 
-    return vak_df, csv_path
+    if multiple_params:
+        return vak_dfs, csv_paths
+    return vak_dfs[0], csv_paths[0]
@@ -7,10 +7,16 @@ import pandas as pd
 import torch.utils.data
 
 from .. import csv
+from .. import distributed
+from .. import engine
 from .. import labels
+from .. import manifest
+from .. import memory
 from .. import models
 from .. import summary_writer
 from .. import transforms
+from ..datasets.cached_dataset import CachedDataset
+from ..datasets.samplers import DistributedWindowSampler
 from ..datasets.window_dataset import WindowDataset
 from ..datasets.vocal_dataset import VocalDataset
 from ..device import get_default as get_default_device
@@ -38,6 +44,16 @@ def train(model_config_map,
           ckpt_step=None,
           patience=None,
           device=None,
+          num_processes=1,
+          fast_val_num_windows=None,
+          full_val_every=None,
+          cache_val_data=False,
+          val_cache_max_mb=None,
+          background_val=False,
+          lockstep=False,
+          step_timing=False,
+          profiler_trace_steps=None,
+          getitem_timing=False,
           logger=None,
           ):
     """train models using training set specified in config.toml file.
@@ -115,6 +131,58 @@ def train(model_config_map,
         number of validation steps to wait without performance on the
         validation set improving before stopping the training.
         Default is None, in which case training only stops after the specified number of epochs.
+    num_processes : int
+        number of processes to use for data-parallel training on CPU.
+        Default is 1. If greater than 1, each model is trained by that many processes
+        with torch.nn.parallel.DistributedDataParallel and the 'gloo' backend.
+        Each process loads batch_size windows per step, so the effective batch size
+        is num_processes * batch_size. Only the first process saves checkpoints, logs,
+        and computes metrics on the validation set. Requires device to be 'cpu'.
+    fast_val_num_windows : int
+        number of windows in a fixed subset of the validation set,
+        drawn so that all classes are represented. If specified,
+        metrics are computed on only this subset at each validation step,
+        and those metrics are used to decide whether to save the max-val-acc checkpoint
+        and whether to stop early. Metrics on the entire validation set are still computed
+        at the end of training. Default is None, in which case the entire validation set
+        is used at every validation step.
+    full_val_every : int
+        when fast_val_num_windows is specified, also compute metrics on the
+        entire validation set every ``full_val_every`` validation steps.
+        Default is None, in which case the entire validation set is only used at the end of training.
+    cache_val_data : bool
+        if True, load and transform every item in the validation set once, before training,
+        and cache the resulting windows, label vectors, and padding masks,
+        so that validation steps only need to run the network. Default is False.
+    val_cache_max_mb : float
+        maximum size in megabytes of the validation set cache to hold in memory.
+        Items that do not fit are saved as memory-mapped arrays in a temporary directory.
+        Default is None, in which case the entire cache is held in memory.
+    background_val : bool
+        if True, compute metrics on the validation set in a separate process,
+        so training continues while validation runs. On each validation step, a checkpoint
+        snapshot is saved and evaluated in the background. Metrics are reported
+        for the global step of the snapshot, and used to select the max-val-acc checkpoint
+        and to decide whether to stop early as soon as they are received. Default is False.
+    lockstep : bool
+        if True, train all models in model_config_map in lockstep, using each batch of training data
+        for one step of every model before loading the next batch, so the cost of loading data
+        is paid once instead of once per model. Each model still has its own checkpoints and
+        summary writer. Cannot be used with num_processes greater than 1. Default is False.
+    step_timing : bool
+        if True, record wall time of each phase of every training step: waiting for data,
+        copying data to the device, forward pass, backward pass, optimizer step, and checkpoint I/O.
+        Times are saved in 'step_times.csv' in the results directory of each model,
+        and added to the summary writer with tags like 'time/forward'. Default is False.
+    profiler_trace_steps : list
+        of two ints, [start, stop]. If specified, torch.profiler records
+        global steps start through stop - 1, and saves a Chrome trace
+        in the results directory of each model. Default is None.
+    getitem_timing : bool
+        if True, record time that each DataLoader worker spends getting each window of training data,
+        split into loading the spectrogram, labeling time bins, and applying transforms.
+        Times are saved in csv files in 'getitem_times' in the results directory,
+        and averages for each worker are logged at the end of training. Default is False.
 
     Other Parameters
     ----------------
@@ -132,6 +200,7 @@ def train(model_config_map,
         logger=logger, level='info'
     )
     dataset_df = pd.read_csv(csv_path)
+    manifest.count_files('spectrogram files in dataset', dataset_df['spect_path'].values)
     # ---------------- pre-conditions ----------------------------------------------------------------------------------
     if val_step and not dataset_df['split'].str.contains('val').any():
         raise ValueError(
@@ -139,6 +208,36 @@ def train(model_config_map,
             f"please run `vak prep` with a config.toml file that specifies a duration for the validation set."
         )
 
+    if fast_val_num_windows is not None and not val_step:
+        raise ValueError(
+            f'fast_val_num_windows set to {fast_val_num_windows} but val_step is not set, '
+            f'so no validation will be done'
+        )
+
+    if full_val_every is not None and fast_val_num_windows is None:
+        raise ValueError(
+            f'full_val_every set to {full_val_every} but fast_val_num_windows is not set; '
+            f'without fast validation, the entire validation set is used on every validation step'
+        )
+
+    if num_processes < 1:
+        raise ValueError(
+            f'num_processes must be a positive integer but was: {num_processes}'
+        )
+
+    if lockstep and num_processes > 1:
+        raise ValueError(
+            'lockstep training cannot be used with more than one process, '
+            f'but num_processes was: {num_processes}'
+        )
+
+    if device is None:
+        device = get_default_device()
+    if num_processes > 1 and device != 'cpu':
+        raise ValueError(
+            f"training with multiple processes requires device to be 'cpu', but device was: {device}"
+        )
+
     # ---- set up directory to save output -----------------------------------------------------------------------------
     if results_path:
         results_path = Path(results_path).expanduser().resolve()
@@ -199,8 +298,9 @@ def train(model_config_map,
         # and make too tight a coupling between this function and that one.
         # Trade off is that this is pretty verbose (even ignoring my comments)
         log_or_print('will normalize spectrograms', logger=logger, level='info')
-        spect_standardizer = transforms.StandardizeSpect.fit_df(dataset_df,
-                                                                spect_key=spect_key)
+        with memory.stage('fit spectrogram scaler'):
+            spect_standardizer = transforms.StandardizeSpect.fit_df(dataset_df,
+                                                                    spect_key=spect_key)
         joblib.dump(spect_standardizer,
                     results_path.joinpath('StandardizeSpect'))
     else:
@@ -208,22 +308,27 @@ def train(model_config_map,
     transform, target_transform = transforms.get_defaults('train',
                                                           spect_standardizer)
 
-    train_dataset = WindowDataset.from_csv(csv_path=csv_path,
-                                           x_inds=x_inds,
-                                           spect_id_vector=spect_id_vector,
-                                           spect_inds_vector=spect_inds_vector,
-                                           split='train',
-                                           labelmap=labelmap,
-                                           window_size=window_size,
-                                           spect_key=spect_key,
-                                           timebins_key=timebins_key,
-                                           transform=transform,
-                                           target_transform=target_transform
-                                           )
+    with memory.stage('make training dataset'):
+        train_dataset = WindowDataset.from_csv(csv_path=csv_path,
+                                               x_inds=x_inds,
+                                               spect_id_vector=spect_id_vector,
+                                               spect_inds_vector=spect_inds_vector,
+                                               split='train',
+                                               labelmap=labelmap,
+                                               window_size=window_size,
+                                               spect_key=spect_key,
+                                               timebins_key=timebins_key,
+                                               transform=transform,
+                                               target_transform=target_transform
+                                               )
     log_or_print(
         f'Duration of WindowDataset used for training, in seconds: {train_dataset.duration()}',
         logger=logger, level='info'
     )
+    if getitem_timing:
+        item_times_dir = results_path.joinpath('getitem_times')
+        item_times_dir.mkdir()
+        train_dataset.record_item_times(item_times_dir)
     train_data = torch.utils.data.DataLoader(dataset=train_dataset,
                                              shuffle=shuffle,
                                              batch_size=batch_size,
@@ -236,13 +341,16 @@ def train(model_config_map,
                                                  window_size=window_size,
                                                  return_padding_mask=True,
                                                  )
-        val_dataset = VocalDataset.from_csv(csv_path=csv_path,
-                                            split='val',
-                                            labelmap=labelmap,
-                                            spect_key=spect_key,
-                                            timebins_key=timebins_key,
-                                            item_transform=item_transform,
-                                            )
+        with memory.stage('make validation dataset'):
+            val_dataset = VocalDataset.from_csv(csv_path=csv_path,
+                                                split='val',
+                                                labelmap=labelmap,
+                                                spect_key=spect_key,
+                                                timebins_key=timebins_key,
+                                                item_transform=item_transform,
+                                                )
+        if cache_val_data:
+            val_dataset = _cache_val_dataset(val_dataset, val_cache_max_mb, logger)
         val_data = torch.utils.data.DataLoader(dataset=val_dataset,
                                                shuffle=False,
                                                # batch size 1 because each spectrogram reshaped into a batch of windows
@@ -258,11 +366,43 @@ def train(model_config_map,
             f'will measure error on validation set every {val_step} steps of training',
             logger=logger, level='info'
         )
+
+        if fast_val_num_windows:
+            # windows transformed the same way as training data
+            fast_val_dataset = WindowDataset.from_csv(csv_path=csv_path,
+                                                      split='val',
+                                                      labelmap=labelmap,
+                                                      window_size=window_size,
+                                                      spect_key=spect_key,
+                                                      timebins_key=timebins_key,
+                                                      transform=transform,
+                                                      target_transform=target_transform
+                                                      )
+            fast_val_dataset.x_inds = fast_val_dataset.stratified_x_inds(fast_val_num_windows)
+            if cache_val_data:
+                fast_val_dataset = _cache_val_dataset(fast_val_dataset, val_cache_max_mb, logger)
+            fast_val_data = torch.utils.data.DataLoader(dataset=fast_val_dataset,
+                                                        shuffle=False,
+                                                        batch_size=batch_size,
+                                                        num_workers=num_workers)
+            log_or_print(
+                f'will measure error on a fixed subset of {len(fast_val_dataset)} windows from validation set '
+                f'at each validation step',
+                logger=logger, level='info'
+            )
+            if full_val_every:
+                log_or_print(
+                    f'will measure error on entire validation set every {full_val_every} validation steps',
+                    logger=logger, level='info'
+                )
+        else:
+            fast_val_dataset = None
+            fast_val_data = None
     else:
+        val_dataset = None
         val_data = None
-
-    if device is None:
-        device = get_default_device()
+        fast_val_dataset = None
+        fast_val_data = None
 
     models_map = models.from_model_config_map(
         model_config_map,
@@ -270,20 +410,224 @@ def train(model_config_map,
         input_shape=train_dataset.shape,
         logger=logger,
     )
+    if lockstep:
+        ckpt_roots = {}
+        for model_name, model in models_map.items():
+            results_model_root = results_path.joinpath(model_name)
+            results_model_root.mkdir()
+            ckpt_roots[model_name] = results_model_root.joinpath('checkpoints')
+            ckpt_roots[model_name].mkdir()
+            model.summary_writer = summary_writer.get_summary_writer(log_dir=results_model_root,
+                                                                     filename_suffix=model_name)
+            model.step_timer = _get_step_timer(step_timing, profiler_trace_steps, results_model_root,
+                                               model.summary_writer, device)
+        log_or_print(f'training models in lockstep: {", ".join(models_map.keys())}',
+                     logger=logger, level='info')
+        engine.lockstep.fit_lockstep(models_map,
+                                     train_data=train_data,
+                                     num_epochs=num_epochs,
+                                     ckpt_roots=ckpt_roots,
+                                     val_data=val_data,
+                                     val_step=val_step,
+                                     ckpt_step=ckpt_step,
+                                     patience=patience,
+                                     device=device,
+                                     fast_val_data=fast_val_data,
+                                     full_val_every=full_val_every,
+                                     background_val=background_val,
+                                     logger=logger)
+        for model in models_map.values():
+            if model.step_timer is not None:
+                model.step_timer.close()
+        if getitem_timing:
+            train_dataset.close_item_times()
+            _log_item_times(item_times_dir, logger)
+        return
+
     for model_name, model in models_map.items():
         results_model_root = results_path.joinpath(model_name)
         results_model_root.mkdir()
         ckpt_root = results_model_root.joinpath('checkpoints')
         ckpt_root.mkdir()
         log_or_print(f'training {model_name}', logger=logger, level='info')
-        writer = summary_writer.get_summary_writer(log_dir=results_model_root,
-                                                   filename_suffix=model_name)
-        model.summary_writer = writer
-        model.fit(train_data=train_data,
-                  num_epochs=num_epochs,
-                  ckpt_root=ckpt_root,
-                  val_data=val_data,
-                  val_step=val_step,
-                  ckpt_step=ckpt_step,
-                  patience=patience,
-                  device=device)
+        if num_processes > 1:
+            log_or_print(f'training with {num_processes} processes', logger=logger, level='info')
+            # each process builds its own copy of the model, see _fit_worker
+            distributed.spawn(_fit_worker,
+                              num_processes,
+                              args=(model_name,
+                                    model_config_map[model_name],
+                                    len(labelmap),
+                                    train_dataset.shape,
+                                    train_dataset,
+                                    val_dataset,
+                                    batch_size,
+                                    shuffle,
+                                    num_workers,
+                                    num_epochs,
+                                    results_model_root,
+                                    ckpt_root,
+                                    val_step,
+                                    ckpt_step,
+                                    patience,
+                                    fast_val_dataset,
+                                    full_val_every,
+                                    background_val,
+                                    step_timing,
+                                    profiler_trace_steps,
+                                    logger.name if logger else __name__,
+                                    distributed.log_paths(logger),
+                                    )
+                              )
+        else:
+            writer = summary_writer.get_summary_writer(log_dir=results_model_root,
+                                                       filename_suffix=model_name)
+            model.summary_writer = writer
+            model.step_timer = _get_step_timer(step_timing, profiler_trace_steps, results_model_root, writer, device)
+            model.fit(train_data=train_data,
+                      num_epochs=num_epochs,
+                      ckpt_root=ckpt_root,
+                      val_data=val_data,
+                      val_step=val_step,
+                      ckpt_step=ckpt_step,
+                      patience=patience,
+                      device=device,
+                      fast_val_data=fast_val_data,
+                      full_val_every=full_val_every,
+                      background_val=background_val)
+            if model.step_timer is not None:
+                model.step_timer.close()
+
+    if getitem_timing:
+        train_dataset.close_item_times()
+        _log_item_times(item_times_dir, logger)
+
+
+def _log_item_times(item_times_dir, logger=None):
+    """log average time that each DataLoader worker spent getting windows of training data"""
+    item_times = WindowDataset.summarize_item_times(item_times_dir)
+    log_or_print(
+        f'average time in seconds to get each window of training data, per worker:\n{item_times.to_string()}',
+        logger=logger, level='info'
+    )
+
+
+def _cache_val_dataset(val_dataset, val_cache_max_mb, logger=None):
+    """compute every item in a validation dataset once, and return a CachedDataset with the items"""
+    log_or_print('caching validation set', logger=logger, level='info')
+    if val_cache_max_mb is not None:
+        max_bytes = int(val_cache_max_mb * 1024 ** 2)
+    else:
+        max_bytes = None
+    with memory.stage('cache validation dataset'):
+        cached_dataset = CachedDataset(val_dataset, max_bytes=max_bytes)
+    log_or_print(
+        f'cached validation set, size in memory: {cached_dataset.nbytes_in_memory / 1024 ** 2:.2f} MB, '
+        f'size of memory-mapped arrays: {cached_dataset.nbytes_memmap / 1024 ** 2:.2f} MB',
+        logger=logger, level='info'
+    )
+    return cached_dataset
+
+
+def _get_step_timer(step_timing, profiler_trace_steps, results_model_root, writer, device):
+    """get a StepTimer for a model, or None if neither step timing nor a profiler trace was requested"""
+    if not step_timing and profiler_trace_steps is None:
+        return None
+    return engine.timing.StepTimer(
+        csv_path=results_model_root.joinpath('step_times.csv') if step_timing else None,
+        summary_writer=writer if step_timing else None,
+        device=device,
+        trace_steps=profiler_trace_steps,
+        trace_dir=results_model_root,
+    )
+
+
+def _fit_worker(rank,
+                world_size,
+                model_name,
+                model_config,
+                num_classes,
+                input_shape,
+                train_dataset,
+                val_dataset,
+                batch_size,
+                shuffle,
+                num_workers,
+                num_epochs,
+                results_model_root,
+                ckpt_root,
+                val_step,
+                ckpt_step,
+                patience,
+                fast_val_dataset,
+                full_val_every,
+                background_val,
+                step_timing,
+                profiler_trace_steps,
+                logger_name,
+                log_paths,
+                ):
+    """fit one model in one process of a data-parallel process group.
+    Run by ``vak.distributed.spawn``, called by ``train`` when num_processes > 1.
+
+    The model is instantiated inside each process, instead of being passed in,
+    because torch.multiprocessing would otherwise put its parameters in shared memory
+    where every process would update the same tensors.
+    DistributedDataParallel makes sure all processes start from the same parameters
+    by broadcasting them from the process with rank 0.
+    """
+    logger = distributed.get_worker_logger(rank, logger_name, log_paths)
+    models_map = models.from_model_config_map(
+        {model_name: model_config},
+        num_classes=num_classes,
+        input_shape=input_shape,
+        logger=logger,
+    )
+    model = models_map[model_name]
+    model.logger = logger
+    if rank == 0:
+        model.summary_writer = summary_writer.get_summary_writer(log_dir=results_model_root,
+                                                                 filename_suffix=model_name)
+        model.step_timer = _get_step_timer(step_timing, profiler_trace_steps, results_model_root,
+                                           model.summary_writer, 'cpu')
+
+    sampler = DistributedWindowSampler(train_dataset,
+                                       num_replicas=world_size,
+                                       rank=rank,
+                                       shuffle=shuffle)
+    train_data = torch.utils.data.DataLoader(dataset=train_dataset,
+                                             sampler=sampler,
+                                             batch_size=batch_size,
+                                             num_workers=num_workers)
+    if val_dataset is not None:
+        # all processes need val_data so they know when a validation step happens,
+        # but only rank 0 will actually iterate through it
+        val_data = torch.utils.data.DataLoader(dataset=val_dataset,
+                                               shuffle=False,
+                                               batch_size=1,
+                                               num_workers=num_workers)
+    else:
+        val_data = None
+
+    if fast_val_dataset is not None:
+        fast_val_data = torch.utils.data.DataLoader(dataset=fast_val_dataset,
+                                                    shuffle=False,
+                                                    batch_size=batch_size,
+                                                    num_workers=num_workers)
+    else:
+        fast_val_data = None
+
+    model.fit(train_data=train_data,
+              num_epochs=num_epochs,
+              ckpt_root=ckpt_root,
+              val_data=val_data,
+              val_step=val_step,
+              ckpt_step=ckpt_step,
+              patience=patience,
+              device='cpu',
+              fast_val_data=fast_val_data,
+              full_val_every=full_val_every,
+              background_val=background_val)
+    if model.step_timer is not None:
+        model.step_timer.close()
+    train_dataset.close_item_times()
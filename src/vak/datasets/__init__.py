@@ -1,7 +1,11 @@
+from .cached_dataset import CachedDataset
+from .samplers import DistributedWindowSampler
 from .vocal_dataset import VocalDataset
 from .window_dataset import WindowDataset
 
 __all__ = [
+    'CachedDataset',
+    'DistributedWindowSampler',
     'VocalDataset',
     'WindowDataset'
 ]
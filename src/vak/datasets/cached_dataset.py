@@ -0,0 +1,132 @@
+from collections import namedtuple
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import torch
+
+
+# path to .npy file with array that will be memory-mapped when accessed
+MemmapArray = namedtuple('MemmapArray', ['npy_path'])
+
+
+class CachedDataset:
+    """Dataset that caches every item of another dataset,
+    after all transforms have been applied,
+    so that iterating over it again only costs a lookup.
+
+    Used for validation sets during training: each validation step would
+    otherwise re-load, re-label, normalize, pad and window every spectrogram,
+    even though none of that changes while the model trains.
+
+    All items are computed once, when a CachedDataset is instantiated.
+    Items are held in memory until the total size of cached arrays reaches ``max_bytes``;
+    arrays in the remaining items are saved to .npy files in a temporary directory
+    and loaded as memory-mapped arrays when the item is accessed.
+
+    Attributes
+    ----------
+    dataset : vak.datasets.VocalDataset, vak.datasets.WindowDataset
+        dataset to cache. Items must be dicts or tuples,
+        where values are torch.Tensors, numpy arrays, or other picklable objects (e.g. paths).
+    max_bytes : int
+        maximum total size in bytes of arrays to hold in memory. Default is None,
+        in which case all items are held in memory.
+    cache_dir : str, Path
+        directory in which to create a temporary directory with memory-mapped arrays.
+        Default is None, in which case the system default temporary directory is used.
+    labelmap : dict
+        labelmap of dataset, needed by vak.Model._eval
+    shape : tuple
+        shape of dataset, e.g. used to initialize networks
+    nbytes_in_memory : int
+        total size of arrays held in memory
+    nbytes_memmap : int
+        total size of arrays saved as memory-mapped files
+    """
+    def __init__(self,
+                 dataset,
+                 max_bytes=None,
+                 cache_dir=None):
+        """initialize a CachedDataset instance, by computing and caching every item in dataset
+
+        Parameters
+        ----------
+        dataset : vak.datasets.VocalDataset, vak.datasets.WindowDataset
+            dataset to cache
+        max_bytes : int
+            maximum total size in bytes of arrays to hold in memory. Default is None,
+            in which case all items are held in memory.
+        cache_dir : str, Path
+            directory in which to create a temporary directory with memory-mapped arrays.
+            Default is None, in which case the system default temporary directory is used.
+        """
+        self.dataset = dataset
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.labelmap = dataset.labelmap
+        self.shape = dataset.shape
+
+        self._tmp_dir = None
+        self.memmap_dir = None
+        self.nbytes_in_memory = 0
+        self.nbytes_memmap = 0
+
+        self._items = []
+        for idx in range(len(dataset)):
+            item = dataset[idx]
+            if isinstance(item, dict):
+                keys = list(item.keys())
+            else:
+                keys = list(range(len(item)))
+            item_arrs = {key: item[key].numpy() if torch.is_tensor(item[key]) else item[key]
+                         for key in keys}
+            item_nbytes = sum([arr.nbytes for arr in item_arrs.values() if isinstance(arr, np.ndarray)])
+
+            if self.max_bytes is None or self.nbytes_in_memory + item_nbytes <= self.max_bytes:
+                self.nbytes_in_memory += item_nbytes
+            else:
+                for key, arr in item_arrs.items():
+                    if isinstance(arr, np.ndarray):
+                        item_arrs[key] = self._to_memmap(arr, f'{idx}-{key}.npy')
+                self.nbytes_memmap += item_nbytes
+
+            if isinstance(item, dict):
+                self._items.append(item_arrs)
+            else:
+                self._items.append(tuple(item_arrs[key] for key in keys))
+
+    def _to_memmap(self, arr, filename):
+        """save array to a .npy file in temporary directory, return MemmapArray with path to file"""
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix='vak-cache-', dir=self.cache_dir)
+            self.memmap_dir = Path(self._tmp_dir.name)
+        npy_path = self.memmap_dir.joinpath(filename)
+        np.save(npy_path, arr)
+        return MemmapArray(npy_path)
+
+    @staticmethod
+    def _to_tensor(arr):
+        if isinstance(arr, MemmapArray):
+            # copy so tensor does not keep memory-mapped file open, and so tensor is writeable
+            arr = np.array(np.load(arr.npy_path, mmap_mode='r'))
+        if isinstance(arr, np.ndarray):
+            return torch.from_numpy(arr)
+        return arr
+
+    def __getitem__(self, idx):
+        item = self._items[idx]
+        if isinstance(item, dict):
+            return {key: self._to_tensor(val) for key, val in item.items()}
+        else:
+            return tuple(self._to_tensor(val) for val in item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getstate__(self):
+        # don't pickle TemporaryDirectory; when dataset is sent to other processes,
+        # they read the same files, and the original instance is responsible for removing them
+        state = self.__dict__.copy()
+        state['_tmp_dir'] = None
+        return state
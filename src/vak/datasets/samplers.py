@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+import torch.utils.data
+
+from .. import distributed
+
+
+class DistributedWindowSampler(torch.utils.data.Sampler):
+    """Sampler that restricts a WindowDataset to a subset of windows,
+    so that each process in data-parallel training sees a different part of the dataset.
+
+    Works like torch.utils.data.distributed.DistributedSampler:
+    each epoch, all processes draw the same permutation of window indices
+    (seeded with ``seed + epoch``), which is padded so it divides evenly
+    by the number of processes, and then each process takes every
+    ``num_replicas``-th index starting from its rank.
+
+    Attributes
+    ----------
+    dataset : vak.datasets.WindowDataset
+        dataset to sample windows from
+    num_replicas : int
+        number of processes in data-parallel training.
+        Default is None, in which case vak.distributed.get_world_size is used.
+    rank : int
+        rank of current process. Default is None,
+        in which case vak.distributed.get_rank is used.
+    shuffle : bool
+        if True, shuffle window indices before each epoch. Default is True.
+    seed : int
+        random seed used to shuffle. Must be the same across processes.
+        Default is 0.
+
+    Notes
+    -----
+    Call ``set_epoch`` before each epoch, or every epoch will use the same ordering.
+    vak.Model.fit does this automatically.
+    """
+    def __init__(self,
+                 dataset,
+                 num_replicas=None,
+                 rank=None,
+                 shuffle=True,
+                 seed=0):
+        if num_replicas is None:
+            num_replicas = distributed.get_world_size()
+        if rank is None:
+            rank = distributed.get_rank()
+        if rank >= num_replicas or rank < 0:
+            raise ValueError(
+                f'invalid rank {rank}, rank should be in the interval [0, {num_replicas - 1}]'
+            )
+
+        self.dataset = dataset
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+        self.num_samples = int(math.ceil(len(self.dataset) / self.num_replicas))
+        self.total_size = self.num_samples * self.num_replicas
+
+    def __iter__(self):
+        if self.shuffle:
+            rng = np.random.default_rng(self.seed + self.epoch)
+            inds = rng.permutation(len(self.dataset))
+        else:
+            inds = np.arange(len(self.dataset))
+
+        # pad so that number of indices divides evenly across processes,
+        # repeating indices as many times as needed when there are fewer windows than processes
+        n_pad = self.total_size - inds.shape[0]
+        if n_pad > 0:
+            inds = np.concatenate((inds, np.tile(inds, math.ceil(n_pad / inds.shape[0]))[:n_pad]))
+
+        inds = inds[self.rank:self.total_size:self.num_replicas]
+        return iter(inds.tolist())
+
+    def __len__(self):
+        return self.num_samples
+
+    def set_epoch(self, epoch):
+        """set epoch, used as part of the seed for shuffling,
+        so that each epoch uses a different ordering"""
+        self.epoch = epoch
@@ -1,3 +1,9 @@
+import csv
+import multiprocessing.util
+import os
+from pathlib import Path
+import time
+
 import numpy as np
 import pandas as pd
 import random
@@ -5,9 +11,11 @@ import torch
 from torchvision.datasets.vision import VisionDataset
 
 from .. import annotation
+from .. import distributed
 from .. import files
 from .. import io
 from .. import labeled_timebins
+from .. import memory
 from .. import validation
 
 
@@ -57,6 +65,9 @@ class WindowDataset(VisionDataset):
         Default is None.
     target_transform : callable
         A function/transform that takes in the target and transforms it.
+    item_times_dir : pathlib.Path
+        directory where times to get each item are saved, one csv per DataLoader worker.
+        Default is None, in which case times are not recorded. See ``record_item_times``.
 
     Notes
     -----
@@ -82,6 +93,8 @@ class WindowDataset(VisionDataset):
     # class attribute, constant used by several methods
     # with x_inds, to mark invalid starting indices for windows
     INVALID_WINDOW_VAL = -1
+    # columns of csv files saved when recording time to get items
+    ITEM_TIMES_FIELDS = ('idx', 'load', 'label', 'transform')
 
     def __init__(self,
                  root,
@@ -160,6 +173,10 @@ class WindowDataset(VisionDataset):
             # just assign dummy value that will end up getting replaced by actual labels by label_timebins()
             self.unlabeled_label = 0
         self.window_size = window_size
+        self.item_times_dir = None
+        self._item_times_file = None
+        self._item_times_writer = None
+        self._item_times_pid = None
 
         tmp_x_ind = 0
         one_x, _ = self.__getitem__(tmp_x_ind)
@@ -167,7 +184,7 @@ class WindowDataset(VisionDataset):
         # e.g. when initializing a neural network model
         self.shape = one_x.shape
 
-    def __get_window_labelvec(self, idx):
+    def __get_window_labelvec(self, idx, times=None):
         """helper function that gets batches of training pairs,
         given indices into dataset
 
@@ -175,6 +192,9 @@ class WindowDataset(VisionDataset):
         ----------
         idx : integer
             index into dataset
+        times : dict
+            if not None, time to load the window and to label it
+            are added to this dict with keys 'load' and 'label'. Default is None.
 
         Returns
         -------
@@ -187,10 +207,17 @@ class WindowDataset(VisionDataset):
         spect_id = self.spect_id_vector[x_ind]
         window_start_ind = self.spect_inds_vector[x_ind]
 
+        if times is not None:
+            tic = time.perf_counter()
         spect_path = self.spect_paths[spect_id]
         spect_dict = files.spect.load(spect_path)
-        spect = spect_dict[self.spect_key]
         timebins = spect_dict[self.timebins_key]
+        window = files.spect.window(spect_dict, self.spect_key,
+                                    window_start_ind, window_start_ind + self.window_size)
+        if times is not None:
+            toc = time.perf_counter()
+            times['load'] = toc - tic
+            tic = toc
 
         annot = self.annots[spect_id]  # "annot id" == spect_id if both were taken from rows of DataFrame
         lbls_int = [self.labelmap[lbl] for lbl in annot.seq.labels]
@@ -199,25 +226,134 @@ class WindowDataset(VisionDataset):
                                                  annot.seq.offsets_s,
                                                  timebins,
                                                  unlabeled_label=self.unlabeled_label)
-
-        window = spect[:, window_start_ind:window_start_ind + self.window_size]
         labelvec = lbl_tb[window_start_ind:window_start_ind + self.window_size]
+        if times is not None:
+            times['label'] = time.perf_counter() - tic
 
         return window, labelvec
 
     def __getitem__(self, idx):
         if torch.is_tensor(idx):
             idx = idx.tolist()
-        window, labelvec = self.__get_window_labelvec(idx)
+        if self.item_times_dir is None:
+            window, labelvec = self.__get_window_labelvec(idx)
+
+            if self.transform is not None:
+                window = self.transform(window)
+
+            if self.target_transform is not None:
+                labelvec = self.target_transform(labelvec)
+        else:
+            times = {}
+            window, labelvec = self.__get_window_labelvec(idx, times)
 
-        if self.transform is not None:
-            window = self.transform(window)
+            tic = time.perf_counter()
+            if self.transform is not None:
+                window = self.transform(window)
 
-        if self.target_transform is not None:
-            labelvec = self.target_transform(labelvec)
+            if self.target_transform is not None:
+                labelvec = self.target_transform(labelvec)
+            times['transform'] = time.perf_counter() - tic
+            self._write_item_times(idx, times)
 
         return window, labelvec
 
+    def record_item_times(self, item_times_dir):
+        """record time spent getting each item,
+        split into time to load the window from a spectrogram file,
+        time to label the time bins in the window, and time to apply transforms.
+
+        Each process that gets items, i.e. each DataLoader worker,
+        appends times to its own csv file in item_times_dir,
+        named ``getitem_times_worker-{id}.csv`` (or ``getitem_times_worker-main.csv``
+        when items are loaded in the main process). When training with multiple processes,
+        names are prefixed with the rank, e.g. ``getitem_times_rank-1_worker-0.csv``.
+        Files opened by DataLoader workers are closed when the workers shut down;
+        call ``close_item_times`` to close the file opened by this process.
+        Summarize with ``summarize_item_times``.
+
+        Parameters
+        ----------
+        item_times_dir : str, pathlib.Path
+            directory where csv files are saved. Must already exist.
+            Pass None to stop recording.
+        """
+        if item_times_dir is not None:
+            item_times_dir = Path(item_times_dir)
+            if not item_times_dir.is_dir():
+                raise NotADirectoryError(
+                    f'item_times_dir not found or not recognized as a directory: {item_times_dir}'
+                )
+        self.item_times_dir = item_times_dir
+
+    def _write_item_times(self, idx, times):
+        # open file lazily, from inside each worker process, so each worker has its own file
+        if self._item_times_pid != os.getpid():
+            worker_info = torch.utils.data.get_worker_info()
+            worker_id = worker_info.id if worker_info is not None else 'main'
+            worker_name = f'worker-{worker_id}'
+            if distributed.is_initialized():
+                worker_name = f'rank-{distributed.get_rank()}_{worker_name}'
+            csv_path = self.item_times_dir.joinpath(f'getitem_times_{worker_name}.csv')
+            write_header = not csv_path.exists()
+            # line buffered so that rows are written even if a worker is terminated before closing its file
+            self._item_times_file = open(csv_path, 'a', newline='', buffering=1)
+            self._item_times_writer = csv.writer(self._item_times_file)
+            if write_header:
+                self._item_times_writer.writerow(self.ITEM_TIMES_FIELDS)
+            self._item_times_pid = os.getpid()
+            if worker_info is not None:
+                # workers are shut down by the DataLoader, so close file when worker process exits
+                multiprocessing.util.Finalize(self, self.close_item_times, exitpriority=0)
+        self._item_times_writer.writerow([idx] + [times[field] for field in self.ITEM_TIMES_FIELDS[1:]])
+
+    def close_item_times(self):
+        """close csv file that this process writes times to get items to,
+        if one is open. Recording continues in a new file if more items are
+        retrieved, unless ``record_item_times`` is called with None."""
+        if self._item_times_file is not None and self._item_times_pid == os.getpid():
+            self._item_times_file.close()
+        self._item_times_file = None
+        self._item_times_writer = None
+        self._item_times_pid = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # open files can't be pickled, e.g. when sending dataset to DataLoader workers
+        state['_item_times_file'] = None
+        state['_item_times_writer'] = None
+        state['_item_times_pid'] = None
+        return state
+
+    @staticmethod
+    def summarize_item_times(item_times_dir):
+        """summarize times saved by WindowDataset instances that called ``record_item_times``
+
+        Parameters
+        ----------
+        item_times_dir : str, pathlib.Path
+            directory with csv files of times
+
+        Returns
+        -------
+        summary : pandas.DataFrame
+            with one row per worker, and columns 'n_items' and
+            the mean time in seconds for 'load', 'label', and 'transform'
+        """
+        csv_paths = sorted(Path(item_times_dir).glob('getitem_times_*.csv'))
+        if len(csv_paths) == 0:
+            raise FileNotFoundError(
+                f'did not find any csv files with times to get items in {item_times_dir}'
+            )
+        rows = []
+        for csv_path in csv_paths:
+            df = pd.read_csv(csv_path)
+            row = {'worker': csv_path.stem.replace('getitem_times_', ''),
+                   'n_items': len(df)}
+            row.update({field: df[field].mean() for field in WindowDataset.ITEM_TIMES_FIELDS[1:]})
+            rows.append(row)
+        return pd.DataFrame.from_records(rows).set_index('worker')
+
     def __len__(self):
         """number of batches"""
         return len(self.x_inds)
@@ -226,6 +362,73 @@ class WindowDataset(VisionDataset):
         """duration of WindowDataset, in seconds"""
         return self.spect_inds_vector.shape[-1] * self.timebin_dur
 
+    def stratified_x_inds(self, num_windows, seed=0):
+        """get a fixed subset of the windows in this dataset,
+        stratified by class so that every class is represented.
+
+        Used to quickly estimate metrics on a validation set
+        without running the network on every window.
+
+        Parameters
+        ----------
+        num_windows : int
+            number of windows in subset. If the dataset has fewer windows
+            than this, all windows are returned.
+        seed : int
+            seed for random number generator. Using the same seed
+            with the same dataset always returns the same subset.
+            Default is 0.
+
+        Returns
+        -------
+        x_inds_subset : numpy.ndarray
+            subset of x_inds, sorted so windows from the same spectrogram are adjacent.
+
+        Notes
+        -----
+        For each class, windows are drawn from the set of windows that contain
+        at least one time bin labeled with that class, with each class allotted
+        an equal share of num_windows. Classes with fewer windows than their share
+        contribute all of them, and any remaining slots are filled with randomly
+        drawn windows.
+        """
+        if num_windows >= len(self.x_inds):
+            return np.copy(self.x_inds)
+
+        lbl_tb = []
+        for spect_path, annot in zip(self.spect_paths, self.annots):
+            timebins = files.spect.load(spect_path)[self.timebins_key]
+            lbls_int = [self.labelmap[lbl] for lbl in annot.seq.labels]
+            lbl_tb.append(labeled_timebins.label_timebins(lbls_int,
+                                                          annot.seq.onsets_s,
+                                                          annot.seq.offsets_s,
+                                                          timebins,
+                                                          unlabeled_label=self.unlabeled_label))
+        lbl_tb = np.concatenate(lbl_tb)
+
+        rng = np.random.default_rng(seed)
+        classes = np.unique(lbl_tb)
+        n_per_class = int(np.ceil(num_windows / classes.shape[0]))
+        x_inds_subset = []
+        for class_ in classes:
+            # cumulative sum lets us count time bins with this class in every window at once
+            class_cumsum = np.concatenate(([0], np.cumsum(lbl_tb == class_)))
+            has_class = (class_cumsum[self.x_inds + self.window_size] - class_cumsum[self.x_inds]) > 0
+            class_x_inds = self.x_inds[has_class]
+            if class_x_inds.shape[0] > n_per_class:
+                class_x_inds = rng.choice(class_x_inds, size=n_per_class, replace=False)
+            x_inds_subset.append(class_x_inds)
+        x_inds_subset = np.unique(np.concatenate(x_inds_subset))
+
+        if x_inds_subset.shape[0] > num_windows:
+            x_inds_subset = rng.choice(x_inds_subset, size=num_windows, replace=False)
+        elif x_inds_subset.shape[0] < num_windows:
+            remaining = np.setdiff1d(self.x_inds, x_inds_subset)
+            extra = rng.choice(remaining, size=num_windows - x_inds_subset.shape[0], replace=False)
+            x_inds_subset = np.concatenate((x_inds_subset, extra))
+
+        return np.sort(x_inds_subset)
+
     @staticmethod
     def crop_spect_vectors_keep_classes(lbl_tb,
                                         spect_id_vector,
@@ -769,7 +972,8 @@ class WindowDataset(VisionDataset):
 
         if all([vec is None for vec in [spect_id_vector, spect_inds_vector, x_inds]]):
             # see Notes in class docstring to understand what these vectors do
-            spect_id_vector, spect_inds_vector, x_inds = cls.spect_vectors_from_df(df, window_size)
+            with memory.stage('index windows'):
+                spect_id_vector, spect_inds_vector, x_inds = cls.spect_vectors_from_df(df, window_size)
 
         annots = annotation.from_df(df)
         timebin_dur = io.dataframe.validate_and_get_timebin_dur(df)
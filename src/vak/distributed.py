@@ -0,0 +1,158 @@
+"""helper functions for data-parallel training with multiple processes on one machine,
+using torch.distributed with the 'gloo' backend (works without a GPU)"""
+import logging
+import os
+import socket
+import sys
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+
+BACKEND = 'gloo'
+MASTER_ADDR = '127.0.0.1'
+
+
+def is_initialized():
+    """returns True if a torch.distributed process group has been initialized
+    in the current process"""
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_rank():
+    """rank of current process. Returns 0 if no process group is initialized."""
+    if is_initialized():
+        return dist.get_rank()
+    else:
+        return 0
+
+
+def get_world_size():
+    """number of processes in group. Returns 1 if no process group is initialized."""
+    if is_initialized():
+        return dist.get_world_size()
+    else:
+        return 1
+
+
+def is_main_process():
+    """returns True if current process has rank 0, or if no process group is initialized.
+    Used to make sure only one process saves checkpoints, logs, and computes validation metrics."""
+    return get_rank() == 0
+
+
+def broadcast_object(obj, src=0):
+    """broadcast a picklable object from process with rank ``src`` to all other processes.
+    Returns the object unchanged when no process group is initialized."""
+    if not is_initialized():
+        return obj
+    obj_list = [obj]
+    dist.broadcast_object_list(obj_list, src=src)
+    return obj_list[0]
+
+
+def find_free_port():
+    """find a free port on localhost that processes can use to rendezvous"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((MASTER_ADDR, 0))
+        return sock.getsockname()[1]
+
+
+def threads_per_process(world_size):
+    """number of intra-op threads each process should use,
+    so that processes don't oversubscribe the CPU cores"""
+    n_cpus = os.cpu_count() or 1
+    return max(1, n_cpus // world_size)
+
+
+def _worker(rank, world_size, master_port, fn, args):
+    """function run by each process started by ``spawn``.
+    Sets up process group, runs ``fn``, then tears down process group."""
+    os.environ['MASTER_ADDR'] = MASTER_ADDR
+    os.environ['MASTER_PORT'] = str(master_port)
+    torch.set_num_threads(threads_per_process(world_size))
+    dist.init_process_group(backend=BACKEND, rank=rank, world_size=world_size)
+    try:
+        fn(rank, world_size, *args)
+    finally:
+        dist.destroy_process_group()
+
+
+def spawn(fn, world_size, args=()):
+    """run a function in ``world_size`` processes that form a process group.
+
+    Parameters
+    ----------
+    fn : callable
+        function to run in each process. Called as ``fn(rank, world_size, *args)``.
+        Must be defined at the top level of a module so it can be pickled.
+    world_size : int
+        number of processes to start.
+    args : tuple
+        additional arguments passed to ``fn``. Must be picklable.
+    """
+    if world_size < 1:
+        raise ValueError(
+            f'world_size must be a positive integer but was: {world_size}'
+        )
+    master_port = find_free_port()
+    mp.spawn(_worker,
+             args=(world_size, master_port, fn, args),
+             nprocs=world_size,
+             join=True)
+
+
+def log_paths(logger):
+    """get paths of log files that a logger writes to,
+    so that a logger in another process can append to the same files
+
+    Parameters
+    ----------
+    logger : logging.Logger
+        instance created by vak.logging.get_logger. Can be None.
+
+    Returns
+    -------
+    log_paths : list
+        of str, paths to log files. Empty if logger is None.
+    """
+    if logger is None:
+        return []
+    return [handler.baseFilename for handler in logger.handlers
+            if isinstance(handler, logging.FileHandler)]
+
+
+def get_worker_logger(rank, logger_name, log_paths=None):
+    """get logger for a process in a process group.
+
+    The process with rank 0 gets a logger that appends to the same files as
+    the logger in the parent process, and logs to stdout.
+    All other processes get a logger that discards messages,
+    so logs are not duplicated once per process.
+
+    Parameters
+    ----------
+    rank : int
+        rank of process
+    logger_name : str
+        name of logger in parent process
+    log_paths : list
+        of str, paths to log files, returned by ``vak.distributed.log_paths``.
+
+    Returns
+    -------
+    logger : logging.Logger
+    """
+    logger = logging.getLogger(f'{logger_name}.rank{rank}')
+    logger.propagate = False
+    logger.handlers = []
+    if rank == 0:
+        logger.setLevel('INFO')
+        if log_paths:
+            for log_path in log_paths:
+                logger.addHandler(logging.FileHandler(log_path))
+        logger.addHandler(logging.StreamHandler(sys.stdout))
+    else:
+        logger.addHandler(logging.NullHandler())
+    return logger
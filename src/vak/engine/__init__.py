@@ -1 +1,3 @@
+from . import lockstep
 from . import model
+from . import timing
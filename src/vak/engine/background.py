@@ -0,0 +1,178 @@
+"""run validation in a separate process, so training does not wait for it"""
+import copy
+import queue
+
+import torch
+import torch.multiprocessing as mp
+import torch.utils.data
+
+
+class BackgroundValidator:
+    """computes metrics on validation sets in a separate process.
+
+    The training process saves a checkpoint snapshot and calls ``submit``;
+    the background process loads the network state from the snapshot,
+    computes metrics, and puts them on a queue tagged with the global step
+    of the snapshot. The training process collects results with ``poll`` or ``wait``.
+    Jobs are evaluated in the order they are submitted.
+
+    Parameters
+    ----------
+    model_class : class
+        vak.Model or a subclass, e.g. TweetyNetModel. Its _eval method
+        is used to compute metrics, so subclasses that override _eval work as expected.
+    network : torch.nn.Module
+        network of model being trained. A copy is sent to the background process,
+        so the network being trained is never modified by it.
+    loss : callable
+        loss function of model
+    metrics : dict
+        mapping metric names to callables, as for vak.Model
+    val_data : dict
+        that maps names of validation sets, e.g. 'val' and 'val_fast',
+        to torch.utils.data.DataLoader instances. The background process
+        makes its own DataLoaders with the same datasets and batch sizes.
+    device : str
+        device on which background process puts network and data. Default is 'cpu'.
+    num_threads : int
+        number of threads torch uses in background process.
+        Default is 1, so that validation does not compete too much with training for CPU.
+    """
+    def __init__(self,
+                 model_class,
+                 network,
+                 loss,
+                 metrics,
+                 val_data,
+                 device='cpu',
+                 num_threads=1):
+        # spawn (not fork) because forking a process that is already using threads for torch can deadlock
+        ctx = mp.get_context('spawn')
+        self.job_queue = ctx.Queue()
+        self.result_queue = ctx.Queue()
+        self.n_pending = 0
+
+        val_datasets = {split: (loader.dataset, loader.batch_size) for split, loader in val_data.items()}
+        self.process = ctx.Process(target=_validation_worker,
+                                   args=(model_class,
+                                         # copy, because sending a network to another process
+                                         # moves its parameters into shared memory
+                                         copy.deepcopy(network).cpu(),
+                                         loss,
+                                         metrics,
+                                         val_datasets,
+                                         device,
+                                         num_threads,
+                                         self.job_queue,
+                                         self.result_queue),
+                                   daemon=True)
+        self.process.start()
+
+    def submit(self, ckpt_path, epoch, global_step, splits):
+        """submit a job to the background process
+
+        Parameters
+        ----------
+        ckpt_path : pathlib.Path
+            checkpoint snapshot saved by vak.Model.save, with network state to evaluate
+        epoch : int
+            epoch when snapshot was saved
+        global_step : int
+            global step when snapshot was saved
+        splits : list
+            of str, names of validation sets to compute metrics on,
+            keys in the val_data dict used to create the BackgroundValidator
+        """
+        self.job_queue.put((ckpt_path, epoch, global_step, splits))
+        self.n_pending += 1
+
+    def _get_result(self, timeout):
+        result = self.result_queue.get(timeout=timeout)
+        self.n_pending -= 1
+        if isinstance(result, Exception):
+            raise RuntimeError(
+                'error in background validation process'
+            ) from result
+        return result
+
+    def poll(self):
+        """get results of all jobs that have finished, without blocking.
+
+        Returns
+        -------
+        results : list
+            of tuples (ckpt_path, epoch, global_step, metric_vals),
+            where metric_vals is a dict that maps names of validation sets to dicts of average metrics.
+        """
+        results = []
+        while self.n_pending > 0:
+            try:
+                results.append(self._get_result(timeout=0.01))
+            except queue.Empty:
+                break
+        return results
+
+    def wait(self):
+        """block until all submitted jobs have finished, and return their results.
+        Returns the same type as ``poll``."""
+        results = []
+        while self.n_pending > 0:
+            try:
+                results.append(self._get_result(timeout=1.0))
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError(
+                        f'background validation process exited with code {self.process.exitcode} '
+                        f'before finishing {self.n_pending} jobs'
+                    )
+        return results
+
+    def close(self):
+        """stop background process"""
+        if self.process.is_alive():
+            self.job_queue.put(None)
+            self.process.join(timeout=10)
+            if self.process.is_alive():
+                self.process.terminate()
+
+
+def _validation_worker(model_class,
+                       network,
+                       loss,
+                       metrics,
+                       val_datasets,
+                       device,
+                       num_threads,
+                       job_queue,
+                       result_queue):
+    """function run by background process. Evaluates checkpoints from job_queue
+    until it gets None, and puts results on result_queue"""
+    torch.set_num_threads(num_threads)
+    model = model_class(network=network, loss=loss, optimizer=None, metrics=metrics)
+    model.device = device
+    model.network.to(device)
+    # num_workers=0 because daemonic processes can't start DataLoader worker processes
+    val_data = {split: torch.utils.data.DataLoader(dataset=dataset,
+                                                   shuffle=False,
+                                                   batch_size=batch_size,
+                                                   num_workers=0)
+                for split, (dataset, batch_size) in val_datasets.items()}
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        ckpt_path, epoch, global_step, splits = job
+        try:
+            ckpt = torch.load(ckpt_path, map_location=device)
+            model.network.load_state_dict(ckpt['network_state_dict'])
+            metric_vals = {}
+            for split in splits:
+                split_metric_vals = model._eval(val_data[split])
+                metric_vals[split] = {metric_name: metric_value
+                                      for metric_name, metric_value in split_metric_vals.items()
+                                      if metric_name.startswith('avg_')}
+        except Exception as e:
+            result_queue.put(e)
+        else:
+            result_queue.put((ckpt_path, epoch, global_step, metric_vals))
@@ -0,0 +1,160 @@
+"""train several models in lockstep, so they share one pass through the training data"""
+import time
+
+from tqdm import tqdm
+
+from .. import memory
+from ..device import get_default as get_default_device
+from ..logging import log_or_print
+from .timing import ThroughputMeter
+
+
+def fit_lockstep(models_map,
+                 train_data,
+                 num_epochs,
+                 ckpt_roots,
+                 val_data=None,
+                 val_step=None,
+                 ckpt_step=None,
+                 patience=None,
+                 device=None,
+                 fast_val_data=None,
+                 full_val_every=None,
+                 background_val=False,
+                 logger=None,
+                 ):
+    """fit several models in lockstep: each batch loaded from train_data
+    is used for one training step of every model, before loading the next batch.
+    This way the cost of loading and transforming data is paid once,
+    instead of once per model.
+
+    Each model keeps its own optimizer, global step, checkpoints, and summary writer,
+    and validation, checkpointing, and early stopping work the same as they do for vak.Model.fit.
+    A model that stops early is removed from the lockstep, and the rest keep training.
+
+    Parameters
+    ----------
+    models_map : dict
+        that maps model names to vak.Model instances,
+        returned by vak.models.from_model_config_map
+    train_data : torch.utils.data.DataLoader
+        yields batches of windows from a WindowDataset
+    num_epochs : int
+        number of training epochs
+    ckpt_roots : dict
+        that maps model names to directories where checkpoints for that model are saved
+    val_data : torch.utils.data.DataLoader
+        yields items from validation set. Default is None.
+    val_step : int
+        step on which to estimate accuracy using validation set. Default is None.
+    ckpt_step : int
+        step on which to save to checkpoint file. Default is None.
+    patience : int
+        number of validation steps to wait without performance on the
+        validation set improving before stopping the training. Default is None.
+    device : str
+        device on which to work with models + data. Default is None,
+        in which case vak.device.get_default is used.
+    fast_val_data : torch.utils.data.DataLoader
+        yields fixed subset of windows from validation set. Default is None.
+        See vak.Model.fit.
+    full_val_every : int
+        compute metrics on entire validation set every ``full_val_every`` validation steps,
+        when fast_val_data is specified. Default is None.
+    background_val : bool
+        if True, compute metrics on validation set in a separate process for each model.
+        Default is False.
+
+    Other Parameters
+    ----------------
+    logger : logging.Logger
+        instance created by vak.logging.get_logger. Default is None.
+    """
+    if device is None:
+        device = get_default_device()
+
+    for model_name, model in models_map.items():
+        model._setup_fit(ckpt_roots[model_name],
+                         val_data,
+                         val_step,
+                         patience,
+                         device,
+                         fast_val_data,
+                         full_val_every,
+                         background_val)
+
+    active_models = dict(models_map)
+    last_epoch = {}
+    try:
+        for epoch in range(1, num_epochs + 1):
+            log_or_print(f'epoch {epoch} / {num_epochs}', logger=logger, level='info')
+            if hasattr(train_data, 'sampler') and hasattr(train_data.sampler, 'set_epoch'):
+                train_data.sampler.set_epoch(epoch)
+            for model in active_models.values():
+                model.network.train()
+
+            for model in active_models.values():
+                if model.step_timer is not None:
+                    model.step_timer.start(model.global_step)
+
+            with memory.stage(f'epoch {epoch}'):
+                progress_bar = tqdm(train_data)
+                throughput = ThroughputMeter()
+                last_step_end = time.perf_counter()
+                for ind, batch in enumerate(progress_bar):
+                    # time to load and copy batch is shared by all models, so record it for each
+                    data_wait = time.perf_counter() - last_step_end
+                    throughput.data_loaded(n_windows=batch[0].shape[0])
+                    tic = time.perf_counter()
+                    # copy to device once, instead of once per model
+                    batch = [item.to(device) for item in batch]
+                    h2d = time.perf_counter() - tic
+                    for model in active_models.values():
+                        if model.step_timer is not None:
+                            model.step_timer.record('data_wait', data_wait)
+                            model.step_timer.record('h2d', h2d)
+
+                    losses = []
+                    for model_name, model in active_models.items():
+                        losses.append(f'{model_name}: {model._train_step(batch):.4f}')
+                    # before validating and saving checkpoints, so that time isn't counted in the step,
+                    # as in Model._train
+                    throughput.step_end()
+                    progress_bar.set_description(
+                        f'Epoch {epoch}, batch {ind}. Loss: {", ".join(losses)}'
+                    )
+                    for model in active_models.values():
+                        if model.global_step % model.THROUGHPUT_LOG_STEP == 0:
+                            model._log_throughput(throughput.as_dict(), split='train')
+
+                    for model_name, model in list(active_models.items()):
+                        stop_early = model._after_train_step(epoch,
+                                                             val_data,
+                                                             val_step,
+                                                             ckpt_step,
+                                                             fast_val_data,
+                                                             full_val_every)
+                        if model.step_timer is not None:
+                            model.step_timer.step_end(model.global_step)
+                        if stop_early:
+                            log_or_print(f'stopped training {model_name} early', logger=logger, level='info')
+                            last_epoch[model_name] = epoch
+                            del active_models[model_name]
+                    if not active_models:
+                        progress_bar.close()
+                        break
+                    # so time spent validating or saving checkpoints doesn't count as waiting for data
+                    throughput.start()
+                    last_step_end = time.perf_counter()
+
+            if not active_models:
+                break
+
+        for model_name, model in models_map.items():
+            model._finish_fit(last_epoch.get(model_name, num_epochs),
+                              num_epochs,
+                              val_data,
+                              fast_val_data)
+    finally:
+        for model in models_map.values():
+            model._close_validator()
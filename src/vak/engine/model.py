@@ -1,10 +1,17 @@
 from collections import defaultdict
+import contextlib
+import os
 
 import torch
 import torch.nn.modules.loss
 import torch.optim
 from tqdm import tqdm
 
+from .. import distributed
+from .. import memory
+from .. import profiling
+from .background import BackgroundValidator
+from .timing import ThroughputMeter
 from ..device import get_default as get_default_device
 from ..labeled_timebins import lbl_tb2labels
 from ..logging import log_or_print
@@ -62,6 +69,9 @@ class Model:
         'metrics',
     ]
 
+    # number of training steps between logging rolling averages of throughput
+    THROUGHPUT_LOG_STEP = 100
+
     def __init__(self,
                  network,
                  loss,
@@ -69,7 +79,8 @@ class Model:
                  metrics,
                  logger=None,
                  summary_writer=None,
-                 global_step=0):
+                 global_step=0,
+                 step_timer=None):
         self.network = network
         self.optimizer = optimizer
         self.loss = loss
@@ -78,14 +89,17 @@ class Model:
         self.logger = logger
         self.summary_writer = summary_writer
         self.global_step = global_step  # used for summary writer
+        self.step_timer = step_timer  # vak.engine.timing.StepTimer, records time of each phase of training steps
 
         # attributes set by fit / _train methods
         self.device = None
+        self._train_network = network  # wrapped with DistributedDataParallel by fit, when training with many processes
         self.ckpt_path = None
         self.max_val_acc = 0
         self.max_val_acc_ckpt_path = None
         self.patience = None
         self.patience_counter = 0
+        self._validator = None  # BackgroundValidator, set by fit when validating in background
 
     def _train(self,
                train_data,
@@ -93,6 +107,8 @@ class Model:
                val_data=None,
                val_step=None,
                ckpt_step=None,
+               fast_val_data=None,
+               full_val_every=None,
                ):
         """helper method, called by the fit method on each epoch.
         Iterates once through train_data, using it to update model parameters.
@@ -102,79 +118,284 @@ class Model:
         ----------
         train_data : torch.util.Dataloader
             instance that will be iterated over.
+        fast_val_data : torch.util.Dataloader
+            yields a fixed subset of windows from the validation set.
+            If specified, metrics on this subset are computed on each validation step
+            and used to decide whether to save the max-val-acc checkpoint and whether to stop early.
+            Default is None, in which case val_data is used.
+        full_val_every : int
+            when fast_val_data is specified, compute metrics on the entire validation set
+            every ``full_val_every`` validation steps. Default is None, in which case
+            the entire validation set is only used at the end of training.
         """
         self.network.train()
 
-        progress_bar = tqdm(train_data)
+        # only show progress from one process, when training with multiple processes
+        progress_bar = tqdm(train_data, disable=not distributed.is_main_process())
+        if self.step_timer is not None:
+            self.step_timer.start(self.global_step)
+        throughput = ThroughputMeter()
         for ind, batch in enumerate(progress_bar):
-            x, y = batch[0].to(self.device), batch[1].to(self.device)
-            y_pred = self.network.forward(x)
-            self.optimizer.zero_grad()
+            throughput.data_loaded(n_windows=batch[0].shape[0])
+            if self.step_timer is not None:
+                self.step_timer.data_loaded()
+            with self._phase('h2d'):
+                batch = [item.to(self.device) for item in batch]
+            loss = self._train_step(batch)
+            throughput.step_end()
+            progress_bar.set_description(
+                f'Epoch {epoch}, batch {ind}. Loss: {loss:.4f}. Global step: {self.global_step}'
+            )
+            if self.global_step % self.THROUGHPUT_LOG_STEP == 0:
+                self._log_throughput(throughput.as_dict(), split='train')
+            stop_early = self._after_train_step(epoch,
+                                                val_data,
+                                                val_step,
+                                                ckpt_step,
+                                                fast_val_data,
+                                                full_val_every)
+            if self.step_timer is not None:
+                self.step_timer.step_end(self.global_step)
+            if stop_early:
+                progress_bar.close()
+                break
+            # so time spent validating or saving checkpoints doesn't count as waiting for data
+            throughput.start()
+
+    def _log_throughput(self, throughput, split='train'):
+        """helper method that logs throughput, and adds it to the summary writer
+        with tags like ``throughput/train_windows_per_sec``
+
+        Parameters
+        ----------
+        throughput : dict
+            returned by vak.engine.timing.ThroughputMeter.as_dict
+        split : str
+            used as prefix of tags for summary writer. Default is 'train'.
+        """
+        log_or_print(f'{split} throughput: {throughput["windows_per_sec"]:.1f} windows/s, '
+                     f'{throughput["batches_per_sec"]:.2f} batches/s, '
+                     f'fraction of time waiting for data: {throughput["data_wait_fraction"]:.3f}',
+                     logger=self.logger, level='info')
+        if self.summary_writer is not None:
+            for name, value in throughput.items():
+                self.summary_writer.add_scalar(f'throughput/{split}_{name}', value, self.global_step)
+
+    def _phase(self, name):
+        """returns context manager that records time of a phase of a training step
+        with self.step_timer, or that does nothing if there is no step timer"""
+        if self.step_timer is not None:
+            return self.step_timer.phase(name)
+        else:
+            return contextlib.nullcontext()
+
+    def _train_step(self, batch):
+        """helper method, called by _train on each batch.
+        Updates model parameters with one batch, and increments the global step.
+
+        Parameters
+        ----------
+        batch : tuple
+            (window, label vector) returned by iterating over a DataLoader with a WindowDataset,
+            already on ``self.device``. Copied by the caller, so that ``vak.engine.lockstep``
+            copies each batch once for all models.
+
+        Returns
+        -------
+        loss : float
+            value of loss function for batch
+        """
+        x, y = batch[0], batch[1]
+        with self._phase('forward'):
+            y_pred = self._train_network.forward(x)
             loss = self.loss(y_pred, y)
+        with self._phase('backward'):
+            self.optimizer.zero_grad()
             loss.backward()
+        with self._phase('optimizer_step'):
             self.optimizer.step()
-            progress_bar.set_description(
-                f'Epoch {epoch}, batch {ind}. Loss: {loss.item():.4f}. Global step: {self.global_step}'
-            )
 
-            if self.summary_writer is not None:
-                self.summary_writer.add_scalar('loss/train', loss.item(), self.global_step)
-            self.global_step += 1
+        if self.summary_writer is not None:
+            self.summary_writer.add_scalar('loss/train', loss.item(), self.global_step)
+        self.global_step += 1
+        return loss.item()
+
+    def _after_train_step(self,
+                          epoch,
+                          val_data=None,
+                          val_step=None,
+                          ckpt_step=None,
+                          fast_val_data=None,
+                          full_val_every=None,
+                          ):
+        """helper method, called by _train after each training step.
+        Computes metrics on the validation set if this is a validation step,
+        and saves a checkpoint if this is a checkpoint step.
+        Parameters are the same as for _train.
 
-            if val_data is not None:
-                if self.global_step % val_step == 0:
-                    log_or_print(f'Step {self.global_step} is a validation step; computing metrics on validation set',
+        Returns
+        -------
+        stop_early : bool
+            if True, accuracy on the validation set has not improved
+            for more validation steps than patience, or a profiler is running
+            and the model has trained for the maximum number of steps, and training should stop.
+        """
+        if val_data is not None:
+            if self.global_step % val_step == 0:
+                # when training with multiple processes, only the main process computes validation metrics
+                if distributed.is_main_process() and self._validator is not None:
+                    # handle results that finished since last validation step, then submit this step
+                    self._handle_background_val_results(self._validator.poll())
+                    splits = ['val_fast'] if fast_val_data is not None else ['val']
+                    val_step_num = self.global_step // val_step
+                    if (fast_val_data is not None and full_val_every is not None and
+                            val_step_num % full_val_every == 0):
+                        splits.append('val')
+                    log_or_print(f'Step {self.global_step} is a validation step; saving snapshot '
+                                 f'to compute metrics in background on: {", ".join(splits)}',
                                  logger=self.logger, level='info')
-                    metric_vals = self._eval(val_data)
+                    snapshot_path = self.ckpt_path.parent.joinpath(f'val-snapshot-{self.global_step}.pt')
+                    self.save(snapshot_path, epoch=epoch, global_step=self.global_step)
+                    self._validator.submit(snapshot_path, epoch, self.global_step, splits)
+                elif distributed.is_main_process():
+                    if fast_val_data is not None:
+                        log_or_print(f'Step {self.global_step} is a validation step; computing metrics on '
+                                     'fixed subset of windows from validation set',
+                                     logger=self.logger, level='info')
+                        metric_vals = self._eval(fast_val_data)
+                        self._log_val_metrics(metric_vals, split='val_fast')
+                        val_step_num = self.global_step // val_step
+                        if full_val_every is not None and val_step_num % full_val_every == 0:
+                            log_or_print(f'Validation step {val_step_num} is a full validation step; '
+                                         'computing metrics on entire validation set',
+                                         logger=self.logger, level='info')
+                            self._log_val_metrics(self._eval(val_data), split='val')
+                    else:
+                        log_or_print(f'Step {self.global_step} is a validation step; '
+                                     'computing metrics on validation set',
+                                     logger=self.logger, level='info')
+                        metric_vals = self._eval(val_data)
+                        self._log_val_metrics(metric_vals, split='val')
                     self.network.train()  # because _eval calls network.eval()
-                    log_or_print(msg=', '.join([f'{metric_name}: {metric_value:.4f}'
-                                                for metric_name, metric_value in metric_vals.items()
-                                                if metric_name.startswith('avg_')]),
-                                 logger=self.logger, level='info')
+                    self._update_max_val_acc(metric_vals, epoch, self.global_step)
+
+                # main process tells any other processes whether to stop early. No-op with a single process
+                self.patience_counter = distributed.broadcast_object(self.patience_counter)
+                if self.patience and self.patience_counter > self.patience:
+                    log_or_print(
+                        'Stopping training early, '
+                        f'accuracy has not improved in {self.patience} validation steps.',
+                        logger=self.logger, level='info')
+                    # save "backup" checkpoint upon stopping; don't save over "max-val-acc" checkpoint
+                    self.save(self.ckpt_path, epoch=epoch, global_step=self.global_step)
+                    return True
+
+        # below can be true regardless of whether we have val_data and/or current epoch is a val_epoch
+        if self.global_step % ckpt_step == 0:
+            log_or_print(f'Step {self.global_step} is a checkpoint step.',
+                         logger=self.logger, level='info')
+            self.save(self.ckpt_path, epoch=epoch, global_step=self.global_step)
 
-                    if self.summary_writer is not None:
-                        for metric_name, metric_value in metric_vals.items():
-                            if metric_name.startswith('avg_'):
-                                self.summary_writer.add_scalar(f'{metric_name}/val',
-                                                               metric_value,
-                                                               self.global_step)
-
-                    current_val_acc = metric_vals['avg_acc']
-                    if current_val_acc > self.max_val_acc:
-                        self.max_val_acc = current_val_acc
-                        log_or_print(msg=f'Accuracy on validation set improved. Saving max-val-acc checkpoint.',
-                                     logger=self.logger, level='info')
-                        self.save(self.max_val_acc_ckpt_path, epoch=epoch, global_step=self.global_step)
-                        if self.patience:
-                            self.patience_counter = 0
-                    else:  # if accuracy did not improve
-                        if self.patience:
-                            self.patience_counter += 1
-                            if self.patience_counter > self.patience:
-                                log_or_print(
-                                    'Stopping training early, '
-                                    f'accuracy has not improved in {self.patience} validation steps.',
-                                    logger=self.logger, level='info')
-                                # save "backup" checkpoint upon stopping; don't save over "max-val-acc" checkpoint
-                                self.save(self.ckpt_path, epoch=epoch, global_step=self.global_step)
-                                progress_bar.close()
-                                break
-                            else:
-                                log_or_print(
-                                    f'Accuracy has not improved in {self.patience_counter} validation steps. '
-                                    f'Not saving max-val-acc checkpoint for this validation step.',
-                                    logger=self.logger, level='info')
-                        else:  # patience is None. We still log that we are not saving checkpoint.
-                            log_or_print(
-                                'Accuracy is less than maximum validation accuracy so far. '
-                                'Not saving max-val-acc checkpoint.',
-                                logger=self.logger, level='info')
-
-            # below can be true regardless of whether we have val_data and/or current epoch is a val_epoch
-            if self.global_step % ckpt_step == 0:
-                log_or_print(f'Step {self.global_step} is a checkpoint step.',
+        if profiling.stop_training(self.global_step):
+            log_or_print(f'Stopping training at step {self.global_step}, '
+                         'the maximum number of steps when profiling.',
+                         logger=self.logger, level='info')
+            return True
+
+        return False
+
+    def _update_max_val_acc(self, metric_vals, epoch, global_step, snapshot_path=None):
+        """helper method that uses accuracy on the validation set to decide
+        whether to save the max-val-acc checkpoint, and updates the patience counter.
+
+        Parameters
+        ----------
+        metric_vals : dict
+            returned by _eval
+        epoch : int
+            epoch when metrics were computed
+        global_step : int
+            global step when metrics were computed
+        snapshot_path : pathlib.Path
+            checkpoint snapshot saved at global_step, when metrics were computed
+            in the background. If accuracy improved, the snapshot becomes the max-val-acc checkpoint,
+            otherwise it is removed. Default is None, in which case the current state of
+            the model is saved if accuracy improved.
+        """
+        current_val_acc = metric_vals['avg_acc']
+        if current_val_acc > self.max_val_acc:
+            self.max_val_acc = current_val_acc
+            log_or_print(msg=f'Accuracy on validation set improved. Saving max-val-acc checkpoint.',
+                         logger=self.logger, level='info')
+            if snapshot_path is not None:
+                log_or_print(f'Using checkpoint snapshot from step {global_step} as max-val-acc checkpoint',
                              logger=self.logger, level='info')
-                self.save(self.ckpt_path, epoch=epoch, global_step=self.global_step)
+                os.replace(snapshot_path, self.max_val_acc_ckpt_path)
+            else:
+                self.save(self.max_val_acc_ckpt_path, epoch=epoch, global_step=global_step)
+            if self.patience:
+                self.patience_counter = 0
+        else:  # if accuracy did not improve
+            if snapshot_path is not None:
+                os.remove(snapshot_path)
+            if self.patience:
+                self.patience_counter += 1
+                if self.patience_counter <= self.patience:
+                    log_or_print(
+                        f'Accuracy has not improved in {self.patience_counter} validation steps. '
+                        f'Not saving max-val-acc checkpoint for this validation step.',
+                        logger=self.logger, level='info')
+            else:  # patience is None. We still log that we are not saving checkpoint.
+                log_or_print(
+                    'Accuracy is less than maximum validation accuracy so far. '
+                    'Not saving max-val-acc checkpoint.',
+                    logger=self.logger, level='info')
+
+    def _handle_background_val_results(self, results):
+        """helper method that logs metrics computed in the background by a BackgroundValidator,
+        and uses them to update the max-val-acc checkpoint and the patience counter
+
+        Parameters
+        ----------
+        results : list
+            returned by BackgroundValidator.poll or BackgroundValidator.wait
+        """
+        for snapshot_path, epoch, global_step, metric_vals in results:
+            log_or_print(f'Received metrics computed in background for step {global_step}',
+                         logger=self.logger, level='info')
+            for split, split_metric_vals in metric_vals.items():
+                self._log_val_metrics(split_metric_vals, split=split, global_step=global_step)
+            # the fixed subset of windows decides, when validating on it, see _train
+            decision_split = 'val_fast' if 'val_fast' in metric_vals else 'val'
+            self._update_max_val_acc(metric_vals[decision_split], epoch, global_step, snapshot_path)
+
+    def _log_val_metrics(self, metric_vals, split='val', global_step=None):
+        """helper method that logs average metrics computed by _eval on a validation set,
+        and adds them to the summary writer, with tags like ``avg_acc/val``
+
+        Parameters
+        ----------
+        metric_vals : dict
+            returned by _eval
+        split : str
+            used as suffix of tag for summary writer. Default is 'val'.
+        global_step : int
+            global step when metrics were computed. Default is None,
+            in which case the current global step is used.
+        """
+        if global_step is None:
+            global_step = self.global_step
+        log_or_print(msg=f'{split}: ' + ', '.join([f'{metric_name}: {metric_value:.4f}'
+                                                    for metric_name, metric_value in metric_vals.items()
+                                                    if metric_name.startswith('avg_')]),
+                     logger=self.logger, level='info')
+
+        if self.summary_writer is not None:
+            for metric_name, metric_value in metric_vals.items():
+                if metric_name.startswith('avg_'):
+                    self.summary_writer.add_scalar(f'{metric_name}/{split}',
+                                                   metric_value,
+                                                   global_step)
 
     def _eval(self, eval_data):
         """helper method, called by the evaluate method, and called by the fit
@@ -185,7 +406,10 @@ class Model:
         Parameters
         ----------
         eval_data : torch.util.Dataloader
-            instance that will be iterated over.
+            instance that will be iterated over. Either yields dicts from a VocalDataset,
+            where each batch is all the windows from one spectrogram, or yields (window, label vector)
+            tuples from a WindowDataset, in which case all windows in a batch
+            are treated as one sequence when computing metrics.
         """
         self.network.eval()
 
@@ -194,18 +418,27 @@ class Model:
         n_batches = 0
 
         progress_bar = tqdm(eval_data)
+        # average over entire pass through eval_data
+        throughput = ThroughputMeter(window=max(len(eval_data), 1))
         with torch.no_grad():
             for ind, batch in enumerate(progress_bar):
-                x, y = batch['source'].to(self.device), batch['annot'].to(self.device)
-                # remove "batch" dimension added by collate_fn to x
-                # we keep for y because loss still expects the first dimension to be batch
-                if x.ndim == 5:
-                    if x.shape[0] == 1:
-                        x = torch.squeeze(x, dim=0)
+                if isinstance(batch, dict):
+                    throughput.data_loaded(n_windows=batch['source'].shape[-4])
+                    x, y = batch['source'].to(self.device), batch['annot'].to(self.device)
+                    # remove "batch" dimension added by collate_fn to x
+                    # we keep for y because loss still expects the first dimension to be batch
+                    if x.ndim == 5:
+                        if x.shape[0] == 1:
+                            x = torch.squeeze(x, dim=0)
+                    else:
+                        raise ValueError(
+                            f'invalid shape for x: {x.shape}'
+                        )
                 else:
-                    raise ValueError(
-                        f'invalid shape for x: {x.shape}'
-                    )
+                    throughput.data_loaded(n_windows=batch[0].shape[0])
+                    x, y = batch[0].to(self.device), batch[1].to(self.device)
+                    # concatenate label vectors from windows, to match shape of output after it's flattened below
+                    y = torch.unsqueeze(torch.flatten(y), dim=0)
 
                 out = self.network.forward(x)
                 # permute and flatten out
@@ -217,7 +450,7 @@ class Model:
                 # reduce to predictions, assuming class dimension is 1
                 y_pred = torch.argmax(out, dim=1)  # y_pred has dims (batch size 1, predicted label per time bin)
 
-                if 'padding_mask' in batch:
+                if isinstance(batch, dict) and 'padding_mask' in batch:
                     padding_mask = batch['padding_mask']  # boolean: 1 where valid, 0 where padding
                     # remove "batch" dimension added by collate_fn
                     # because this extra dimension just makes it confusing to use the mask as indices
@@ -263,6 +496,7 @@ class Model:
                         )
 
                 n_batches += 1
+                throughput.step_end()
                 progress_bar.set_description(
                     f'batch {ind} / {len(eval_data)}'
                 )
@@ -280,6 +514,8 @@ class Model:
                     f'calculation of metric across batches not yet implemented for {metric_name}'
                 )
 
+        self._log_throughput(throughput.as_dict(), split='eval')
+
         return metric_vals
 
     def _predict(self, pred_data):
@@ -328,6 +564,10 @@ class Model:
         kwargs :
             keyword arguments; if there are any, they will be added to checkpoint
         """
+        if not distributed.is_main_process():
+            # only one process saves checkpoints when training with multiple processes
+            return
+
         ckpt = {
             'network_state_dict': self.network.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
@@ -336,7 +576,8 @@ class Model:
         log_or_print(
             f'Saving checkpoint at:\n{ckpt_path} ',
             logger=self.logger, level='info')
-        torch.save(ckpt, ckpt_path)
+        with self._phase('checkpoint'):
+            torch.save(ckpt, ckpt_path)
 
     def load(self, ckpt_path):
         """load model state dict from a checkpoint file.
@@ -365,8 +606,59 @@ class Model:
             val_step=None,
             ckpt_step=None,
             patience=None,
-            device=None
+            device=None,
+            fast_val_data=None,
+            full_val_every=None,
+            background_val=False,
             ):
+        self._setup_fit(ckpt_root,
+                        val_data,
+                        val_step,
+                        patience,
+                        device,
+                        fast_val_data,
+                        full_val_every,
+                        background_val)
+
+        # ---- actually do fitting ----------
+        try:
+            for epoch in range(1, num_epochs + 1):
+                log_or_print(f'epoch {epoch} / {num_epochs}', logger=self.logger, level='info')
+                if hasattr(train_data, 'sampler') and hasattr(train_data.sampler, 'set_epoch'):
+                    # so samplers like vak.datasets.DistributedWindowSampler shuffle differently each epoch
+                    train_data.sampler.set_epoch(epoch)
+                with memory.stage(f'epoch {epoch}'):
+                    self._train(train_data,
+                                epoch,
+                                val_data,
+                                val_step,
+                                ckpt_step,
+                                fast_val_data,
+                                full_val_every)
+                if patience is not None:
+                    if self.patience_counter > self.patience:
+                        # need to break here too, not just inside _train function
+                        break
+                if profiling.stop_training(self.global_step):
+                    break
+
+            self._finish_fit(epoch, num_epochs, val_data, fast_val_data)
+        finally:
+            self._close_validator()
+
+    def _setup_fit(self,
+                   ckpt_root,
+                   val_data=None,
+                   val_step=None,
+                   patience=None,
+                   device=None,
+                   fast_val_data=None,
+                   full_val_every=None,
+                   background_val=False,
+                   ):
+        """helper method, called by the fit method before training.
+        Checks arguments, sets attributes used during training, and puts network on device.
+        Parameters are the same as for fit."""
         # ---- pre-conditions ----------
         if val_data is None:
             if patience is not None:
@@ -377,6 +669,18 @@ class Model:
                 raise ValueError(
                     f'val_step set to {val_step}, but no validation dataset was provided to measure accuracy'
                 )
+            if fast_val_data is not None:
+                raise ValueError(
+                    'fast_val_data was provided, but no validation dataset was provided'
+                )
+            if background_val:
+                raise ValueError(
+                    'background_val is True, but no validation dataset was provided'
+                )
+        if full_val_every is not None and fast_val_data is None:
+            raise ValueError(
+                f'full_val_every set to {full_val_every}, but no fast_val_data was provided'
+            )
 
         # ---- set attributes ----------
         if device is None:
@@ -398,24 +702,60 @@ class Model:
             self.patience_counter = 0
 
         self.network.to(self.device)
+        if distributed.is_initialized():
+            # average gradients across processes on each backward pass.
+            # We keep self.network unwrapped, so evaluation and checkpoints only ever touch one process
+            self._train_network = torch.nn.parallel.DistributedDataParallel(self.network)
+        else:
+            self._train_network = self.network
+
+        if background_val and distributed.is_main_process():
+            background_val_data = {'val': val_data}
+            if fast_val_data is not None:
+                background_val_data['val_fast'] = fast_val_data
+            log_or_print('Starting process to compute metrics on validation set in background',
+                         logger=self.logger, level='info')
+            self._validator = BackgroundValidator(model_class=type(self),
+                                                  network=self.network,
+                                                  loss=self.loss,
+                                                  metrics=self.metrics,
+                                                  val_data=background_val_data,
+                                                  device=self.device)
+
+    def _finish_fit(self, epoch, num_epochs, val_data=None, fast_val_data=None):
+        """helper method, called by the fit method after the last training step.
+        Saves the final checkpoint, handles any metrics still being computed in the background,
+        and computes metrics on the entire validation set if only a subset was used during training.
 
-        # ---- actually do fitting ----------
-        for epoch in range(1, num_epochs + 1):
-            log_or_print(f'epoch {epoch} / {num_epochs}', logger=self.logger, level='info')
-            self._train(train_data,
-                        epoch,
-                        val_data,
-                        val_step,
-                        ckpt_step)
-            if patience is not None:
-                if self.patience_counter > self.patience:
-                    # need to break here too, not just inside _train function
-                    break
-
+        Parameters
+        ----------
+        epoch : int
+            last epoch of training
+        num_epochs : int
+            number of epochs that training would run for, if it did not stop early
+        """
         if epoch == num_epochs:  # save at end, if we complete all epochs (not if we stopped because of patience)
             log_or_print('Completed last epoch.', logger=self.logger, level='info')
             self.save(self.ckpt_path, epoch=epoch, global_step=self.global_step)
 
+        if self._validator is not None:
+            log_or_print('Waiting for metrics computed in background on validation set',
+                         logger=self.logger, level='info')
+            self._handle_background_val_results(self._validator.wait())
+            self._close_validator()
+
+        if fast_val_data is not None and distributed.is_main_process():
+            # validation steps only used subset of windows, so report metrics on entire set once at the end
+            log_or_print('Computing metrics on entire validation set with final model',
+                         logger=self.logger, level='info')
+            self._log_val_metrics(self._eval(val_data), split='val')
+
+    def _close_validator(self):
+        """stop process that computes metrics in background, if there is one"""
+        if self._validator is not None:
+            self._validator.close()
+            self._validator = None
+
     def evaluate(self,
                  eval_data,
                  device=None):
@@ -0,0 +1,223 @@
+"""record where time goes during training steps"""
+from collections import deque
+from contextlib import contextmanager
+import csv
+from pathlib import Path
+import time
+
+import torch
+import torch.profiler
+
+
+class StepTimer:
+    """records wall time of each phase of each training step.
+
+    At the end of each step, the time for each phase is written as a row
+    in a csv file, and added to a summary writer with tags like ``time/forward``.
+    Phases that did not happen during a step, e.g. checkpoint I/O on most steps,
+    are recorded as zero.
+
+    Optionally captures a trace with torch.profiler for a range of steps,
+    saved as a Chrome trace (open with chrome://tracing or https://ui.perfetto.dev).
+
+    Parameters
+    ----------
+    csv_path : str, pathlib.Path
+        path to csv file where times are saved. Default is None,
+        in which case times are not saved to a csv.
+    summary_writer : torch.utils.tensorboard.SummaryWriter
+        used to log times. Default is None, in which case times are not logged.
+    device : str
+        device on which model is trained. If 'cuda', ``torch.cuda.synchronize``
+        is called at the end of each phase, so times include the kernels
+        launched during that phase. Default is None.
+    trace_steps : list
+        of two ints, [start, stop]. The profiler starts at the beginning of global step ``start``,
+        and stops at the beginning of global step ``stop``. Default is None, in which case no trace is captured.
+    trace_dir : str, pathlib.Path
+        directory where trace is saved, as ``trace_steps_{start}-{stop}.json``.
+        Required if trace_steps is specified.
+    """
+    PHASES = (
+        'data_wait',
+        'h2d',
+        'forward',
+        'backward',
+        'optimizer_step',
+        'checkpoint',
+    )
+
+    def __init__(self,
+                 csv_path=None,
+                 summary_writer=None,
+                 device=None,
+                 trace_steps=None,
+                 trace_dir=None):
+        if trace_steps is not None:
+            if trace_dir is None:
+                raise ValueError(
+                    'must specify trace_dir when specifying trace_steps'
+                )
+            if len(trace_steps) != 2 or trace_steps[0] >= trace_steps[1]:
+                raise ValueError(
+                    f'trace_steps must be two integers [start, stop] where start < stop, but was: {trace_steps}'
+                )
+
+        self.summary_writer = summary_writer
+        self.synchronize = device is not None and str(device).startswith('cuda')
+        self.trace_steps = trace_steps
+        self.trace_dir = Path(trace_dir) if trace_dir is not None else None
+        self.trace_path = None
+        self.profiler = None
+
+        if csv_path is not None:
+            self._csv_file = open(csv_path, 'w', newline='')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(('global_step',) + self.PHASES)
+        else:
+            self._csv_file = None
+            self._csv_writer = None
+
+        self.times = dict.fromkeys(self.PHASES, 0.)
+        self._last_step_end = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """context manager that adds the time spent inside it to phase ``name``.
+        When the profiler is running, the phase is also labeled in the trace."""
+        if self.profiler is not None:
+            with torch.profiler.record_function(name):
+                tic = time.perf_counter()
+                yield
+                if self.synchronize:
+                    torch.cuda.synchronize()
+        else:
+            tic = time.perf_counter()
+            yield
+            if self.synchronize:
+                torch.cuda.synchronize()
+        self.times[name] += time.perf_counter() - tic
+
+    def record(self, name, seconds):
+        """add ``seconds`` to the time for phase ``name``"""
+        self.times[name] += seconds
+
+    def start(self, global_step):
+        """call at the start of each epoch, with the current global step.
+        Marks the start so time spent waiting for the first batch
+        does not include whatever happened before, e.g. validation,
+        and starts the profiler if the first step of this epoch is the start of trace_steps."""
+        if self.trace_steps is not None and global_step == self.trace_steps[0] and self.profiler is None:
+            self._start_profiler()
+        self._last_step_end = time.perf_counter()
+
+    def data_loaded(self):
+        """call right after getting a batch from a DataLoader.
+        Records time since the end of the last step as time waiting for data."""
+        self.record('data_wait', time.perf_counter() - self._last_step_end)
+
+    def step_end(self, global_step):
+        """call at the end of each training step, with the global step after that step.
+        Writes times for the step, resets them, and starts or stops the profiler
+        if the next step is the start or stop of trace_steps."""
+        if self._csv_writer is not None:
+            self._csv_writer.writerow([global_step - 1] + [self.times[phase] for phase in self.PHASES])
+        if self.summary_writer is not None:
+            for phase in self.PHASES:
+                self.summary_writer.add_scalar(f'time/{phase}', self.times[phase], global_step - 1)
+        self.times = dict.fromkeys(self.PHASES, 0.)
+
+        if self.trace_steps is not None:
+            if global_step == self.trace_steps[0] and self.profiler is None:
+                self._start_profiler()
+            elif global_step == self.trace_steps[1] and self.profiler is not None:
+                self._stop_profiler()
+
+        self._last_step_end = time.perf_counter()
+
+    def _start_profiler(self):
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self.profiler = torch.profiler.profile(activities=activities, record_shapes=True)
+        self.profiler.start()
+
+    def _stop_profiler(self):
+        self.profiler.stop()
+        start, stop = self.trace_steps
+        self.trace_path = self.trace_dir.joinpath(f'trace_steps_{start}-{stop}.json')
+        self.profiler.export_chrome_trace(str(self.trace_path))
+        self.profiler = None
+
+    def close(self):
+        """close csv file, and stop profiler if it is still running,
+        e.g. because training ended before the last step in trace_steps"""
+        if self.profiler is not None:
+            self._stop_profiler()
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv_writer = None
+
+
+class ThroughputMeter:
+    """computes rolling averages of throughput while iterating over a DataLoader,
+    and of the fraction of time spent waiting for the DataLoader to return a batch.
+
+    A high wait fraction means the model is starved for data,
+    and that e.g. increasing num_workers or caching data would speed up training.
+
+    Parameters
+    ----------
+    window : int
+        number of most recent batches to average over. Default is 100.
+    """
+    def __init__(self, window=100):
+        self.waits = deque(maxlen=window)
+        self.durations = deque(maxlen=window)
+        self.n_windows = deque(maxlen=window)
+        self._wait = 0.
+        self._n_windows = 0
+        self._last_step_end = time.perf_counter()
+
+    def start(self):
+        """mark the point from which time waiting for the next batch is measured.
+        Call before starting to iterate, and after any work between batches that
+        should not count as part of a step, e.g. validation."""
+        self._last_step_end = time.perf_counter()
+
+    def data_loaded(self, n_windows):
+        """call right after getting a batch, with the number of windows in the batch"""
+        self._wait = time.perf_counter() - self._last_step_end
+        self._n_windows = n_windows
+
+    def step_end(self):
+        """call after the batch has been used"""
+        now = time.perf_counter()
+        self.waits.append(self._wait)
+        self.durations.append(now - self._last_step_end)
+        self.n_windows.append(self._n_windows)
+        self._last_step_end = now
+
+    @property
+    def windows_per_sec(self):
+        total = sum(self.durations)
+        return sum(self.n_windows) / total if total > 0 else 0.
+
+    @property
+    def batches_per_sec(self):
+        total = sum(self.durations)
+        return len(self.durations) / total if total > 0 else 0.
+
+    @property
+    def data_wait_fraction(self):
+        total = sum(self.durations)
+        return sum(self.waits) / total if total > 0 else 0.
+
+    def as_dict(self):
+        """returns rolling averages as a dict"""
+        return {
+            'windows_per_sec': self.windows_per_sec,
+            'batches_per_sec': self.batches_per_sec,
+            'data_wait_fraction': self.data_wait_fraction,
+        }
@@ -1,2 +1,4 @@
 from .files import find_fname, from_dir
+from . import audio
+from . import container
 from . import spect
@@ -0,0 +1,184 @@
+"""load audio files as memory-mapped arrays, so that samples are read from disk
+only when they are accessed. Used to make spectrograms from very long recordings
+one chunk at a time, with ``vak.spect.spectrogram_chunked``.
+
+Compressed files, e.g. FLAC, can't be memory-mapped, so they are loaded
+as a ``SoundFileArray``, that decodes only the block of samples that is sliced.
+"""
+from pathlib import Path
+
+import numpy as np
+import soundfile
+from evfuncs import readrecf
+from scipy.io import wavfile
+
+from .. import constants
+
+
+def load_wav_mmap(wav_path):
+    """load a .wav file as a memory-mapped array
+
+    Parameters
+    ----------
+    wav_path : str, pathlib.Path
+        path to .wav file
+
+    Returns
+    -------
+    samp_freq : int
+        sampling frequency in Hz
+    dat : numpy.memmap
+        audio signal, read-only
+
+    Notes
+    -----
+    Uses ``scipy.io.wavfile.read`` with ``mmap=True``, that does not support
+    all .wav files, e.g. files with 24-bit samples.
+    """
+    return wavfile.read(wav_path, mmap=True)
+
+
+def load_cbin_mmap(cbin_path, channel=0):
+    """load a .cbin file output by EvTAF as a memory-mapped array
+
+    Parameters
+    ----------
+    cbin_path : str, pathlib.Path
+        path to .cbin file. The .rec file with the same name must be in the same directory.
+    channel : int
+        channel in file to load. Default is 0.
+
+    Returns
+    -------
+    samp_freq : int
+        sampling frequency in Hz
+    dat : numpy.memmap
+        audio signal, read-only, a strided view when the file has more than one channel
+
+    Notes
+    -----
+    Returns the same signal as ``evfuncs.load_cbin``, that reads the whole file.
+    """
+    cbin_path = Path(cbin_path)
+    rec_dict = readrecf(cbin_path.parent.joinpath(cbin_path.stem + '.rec'))
+    # .cbin files are big endian, 16 bit signed int
+    dat = np.memmap(cbin_path, dtype='>i2', mode='r')
+    dat = dat[channel::rec_dict['num_channels']]
+    return rec_dict['sample_freq'], dat
+
+
+class SoundFileArray:
+    """array-like access to samples in a compressed audio file, e.g. a .flac file,
+    that decodes samples with soundfile when the array is sliced,
+    so that the whole file is never decoded into memory at once.
+
+    Slices are decoded from the current position in the file when they are consecutive,
+    e.g. chunks in ``vak.spect.spectrogram_chunked``; otherwise the file is seeked first.
+
+    Parameters
+    ----------
+    audio_path : str, pathlib.Path
+        path to audio file, in a format supported by libsndfile
+    dtype : str
+        data type samples are decoded to. Default is None, in which case
+        it is determined by the subtype of the file, as by ``vak.constants.load_flac``.
+        If 'uint8', samples are decoded as int16 and converted with ``vak.constants.int16_to_uint8``.
+
+    Attributes
+    ----------
+    samp_freq : int
+        sampling frequency in Hz
+    shape : tuple
+        (number of samples,), or (number of samples, number of channels)
+        if there is more than one channel
+    dtype : numpy.dtype
+        of decoded samples
+    """
+    def __init__(self, audio_path, dtype=None):
+        self.audio_path = audio_path
+        info = soundfile.info(audio_path)
+        if dtype is None:
+            dtype = constants.SOUNDFILE_SUBTYPE_DTYPE_MAP.get(info.subtype, 'float32')
+        self.dtype = np.dtype(dtype)
+        self.samp_freq = info.samplerate
+        if info.channels == 1:
+            self.shape = (info.frames,)
+        else:
+            self.shape = (info.frames, info.channels)
+        self._soundfile = None
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError(
+                f'{type(self).__name__} can only be indexed with a slice with a step of 1, but got: {key}'
+            )
+        start, stop, _ = key.indices(self.shape[0])
+        stop = max(start, stop)
+        if self._soundfile is None:
+            self._soundfile = soundfile.SoundFile(self.audio_path)
+        if self._soundfile.tell() != start:
+            self._soundfile.seek(start)
+        if self.dtype == np.uint8:
+            return constants.int16_to_uint8(self._soundfile.read(stop - start, dtype='int16', always_2d=False))
+        return self._soundfile.read(stop - start, dtype=self.dtype.name, always_2d=False)
+
+    def close(self):
+        if self._soundfile is not None:
+            self._soundfile.close()
+            self._soundfile = None
+
+
+def load_flac_blocks(flac_path):
+    """load a .flac file as a ``vak.files.audio.SoundFileArray``,
+    that decodes blocks of samples when they are accessed
+
+    Parameters
+    ----------
+    flac_path : str, pathlib.Path
+        path to .flac file
+
+    Returns
+    -------
+    samp_freq : int
+        sampling frequency in Hz
+    dat : vak.files.audio.SoundFileArray
+        audio signal
+    """
+    dat = SoundFileArray(flac_path)
+    return dat.samp_freq, dat
+
+
+AUDIO_FORMAT_MMAP_FUNC_MAP = {
+    'cbin': load_cbin_mmap,
+    'flac': load_flac_blocks,
+    'wav': load_wav_mmap,
+}
+
+
+def load_mmap(audio_path, audio_format):
+    """load an audio file as a memory-mapped array,
+    or for compressed formats, an array that decodes samples when they are accessed
+
+    Parameters
+    ----------
+    audio_path : str, pathlib.Path
+        path to audio file
+    audio_format : str
+        format of audio file. One of {'wav', 'cbin', 'flac'}
+
+    Returns
+    -------
+    samp_freq : int
+        sampling frequency in Hz
+    dat : numpy.memmap, vak.files.audio.SoundFileArray
+        audio signal, read-only. A SoundFileArray for 'flac' files.
+    """
+    if audio_format not in AUDIO_FORMAT_MMAP_FUNC_MAP:
+        raise ValueError(
+            f"audio format must be one of '{list(AUDIO_FORMAT_MMAP_FUNC_MAP.keys())}'; "
+            f"format '{audio_format}' not recognized."
+        )
+    return AUDIO_FORMAT_MMAP_FUNC_MAP[audio_format](audio_path)
@@ -0,0 +1,381 @@
+"""single-file container for all the spectrograms in a dataset,
+so that a dataset is one file instead of thousands of small files.
+
+A container is an uncompressed zip file of .npy arrays, like a .npz file
+saved by ``numpy.savez``, with the file extension '.spectpack'.
+Spectrograms from all files are concatenated along the time axis in one array,
+saved with time as the first dimension, so that any range of time bins from a file
+is one contiguous block of bytes. That array is memory-mapped when a container
+is opened, so reading a window from a spectrogram only reads that window from disk.
+
+Each spectrogram in a container is identified by the name of the file it was made from,
+and is loaded with a path to the container followed by that name, e.g.
+``'~/data/bird1.spectpack/bird1_song0.wav.spect.npz'``. Datasets refer to spectrograms
+by these paths, that ``vak.files.spect.load`` accepts like any other spectrogram file.
+"""
+from collections.abc import Mapping
+import functools
+import json
+import os
+from pathlib import Path
+import struct
+import zipfile
+
+import numpy as np
+
+from .. import constants
+
+# members of container file
+SPECT_MEMBER = 'spect.npy'
+FREQBINS_MEMBER = 'freqbins.npy'
+TIMEBINS_MEMBER = 'timebins.npy'
+OFFSETS_MEMBER = 'offsets.npy'
+FILE_IDS_MEMBER = 'file_ids.npy'
+SCALE_MEMBER = 'scale.npy'
+OFFSET_MEMBER = 'offset.npy'
+SCHEMA_MEMBER = 'schema.json'
+
+SCHEMA_VERSION = 1
+
+
+def is_container_path(spect_path):
+    """True if spect_path is a path to a spectrogram in a container,
+    i.e., a path to a container file followed by the name of a spectrogram in it"""
+    return Path(spect_path).parent.suffix == f'.{constants.SPECT_CONTAINER_FORMAT}'
+
+
+def split_path(spect_path):
+    """split path to spectrogram in a container into path to container
+    and the id of the spectrogram in it
+
+    Parameters
+    ----------
+    spect_path : str, pathlib.Path
+        e.g. '~/data/bird1.spectpack/bird1_song0.wav.spect.npz'
+
+    Returns
+    -------
+    container_path : pathlib.Path
+        e.g. '~/data/bird1.spectpack'
+    file_id : str
+        e.g. 'bird1_song0.wav.spect.npz'
+    """
+    if not is_container_path(spect_path):
+        raise ValueError(
+            f'not a path to a spectrogram in a .{constants.SPECT_CONTAINER_FORMAT} file: {spect_path}'
+        )
+    spect_path = Path(spect_path)
+    return spect_path.parent, spect_path.name
+
+
+def _save_member(zf, name, arr):
+    with zf.open(name, mode='w', force_zip64=True) as fp:
+        np.lib.format.write_array(fp, np.asanyarray(arr), allow_pickle=False)
+
+
+def pack(spect_paths,
+         container_path,
+         spect_format='npz',
+         spect_key='s',
+         freqbins_key='f',
+         timebins_key='t',
+         spect_dtype='float32'):
+    """save spectrograms from files in a single container file
+
+    Parameters
+    ----------
+    spect_paths : list
+        of str or pathlib.Path, paths to spectrogram files.
+        All spectrograms must have the same frequency bins.
+        Names of files must be unique; they are the ids of spectrograms in the container.
+    container_path : str, pathlib.Path
+        path where container is saved. Must have extension '.spectpack'.
+    spect_format : str
+        format of spectrogram files. One of {'mat', 'npz'}. Default is 'npz'.
+    spect_key : str
+        key for accessing spectrogram in files. Default is 's'.
+    freqbins_key : str
+        key for accessing vector of frequency bins in files. Default is 'f'.
+    timebins_key : str
+        key for accessing vector of time bins in files. Default is 't'.
+    spect_dtype : str
+        data type used to save spectrograms in the container.
+        One of {'float32', 'float16', 'uint8'}. See ``vak.files.spect.encode``.
+        Default is 'float32'.
+
+    Returns
+    -------
+    container_spect_paths : list
+        of pathlib.Path, paths to spectrograms in the container,
+        in the same order as spect_paths
+    """
+    from . import spect  # here to avoid circular import, since vak.files.spect.load opens containers
+
+    container_path = Path(container_path)
+    if container_path.suffix != f'.{constants.SPECT_CONTAINER_FORMAT}':
+        raise ValueError(
+            f'container_path must have extension .{constants.SPECT_CONTAINER_FORMAT}, '
+            f'but was: {container_path}'
+        )
+    if len(spect_paths) == 0:
+        raise ValueError('no spectrogram files to save in container')
+
+    file_ids = [Path(spect_path).name for spect_path in spect_paths]
+    if len(set(file_ids)) != len(file_ids):
+        raise ValueError(
+            'names of spectrogram files saved in a container must be unique'
+        )
+
+    # first pass: get shapes, and vectors of frequency bins and time bins
+    freqbins = None
+    n_timebins = []
+    timebins = []
+    other_keys = None
+    for spect_path in spect_paths:
+        spect_dict = spect.load(spect_path, spect_format)
+        if freqbins is None:
+            freqbins = np.asarray(spect_dict[freqbins_key])
+            other_keys = [key for key in spect_dict.keys()
+                          if key not in (spect_key, freqbins_key, timebins_key) and not key.startswith('__')]
+        elif not np.array_equal(spect_dict[freqbins_key], freqbins):
+            raise ValueError(
+                f'frequency bins in {spect_path} are not the same as in {spect_paths[0]}, '
+                'all spectrograms in a container must have the same frequency bins'
+            )
+        t = np.asarray(spect_dict[timebins_key])
+        n_timebins.append(t.shape[-1])
+        timebins.append(t.ravel())
+    offsets = np.concatenate(([0], np.cumsum(n_timebins))).astype(np.int64)
+
+    # second pass: write spectrograms, one at a time, into one array
+    other_vals = {key: [] for key in other_keys}
+    scales, spect_offsets = [], []
+    tmp_path = container_path.with_name(f'{container_path.name}.{os.getpid()}.tmp')
+    with zipfile.ZipFile(tmp_path, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        with zf.open(SPECT_MEMBER, mode='w', force_zip64=True) as fp:
+            header = {
+                'descr': np.lib.format.dtype_to_descr(np.dtype(spect_dtype)),
+                'fortran_order': False,
+                'shape': (int(offsets[-1]), freqbins.shape[-1]),
+            }
+            np.lib.format.write_array_header_2_0(fp, header)
+            for spect_path in spect_paths:
+                spect_dict = spect.load(spect_path, spect_format)
+                encoded, scale, offset = spect.encode(np.asarray(spect_dict[spect_key]), spect_dtype)
+                if encoded.shape[0] != freqbins.shape[-1]:
+                    raise ValueError(
+                        f'number of rows in spectrogram in {spect_path} does not equal '
+                        'length of frequency bins'
+                    )
+                fp.write(np.ascontiguousarray(encoded.T).tobytes())
+                scales.append(scale)
+                spect_offsets.append(offset)
+                for key in other_keys:
+                    val = np.asarray(spect_dict[key])
+                    if val.ndim != 0:
+                        raise ValueError(
+                            f"can only save arrays with one value per file in container, but '{key}' "
+                            f'in {spect_path} has shape {val.shape}'
+                        )
+                    other_vals[key].append(val.item())
+
+        _save_member(zf, FREQBINS_MEMBER, freqbins)
+        _save_member(zf, TIMEBINS_MEMBER, np.concatenate(timebins))
+        _save_member(zf, OFFSETS_MEMBER, offsets)
+        _save_member(zf, FILE_IDS_MEMBER, np.array(file_ids))
+        _save_member(zf, SCALE_MEMBER, np.array(scales, dtype=np.float64))
+        _save_member(zf, OFFSET_MEMBER, np.array(spect_offsets, dtype=np.float64))
+        for key in other_keys:
+            _save_member(zf, f'{key}.npy', np.array(other_vals[key]))
+        schema = {
+            'version': SCHEMA_VERSION,
+            'spect_key': spect_key,
+            'freqbins_key': freqbins_key,
+            'timebins_key': timebins_key,
+            'spect_dtype': spect_dtype,
+            'other_keys': other_keys,
+        }
+        zf.writestr(SCHEMA_MEMBER, json.dumps(schema))
+    os.replace(tmp_path, container_path)
+
+    return [container_path.joinpath(file_id) for file_id in file_ids]
+
+
+def _member_offset(container_path, zf, name):
+    """offset in bytes of the start of an uncompressed member in a zip file"""
+    info = zf.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(
+            f'{name} in container {container_path} is compressed, so it can not be memory-mapped'
+        )
+    with open(container_path, 'rb') as fp:
+        fp.seek(info.header_offset)
+        local_header = fp.read(30)
+    # length of file name and of extra field are the last two fields of the local file header
+    name_len, extra_len = struct.unpack('<HH', local_header[26:30])
+    return info.header_offset + 30 + name_len + extra_len
+
+
+class SpectContainer:
+    """container with all the spectrograms in a dataset, opened for reading.
+    Use ``vak.files.container.open_container`` to get an instance,
+    so that each container is only opened once by a process.
+
+    Parameters
+    ----------
+    container_path : str, pathlib.Path
+        path to .spectpack file
+    """
+    def __init__(self, container_path):
+        self.container_path = Path(container_path)
+        with zipfile.ZipFile(self.container_path) as zf:
+            self.schema = json.loads(zf.read(SCHEMA_MEMBER))
+            if self.schema['version'] > SCHEMA_VERSION:
+                raise ValueError(
+                    f"container was saved with schema version {self.schema['version']}, "
+                    f'but this version of vak can only load versions up to {SCHEMA_VERSION}'
+                )
+
+            def _load_member(name):
+                with zf.open(name) as fp:
+                    return np.lib.format.read_array(fp, allow_pickle=False)
+
+            self.freqbins = _load_member(FREQBINS_MEMBER)
+            self.timebins = _load_member(TIMEBINS_MEMBER)
+            self.offsets = _load_member(OFFSETS_MEMBER)
+            self.file_ids = _load_member(FILE_IDS_MEMBER).tolist()
+            self.scale = _load_member(SCALE_MEMBER)
+            self.offset = _load_member(OFFSET_MEMBER)
+            self.other = {key: _load_member(f'{key}.npy') for key in self.schema['other_keys']}
+            spect_offset = _member_offset(self.container_path, zf, SPECT_MEMBER)
+
+        with open(self.container_path, 'rb') as fp:
+            fp.seek(spect_offset)
+            if np.lib.format.read_magic(fp) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fp)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fp)
+            data_offset = fp.tell()
+        self.spect = np.memmap(self.container_path, dtype=dtype, mode='r', offset=data_offset, shape=shape,
+                               order='F' if fortran_order else 'C')
+        self.index = {file_id: ind for ind, file_id in enumerate(self.file_ids)}
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    def __contains__(self, file_id):
+        return file_id in self.index
+
+    def _ind(self, file_id):
+        try:
+            return self.index[file_id]
+        except KeyError:
+            raise KeyError(
+                f'no spectrogram with id {file_id} in container: {self.container_path}'
+            ) from None
+
+    def n_timebins(self, file_id):
+        """number of time bins in spectrogram"""
+        ind = self._ind(file_id)
+        return int(self.offsets[ind + 1] - self.offsets[ind])
+
+    def read(self, file_id, start=None, stop=None):
+        """read spectrogram, or a range of its time bins
+
+        Parameters
+        ----------
+        file_id : str
+            id of spectrogram, name of the file it was made from
+        start, stop : int
+            range of time bins to read, like ``spect[:, start:stop]``.
+            Default is None, in which case the whole spectrogram is read.
+
+        Returns
+        -------
+        spect : numpy.ndarray
+            float32 array with shape (frequency bins, time bins)
+        """
+        ind = self._ind(file_id)
+        start, stop, _ = slice(start, stop).indices(self.n_timebins(file_id))
+        stop = max(start, stop)
+        block = self.spect[self.offsets[ind] + start:self.offsets[ind] + stop]
+        spect = np.ascontiguousarray(block.T, dtype=np.float32)
+        if self.scale[ind] != 1.0 or self.offset[ind] != 0.0:
+            spect *= np.float32(self.scale[ind])
+            spect += np.float32(self.offset[ind])
+        return spect
+
+    def load(self, file_id):
+        """dictionary-like access to spectrogram and related arrays, like a .npz file"""
+        return ContainerSpectDict(self, file_id)
+
+    def spect_paths(self):
+        """paths to all spectrograms in container"""
+        return [self.container_path.joinpath(file_id) for file_id in self.file_ids]
+
+
+@functools.lru_cache(maxsize=16)
+def _open_container(container_path, mtime_ns):
+    return SpectContainer(container_path)
+
+
+def open_container(container_path):
+    """open container for reading. Containers stay open, so each container
+    is opened once by each process, unless it is modified"""
+    container_path = Path(container_path).expanduser().resolve()
+    return _open_container(container_path, os.stat(container_path).st_mtime_ns)
+
+
+def load(spect_path):
+    """load spectrogram in a container, given a path to the container
+    followed by the id of the spectrogram. See ``vak.files.container.split_path``.
+    Returns a dictionary-like object, like ``vak.files.spect.load``."""
+    container_path, file_id = split_path(spect_path)
+    return open_container(container_path).load(file_id)
+
+
+class ContainerSpectDict(Mapping):
+    """dictionary-like access to a spectrogram in a container and related arrays,
+    with the same keys as the file it was made from.
+    The spectrogram is only read when it is accessed.
+
+    Parameters
+    ----------
+    container : vak.files.container.SpectContainer
+    file_id : str
+        id of spectrogram, name of the file it was made from
+    """
+    def __init__(self, container, file_id):
+        self.container = container
+        self.file_id = file_id
+        self.ind = container._ind(file_id)
+        self.spect_key = container.schema['spect_key']
+        self.freqbins_key = container.schema['freqbins_key']
+        self.timebins_key = container.schema['timebins_key']
+        self._keys = [self.spect_key, self.freqbins_key, self.timebins_key] + container.schema['other_keys']
+
+    def window(self, start, stop):
+        """read time bins start:stop of spectrogram"""
+        return self.container.read(self.file_id, start, stop)
+
+    def __getitem__(self, key):
+        if key == self.spect_key:
+            return self.container.read(self.file_id)
+        elif key == self.freqbins_key:
+            return self.container.freqbins.copy()
+        elif key == self.timebins_key:
+            offsets = self.container.offsets
+            return self.container.timebins[offsets[self.ind]:offsets[self.ind + 1]].copy()
+        elif key in self.container.other:
+            # as 0-d array, the same as when loaded from a .npz file
+            return np.array(self.container.other[key][self.ind])
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
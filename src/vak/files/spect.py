@@ -1,11 +1,16 @@
+from collections.abc import Mapping
+from functools import partial
+import json
+import os
 from pathlib import Path
 
 import numpy as np
-from dask import bag as db
-from dask.diagnostics import ProgressBar
+from scipy.io import loadmat, whosmat
 
 from .. import constants
+from .. import parallel
 from ..logging import log_or_print
+from . import container
 from .files import find_fname
 from ..timebins import timebin_dur_from_vec
 
@@ -68,9 +73,10 @@ def load(spect_path, spect_format=None):
     Parameters
     ----------
     spect_path : str, Path
-        to an array file.
+        to an array file, or to a spectrogram in a container file,
+        e.g. 'bird1.spectpack/bird1_song0.wav.spect.npz'. See ``vak.files.container``.
     spect_format : str
-        Valid formats are defined in vak.io.spect.SPECT_FORMAT_LOAD_FUNCTION_MAP.
+        Valid formats are defined in vak.constants.VALID_SPECT_FORMATS.
         Default is None, in which case the extension of the file is used.
 
     Returns
@@ -82,13 +88,413 @@ def load(spect_path, spect_format=None):
         array files that function creates.
     """
     spect_path = Path(spect_path)
+    if spect_format == constants.SPECT_CONTAINER_FORMAT or (
+            spect_format is None and container.is_container_path(spect_path)
+    ):
+        return container.load(spect_path)
     if spect_format is None:
         # "replace('.', '')", because suffix returns file extension with period included
         spect_format = spect_path.suffix.replace('.', '')
     spect_dict = constants.SPECT_FORMAT_LOAD_FUNCTION_MAP[spect_format](spect_path)
+    if spect_format == 'npz' and SCHEMA_KEY in spect_dict:
+        spect_dict = LeanSpectDict(spect_dict)
     return spect_dict
 
 
+def window(spect_dict, spect_key, start, stop):
+    """get time bins start:stop of a spectrogram loaded by ``vak.files.spect.load``.
+    For spectrograms in a container, only those time bins are read from disk.
+
+    Parameters
+    ----------
+    spect_dict : dict-like
+        returned by ``vak.files.spect.load``
+    spect_key : str
+        key for accessing spectrogram
+    start, stop : int
+        range of time bins
+
+    Returns
+    -------
+    window : numpy.ndarray
+        ``spect_dict[spect_key][:, start:stop]``
+    """
+    if isinstance(spect_dict, container.ContainerSpectDict) and spect_key == spect_dict.spect_key:
+        return spect_dict.window(start, stop)
+    return spect_dict[spect_key][:, start:stop]
+
+
+# key in spectrogram files saved with reduced precision or the lean schema,
+# for a JSON string with the parameters needed to decode arrays in the file
+SCHEMA_KEY = 'vak_spect_schema'
+SCHEMA_VERSION = 1
+# number of elements of a spectrogram converted at a time by encode, when writing to an array
+ENCODE_BLOCK_SIZE = 2 ** 22
+
+
+def _freqbins_from_params(params):
+    """vector of frequency bins, computed the same way as by ``numpy.fft.fftfreq``"""
+    return np.arange(params['start'], params['start'] + params['n']) * (
+        1.0 / (params['fft_size'] * (1 / params['samp_freq']))
+    )
+
+
+def _timebins_from_params(params):
+    """vector of time bins, computed the same way as ``vak.spect.spectrogram``"""
+    return (params['fft_size'] / 2 + params['step_size'] * np.arange(params['n'])) / params['samp_freq']
+
+
+def _freqbins_params(freqbins, samp_freq, fft_size):
+    """scalars that reproduce freqbins exactly, or None if there are none"""
+    if freqbins.ndim != 1 or freqbins.size == 0:
+        return None
+    params = {
+        'samp_freq': float(samp_freq),
+        'fft_size': int(fft_size),
+        'start': int(round(freqbins[0] * fft_size / samp_freq)),
+        'n': int(freqbins.size),
+    }
+    if np.array_equal(_freqbins_from_params(params), freqbins):
+        return params
+
+
+def _timebins_params(timebins, samp_freq, fft_size, step_size):
+    """scalars that reproduce timebins exactly, or None if there are none"""
+    if timebins.ndim != 1:
+        return None
+    params = {
+        'samp_freq': float(samp_freq),
+        'fft_size': int(fft_size),
+        'step_size': int(step_size),
+        'n': int(timebins.size),
+    }
+    if np.array_equal(_timebins_from_params(params), timebins):
+        return params
+
+
+def encode(spect, spect_dtype='float32', out=None):
+    """convert spectrogram to a data type with less precision, to save in a file
+
+    Parameters
+    ----------
+    spect : numpy.ndarray
+        spectrogram
+    spect_dtype : str
+        data type to convert to. One of {'float32', 'float16', 'uint8'}.
+        With 'uint8', values are scaled to the range [0, 255] with a scale and offset
+        computed for each spectrogram, so spectrograms are quantized to 256 levels.
+        With 'float16', values must be smaller than 65504 in magnitude,
+        e.g. spectrograms transformed with 'log_spect'.
+    out : numpy.ndarray
+        of spect_dtype, with the same shape as spect, that the converted spectrogram
+        is written to, e.g. a numpy.memmap. Values are converted in blocks of time bins,
+        so no temporary arrays the size of spect are allocated. Default is None,
+        in which case a new array is returned, or spect itself if it is already float32.
+
+    Returns
+    -------
+    encoded : numpy.ndarray
+        spectrogram converted to spect_dtype
+    scale : float
+        spectrogram is ``encoded * scale + offset``. 1.0 unless spect_dtype is 'uint8'.
+    offset : float
+        0.0 unless spect_dtype is 'uint8'.
+    """
+    if spect_dtype not in constants.VALID_SPECT_DTYPES:
+        raise ValueError(
+            f'spect_dtype must be one of {constants.VALID_SPECT_DTYPES}, but was: {spect_dtype}'
+        )
+    if out is not None and (out.shape != spect.shape or out.dtype != np.dtype(spect_dtype)):
+        raise ValueError(
+            f'out must have shape {spect.shape} and dtype {spect_dtype}, '
+            f'but had shape {out.shape} and dtype {out.dtype}'
+        )
+
+    scale, offset = 1.0, 0.0
+    if spect_dtype == 'uint8':
+        if spect.size > 0:
+            offset = float(spect.min())
+            scale = (float(spect.max()) - offset) / 255
+            if scale == 0.0:  # constant spectrogram
+                scale = 1.0
+    elif spect_dtype == 'float16' and spect.size > 0:
+        if max(abs(float(spect.min())), abs(float(spect.max()))) > np.finfo(np.float16).max:
+            raise ValueError(
+                'values in spectrogram are too large to save as float16, '
+                'use a transform_type, or a different spect_dtype'
+            )
+
+    def _encode(block):
+        if spect_dtype == 'uint8':
+            return np.rint((block - offset) / scale)
+        return block
+
+    if out is None:
+        return _encode(spect).astype(spect_dtype, copy=False), scale, offset
+
+    block_size = max(1, ENCODE_BLOCK_SIZE // max(1, spect.shape[0]))
+    for start in range(0, spect.shape[-1], block_size):
+        out[..., start:start + block_size] = _encode(spect[..., start:start + block_size])
+    return out, scale, offset
+
+
+def decode(encoded, scale=1.0, offset=0.0):
+    """convert spectrogram saved with reduced precision back to float32.
+    Inverse of ``vak.files.spect.encode``, up to the precision lost by encoding."""
+    spect = encoded.astype(np.float32)
+    if scale != 1.0 or offset != 0.0:
+        spect *= np.float32(scale)
+        spect += np.float32(offset)
+    return spect
+
+
+def save(spect_file,
+         spect_dict,
+         spect_key='s',
+         freqbins_key='f',
+         timebins_key='t',
+         spect_dtype='float32',
+         lean=False,
+         compress=False,
+         samp_freq=None,
+         fft_size=None,
+         step_size=None,
+         out=None):
+    """save spectrogram and related arrays in a .npz file,
+    optionally with reduced precision, the lean schema, or compression.
+    Files are loaded with ``vak.files.spect.load``, that returns the same keys
+    and arrays either way, except for any precision lost.
+
+    Parameters
+    ----------
+    spect_file : str, pathlib.Path, file-like
+        where file is saved
+    spect_dict : dict
+        of arrays, with keys spect_key, freqbins_key, and timebins_key,
+        and any others, e.g. the path to the source audio file
+    spect_key : str
+        key for spectrogram in spect_dict. Default is 's'.
+    freqbins_key : str
+        key for vector of frequency bins in spect_dict. Default is 'f'.
+    timebins_key : str
+        key for vector of time bins in spect_dict. Default is 't'.
+    spect_dtype : str
+        data type used to save spectrogram. One of {'float32', 'float16', 'uint8'}.
+        See ``vak.files.spect.encode``. Default is 'float32'.
+    lean : bool
+        if True, don't save vectors of frequency bins and time bins,
+        only the scalars needed to compute them when the file is loaded:
+        samp_freq, fft_size, step_size, and the number of bins.
+        Vectors that can't be computed exactly from these are saved as usual.
+        Default is False.
+    compress : bool
+        if True, save with ``numpy.savez_compressed``. Default is False.
+    samp_freq : int
+        sampling frequency of audio used to make spectrogram. Required if lean is True.
+    fft_size : int
+        size of window for Fast Fourier transform. Required if lean is True.
+    step_size : int
+        step size for Fast Fourier transform. Required if lean is True.
+    out : numpy.ndarray
+        of spect_dtype, with the same shape as the spectrogram, that the spectrogram
+        is converted into before saving, e.g. a numpy.memmap, so a spectrogram
+        that is too large for memory can be saved. See ``vak.files.spect.encode``.
+        Default is None.
+
+    Returns
+    -------
+    None
+
+    Notes
+    -----
+    ``numpy.savez`` writes arrays to the file in blocks, so a memory-mapped
+    spectrogram is saved without reading it all into memory.
+    """
+    if lean and any([arg is None for arg in (samp_freq, fft_size, step_size)]):
+        raise ValueError(
+            'samp_freq, fft_size, and step_size are required to save spectrogram with lean schema'
+        )
+
+    savez = np.savez_compressed if compress else np.savez
+    if spect_dtype == 'float32' and not lean:
+        savez(spect_file, **spect_dict)
+        return
+
+    spect_dict = dict(spect_dict)
+    schema = {'version': SCHEMA_VERSION, 'spect_key': spect_key, 'spect_dtype': spect_dtype}
+    spect_dict[spect_key], schema['scale'], schema['offset'] = encode(spect_dict[spect_key], spect_dtype,
+                                                                       out=out)
+    if lean:
+        freqbins_params = _freqbins_params(np.asarray(spect_dict[freqbins_key]), samp_freq, fft_size)
+        if freqbins_params is not None:
+            schema['freqbins'] = dict(key=freqbins_key, **freqbins_params)
+            del spect_dict[freqbins_key]
+        timebins_params = _timebins_params(np.asarray(spect_dict[timebins_key]), samp_freq, fft_size, step_size)
+        if timebins_params is not None:
+            schema['timebins'] = dict(key=timebins_key, **timebins_params)
+            del spect_dict[timebins_key]
+    spect_dict[SCHEMA_KEY] = json.dumps(schema)
+    savez(spect_file, **spect_dict)
+
+
+class LeanSpectDict(Mapping):
+    """dictionary-like access to arrays in a spectrogram file
+    saved by ``vak.files.spect.save`` with reduced precision or the lean schema.
+    Spectrograms are decoded to float32, and vectors of frequency bins and time bins
+    are computed, when accessed.
+
+    Parameters
+    ----------
+    npz : numpy.lib.npyio.NpzFile
+        returned by ``numpy.load``
+    """
+    def __init__(self, npz):
+        self.npz = npz
+        self.schema = json.loads(str(npz[SCHEMA_KEY]))
+        if self.schema['version'] > SCHEMA_VERSION:
+            raise ValueError(
+                f"spectrogram file was saved with schema version {self.schema['version']}, "
+                f'but this version of vak can only load versions up to {SCHEMA_VERSION}'
+            )
+        self._computed = {}
+        for name, from_params in (('freqbins', _freqbins_from_params),
+                                  ('timebins', _timebins_from_params)):
+            if name in self.schema:
+                self._computed[self.schema[name]['key']] = partial(from_params, self.schema[name])
+
+    def __getitem__(self, key):
+        if key in self._computed:
+            return self._computed[key]()
+        if key == SCHEMA_KEY or key not in self.npz.files:
+            raise KeyError(key)
+        if key == self.schema['spect_key']:
+            return decode(self.npz[key], self.schema['scale'], self.schema['offset'])
+        return self.npz[key]
+
+    def __contains__(self, key):
+        return key in self._computed or (key != SCHEMA_KEY and key in self.npz.files)
+
+    def __iter__(self):
+        yield from (key for key in self.npz.files if key != SCHEMA_KEY)
+        yield from self._computed
+
+    def __len__(self):
+        return len(self.npz.files) - 1 + len(self._computed)
+
+    def close(self):
+        self.npz.close()
+
+
+def _npy_shape(zf, key):
+    """shape of array in a .npy file in a zip file, e.g. a .npz file, read from its header"""
+    with zf.open(f'{key}.npy') as fp:
+        if np.lib.format.read_magic(fp) == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(fp)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(fp)
+    return shape
+
+
+def metadata(spect_path,
+             spect_format=None,
+             spect_key='s',
+             freqbins_key='f',
+             timebins_key='t',
+             audio_path_key='audio_path'):
+    """get shape of spectrogram in a file, and vectors of frequency bins and time bins,
+    without loading the spectrogram. The shape is read from the header of the array
+    in .npz files, and from the header of the variable in .mat files.
+
+    Parameters
+    ----------
+    spect_path : str, Path
+        to an array file, or to a spectrogram in a container file. See ``vak.files.spect.load``.
+    spect_format : str
+        Valid formats are defined in vak.constants.VALID_SPECT_FORMATS.
+        Default is None, in which case the extension of the file is used.
+    spect_key : str
+        key for accessing spectrogram in files. Default is 's'.
+    freqbins_key : str
+        key for accessing vector of frequency bins in files. Default is 'f'.
+    timebins_key : str
+        key for accessing vector of time bins in files. Default is 't'.
+    audio_path_key : str
+        key for accessing path to source audio file for spectogram in files.
+        Default is 'audio_path'.
+
+    Returns
+    -------
+    spect_metadata : dict
+        with keys 'shape', the shape of the spectrogram, 'freqbins' and 'timebins',
+        vectors of frequency bins and time bins, and 'audio_path', the path to the source
+        audio file, or None if the file does not contain one.
+    """
+    spect_path = Path(spect_path)
+    if spect_format is None:
+        if container.is_container_path(spect_path):
+            spect_format = constants.SPECT_CONTAINER_FORMAT
+        else:
+            spect_format = spect_path.suffix.replace('.', '')
+
+    if spect_format == constants.SPECT_CONTAINER_FORMAT:
+        spect_dict = container.load(spect_path)
+        if spect_key != spect_dict.spect_key:
+            raise KeyError(
+                f"Did not find a spectrogram in file '{spect_path.name}' "
+                f"using spect_key '{spect_key}'."
+            )
+        shape = (spect_dict.container.freqbins.shape[-1], spect_dict.container.n_timebins(spect_dict.file_id))
+        keys = spect_dict
+
+    elif spect_format == 'npz':
+        with np.load(spect_path) as npz:
+            if spect_key not in npz.files:
+                raise KeyError(
+                    f"Did not find a spectrogram in file '{spect_path.name}' "
+                    f"using spect_key '{spect_key}'."
+                )
+            shape = _npy_shape(npz.zip, spect_key)
+            spect_dict = LeanSpectDict(npz) if SCHEMA_KEY in npz.files else npz
+            keys = list(spect_dict.keys())
+            spect_dict = {key: spect_dict[key] for key in (freqbins_key, timebins_key, audio_path_key)
+                          if key in keys}
+
+    elif spect_format == 'mat':
+        shapes = {name: shape for name, shape, _ in whosmat(spect_path)}
+        if spect_key not in shapes:
+            raise KeyError(
+                f"Did not find a spectrogram in file '{spect_path.name}' "
+                f"using spect_key '{spect_key}'."
+            )
+        # loaded with squeeze_me=True, see vak.constants.SPECT_FORMAT_LOAD_FUNCTION_MAP
+        shape = tuple(dim for dim in shapes[spect_key] if dim != 1)
+        keys = list(shapes.keys())
+        spect_dict = loadmat(spect_path, squeeze_me=True,
+                             variable_names=[key for key in (freqbins_key, timebins_key, audio_path_key)
+                                             if key in keys])
+
+    else:
+        raise ValueError(
+            f"spect_format must be one of '{constants.VALID_SPECT_FORMATS}'; "
+            f"format '{spect_format}' not recognized."
+        )
+
+    if audio_path_key in keys:
+        audio_path = spect_dict[audio_path_key]
+        if type(audio_path) == np.ndarray:
+            # (because everything stored in .npz has to be in an ndarray)
+            audio_path = audio_path.tolist()
+    else:
+        audio_path = None
+
+    return {
+        'shape': tuple(shape),
+        'freqbins': np.asarray(spect_dict[freqbins_key]),
+        'timebins': np.asarray(spect_dict[timebins_key]),
+        'audio_path': audio_path,
+    }
+
+
 def timebin_dur(spect_path, spect_format, timebins_key, n_decimals_trunc=5):
     """get duration of time bins from a spectrogram file
 
@@ -97,7 +503,7 @@ def timebin_dur(spect_path, spect_format, timebins_key, n_decimals_trunc=5):
     spect_path: str, Path
         path to spectrogram file.
     spect_format : str
-        format of file containing spectrogram. One of {'mat', 'npz'}
+        format of file containing spectrogram. One of {'mat', 'npz', 'spectpack'}
     timebins_key : str
         key for accessing vector of time bins in files. Default is 't'.
     n_decimals_trunc : int
@@ -117,12 +523,184 @@ def timebin_dur(spect_path, spect_format, timebins_key, n_decimals_trunc=5):
     return timebin_dur
 
 
+def validate(spect_path,
+             spect_format,
+             freqbins_key='f',
+             timebins_key='t',
+             spect_key='s',
+             n_decimals_trunc=5,
+             audio_path_key='audio_path'):
+    """validate one spectrogram file, using only its metadata.
+    Validates that the file contains a spectrogram that can be accessed with spect_key,
+    and that the lengths of the frequency bin and time bin vectors
+    equal the number of rows and columns in the spectrogram.
+
+    Parameters
+    ----------
+    spect_path: str, pathlib.Path
+        path to spectrogram file.
+    spect_format : str
+        format of file containing spectrogram. One of {'mat', 'npz', 'spectpack'}
+    freqbins_key : str
+        key for accessing vector of frequency bins in files. Default is 'f'.
+    timebins_key : str
+        key for accessing vector of time bins in files. Default is 't'.
+    spect_key : str
+        key for accessing spectrogram in files. Default is 's'.
+    n_decimals_trunc : int
+        number of decimal places to keep when truncating the timebin duration calculated from
+        the vector of time bins. Default is 5.
+    audio_path_key : str
+        key for accessing path to source audio file for spectogram in files.
+        Default is 'audio_path'.
+
+    Returns
+    -------
+    spect_metadata : dict
+        returned by ``vak.files.spect.metadata``, with the duration of time bins
+        added with the key 'timebin_dur'
+    """
+    spect_path = Path(spect_path)
+    spect_metadata = metadata(spect_path, spect_format, spect_key, freqbins_key, timebins_key, audio_path_key)
+
+    # number of freq. bins should equal number of rows
+    if spect_metadata['freqbins'].shape[-1] != spect_metadata['shape'][0]:
+        raise ValueError(
+            f'length of frequency bins in {spect_path.name} '
+            'does not match number of rows in spectrogram'
+        )
+    # number of time bins should equal number of columns
+    if spect_metadata['timebins'].shape[-1] != spect_metadata['shape'][1]:
+        raise ValueError(
+            f'length of time_bins in {spect_path.name} '
+            f'does not match number of columns in spectrogram'
+        )
+
+    spect_metadata['timebin_dur'] = timebin_dur_from_vec(spect_metadata['timebins'], n_decimals_trunc)
+    return spect_metadata
+
+
+def validate_across_files(freqbins, timebin_durs):
+    """validate that frequency bins and duration of time bins
+    are the same across a set of spectrogram files
+
+    Parameters
+    ----------
+    freqbins : list
+        of numpy.ndarray, vector of frequency bins from each file
+    timebin_durs : list
+        of float, duration of time bins in each file
+
+    Returns
+    -------
+    timebin_dur : float
+        duration of time bins in all files
+    """
+    uniq_freq_bins = np.unique(np.stack(freqbins), axis=0)
+    if len(uniq_freq_bins) != 1:
+        raise ValueError(
+            f'Found more than one frequency bin vector across files. '
+            f'Instead found {len(uniq_freq_bins)}'
+        )
+
+    uniq_durs = np.unique(timebin_durs)
+    if len(uniq_durs) != 1:
+        raise ValueError(
+            'Found more than one duration for time bins across spectrogram files. '
+            f'Durations found were: {uniq_durs}'
+        )
+    return uniq_durs[0]
+
+
+def _validate(spect_format, freqbins_key, timebins_key, spect_key, n_decimals_trunc, spect_path):
+    """validates each spectrogram file, then returns frequency bin array
+    and duration of time bins, so that those can be validated across all files"""
+    spect_metadata = validate(spect_path, spect_format, freqbins_key, timebins_key, spect_key, n_decimals_trunc)
+    return spect_path, spect_metadata['freqbins'], spect_metadata['timebin_dur']
+
+
+def _convert(spect_format, output_dir, keys, spect_path):
+    """convert one spectrogram file to a .spect.npz file"""
+    spect_dict = load(spect_path, spect_format)
+    converted = {key: spect_dict[key] for key in keys if key in spect_dict}
+    converted_path = os.path.join(output_dir, f'{Path(spect_path).stem}.spect.npz')
+    np.savez(converted_path, **converted)
+    return converted_path
+
+
+def convert(spect_paths,
+            spect_format,
+            output_dir,
+            spect_key='s',
+            freqbins_key='f',
+            timebins_key='t',
+            audio_path_key='audio_path',
+            executor=None,
+            logger=None):
+    """convert spectrogram files, e.g. .mat files, to .npz files,
+    that are faster to load. Original files are not changed.
+
+    Parameters
+    ----------
+    spect_paths : list
+        of str or pathlib.Path, paths to spectrogram files
+    spect_format : str
+        format of spectrogram files. One of {'mat', 'npz'}
+    output_dir : str, pathlib.Path
+        directory where converted files are saved. Each file is named
+        with the name of the original file, with its extension replaced
+        by '.spect.npz', e.g. 'bird1.wav.mat' becomes 'bird1.wav.spect.npz'.
+    spect_key : str
+        key for accessing spectrogram in files. Default is 's'.
+    freqbins_key : str
+        key for accessing vector of frequency bins in files. Default is 'f'.
+    timebins_key : str
+        key for accessing vector of time bins in files. Default is 't'.
+    audio_path_key : str
+        key for accessing path to source audio file for spectogram in files.
+        Default is 'audio_path'. Only saved in converted file if present in original.
+    executor : vak.parallel.Executor
+        used to convert files in parallel. Default is None,
+        in which case an Executor with default parameters is used.
+
+    Other Parameters
+    ----------------
+    logger : logging.Logger
+        instance created by vak.logging.get_logger. Default is None.
+
+    Returns
+    -------
+    converted_paths : list
+        of str, paths to converted files, in the same order as spect_paths.
+        Other variables in original files are not saved in converted files.
+    """
+    stems = [Path(spect_path).stem for spect_path in spect_paths]
+    if len(set(stems)) != len(stems):
+        raise ValueError(
+            'names of spectrogram files must be unique after removing their extension, '
+            'so that converted files do not overwrite each other'
+        )
+
+    if executor is None:
+        executor = parallel.Executor()
+
+    log_or_print(f'converting {len(spect_paths)} spectrogram files in {spect_format} format to npz format',
+                 logger=logger, level='info')
+    return executor.map(
+        partial(_convert, spect_format, output_dir, (spect_key, freqbins_key, timebins_key, audio_path_key)),
+        spect_paths,
+        sizes=os.path.getsize,
+        logger=logger,
+    )
+
+
 def is_valid_set_of_spect_files(spect_paths,
                                 spect_format,
                                 freqbins_key='f',
                                 timebins_key='t',
                                 spect_key='s',
                                 n_decimals_trunc=5,
+                                executor=None,
                                 logger=None
                                 ):
     """validate a set of spectrogram files that will be used as a dataset.
@@ -149,6 +727,9 @@ def is_valid_set_of_spect_files(spect_paths,
         number of decimal places to keep when truncating the timebin duration calculated from
         the vector of time bins.
         Default is 3, i.e. assumes milliseconds is the last significant digit.
+    executor : vak.parallel.Executor
+        used to validate files in parallel. Default is None,
+        in which case an Executor with default parameters is used.
 
     Other Parameters
     ----------------
@@ -161,59 +742,18 @@ def is_valid_set_of_spect_files(spect_paths,
     """
     spect_paths = [Path(spect_path) for spect_path in spect_paths]
 
-    def _validate(spect_path):
-        """validates each spectrogram file, then returns frequency bin array
-        and duration of time bins, so that those can be validated across all files"""
-        spect_dict = load(spect_path, spect_format)
-
-        if spect_key not in spect_dict:
-            raise KeyError(
-                f"Did not find a spectrogram in file '{spect_path.name}' "
-                f"using spect_key '{spect_key}'."
-            )
-
-        freq_bins = spect_dict[freqbins_key]
-        time_bins = spect_dict[timebins_key]
-        timebin_dur = timebin_dur_from_vec(time_bins, n_decimals_trunc)
-
-        # number of freq. bins should equal number of rows
-        if spect_dict[freqbins_key].shape[-1] != spect_dict[spect_key].shape[0]:
-            raise ValueError(
-                f'length of frequency bins in {spect_path.name} '
-                'does not match number of rows in spectrogram'
-            )
-        # number of time bins should equal number of columns
-        if spect_dict[timebins_key].shape[-1] != spect_dict[spect_key].shape[1]:
-            raise ValueError(
-                f'length of time_bins in {spect_path.name} '
-                f'does not match number of columns in spectrogram'
-            )
-
-        return spect_path, freq_bins, timebin_dur
-
-    spect_paths_bag = db.from_sequence(spect_paths)
+    if executor is None:
+        executor = parallel.Executor()
 
     log_or_print('validating set of spectrogram files', logger=logger, level='info')
-
-    with ProgressBar():
-        path_freqbins_timebin_dur_tups = list(spect_paths_bag.map(_validate))
-
-    all_freq_bins = np.stack(
-        [tup[1] for tup in path_freqbins_timebin_dur_tups]
+    path_freqbins_timebin_dur_tups = executor.map(
+        partial(_validate, spect_format, freqbins_key, timebins_key, spect_key, n_decimals_trunc),
+        spect_paths,
+        sizes=os.path.getsize if spect_format != constants.SPECT_CONTAINER_FORMAT else None,
+        logger=logger,
     )
-    uniq_freq_bins = np.unique(all_freq_bins, axis=0)
-    if len(uniq_freq_bins) != 1:
-        raise ValueError(
-            f'Found more than one frequency bin vector across files. '
-            f'Instead found {len(uniq_freq_bins)}'
-        )
 
-    timebin_durs = [tup[2] for tup in path_freqbins_timebin_dur_tups]
-    uniq_durs = np.unique(timebin_durs)
-    if len(uniq_durs) != 1:
-        raise ValueError(
-            'Found more than one duration for time bins across spectrogram files. '
-            f'Durations found were: {uniq_durs}'
-        )
+    validate_across_files([tup[1] for tup in path_freqbins_timebin_dur_tups],
+                          [tup[2] for tup in path_freqbins_timebin_dur_tups])
 
     return True
@@ -1,15 +1,20 @@
+from collections import defaultdict
+from functools import partial
 import logging
 import os
+import tempfile
 
 import numpy as np
-import dask.bag as db
-from dask.diagnostics import ProgressBar
 
 from .. import constants
 from .. import files
+from .. import manifest
+from .. import parallel
 from ..annotation import source_annot_map
 from ..config.spect_params import SpectParamsConfig
-from ..spect import spectrogram
+from ..spect import (butter_bandpass_filter, spectrogram, spectrogram_batch, spectrogram_chunked,
+                     spectrogram_shape)
+from .spect_cache import audio_hash, SpectCache
 
 
 def files_from_dir(audio_dir, audio_format):
@@ -22,7 +27,7 @@ def files_from_dir(audio_dir, audio_format):
     audio_dir : str
         path to directory containing audio files.
     audio_format : str
-        valid audio file format. One of {'wav', 'cbin'}.
+        valid audio file format. One of {'wav', 'cbin', 'flac'}.
 
     Returns
     -------
@@ -35,6 +40,206 @@ def files_from_dir(audio_dir, audio_format):
     return audio_files
 
 
+def _npz_fname(audio_file, output_dir):
+    """path to .spect.npz file made from audio file, in output_dir"""
+    basename = os.path.basename(audio_file)
+    return os.path.join(os.path.normpath(output_dir),
+                        basename + '.spect.npz')
+
+
+def _load_audio(audio_format, job):
+    """load audio for one job, first stage of pipeline that makes spectrogram files"""
+    fs, dat = constants.AUDIO_FORMAT_FUNC_MAP[audio_format](job[0])
+    return job, fs, dat
+
+
+def _make_spect(spect_params, loaded):
+    """make spectrogram for one job, second stage of pipeline that makes spectrogram files"""
+    job, fs, dat = loaded
+    s, f, t = spectrogram(dat, fs,
+                          spect_params.fft_size,
+                          spect_params.step_size,
+                          spect_params.thresh,
+                          spect_params.transform_type,
+                          spect_params.freq_cutoffs,
+                          spect_params.zero_phase_filter,
+                          freq_scale=spect_params.freq_scale,
+                          num_freqbins=spect_params.num_freqbins,
+                          freq_decimate=spect_params.freq_decimate)
+    return job, fs, s, f, t
+
+
+def _save_spect(spect_params, cache, computed, out=None):
+    """save spectrogram for one job in a .spect.npz file, and in cache if there is one.
+    Last stage of pipeline that makes spectrogram files. ``out`` is passed to
+    ``vak.files.spect.save``"""
+    (audio_file, npz_fname, cache_path), fs, s, f, t = computed
+    spect_dict = {spect_params.spect_key: s,
+                  spect_params.freqbins_key: f,
+                  spect_params.timebins_key: t,
+                  spect_params.audio_path_key: audio_file}
+    save_kwargs = dict(spect_key=spect_params.spect_key,
+                       freqbins_key=spect_params.freqbins_key,
+                       timebins_key=spect_params.timebins_key,
+                       spect_dtype=spect_params.spect_dtype,
+                       lean=spect_params.lean_schema,
+                       compress=spect_params.compress,
+                       samp_freq=fs,
+                       fft_size=spect_params.fft_size,
+                       step_size=spect_params.step_size,
+                       out=out)
+    if cache is not None:
+        cache.save(cache_path, spect_dict, **save_kwargs)
+        cache.link(cache_path, npz_fname)
+    else:
+        files.spect.save(npz_fname, spect_dict, **save_kwargs)
+    return npz_fname
+
+
+def _stream_spect(audio_format, spect_params, cache, job):
+    """make spectrogram for one job from a memory-mapped audio file, one chunk at a time,
+    into a memory-mapped array in a temporary file next to the .spect.npz file, then save it.
+    Memory used does not depend on the length of the audio file"""
+    audio_file, npz_fname, _ = job
+    fs, dat = files.audio.load_mmap(audio_file, audio_format)
+    shape = spectrogram_shape(dat.shape[0], fs,
+                              spect_params.fft_size,
+                              spect_params.step_size,
+                              spect_params.freq_cutoffs,
+                              spect_params.freq_scale,
+                              spect_params.num_freqbins,
+                              spect_params.freq_decimate)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(npz_fname)) as tmp_dir:
+        # Fortran order, so that each time bin is contiguous and time bins are written sequentially
+        out = np.lib.format.open_memmap(os.path.join(tmp_dir, 's.npy'), mode='w+', dtype=np.float32,
+                                        shape=shape, fortran_order=True)
+        s, f, t = spectrogram_chunked(dat, fs,
+                                      spect_params.fft_size,
+                                      spect_params.step_size,
+                                      spect_params.thresh,
+                                      spect_params.transform_type,
+                                      spect_params.freq_cutoffs,
+                                      out=out,
+                                      freq_scale=spect_params.freq_scale,
+                                      num_freqbins=spect_params.num_freqbins,
+                                      freq_decimate=spect_params.freq_decimate)
+        if spect_params.spect_dtype != 'float32':
+            encoded = np.lib.format.open_memmap(os.path.join(tmp_dir, 'encoded.npy'), mode='w+',
+                                                dtype=spect_params.spect_dtype, shape=shape, fortran_order=True)
+        else:
+            encoded = None
+        npz_fname = _save_spect(spect_params, cache, (job, fs, s, f, t), out=encoded)
+        del out, s, encoded
+    if isinstance(dat, files.audio.SoundFileArray):
+        dat.close()
+    return npz_fname
+
+
+def _make_spect_multi(spect_params_list, loaded):
+    """make spectrograms with more than one set of parameters for one job,
+    filtering the audio once for all sets of parameters with the same frequency cutoffs"""
+    (audio_file, ind_jobs), fs, dat = loaded
+    filtered = {}
+    computed = []
+    for ind, job in ind_jobs:
+        spect_params = spect_params_list[ind]
+        if spect_params.freq_cutoffs:
+            filter_key = (tuple(spect_params.freq_cutoffs), spect_params.zero_phase_filter)
+            if filter_key not in filtered:
+                filtered[filter_key] = butter_bandpass_filter(dat,
+                                                              spect_params.freq_cutoffs[0],
+                                                              spect_params.freq_cutoffs[1],
+                                                              fs,
+                                                              zero_phase=spect_params.zero_phase_filter)
+            spect_dat = filtered[filter_key]
+        else:
+            spect_dat = dat
+        s, f, t = spectrogram(spect_dat, fs,
+                              spect_params.fft_size,
+                              spect_params.step_size,
+                              spect_params.thresh,
+                              spect_params.transform_type,
+                              spect_params.freq_cutoffs,
+                              spect_params.zero_phase_filter,
+                              prefiltered=True,
+                              freq_scale=spect_params.freq_scale,
+                              num_freqbins=spect_params.num_freqbins,
+                              freq_decimate=spect_params.freq_decimate)
+        computed.append((ind, (job, fs, s, f, t)))
+    return computed
+
+
+def _save_spect_multi(spect_params_list, caches, computed):
+    """save spectrograms made with more than one set of parameters for one job"""
+    return [
+        (ind, _save_spect(spect_params_list[ind], caches[ind], job_spect))
+        for ind, job_spect in computed
+    ]
+
+
+def _jobs(audio_files, output_dir, cache, audio_hashes, logger):
+    """find spectrograms made from audio files in the cache, if there is one,
+    and make a job for each audio file that does not have a spectrogram in the cache.
+
+    Each job is (audio file, .spect.npz file in output_dir, file in cache or None).
+    Returns paths to .spect.npz files linked from the cache, the jobs,
+    and paths to all files in the cache used for audio_files"""
+    if cache is None:
+        jobs = [(audio_file, _npz_fname(audio_file, output_dir), None) for audio_file in audio_files]
+        return [], jobs, []
+
+    cache_paths = {audio_file: cache.path(audio_file, audio_hashes[audio_file]) for audio_file in audio_files}
+    cached_files = [audio_file for audio_file in audio_files if cache_paths[audio_file].exists()]
+    logger.info(
+        f'found spectrograms for {len(cached_files)} of {len(audio_files)} audio files in cache: {cache.params_dir}'
+    )
+    spect_files_cached = [
+        cache.link(cache_paths[audio_file], _npz_fname(audio_file, output_dir))
+        for audio_file in cached_files
+    ]
+    manifest.count_files('spectrogram files from cache', spect_files_cached)
+    cached_files = set(cached_files)
+    jobs = [
+        (audio_file, _npz_fname(audio_file, output_dir), cache_paths[audio_file])
+        for audio_file in audio_files if audio_file not in cached_files
+    ]
+    return spect_files_cached, jobs, list(cache_paths.values())
+
+
+def _load_audio_batch(audio_format, jobs):
+    """load audio for a batch of jobs, grouped by sampling frequency,
+    since spectrograms in a batch must have the same sampling frequency"""
+    fs_loaded_map = defaultdict(list)
+    for job in jobs:
+        job, fs, dat = _load_audio(audio_format, job)
+        fs_loaded_map[fs].append((job, dat))
+    return fs_loaded_map
+
+
+def _make_spect_batch(spect_params, fs_loaded_map):
+    """make spectrograms for a batch of jobs with torch"""
+    computed = []
+    for fs, job_dat_tuples in fs_loaded_map.items():
+        jobs, dats = zip(*job_dat_tuples)
+        spects = spectrogram_batch(dats, fs,
+                                   spect_params.fft_size,
+                                   spect_params.step_size,
+                                   spect_params.thresh,
+                                   spect_params.transform_type,
+                                   spect_params.freq_cutoffs,
+                                   spect_params.zero_phase_filter,
+                                   spect_params.num_threads,
+                                   freq_scale=spect_params.freq_scale,
+                                   num_freqbins=spect_params.num_freqbins,
+                                   freq_decimate=spect_params.freq_decimate)
+        computed.extend((job, fs, s, f, t) for job, (s, f, t) in zip(jobs, spects))
+    return computed
+
+
+def _save_spect_batch(save, computed):
+    return [save(job_spect) for job_spect in computed]
+
+
 def to_spect(audio_format,
              spect_params,
              output_dir,
@@ -42,14 +247,18 @@ def to_spect(audio_format,
              audio_files=None,
              annot_list=None,
              audio_annot_map=None,
-             labelset=None):
+             labelset=None,
+             cache_dir=None,
+             cache_key='stat',
+             cache_max_mb=None,
+             executor=None):
     """makes spectrograms from audio files and saves in array files
 
     Parameters
     ----------
     audio_format : str
-        format of audio files. One of {'wav', 'cbin'}
-    spect_params : dict or vak.config.spectrogram.SpectConfig
+        format of audio files. One of {'wav', 'cbin', 'flac'}
+    spect_params : dict or vak.config.spectrogram.SpectConfig, or list of them
         parameters for computing spectrogram, from .toml file.
         To see all related parameters, run:
         >>> help(vak.config.spect_params.SpectParamConfig)
@@ -57,6 +266,12 @@ def to_spect(audio_format,
         with no arguments and then pass that to `to_spect`:
         >>> default_spect_params = vak.config.spect_params.SpectParamConfig()
         >>> to_spect(audio_format='wav', spect_params=default_spect_params, output_dir='.')
+        If a list, a spectrogram is made with each set of parameters from each audio file.
+        Each audio file is loaded once for all sets of parameters, and filtered once
+        for all sets with the same ``freq_cutoffs`` and ``zero_phase_filter``.
+        Spectrograms are made with the 'numpy' backend, whatever the backend in spect_params,
+        and audio files that are streamed (see ``stream_min_mb``) are loaded once
+        for each set of parameters.
     audio_dir : str
         path to directory containing audio files from which to make spectrograms
     audio_files : list
@@ -67,17 +282,39 @@ def to_spect(audio_format,
         Where keys are paths to array files and value corresponding to each key is
         the annotation for that array file.
         Default is None.
-    output_dir : str
+    output_dir : str, list
         directory in which to save .spect.npz file generated for each audio file.
+        If spect_params is a list, a list of directories, one for each set of parameters.
     labelset : set
         of str or int, set of unique labels for vocalizations. Default is None.
         If not None, then files will be skipped where the 'labels' array in the
         corresponding annotation contains labels that are not found in labelset
+    cache_dir : str, pathlib.Path
+        path to directory where spectrogram files are cached. Default is None,
+        in which case spectrograms are not cached. If specified, spectrograms
+        are only made for audio files that do not already have a spectrogram
+        made with the same spect_params in the cache; files in output_dir are
+        hard links to (or copies of) files in the cache. See ``vak.io.spect_cache``.
+    cache_key : str
+        how to find spectrograms made from audio files in the cache,
+        one of {'stat', 'content'}. See ``vak.io.spect_cache.audio_hash``.
+        Default is 'stat'.
+    cache_max_mb : float
+        maximum size of cache in megabytes. After making spectrograms,
+        the least recently used files in the cache are removed until it is
+        smaller than this size, except for files used by this call to ``to_spect``.
+        Default is None, in which case files are never removed from the cache.
+    executor : vak.parallel.Executor
+        used to make spectrograms in parallel, when spect_params.backend is 'numpy',
+        and for audio files that are streamed, see ``stream_min_mb`` in
+        ``vak.config.spect_params.SpectParamsConfig``.
+        Default is None, in which case an Executor with default parameters is used.
 
     Returns
     -------
     spect_files : list
-        of str, full paths to .spect.npz files
+        of str, full paths to .spect.npz files.
+        If spect_params is a list, a list of lists, one for each set of parameters.
 
     Notes
     -----
@@ -94,6 +331,10 @@ def to_spect(audio_format,
 
     The names of the arrays are defaults, and will change if different values are specified
     in spect_params for 'spect_key', 'freqbins_key', 'timebins_key', or 'audio_path_key'.
+
+    If spect_params specifies a 'spect_dtype' other than 'float32', or 'lean_schema',
+    files also contain a JSON string with the parameters needed to decode them,
+    and must be loaded with ``vak.files.spect.load``, which returns the same arrays.
     """
     if audio_format not in constants.VALID_AUDIO_FORMATS:
         raise ValueError(
@@ -125,14 +366,28 @@ def to_spect(audio_format,
                 f'type of labelset must be set, but was: {type(labelset)}'
             )
 
-    if type(spect_params) not in [dict, SpectParamsConfig]:
-        raise TypeError(
-            'type of spect_params must be an instance of vak.config.spect_params.SpectParamsConfig, '
-            'or a dict that can be converted to a SpectParamsConfig instance, '
-            f'but was {type(spect_params)}'
-        )
-    if type(spect_params) is dict:
-        spect_params = SpectParamsConfig(**spect_params)
+    multiple_params = type(spect_params) in (list, tuple)
+    if multiple_params:
+        if len(spect_params) == 0:
+            raise ValueError('spect_params is an empty list')
+        if type(output_dir) not in (list, tuple) or len(output_dir) != len(spect_params):
+            raise ValueError(
+                'when spect_params is a list, output_dir must be a list with one directory '
+                f'for each set of parameters, but was: {output_dir}'
+            )
+        spect_params_list, output_dirs = list(spect_params), list(output_dir)
+    else:
+        spect_params_list, output_dirs = [spect_params], [output_dir]
+
+    for ind, spect_params in enumerate(spect_params_list):
+        if type(spect_params) not in [dict, SpectParamsConfig]:
+            raise TypeError(
+                'type of spect_params must be an instance of vak.config.spect_params.SpectParamsConfig, '
+                'or a dict that can be converted to a SpectParamsConfig instance, '
+                f'but was {type(spect_params)}'
+            )
+        if type(spect_params) is dict:
+            spect_params_list[ind] = SpectParamsConfig(**spect_params)
 
     # validate audio files if supplied by user
     if audio_files:
@@ -186,31 +441,107 @@ def to_spect(audio_format,
                     )
         audio_files = sorted(list(audio_annot_map.keys()))
 
-    # this is defined here so all other arguments to 'to_spect' are in scope
-    def _spect_file(audio_file):
-        """helper function that enables parallelized creation of array
-        files containing spectrograms.
-        Accepts path to audio file, saves .npz file with spectrogram"""
-        fs, dat = constants.AUDIO_FORMAT_FUNC_MAP[audio_format](audio_file)
-        s, f, t = spectrogram(dat, fs,
-                              spect_params.fft_size,
-                              spect_params.step_size,
-                              spect_params.thresh,
-                              spect_params.transform_type,
-                              spect_params.freq_cutoffs)
-        spect_dict = {spect_params.spect_key: s,
-                      spect_params.freqbins_key: f,
-                      spect_params.timebins_key: t,
-                      spect_params.audio_path_key: audio_file}
-        basename = os.path.basename(audio_file)
-        npz_fname = os.path.join(os.path.normpath(output_dir),
-                                 basename + '.spect.npz')
-        np.savez(npz_fname, **spect_dict)
-        return npz_fname
-
-    bag = db.from_sequence(audio_files)
-    with ProgressBar():
-        spect_files = list(bag.map(_spect_file))
-    # sort because ordering from Dask not guaranteed
-    spect_files = sorted(spect_files)
-    return spect_files
+    if cache_dir is not None:
+        caches = [SpectCache(cache_dir, spect_params, key=cache_key) for spect_params in spect_params_list]
+        # hash each audio file once, for all sets of parameters
+        audio_hashes = {audio_file: audio_hash(audio_file, cache_key) for audio_file in audio_files}
+    else:
+        caches = [None for _ in spect_params_list]
+        audio_hashes = None
+
+    # for each set of parameters, find spectrograms already in cache,
+    # and make a job for each audio file that still needs a spectrogram
+    spect_files, jobs, cache_paths = [], [], []
+    for cache, spect_output_dir in zip(caches, output_dirs):
+        spect_files_cached, params_jobs, params_cache_paths = _jobs(audio_files, spect_output_dir, cache,
+                                                                    audio_hashes, logger)
+        spect_files.append(spect_files_cached)
+        jobs.append(params_jobs)
+        cache_paths.extend(params_cache_paths)
+
+    if executor is None:
+        executor = parallel.Executor()
+
+    stream_jobs = [[] for _ in spect_params_list]
+    for ind, spect_params in enumerate(spect_params_list):
+        if spect_params.stream_min_mb is not None and not spect_params.zero_phase_filter:
+            stream_min_bytes = spect_params.stream_min_mb * 2 ** 20
+            stream_jobs[ind] = [job for job in jobs[ind] if os.path.getsize(job[0]) >= stream_min_bytes]
+            jobs[ind] = [job for job in jobs[ind] if os.path.getsize(job[0]) < stream_min_bytes]
+
+    if multiple_params:
+        # load each audio file once, and make spectrograms with all parameters that still need one
+        audio_file_jobs = defaultdict(list)
+        for ind, params_jobs in enumerate(jobs):
+            for job in params_jobs:
+                audio_file_jobs[job[0]].append((ind, job))
+        multi_jobs = [(audio_file, tuple(ind_jobs)) for audio_file, ind_jobs in audio_file_jobs.items()]
+        if multi_jobs:
+            logger.info(
+                f'making spectrograms with {len(spect_params_list)} sets of parameters '
+                f'from {len(multi_jobs)} audio files'
+            )
+            saved = executor.pipeline(load=partial(_load_audio, audio_format),
+                                      compute=partial(_make_spect_multi, spect_params_list),
+                                      save=partial(_save_spect_multi, spect_params_list, caches),
+                                      items=multi_jobs,
+                                      sizes=[os.path.getsize(job[0]) for job in multi_jobs])
+            for ind_spect_files in saved:
+                for ind, spect_file in ind_spect_files:
+                    spect_files[ind].append(spect_file)
+
+    else:
+        spect_params, cache, jobs = spect_params_list[0], caches[0], jobs[0]
+        save = partial(_save_spect, spect_params, cache)
+
+        if not jobs:  # e.g., all spectrograms were in cache
+            pass
+
+        elif spect_params.backend == 'numpy':
+            spect_files[0] += executor.pipeline(load=partial(_load_audio, audio_format),
+                                                compute=partial(_make_spect, spect_params),
+                                                save=save,
+                                                items=jobs,
+                                                sizes=[os.path.getsize(job[0]) for job in jobs])
+
+        elif spect_params.backend == 'torch':
+            # sort by size of files, as a proxy for duration, so that files in a batch need less padding
+            jobs = sorted(jobs, key=lambda job: os.path.getsize(job[0]))
+            batch_size = spect_params.batch_size
+            batches = [jobs[start:start + batch_size] for start in range(0, len(jobs), batch_size)]
+            logger.info(
+                f'computing spectrograms with torch, in batches of {batch_size} files'
+            )
+            # all batches in this process, since torch uses multiple threads,
+            # but still load the next batch and save the last one while computing
+            batch_executor = parallel.Executor(num_workers=0, chunksize=len(batches))
+            batch_spect_files = batch_executor.pipeline(load=partial(_load_audio_batch, audio_format),
+                                                        compute=partial(_make_spect_batch, spect_params),
+                                                        save=partial(_save_spect_batch, save),
+                                                        items=batches)
+            spect_files[0] += [spect_file for spect_files_ in batch_spect_files for spect_file in spect_files_]
+
+    for ind, (spect_params, cache) in enumerate(zip(spect_params_list, caches)):
+        if stream_jobs[ind]:
+            logger.info(
+                f'computing spectrograms for {len(stream_jobs[ind])} audio files of {spect_params.stream_min_mb} MB '
+                'or larger, one chunk of audio at a time'
+            )
+            spect_files[ind] += executor.map(partial(_stream_spect, audio_format, spect_params, cache),
+                                             stream_jobs[ind],
+                                             sizes=[os.path.getsize(job[0]) for job in stream_jobs[ind]])
+
+    if cache_dir is not None and cache_max_mb is not None:
+        # all sets of parameters share one cache directory, so evict once
+        evicted = caches[0].evict(max_bytes=cache_max_mb * 2 ** 20, keep=cache_paths)
+        if evicted:
+            logger.info(
+                f'removed {len(evicted)} least recently used spectrogram files from cache, '
+                f'to keep it under {cache_max_mb} MB'
+            )
+
+    # sort because ordering from batching not guaranteed
+    spect_files = [sorted(params_spect_files) for params_spect_files in spect_files]
+    if multiple_params:
+        return spect_files
+    return spect_files[0]
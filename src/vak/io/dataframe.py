@@ -1,15 +1,46 @@
 from datetime import datetime
+from glob import glob
 import os
+import shutil
+import tempfile
 
 from crowsetta import Transcriber
 import numpy as np
 
 from . import audio, spect
 from .. import annotation
+from .. import constants
+from .. import files
+from .. import manifest
+from .. import memory
 from ..annotation import source_annot_map
+from ..config.spect_params import SpectParamsConfig
 from ..logging import log_or_print
 
 
+def _to_container(spect_files,
+                  container_path,
+                  tmp_dir,
+                  spect_key='s',
+                  freqbins_key='f',
+                  timebins_key='t',
+                  spect_dtype='float32',
+                  logger=None):
+    """save spectrogram files in a container, then remove the temporary directory
+    where the files were made, and return paths to spectrograms in the container"""
+    log_or_print(f'saving spectrograms in container: {container_path}', logger=logger, level='info')
+    with memory.stage('save spectrograms in container'):
+        spect_files = files.container.pack(spect_files,
+                                           container_path,
+                                           spect_key=spect_key,
+                                           freqbins_key=freqbins_key,
+                                           timebins_key=timebins_key,
+                                           spect_dtype=spect_dtype)
+    shutil.rmtree(tmp_dir)
+    manifest.count_files('spectrogram containers', [container_path])
+    return spect_files
+
+
 def from_files(data_dir,
                annot_format=None,
                labelset=None,
@@ -19,6 +50,12 @@ def from_files(data_dir,
                spect_format=None,
                spect_params=None,
                spect_output_dir=None,
+               spect_cache_dir=None,
+               spect_cache_key='stat',
+               spect_cache_max_mb=None,
+               executor=None,
+               spect_container=False,
+               convert_spect_format=None,
                logger=None):
     """prepare a dataset of vocalizations from a directory of audio or spectrogram files containing vocalizations,
     and (optionally) annotation for those files. The dataset is returned as a pandas DataFrame.
@@ -45,19 +82,51 @@ def from_files(data_dir,
         Default is True. Set to False when you want to create a VocalDataset for use
         later, but don't want to load all the spectrograms into memory yet.
     audio_format : str
-        format of audio files. One of {'wav', 'cbin'}.
+        format of audio files. One of {'wav', 'cbin', 'flac'}.
     spect_format : str
         format of array files containing spectrograms as 2-d matrices.
-        One of {'mat', 'npz'}.
+        One of {'mat', 'npz', 'spectpack'}.
     annot_file : str
         Path to a single annotation file. Default is None.
         Used when a single file contains annotations for multiple audio files.
-    spect_params : dict, vak.config.spect.SpectParamsConfig.
+    spect_params : dict, vak.config.spect.SpectParamsConfig, or list of them
         Parameters for creating spectrograms.
         Default is None (implying that spectrograms are already made).
+        If a list, a dataset is prepared for each set of parameters, from one pass
+        through the audio files, see ``vak.io.audio.to_spect``. Spectrograms for each
+        are saved in 'spectrograms_generated_{time stamp}_{index}', or containers
+        'spectrograms_generated_{time stamp}_{index}.spectpack', where index is
+        the index of the parameters in the list.
     spect_output_dir : str
         path to location where spectrogram files should be saved. Default is None,
         in which case it defaults to 'spectrograms_generated_{time stamp}'.
+        If spect_params is a list, directories for each set of parameters
+        are made in spect_output_dir.
+    spect_cache_dir : str
+        path to directory where spectrogram files are cached, so they are only made once
+        for the same audio file and spect_params. Default is None, in which case
+        spectrograms are not cached. See ``vak.io.spect_cache``.
+    spect_cache_key : str
+        how to find spectrograms made from audio files in the cache, one of {'stat', 'content'}.
+        See ``vak.io.spect_cache.audio_hash``. Default is 'stat'.
+    spect_cache_max_mb : float
+        maximum size of spectrogram cache in megabytes. Default is None, in which case
+        files are never removed from the cache.
+    executor : vak.parallel.Executor
+        used to make spectrograms and validate spectrogram files in parallel.
+        Default is None, in which case an Executor with default parameters is used.
+    spect_container : bool
+        if True, save all spectrograms made from audio files in a single container file,
+        'spectrograms_generated_{time stamp}.spectpack', in spect_output_dir if specified
+        and otherwise in output_dir. Spectrogram files are made in a temporary directory
+        and then saved in the container. See ``vak.files.container``. Default is False.
+    convert_spect_format : str
+        format to convert spectrogram files to, when making a dataset from spectrogram files.
+        One of {'npz', 'spectpack'}. Files are converted once, to a directory
+        'spectrograms_converted_{time stamp}' or a container
+        'spectrograms_converted_{time stamp}.spectpack' in output_dir, and the
+        dataset refers to the converted files. Original files are not changed.
+        Default is None, in which case files are not converted.
 
     Other Parameters
     ----------------
@@ -67,7 +136,8 @@ def from_files(data_dir,
     Returns
     -------
     vak_df : pandas.DataFrame
-        the dataset prepared from the directory specified
+        the dataset prepared from the directory specified.
+        If spect_params is a list, a list of DataFrames, one for each set of parameters.
 
     Notes
     -----
@@ -107,29 +177,47 @@ def from_files(data_dir,
                          "unclear whether to create spectrograms from audio files or "
                          "use already-generated spectrograms from array files")
 
+    multiple_params = type(spect_params) in (list, tuple)
+    if multiple_params and not audio_format:
+        raise ValueError(
+            'a list of spect_params can only be used to make spectrograms from audio files, '
+            'but audio_format was not specified'
+        )
+
+    if convert_spect_format is not None and convert_spect_format not in constants.VALID_CONVERT_SPECT_FORMATS:
+        raise ValueError(
+            f'convert_spect_format must be one of {constants.VALID_CONVERT_SPECT_FORMATS}, '
+            f'but was: {convert_spect_format}'
+        )
+
     if spect_output_dir:
         if not os.path.isdir(spect_output_dir):
             raise NotADirectoryError(
                 f'spect_output_dir not found: {spect_output_dir}'
             )
 
-    if annot_format is not None:
-        if annot_file is None:
-            annot_files = annotation.files_from_dir(annot_dir=data_dir,
-                                                    annot_format=annot_format)
-            scribe = Transcriber(annot_format=annot_format)
-            annot_list = scribe.from_file(annot_file=annot_files)
-        else:
-            scribe = Transcriber(annot_format=annot_format)
-            annot_list = scribe.from_file(annot_file=annot_file)
-    else:  # if annot_format not specified
-        annot_list = None
+    with memory.stage('parse annotations'):
+        if annot_format is not None:
+            if annot_file is None:
+                annot_files = annotation.files_from_dir(annot_dir=data_dir,
+                                                        annot_format=annot_format)
+                manifest.count_files('annotation files', annot_files)
+                scribe = Transcriber(annot_format=annot_format)
+                annot_list = scribe.from_file(annot_file=annot_files)
+            else:
+                manifest.count_files('annotation files', [annot_file])
+                scribe = Transcriber(annot_format=annot_format)
+                annot_list = scribe.from_file(annot_file=annot_file)
+        else:  # if annot_format not specified
+            annot_list = None
 
     # ------ if making dataset from audio files, need to make into array files first! ----------------------------------
     if audio_format:
         log_or_print(f'making array files containing spectrograms from audio files in: {data_dir}',
                      logger=logger, level='info')
-        audio_files = audio.files_from_dir(data_dir, audio_format)
+        with memory.stage('find audio files'):
+            audio_files = audio.files_from_dir(data_dir, audio_format)
+        manifest.count_files('audio files', audio_files)
         if annot_list:
             audio_annot_map = source_annot_map(audio_files, annot_list)
             if labelset:  # then remove annotations with labels not in labelset
@@ -155,36 +243,124 @@ def from_files(data_dir,
                     annot_list.append(v)
 
         timenow = datetime.now().strftime('%y%m%d_%H%M%S')
-        if spect_output_dir is None:
-            spect_output_dir = os.path.join(output_dir,
-                                            f'spectrograms_generated_{timenow}')
-            os.makedirs(spect_output_dir)
-        spect_files = audio.to_spect(audio_format=audio_format,
-                                     spect_params=spect_params,
-                                     output_dir=spect_output_dir,
-                                     audio_files=audio_files,
-                                     annot_list=annot_list,
-                                     labelset=labelset)
+        if multiple_params:
+            spect_params_list = list(spect_params)
+            suffixes = [f'_{ind}' for ind in range(len(spect_params_list))]
+        else:
+            spect_params_list = [spect_params]
+            suffixes = ['']
+        spect_params_list = [SpectParamsConfig(**params) if type(params) is dict else params
+                             for params in spect_params_list]
+
+        spect_output_dirs, container_paths = [], []
+        for suffix in suffixes:
+            if spect_container:
+                container_paths.append(
+                    os.path.join(spect_output_dir if spect_output_dir else output_dir,
+                                 f'spectrograms_generated_{timenow}{suffix}.{constants.SPECT_CONTAINER_FORMAT}')
+                )
+                # files are only needed until they are saved in the container,
+                # so don't make them on the (possibly shared) file system where the dataset is saved
+                spect_output_dirs.append(tempfile.mkdtemp())
+            elif spect_output_dir is None or multiple_params:
+                spect_output_dirs.append(
+                    os.path.join(spect_output_dir if spect_output_dir else output_dir,
+                                 f'spectrograms_generated_{timenow}{suffix}')
+                )
+                os.makedirs(spect_output_dirs[-1])
+            else:
+                spect_output_dirs.append(spect_output_dir)
+
+        with memory.stage('make spectrograms'):
+            spect_files_list = audio.to_spect(audio_format=audio_format,
+                                              spect_params=spect_params_list if multiple_params
+                                              else spect_params_list[0],
+                                              output_dir=spect_output_dirs if multiple_params
+                                              else spect_output_dirs[0],
+                                              audio_files=audio_files,
+                                              annot_list=annot_list,
+                                              labelset=labelset,
+                                              cache_dir=spect_cache_dir,
+                                              cache_key=spect_cache_key,
+                                              cache_max_mb=spect_cache_max_mb,
+                                              executor=executor)
+        if not multiple_params:
+            spect_files_list = [spect_files_list]
+        manifest.count_files('spectrogram files generated',
+                             [spect_file for spect_files in spect_files_list for spect_file in spect_files])
         spect_format = 'npz'
+
+        if spect_container:
+            for ind, params in enumerate(spect_params_list):
+                spect_files_list[ind] = _to_container(spect_files_list[ind],
+                                                      container_paths[ind],
+                                                      spect_output_dirs[ind],
+                                                      spect_key=params.spect_key,
+                                                      freqbins_key=params.freqbins_key,
+                                                      timebins_key=params.timebins_key,
+                                                      spect_dtype=params.spect_dtype,
+                                                      logger=logger)
+            spect_format = constants.SPECT_CONTAINER_FORMAT
     else:  # if audio format is None
         spect_files = None
+        if convert_spect_format is not None and convert_spect_format != spect_format:
+            # convert once, so files are fast to load when training
+            timenow = datetime.now().strftime('%y%m%d_%H%M%S')
+            if convert_spect_format == constants.SPECT_CONTAINER_FORMAT:
+                container_path = os.path.join(output_dir,
+                                              f'spectrograms_converted_{timenow}.{constants.SPECT_CONTAINER_FORMAT}')
+                converted_dir = tempfile.mkdtemp()
+            else:
+                converted_dir = os.path.join(output_dir, f'spectrograms_converted_{timenow}')
+                os.makedirs(converted_dir)
+            if spect_params is None:
+                spect_params = SpectParamsConfig()
+            elif type(spect_params) is dict:
+                spect_params = SpectParamsConfig(**spect_params)
+            spect_files = sorted(glob(os.path.join(data_dir, f'*{spect_format}')))
+            with memory.stage('convert spectrogram files'):
+                spect_files = files.spect.convert(spect_files, spect_format, converted_dir,
+                                                  spect_key=spect_params.spect_key,
+                                                  freqbins_key=spect_params.freqbins_key,
+                                                  timebins_key=spect_params.timebins_key,
+                                                  audio_path_key=spect_params.audio_path_key,
+                                                  executor=executor, logger=logger)
+            manifest.count_files('spectrogram files converted', spect_files)
+            spect_format = 'npz'
+
+            if convert_spect_format == constants.SPECT_CONTAINER_FORMAT:
+                spect_files = _to_container(spect_files,
+                                            container_path,
+                                            converted_dir,
+                                            spect_key=spect_params.spect_key,
+                                            freqbins_key=spect_params.freqbins_key,
+                                            timebins_key=spect_params.timebins_key,
+                                            logger=logger)
+                spect_format = constants.SPECT_CONTAINER_FORMAT
+        spect_files_list = [spect_files]
+
+    vak_dfs = []
+    for spect_files in spect_files_list:
+        from_files_kwargs = {
+            'spect_format': spect_format,
+            'labelset': labelset,
+            'annot_list': annot_list,
+            'annot_format': annot_format,
+        }
+
+        if spect_files:
+            from_files_kwargs['spect_files'] = spect_files
+            log_or_print(f'creating datasetfrom spectrogram files in: {output_dir}', logger=logger, level='info')
+        else:
+            from_files_kwargs['spect_dir'] = data_dir
+            log_or_print(f'creating dataset from spectrogram files in: {data_dir}', logger=logger, level='info')
+
+        with memory.stage('make dataframe'):
+            vak_dfs.append(spect.to_dataframe(**from_files_kwargs, executor=executor, logger=logger))
 
-    from_files_kwargs = {
-        'spect_format': spect_format,
-        'labelset': labelset,
-        'annot_list': annot_list,
-        'annot_format': annot_format,
-    }
-
-    if spect_files:
-        from_files_kwargs['spect_files'] = spect_files
-        log_or_print(f'creating datasetfrom spectrogram files in: {output_dir}', logger=logger, level='info')
-    else:
-        from_files_kwargs['spect_dir'] = data_dir
-        log_or_print(f'creating dataset from spectrogram files in: {data_dir}', logger=logger, level='info')
-
-    vak_df = spect.to_dataframe(**from_files_kwargs, logger=logger)
-    return vak_df
+    if multiple_params:
+        return vak_dfs
+    return vak_dfs[0]
 
 
 def add_split_col(df, split):
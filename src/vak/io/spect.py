@@ -1,15 +1,16 @@
 """functions for dealing with vocalization datasets as pandas DataFrames"""
+from functools import partial
 from glob import glob
 import os
 from pathlib import Path
 
-import dask.bag as db
-from dask.diagnostics import ProgressBar
-import numpy as np
 import pandas as pd
 
 from .. import constants
 from .. import files
+from .. import manifest
+from .. import memory
+from .. import parallel
 from ..annotation import source_annot_map
 from ..logging import log_or_print
 
@@ -25,6 +26,50 @@ DF_COLUMNS = [
 ]
 
 
+def _to_record(spect_format, spect_key, freqbins_key, timebins_key, audio_path_key, annot_format,
+               n_decimals_trunc, spect_annot_tuple):
+    """helper function that enables parallelized validation of spectrogram files
+    and creation of "records", i.e. rows for dataframe, in one pass through the files.
+    Accepts a two-element tuple containing (1) a path to a spectrogram file
+    and (2) annotation for that file.
+
+    Returns the record along with the vector of frequency bins and the duration of time bins,
+    so that those can be validated across all files"""
+    spect_path, annot = spect_annot_tuple
+    spect_metadata = files.spect.validate(spect_path, spect_format, freqbins_key, timebins_key, spect_key,
+                                          n_decimals_trunc, audio_path_key)
+    timebin_dur = spect_metadata['timebin_dur']
+    spect_dur = spect_metadata['shape'][-1] * timebin_dur
+    audio_path = spect_metadata['audio_path']
+    if audio_path is None:
+        # try to figure out audio filename programmatically
+        # if we can't, then we'll get back a None
+        # (or an error)
+        audio_path = files.spect.find_audio_fname(str(spect_path))
+
+    if annot is not None:
+        # TODO: change to annot.annot_path when changing dependency to crowsetta>=2.0
+        annot_path = annot.annot_file
+    else:
+        annot_path = None
+
+    def abspath(a_path):
+        if a_path is None:
+            return
+        else:
+            return str(Path(a_path).absolute())
+
+    record = tuple([
+        abspath(audio_path),
+        abspath(spect_path),
+        abspath(annot_path),
+        annot_format if annot_format else constants.NO_ANNOTATION_FORMAT,
+        spect_dur,
+        timebin_dur,
+    ])
+    return record, spect_metadata['freqbins'], timebin_dur
+
+
 def to_dataframe(spect_format,
                  spect_dir=None,
                  spect_files=None,
@@ -37,6 +82,7 @@ def to_dataframe(spect_format,
                  timebins_key='t',
                  spect_key='s',
                  audio_path_key='audio_path',
+                 executor=None,
                  logger=None,
                  ):
     """convert spectrogram files into a dataset of vocalizations represented as a Pandas DataFrame.
@@ -45,10 +91,13 @@ def to_dataframe(spect_format,
     Parameters
     ----------
     spect_format : str
-        format of files containing spectrograms. One of {'mat', 'npz'}
+        format of files containing spectrograms. One of {'mat', 'npz', 'spectpack'}.
+        If 'spectpack', spect_files are paths to spectrograms in container files,
+        see ``vak.files.container``.
     spect_dir : str
         path to directory of files containing spectrograms as arrays.
-        Default is None.
+        If spect_format is 'spectpack', all spectrograms in all container files
+        in the directory are used. Default is None.
     spect_files : list
         List of paths to array files. Default is None.
     annot_list : list
@@ -78,6 +127,9 @@ def to_dataframe(spect_format,
     audio_path_key : str
         key for accessing path to source audio file for spectogram in files.
         Default is 'audio_path'.
+    executor : vak.parallel.Executor
+        used to validate spectrogram files and make rows of DataFrame in parallel.
+        Default is None, in which case an Executor with default parameters is used.
 
     Other Parameters
     ----------------
@@ -131,10 +183,18 @@ def to_dataframe(spect_format,
                 f'type of labelset must be set, but was: {type(labelset)}'
             )
 
+    if executor is None:
+        executor = parallel.Executor()
+
     # ---- get a list of spectrogram files + associated annotation files -----------------------------------------------
     if spect_dir:  # then get spect_files from that dir
         # note we already validated format above
         spect_files = glob(os.path.join(spect_dir, f'*{spect_format}'))
+        if spect_format == constants.SPECT_CONTAINER_FORMAT:
+            # get paths to spectrograms in each container
+            spect_files = [spect_path
+                           for container_path in sorted(spect_files)
+                           for spect_path in files.container.open_container(container_path).spect_paths()]
 
     if spect_files:  # (or if we just got them from spect_dir)
         if annot_list:
@@ -161,72 +221,23 @@ def to_dataframe(spect_format,
                 spect_annot_map.pop(spect_path)
                 continue
 
-    # ---- validate set of spectrogram files ---------------------------------------------------------------------------
-    # regardless of whether we just made it or user supplied it
+    # ---- validate spectrogram files and make the dataframe -----------------------------------------------------------
+    # regardless of whether we just made them or user supplied them.
+    # Validate each file and make its record in one pass, reading only metadata from each file,
+    # then validate that frequency bins and duration of time bins are the same across files
     spect_paths = list(spect_annot_map.keys())
-    files.spect.is_valid_set_of_spect_files(spect_paths,
-                                            spect_format,
-                                            freqbins_key,
-                                            timebins_key,
-                                            spect_key,
-                                            n_decimals_trunc,
-                                            logger=logger)
-
-    # now that we have validated that duration of time bins is consistent across files, we can just open one file
-    # to get that time bin duration. This way validation function has no side effects, like returning time bin, and
-    # this is still relatively fast compared to looping through all files again
-    timebin_dur = files.spect.timebin_dur(spect_paths[0],
-                                          spect_format,
-                                          timebins_key,
-                                          n_decimals_trunc)
-
-    # ---- actually make the dataframe ---------------------------------------------------------------------------------
-    # this is defined here so all other arguments to 'to_dataframe' are in scope
-    def _to_record(spect_annot_tuple):
-        """helper function that enables parallelized creation of "records",
-        i.e. rows for dataframe, from .
-        Accepts a two-element tuple containing (1) a dictionary that represents a spectrogram
-        and (2) annotation for that file"""
-        spect_path, annot = spect_annot_tuple
-        spect_dict = files.spect.load(spect_path, spect_format)
-
-        spect_dur = spect_dict[spect_key].shape[-1] * timebin_dur
-        if audio_path_key in spect_dict:
-            audio_path = spect_dict[audio_path_key]
-            if type(audio_path) == np.ndarray:
-                # (because everything stored in .npz has to be in an ndarray)
-                audio_path = audio_path.tolist()
-        else:
-            # try to figure out audio filename programmatically
-            # if we can't, then we'll get back a None
-            # (or an error)
-            audio_path = files.spect.find_audio_fname(spect_path)
-
-        if annot is not None:
-            # TODO: change to annot.annot_path when changing dependency to crowsetta>=2.0
-            annot_path = annot.annot_file
-        else:
-            annot_path = None
-
-        def abspath(a_path):
-            if a_path is None:
-                return
-            else:
-                return str(Path(a_path).absolute())
-
-        record = tuple([
-            abspath(audio_path),
-            abspath(spect_path),
-            abspath(annot_path),
-            annot_format if annot_format else constants.NO_ANNOTATION_FORMAT,
-            spect_dur,
-            timebin_dur,
-        ])
-        return record
-
-    spect_path_annot_tuples = db.from_sequence(spect_annot_map.items())
-    log_or_print('creating pandas.DataFrame representing dataset from spectrogram files', logger=logger, level='info')
-    with ProgressBar():
-        records = list(spect_path_annot_tuples.map(_to_record))
+    manifest.count_files('spectrogram files', spect_paths)
+    log_or_print('validating spectrogram files and creating pandas.DataFrame representing dataset',
+                 logger=logger, level='info')
+    with memory.stage('validate spectrogram files'):
+        record_freqbins_timebin_dur_tups = executor.map(
+            partial(_to_record, spect_format, spect_key, freqbins_key, timebins_key, audio_path_key,
+                    annot_format, n_decimals_trunc),
+            list(spect_annot_map.items()),
+            logger=logger,
+        )
+        files.spect.validate_across_files([tup[1] for tup in record_freqbins_timebin_dur_tups],
+                                          [tup[2] for tup in record_freqbins_timebin_dur_tups])
 
+    records = [tup[0] for tup in record_freqbins_timebin_dur_tups]
     return pd.DataFrame.from_records(data=records, columns=DF_COLUMNS)
@@ -0,0 +1,247 @@
+"""cache of spectrogram files made from audio files,
+so that spectrograms are only made once for the same audio and the same parameters.
+
+Cached spectrograms are saved in a directory for each set of parameters,
+named by a hash of the parameters that change the contents of spectrogram files,
+in a file named by a hash of the audio file (its path, size, and time last modified,
+or its path and contents). A spectrogram file is only added to the cache once it is
+completely written, so if making spectrograms is interrupted, e.g. because ``vak prep``
+is stopped, running again re-uses all the spectrograms that were already made.
+
+Spectrograms are returned to the caller as hard links to the cached files, in the
+output directory specified by the caller, e.g. the 'spectrograms_generated' directory
+made by ``vak prep``, so datasets do not refer to files in the cache,
+and removing files from the cache does not remove them from a dataset.
+Hard links take no extra space; when they can't be made, e.g. because the output
+directory is on a different file system, cached files are copied instead.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+
+import attr
+
+from .. import constants
+from .. import files
+from .. import manifest
+from ..config.spect_params import SpectParamsConfig
+
+# attributes of SpectParamsConfig that change the contents of spectrogram files.
+# Others, e.g. 'backend' or 'num_threads', only change how spectrograms are made
+SPECT_PARAMS_HASHED = (
+    'fft_size',
+    'step_size',
+    'freq_cutoffs',
+    'thresh',
+    'transform_type',
+    'zero_phase_filter',
+    'spect_key',
+    'freqbins_key',
+    'timebins_key',
+    'audio_path_key',
+    'spect_dtype',
+    'lean_schema',
+    'compress',
+)
+
+# attributes added after the cache, hashed only when they are not None,
+# so spectrograms made before they were added are still found in the cache
+SPECT_PARAMS_HASHED_IF_SET = (
+    'freq_scale',
+    'num_freqbins',
+    'freq_decimate',
+)
+
+# change if spectrograms are made differently for the same parameters,
+# so that spectrograms made by older versions are not re-used
+CACHE_VERSION = 1
+
+
+def params_hash(spect_params):
+    """get hash of parameters for making spectrograms
+
+    Parameters
+    ----------
+    spect_params : vak.config.spect_params.SpectParamsConfig
+        parameters for making spectrograms
+
+    Returns
+    -------
+    params_hash : str
+        sha256 hash of parameters that change the contents of spectrogram files,
+        as a hex str
+    """
+    params = {
+        key: val for key, val in attr.asdict(spect_params).items()
+        if key in SPECT_PARAMS_HASHED or (key in SPECT_PARAMS_HASHED_IF_SET and val is not None)
+    }
+    params['cache_version'] = CACHE_VERSION
+    params_str = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(params_str.encode()).hexdigest()
+
+
+def audio_hash(audio_file, key='stat'):
+    """get hash of an audio file used to find spectrogram made from it in cache.
+
+    The absolute path to the audio file is always part of the hash,
+    since it is saved in the spectrogram file.
+
+    Parameters
+    ----------
+    audio_file : str, pathlib.Path
+        path to audio file
+    key : str
+        what is hashed along with the path. One of {'stat', 'content'}.
+        If 'stat', the size and time last modified of the file, which is fast.
+        If 'content', the contents of the file, so that spectrograms are re-used even when
+        a file is modified without its contents changing, e.g. when it is copied back
+        to the same location. Default is 'stat'.
+
+    Returns
+    -------
+    audio_hash : str
+        sha256 hash as a hex str
+    """
+    if key not in constants.VALID_SPECT_CACHE_KEYS:
+        raise ValueError(
+            f'cache key must be one of {constants.VALID_SPECT_CACHE_KEYS}, but was: {key}'
+        )
+    audio_file = os.path.abspath(audio_file)
+    if key == 'stat':
+        stat = os.stat(audio_file)
+        audio_str = f'{audio_file}:{stat.st_size}:{stat.st_mtime_ns}'
+    elif key == 'content':
+        audio_str = f'{audio_file}:{manifest.sha256(audio_file)}'
+    return hashlib.sha256(audio_str.encode()).hexdigest()
+
+
+def link_or_copy(src, dst):
+    """make a hard link to src at dst, or copy src to dst if a hard link can't be made.
+    Replaces dst if it exists."""
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:  # e.g., different file systems, or file system without hard links
+        shutil.copy2(src, dst)
+
+
+class SpectCache:
+    """cache of spectrogram files made from audio files
+
+    Parameters
+    ----------
+    cache_dir : str, pathlib.Path
+        path to directory where spectrogram files are cached.
+        Created if it does not exist.
+    spect_params : dict, vak.config.spect_params.SpectParamsConfig
+        parameters for making spectrograms
+    key : str
+        how to find spectrograms made from audio files in the cache,
+        one of {'stat', 'content'}. See ``vak.io.spect_cache.audio_hash``.
+        Default is 'stat'.
+
+    Examples
+    --------
+    >>> cache = SpectCache('~/.vak_cache', spect_params)
+    >>> cache_path = cache.path(audio_file)
+    >>> if not cache_path.exists():
+    ...     cache.save(cache_path, spect_dict)
+    >>> cache.link(cache_path, 'spectrograms_generated/bird1.wav.spect.npz')
+    """
+    def __init__(self, cache_dir, spect_params, key='stat'):
+        if type(spect_params) is dict:
+            spect_params = SpectParamsConfig(**spect_params)
+        if key not in constants.VALID_SPECT_CACHE_KEYS:
+            raise ValueError(
+                f'cache key must be one of {constants.VALID_SPECT_CACHE_KEYS}, but was: {key}'
+            )
+        self.cache_dir = Path(cache_dir).expanduser().resolve()
+        self.key = key
+        self.params_dir = self.cache_dir.joinpath(params_hash(spect_params))
+        self.params_dir.mkdir(parents=True, exist_ok=True)
+
+        # so a person can tell what parameters were used to make spectrograms in each directory
+        params_json = self.params_dir.joinpath('spect_params.json')
+        if not params_json.exists():
+            with params_json.open('w') as fp:
+                json.dump(attr.asdict(spect_params), fp, indent=4, default=str)
+
+    def path(self, audio_file, file_hash=None):
+        """path to spectrogram file made from audio file in cache. The file may not exist yet.
+        ``file_hash`` is the hash of the audio file returned by ``audio_hash`` with the key
+        of this cache, if it was already computed, e.g. for another cache with different parameters."""
+        if file_hash is None:
+            file_hash = audio_hash(audio_file, self.key)
+        return self.params_dir.joinpath(f'{file_hash}.spect.npz')
+
+    def save(self, cache_path, spect_dict, **save_kwargs):
+        """save spectrogram in cache.
+
+        File is written to a temporary path first and then renamed, so that a
+        file in the cache is always complete, even if writing was interrupted.
+
+        Parameters
+        ----------
+        cache_path : pathlib.Path
+            path returned by ``SpectCache.path``
+        spect_dict : dict
+            of arrays saved in file with ``vak.files.spect.save``
+        **save_kwargs
+            passed to ``vak.files.spect.save``, e.g. spect_dtype
+        """
+        tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+        with tmp_path.open('wb') as fp:
+            files.spect.save(fp, spect_dict, **save_kwargs)
+        os.replace(tmp_path, cache_path)
+
+    def link(self, cache_path, dst):
+        """make spectrogram file in cache available at path dst,
+        and mark it as recently used, so it is evicted last"""
+        os.utime(cache_path)
+        link_or_copy(cache_path, dst)
+        return dst
+
+    def files(self):
+        """all spectrogram files in the cache, for any parameters"""
+        return sorted(self.cache_dir.glob('*/*.spect.npz'))
+
+    def size(self):
+        """total size in bytes of all spectrogram files in the cache"""
+        return sum(path.stat().st_size for path in self.files())
+
+    def evict(self, max_bytes, keep=None):
+        """remove least recently used spectrogram files from the cache
+        until its total size is less than or equal to max_bytes.
+        A removed file still takes up space if there are hard links to it,
+        e.g. in the 'spectrograms_generated' directory of a dataset,
+        until those are removed too.
+
+        Parameters
+        ----------
+        max_bytes : int
+            maximum size of cache, in bytes
+        keep : list
+            of paths to files in the cache that should not be removed,
+            e.g. ones used by the current run. Default is None.
+
+        Returns
+        -------
+        evicted : list
+            of pathlib.Path, files that were removed
+        """
+        keep = set(Path(path) for path in keep) if keep else set()
+        stats = [(path, path.stat()) for path in self.files()]
+        total = sum(stat.st_size for _, stat in stats)
+        evicted = []
+        for path, stat in sorted(stats, key=lambda path_stat: path_stat[1].st_mtime_ns):
+            if total <= max_bytes:
+                break
+            if path in keep:
+                continue
+            path.unlink()
+            total -= stat.st_size
+            evicted.append(path)
+        return evicted
@@ -0,0 +1,213 @@
+"""machine-readable record of a run of a vak command.
+
+Each command-line command saves a run manifest, a .json file
+with the version of vak, hashes of the config file and its sections,
+the wall time and peak memory of each stage of the command (as recorded by ``vak.memory``),
+and the number and total size in bytes of the files it processed.
+Manifests from different versions of vak and different datasets can be compared
+to track down changes in performance.
+
+Functions that process files report them with ``vak.manifest.count_files``,
+which does nothing unless a manifest is being recorded.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+import platform
+import sys
+import time
+
+import numpy as np
+import toml
+import torch
+
+from .__about__ import __version__
+from . import memory
+from .logging import log_or_print
+
+
+# manifest that files are counted in by ``vak.manifest.count_files``, set by ``vak.manifest.record``
+_ACTIVE_MANIFEST = None
+
+
+def sha256(path):
+    """returns sha256 hash of a file, as a hex str"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(2 ** 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def config_hashes(toml_path):
+    """get hashes of a config.toml file
+
+    Parameters
+    ----------
+    toml_path : str, pathlib.Path
+        path to a configuration file in TOML format
+
+    Returns
+    -------
+    hashes : dict
+        with keys 'sha256', the hash of the file,
+        and 'sections', that maps the name of each section in the file
+        to a hash of the options in that section. Section hashes don't change
+        when comments, formatting, or other sections change,
+        so they can be used to group runs with the same e.g. SPECT_PARAMS.
+    """
+    with Path(toml_path).open('r') as fp:
+        config_toml = toml.load(fp)
+    sections = {}
+    for section_name, section in config_toml.items():
+        section_str = json.dumps(section, sort_keys=True, default=str)
+        sections[section_name] = hashlib.sha256(section_str.encode()).hexdigest()
+    return {
+        'sha256': sha256(toml_path),
+        'sections': sections,
+    }
+
+
+class RunManifest:
+    """record of a run of a vak command,
+    saved as a .json file by ``vak.manifest.record``
+
+    Parameters
+    ----------
+    command : str
+        name of command, e.g. 'train'
+    toml_path : str, pathlib.Path
+        path to config.toml file used to run command. Default is None.
+
+    Attributes
+    ----------
+    counts : dict
+        that maps names of sets of files, e.g. 'audio files',
+        to dicts with keys 'n_files' and 'n_bytes'
+    """
+    def __init__(self, command, toml_path=None):
+        self.command = command
+        self.toml_path = Path(toml_path) if toml_path is not None else None
+        self.config = config_hashes(toml_path) if toml_path is not None else None
+        self.counts = {}
+        self.started = datetime.now()
+        self._tic = time.perf_counter()
+
+    def count_files(self, name, paths):
+        """add number of files and their total size to counts for ``name``
+
+        Parameters
+        ----------
+        name : str
+            name of set of files, e.g. 'audio files'
+        paths : list
+            of str or pathlib.Path, paths to files
+        """
+        paths = [path for path in paths if path is not None]
+        n_bytes = sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+        if name not in self.counts:
+            self.counts[name] = {'n_files': 0, 'n_bytes': 0}
+        self.counts[name]['n_files'] += len(paths)
+        self.counts[name]['n_bytes'] += n_bytes
+
+    def to_dict(self, stages=None, status='completed', error=None):
+        """returns manifest as a dict that can be saved as json
+
+        Parameters
+        ----------
+        stages : list
+            of dicts, records from a vak.memory.MemoryTracker. Default is None.
+        status : str
+            'completed' or 'failed'. Default is 'completed'.
+        error : str
+            repr of error, if status is 'failed'. Default is None.
+        """
+        return {
+            'command': self.command,
+            'status': status,
+            'error': error,
+            'vak_version': __version__,
+            'python_version': platform.python_version(),
+            'numpy_version': np.__version__,
+            'torch_version': torch.__version__,
+            'platform': platform.platform(),
+            'argv': sys.argv,
+            'started': self.started.isoformat(timespec='seconds'),
+            'wall_time_s': time.perf_counter() - self._tic,
+            'config_path': str(self.toml_path) if self.toml_path is not None else None,
+            'config': self.config,
+            'stages': stages if stages is not None else [],
+            'counts': self.counts,
+        }
+
+    def save(self, json_path, stages=None, status='completed', error=None):
+        """save manifest as a .json file. Parameters are the same as ``to_dict``"""
+        with Path(json_path).open('w') as fp:
+            json.dump(self.to_dict(stages, status, error), fp, indent=4)
+
+
+def count_files(name, paths):
+    """add number of files and their total size in bytes to the run manifest
+    being recorded, with the name ``name``.
+    If no manifest is being recorded, this does nothing.
+
+    Parameters
+    ----------
+    name : str
+        name of set of files, e.g. 'audio files'
+    paths : list
+        of str or pathlib.Path, paths to files
+    """
+    if _ACTIVE_MANIFEST is not None:
+        _ACTIVE_MANIFEST.count_files(name, paths)
+
+
+@contextmanager
+def record(command, toml_path, output_dir, timestamp, logger=None):
+    """context manager that records a run of a command-line command.
+
+    Tracks memory and wall time of each stage with ``vak.memory.track``,
+    then saves the stages in ``memory_{command}_{timestamp}.csv``,
+    and saves a run manifest in ``manifest_{command}_{timestamp}.json``,
+    both in output_dir. Files are saved even if an error occurs,
+    in which case the manifest has status 'failed'.
+
+    Parameters
+    ----------
+    command : str
+        name of command, e.g. 'train'
+    toml_path : str, pathlib.Path
+        path to config.toml file used to run command
+    output_dir : str, pathlib.Path
+        directory where files are saved, i.e. where the log file for the command is saved
+    timestamp : str
+        time stamp, included in file names, same as in name of log file
+    logger : logging.Logger
+        instance created by vak.logging.get_logger. Default is None.
+
+    Yields
+    ------
+    run_manifest : RunManifest
+    """
+    global _ACTIVE_MANIFEST
+    output_dir = Path(output_dir)
+    run_manifest = RunManifest(command, toml_path)
+    _ACTIVE_MANIFEST = run_manifest
+    status, error = 'completed', None
+    tracker = None
+    memory_csv_path = output_dir.joinpath(f'memory_{command}_{timestamp}.csv')
+    try:
+        with memory.track(command, csv_path=memory_csv_path, logger=logger) as tracker:
+            yield run_manifest
+    except BaseException as e:
+        status, error = 'failed', repr(e)
+        raise
+    finally:
+        _ACTIVE_MANIFEST = None
+        json_path = output_dir.joinpath(f'manifest_{command}_{timestamp}.json')
+        stages = tracker.records if tracker is not None else None
+        run_manifest.save(json_path, stages=stages, status=status, error=error)
+        log_or_print(f'saved run manifest: {json_path}', logger=logger, level='info')
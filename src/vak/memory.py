@@ -0,0 +1,272 @@
+"""track peak memory used by each stage of a vak command,
+e.g. making spectrograms, fitting a spectrogram scaler, or training for one epoch.
+
+Functions that do the work mark stages with ``vak.memory.stage``,
+which does nothing unless a ``MemoryTracker`` has been started, e.g. by a command-line command:
+
+>>> tracker = vak.memory.MemoryTracker(csv_path='memory.csv').start()
+>>> with vak.memory.stage('make spectrograms'):
+...     make_spectrograms()
+>>> tracker.stop()
+>>> print(tracker.summary())
+"""
+from contextlib import contextmanager
+import csv
+import os
+import sys
+import threading
+import time
+
+import torch
+
+from .logging import log_or_print
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# tracker that records stages marked with ``vak.memory.stage``, set by MemoryTracker.start
+_ACTIVE_TRACKER = None
+
+
+def current_rss():
+    """current resident set size (RSS) of this process, in bytes.
+    Returns None where /proc is not available, e.g. on macOS,
+    in which case only the peaks from ``peak_rss`` are used."""
+    try:
+        with open('/proc/self/statm', 'r') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss(children=False):
+    """peak resident set size, in bytes, since process started.
+    Returns None where the resource module is not available, i.e. on Windows.
+
+    Parameters
+    ----------
+    children : bool
+        if True, return peak of the largest child process that has terminated
+        and been waited for, e.g. a DataLoader worker or a worker process used by vak.parallel.Executor.
+        Default is False.
+    """
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+class MemoryTracker:
+    """records peak memory for each named stage of a vak command.
+
+    For each stage, records:
+    peak resident set size (RSS) of this process during the stage,
+    RSS at the start and end of the stage,
+    peak RSS of any child processes that terminated during the stage,
+    and peak memory allocated by torch on the GPU, when using CUDA.
+    Also records the duration of the stage in seconds.
+
+    Peak RSS is found by sampling RSS in a background thread,
+    and by checking whether the peak RSS reported by the operating system
+    increased during the stage; in that case the peak occurred during the stage,
+    so the value is exact, even for short spikes that sampling misses.
+    Stages can be nested; the peak of a stage includes its nested stages.
+
+    Parameters
+    ----------
+    csv_path : str, pathlib.Path
+        path to csv file where a row is written as each stage ends,
+        so that stages that finished are saved even if the process
+        runs out of memory. Default is None, in which case stages are only kept in memory.
+    interval : float
+        interval in seconds between samples of RSS. Default is 0.05.
+    """
+    FIELDS = (
+        'stage',
+        'duration_s',
+        'start_rss_mb',
+        'end_rss_mb',
+        'peak_rss_mb',
+        'peak_children_rss_mb',
+        'cuda_peak_allocated_mb',
+    )
+
+    def __init__(self, csv_path=None, interval=0.05):
+        self.csv_path = csv_path
+        self.interval = interval
+        self.records = []
+
+        self._active = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._csv_file = None
+        self._csv_writer = None
+
+    def start(self):
+        """start tracking, and make this the tracker used by ``vak.memory.stage``.
+        Returns self, so a tracker can be created and started in one line."""
+        global _ACTIVE_TRACKER
+        if self.csv_path is not None:
+            self._csv_file = open(self.csv_path, 'w', newline='')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(self.FIELDS)
+        if current_rss() is not None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        _ACTIVE_TRACKER = self
+        return self
+
+    def stop(self):
+        """stop tracking, and close csv file"""
+        global _ACTIVE_TRACKER
+        if _ACTIVE_TRACKER is self:
+            _ACTIVE_TRACKER = None
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv_writer = None
+
+    def _sample(self):
+        while not self._stop_event.wait(self.interval):
+            rss = current_rss()
+            with self._lock:
+                for active_stage in self._active:
+                    active_stage['peak_rss'] = max(active_stage['peak_rss'], rss)
+
+    @contextmanager
+    def stage(self, name):
+        """context manager that records memory used by code inside it as stage ``name``"""
+        rss = current_rss()
+        active_stage = {
+            'name': name,
+            'tic': time.perf_counter(),
+            'start_rss': rss,
+            'peak_rss': rss or 0,
+            'maxrss': peak_rss(),
+            'children_maxrss': peak_rss(children=True),
+            'cuda_peak': 0,
+        }
+        use_cuda = torch.cuda.is_available() and torch.cuda.is_initialized()
+        with self._lock:
+            if use_cuda:
+                # keep peaks of enclosing stages before resetting, so each stage gets its own peak
+                self._update_cuda_peaks(torch.cuda.max_memory_allocated())
+                torch.cuda.reset_peak_memory_stats()
+            self._active.append(active_stage)
+        try:
+            yield
+        finally:
+            with self._lock:
+                if use_cuda:
+                    self._update_cuda_peaks(torch.cuda.max_memory_allocated())
+                self._active.remove(active_stage)
+            self._end_stage(active_stage, use_cuda)
+
+    def _update_cuda_peaks(self, cuda_peak):
+        for active_stage in self._active:
+            active_stage['cuda_peak'] = max(active_stage['cuda_peak'], cuda_peak)
+
+    def _end_stage(self, active_stage, use_cuda):
+        end_rss = current_rss()
+        peak = max(active_stage['peak_rss'], end_rss or 0)
+        maxrss = peak_rss()
+        if maxrss is not None and maxrss > active_stage['maxrss']:
+            # process reached a new lifetime peak during this stage, so that's the exact peak for the stage
+            peak = max(peak, maxrss)
+        children_maxrss = peak_rss(children=True)
+        if children_maxrss is not None and children_maxrss > active_stage['children_maxrss']:
+            peak_children = children_maxrss
+        else:
+            peak_children = None
+
+        record = {
+            'stage': active_stage['name'],
+            'duration_s': time.perf_counter() - active_stage['tic'],
+            'start_rss_mb': _to_mb(active_stage['start_rss']),
+            'end_rss_mb': _to_mb(end_rss),
+            'peak_rss_mb': _to_mb(peak) if peak > 0 else None,
+            'peak_children_rss_mb': _to_mb(peak_children),
+            'cuda_peak_allocated_mb': _to_mb(active_stage['cuda_peak']) if use_cuda else None,
+        }
+        self.records.append(record)
+        if self._csv_writer is not None:
+            self._csv_writer.writerow([record[field] for field in self.FIELDS])
+            self._csv_file.flush()
+
+    def summary(self):
+        """returns a table of stages with their peak memory, as a str for logging"""
+        if len(self.records) == 0:
+            return 'no stages recorded by memory tracker'
+        lines = [f'{"stage":<40} {"duration (s)":>12} {"peak RSS (MB)":>14} '
+                 f'{"children (MB)":>14} {"CUDA (MB)":>10}']
+        for record in self.records:
+            lines.append(
+                f'{record["stage"]:<40} {record["duration_s"]:>12.2f} {_format_mb(record["peak_rss_mb"]):>14} '
+                f'{_format_mb(record["peak_children_rss_mb"]):>14} {_format_mb(record["cuda_peak_allocated_mb"]):>10}'
+            )
+        return '\n'.join(lines)
+
+
+def _to_mb(n_bytes):
+    return n_bytes / 1024 ** 2 if n_bytes is not None else None
+
+
+def _format_mb(mb):
+    return f'{mb:.1f}' if mb is not None else '-'
+
+
+@contextmanager
+def stage(name):
+    """context manager that marks code inside it as a stage named ``name``.
+    If a MemoryTracker has been started, it records the memory used by the stage;
+    otherwise this does nothing."""
+    if _ACTIVE_TRACKER is None:
+        yield
+    else:
+        with _ACTIVE_TRACKER.stage(name):
+            yield
+
+
+def get_tracker():
+    """returns the MemoryTracker used by ``vak.memory.stage``,
+    or None if one has not been started"""
+    return _ACTIVE_TRACKER
+
+
+@contextmanager
+def track(name, csv_path=None, logger=None):
+    """context manager that starts a MemoryTracker, records the code inside it
+    as a stage named ``name`` (along with any stages marked inside that code),
+    and logs a summary of all stages at the end, even if an error occurs.
+    Used by command-line commands.
+
+    Parameters
+    ----------
+    name : str
+        name of stage for all the code inside, e.g. the name of a command like 'train'
+    csv_path : str, pathlib.Path
+        path to csv file where stages are saved. Default is None.
+    logger : logging.Logger
+        instance created by vak.logging.get_logger. Default is None.
+
+    Yields
+    ------
+    tracker : MemoryTracker
+    """
+    tracker = MemoryTracker(csv_path=csv_path).start()
+    try:
+        with tracker.stage(name):
+            yield tracker
+    finally:
+        tracker.stop()
+        log_or_print(f'peak memory used by each stage:\n{tracker.summary()}', logger=logger, level='info')
@@ -0,0 +1,235 @@
+"""run functions on many files in parallel, with a pool of processes.
+
+Used to make spectrograms from audio files and to validate spectrogram files
+when preparing datasets. Files are assigned to processes longest first,
+by file size, so that a long file is not the last one to start while
+the other processes sit idle, and each process limits the number of threads
+used by numerical libraries, so processes do not compete for cores.
+
+``Executor.pipeline`` splits the work on each file into stages,
+loading, computing, and saving, that run in separate threads within a process,
+so that the next file is loaded and the last result is written to disk
+while the current file is computed.
+"""
+from concurrent.futures import as_completed, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import multiprocessing
+import os
+
+from threadpoolctl import threadpool_limits
+import torch
+from tqdm import tqdm
+
+from .logging import log_or_print
+
+
+def _mp_context():
+    """context for starting worker processes.
+
+    Not 'fork', because forking a process that has loaded torch and is using threads can deadlock.
+    With 'forkserver', workers are forked from a server process that only imports vak,
+    so they start quickly without importing torch again, as they would with 'spawn'.
+    'spawn' is used on platforms without 'forkserver', e.g. Windows.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(['vak'])
+        return ctx
+    return multiprocessing.get_context('spawn')
+
+
+def _limit_threads(threads_per_worker):
+    """initializer for worker processes that limits number of threads they use.
+    Libraries are already loaded in workers, so environment variables like
+    OMP_NUM_THREADS would have no effect; threadpoolctl changes the size of their thread pools"""
+    threadpool_limits(threads_per_worker)
+    torch.set_num_threads(threads_per_worker)
+
+
+def _map_chunk(func, chunk):
+    """apply func to each item in a chunk, in a worker process"""
+    return [func(item) for item in chunk]
+
+
+def _pipeline_chunk(load, compute, save, chunk):
+    """apply load, compute, and save to each item in a chunk, in a worker process.
+
+    While ``compute`` runs on one item in the calling thread, ``load`` runs on the next
+    item and ``save`` on the previous one in other threads. At most two results
+    wait to be saved at any time, so memory use is bounded when saving is slower than computing.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=2) as threads:
+        next_loaded = threads.submit(load, chunk[0])
+        for ind in range(len(chunk)):
+            loaded = next_loaded.result()
+            if ind + 1 < len(chunk):
+                next_loaded = threads.submit(load, chunk[ind + 1])
+            computed = compute(loaded)
+            results.append(threads.submit(save, computed))
+            if len(results) >= 2:
+                results[-2].result()  # also raises any error from saving
+        return [result.result() for result in results]
+
+
+class Executor:
+    """runs functions on many files in parallel, with a pool of processes,
+    showing a progress bar as items are processed
+
+    Parameters
+    ----------
+    num_workers : int
+        number of worker processes. If 0, all work is done in the calling process,
+        without starting a pool. Default is None, in which case it is the number of CPUs.
+    chunksize : int
+        number of items sent to a worker process at a time. Larger chunks
+        reduce overhead of communicating with processes, smaller chunks balance work better.
+        Default is None, in which case items are split into about four chunks per worker.
+    threads_per_worker : int
+        maximum number of threads each worker process uses for numerical libraries,
+        e.g. numpy, scipy, and torch. Default is None, in which case CPUs are divided
+        evenly among workers. Set with ``threadpoolctl`` and ``torch.set_num_threads``.
+
+    Notes
+    -----
+    Worker processes are started with the 'forkserver' method, or 'spawn' where that
+    is not available, not 'fork', since forking a process that has loaded torch can deadlock.
+    Functions passed to ``map`` and ``pipeline`` are imported in each worker,
+    so scripts that use an Executor need an ``if __name__ == '__main__':`` guard.
+
+    Examples
+    --------
+    >>> executor = vak.parallel.Executor(num_workers=4)
+    >>> durs = executor.map(audio_dur, audio_files, sizes=os.path.getsize)
+    """
+    def __init__(self, num_workers=None, chunksize=None, threads_per_worker=None):
+        if num_workers is not None and num_workers < 0:
+            raise ValueError(
+                f'num_workers must be greater than or equal to zero, but was: {num_workers}'
+            )
+        if chunksize is not None and chunksize < 1:
+            raise ValueError(
+                f'chunksize must be greater than zero, but was: {chunksize}'
+            )
+        if threads_per_worker is not None and threads_per_worker < 1:
+            raise ValueError(
+                f'threads_per_worker must be greater than zero, but was: {threads_per_worker}'
+            )
+        cpu_count = os.cpu_count() or 1
+        self.num_workers = num_workers if num_workers is not None else cpu_count
+        self.chunksize = chunksize
+        if threads_per_worker is None:
+            threads_per_worker = max(1, cpu_count // max(1, self.num_workers))
+        self.threads_per_worker = threads_per_worker
+
+    def __repr__(self):
+        return (f'Executor(num_workers={self.num_workers}, chunksize={self.chunksize}, '
+                f'threads_per_worker={self.threads_per_worker})')
+
+    def _chunks(self, items, sizes):
+        """split indices of items into chunks, with the largest items first"""
+        inds = list(range(len(items)))
+        if sizes is not None:
+            if callable(sizes):
+                sizes = [sizes(item) for item in items]
+            inds.sort(key=lambda ind: sizes[ind], reverse=True)
+        if self.chunksize is not None:
+            chunksize = self.chunksize
+        else:
+            chunksize = max(1, len(items) // (max(1, self.num_workers) * 4))
+        return [inds[start:start + chunksize] for start in range(0, len(inds), chunksize)]
+
+    def _run(self, chunk_func, items, sizes, logger):
+        """apply chunk_func to chunks of items, and return results in the same order as items"""
+        items = list(items)
+        if len(items) == 0:
+            return []
+
+        chunks = self._chunks(items, sizes)
+        results = [None] * len(items)
+        if self.num_workers == 0:
+            with tqdm(total=len(items)) as progress_bar:
+                for chunk in chunks:
+                    for ind, result in zip(chunk, chunk_func([items[ind] for ind in chunk])):
+                        results[ind] = result
+                    progress_bar.update(len(chunk))
+            return results
+
+        log_or_print(
+            f'processing {len(items)} items in {len(chunks)} chunks with {self.num_workers} worker processes',
+            logger=logger, level='info'
+        )
+        with ProcessPoolExecutor(max_workers=self.num_workers,
+                                 mp_context=_mp_context(),
+                                 initializer=_limit_threads,
+                                 initargs=(self.threads_per_worker,)) as pool:
+            # submit all chunks at once, in order, so that largest items start first
+            futures = {pool.submit(chunk_func, [items[ind] for ind in chunk]): chunk for chunk in chunks}
+            with tqdm(total=len(items)) as progress_bar:
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    for ind, result in zip(chunk, future.result()):
+                        results[ind] = result
+                    progress_bar.update(len(chunk))
+        return results
+
+    def map(self, func, items, sizes=None, logger=None):
+        """apply a function to each item
+
+        Parameters
+        ----------
+        func : callable
+            function to apply. Must be picklable, e.g. a function defined at the top
+            level of a module, or a ``functools.partial`` of one.
+        items : iterable
+            of items, e.g. paths to files
+        sizes : list, callable
+            sizes of items, used to start work on the largest items first.
+            Either a list with a size for each item, or a function that returns
+            the size of an item, e.g. ``os.path.getsize``. Default is None,
+            in which case items are processed in order.
+
+        Other Parameters
+        ----------------
+        logger : logging.Logger
+            instance created by vak.logging.get_logger. Default is None.
+
+        Returns
+        -------
+        results : list
+            of values returned by func, in the same order as items
+        """
+        return self._run(partial(_map_chunk, func), items, sizes, logger)
+
+    def pipeline(self, load, compute, save, items, sizes=None, logger=None):
+        """apply three functions to each item, as stages of a pipeline:
+        ``save(compute(load(item)))``.
+
+        Within each worker process, loading the next item and saving the
+        result for the previous item run in threads while the current item is computed,
+        so that reading and writing files overlap with computing.
+
+        Parameters
+        ----------
+        load, compute, save : callable
+            functions that are the stages of the pipeline. Must be picklable,
+            e.g. functions defined at the top level of a module,
+            or ``functools.partial`` of them.
+        items : iterable
+            of items, e.g. paths to files
+        sizes : list, callable
+            sizes of items, used to start work on the largest items first.
+            See ``Executor.map``.
+
+        Other Parameters
+        ----------------
+        logger : logging.Logger
+            instance created by vak.logging.get_logger. Default is None.
+
+        Returns
+        -------
+        results : list
+            of values returned by save, in the same order as items
+        """
+        return self._run(partial(_pipeline_chunk, load, compute, save), items, sizes, logger)
+
@@ -0,0 +1,386 @@
+"""profile a run of a vak command, to find out where time goes.
+
+Runs code under cProfile and, optionally, torch.profiler,
+then saves a ranked report of hotspots grouped by module,
+so that time spent in e.g. ``vak.files.spect`` can be told apart from
+time spent in ``vak.engine.model`` or in numpy and torch.
+Also saves files that can be loaded by other tools:
+
+- ``{name}.prof``, cProfile stats, that can be opened with e.g. snakeviz,
+  or loaded with ``pstats.Stats``
+- ``{name}.collapsed``, call stacks in the "collapsed" or "folded" format
+  used by flamegraph.pl, speedscope, and inferno, to make a flamegraph
+- ``{name}_torch_trace.json``, a Chrome trace from torch.profiler,
+  that can be opened with chrome://tracing or https://ui.perfetto.dev
+
+Training loops call ``vak.profiling.stop_training``, which returns True
+once a model has trained for the maximum number of steps
+when a profiler is running, and otherwise always returns False.
+"""
+from collections import defaultdict
+import cProfile
+import os
+from pathlib import Path
+import pstats
+import sysconfig
+import time
+
+import pandas as pd
+import torch
+import torch.profiler
+
+from .logging import log_or_print
+
+# profiler that training loops check with ``vak.profiling.stop_training``, set by Profiler.start
+_ACTIVE_PROFILER = None
+
+VAK_ROOT = Path(__file__).parent
+STDLIB_ROOT = Path(sysconfig.get_paths()['stdlib'])
+
+
+def stop_training(global_step):
+    """returns True if a Profiler is running with max_steps,
+    and global_step has reached max_steps. Otherwise returns False."""
+    return (
+        _ACTIVE_PROFILER is not None
+        and _ACTIVE_PROFILER.max_steps is not None
+        and global_step >= _ACTIVE_PROFILER.max_steps
+    )
+
+
+def module_name(filename):
+    """get name of module that a function profiled by cProfile belongs to,
+    from the filename in the key for that function in ``pstats.Stats.stats``.
+
+    For modules in vak, returns the full name of the module, e.g. 'vak.io.audio'.
+    For other packages, returns the name of the top-level package, e.g. 'numpy'.
+    Built-in functions, such as methods implemented in C, are grouped as '<built-in>'.
+
+    Parameters
+    ----------
+    filename : str
+        filename of function, first element of key in ``pstats.Stats.stats``
+
+    Returns
+    -------
+    module_name : str
+    """
+    if filename == '~':
+        return '<built-in>'
+    if filename.startswith('<frozen '):
+        # e.g. '<frozen importlib._bootstrap>'
+        return filename[len('<frozen '):-1].split('.')[0]
+    if filename.startswith('<'):
+        # e.g. '<string>', code passed to exec
+        return filename
+
+    path = Path(filename)
+    try:
+        relpath = path.resolve().relative_to(VAK_ROOT.resolve())
+        parts = ['vak'] + list(relpath.with_suffix('').parts)
+        if parts[-1] == '__init__':
+            parts = parts[:-1]
+        return '.'.join(parts)
+    except ValueError:
+        pass
+
+    parts = path.parts
+    for packages_dir in ('site-packages', 'dist-packages'):
+        if packages_dir in parts:
+            ind = len(parts) - 1 - parts[::-1].index(packages_dir)
+            if ind + 1 < len(parts):
+                return Path(parts[ind + 1]).stem
+    try:
+        relpath = path.relative_to(STDLIB_ROOT)
+        return relpath.with_suffix('').parts[0]
+    except ValueError:
+        return path.stem
+
+
+def _func_label(func):
+    filename, lineno, funcname = func
+    return f'{module_name(filename)}:{funcname}:{lineno}'
+
+
+def hotspots(stats):
+    """get a table of profiled functions
+
+    Parameters
+    ----------
+    stats : pstats.Stats
+        from cProfile
+
+    Returns
+    -------
+    hotspots_df : pandas.DataFrame
+        with one row per function, and columns
+        'module', 'function', 'filename', 'lineno', 'ncalls',
+        'tottime' (time spent in the function itself, excluding calls to other functions),
+        and 'cumtime' (time spent in the function including calls to other functions).
+        Sorted by tottime, highest first.
+    """
+    records = []
+    for (filename, lineno, funcname), (cc, nc, tt, ct, callers) in stats.stats.items():
+        records.append({
+            'module': module_name(filename),
+            'function': funcname,
+            'filename': filename,
+            'lineno': lineno,
+            'ncalls': nc,
+            'tottime': tt,
+            'cumtime': ct,
+        })
+    hotspots_df = pd.DataFrame.from_records(
+        records, columns=['module', 'function', 'filename', 'lineno', 'ncalls', 'tottime', 'cumtime']
+    )
+    return hotspots_df.sort_values(by='tottime', ascending=False).reset_index(drop=True)
+
+
+def module_totals(stats):
+    """sum time spent in functions of each module.
+
+    Time in built-in functions, e.g. methods implemented in C like ``torch.conv2d``
+    or ``zlib.crc32``, is attributed to the modules of the functions that call them,
+    in proportion to the time of calls from each caller, so that e.g. time spent
+    decompressing arrays is counted for the module that loads them.
+
+    Parameters
+    ----------
+    stats : pstats.Stats
+        from cProfile
+
+    Returns
+    -------
+    modules_df : pandas.DataFrame
+        with one row per module, and columns 'module', 'ncalls', 'tottime', and 'percent',
+        the percent of all profiled time spent in that module's functions.
+        Sorted by tottime, highest first.
+    """
+    tottime = defaultdict(float)
+    ncalls = defaultdict(int)
+    for (filename, lineno, funcname), (cc, nc, tt, ct, callers) in stats.stats.items():
+        module = module_name(filename)
+        ncalls[module] += nc
+        callers_ct = sum(caller_ct for caller_cc, caller_nc, caller_tt, caller_ct in callers.values())
+        if module == '<built-in>' and callers_ct > 0:
+            for caller, (caller_cc, caller_nc, caller_tt, caller_ct) in callers.items():
+                tottime[module_name(caller[0])] += tt * caller_ct / callers_ct
+        else:
+            tottime[module] += tt
+
+    modules_df = pd.DataFrame({
+        'module': list(ncalls.keys()),
+        'ncalls': list(ncalls.values()),
+        'tottime': [tottime[module] for module in ncalls.keys()],
+    })
+    total = modules_df['tottime'].sum()
+    modules_df['percent'] = modules_df['tottime'] / total * 100 if total > 0 else 0.
+    return modules_df.sort_values(by='tottime', ascending=False).reset_index(drop=True)
+
+
+def collapsed_stacks(stats, min_fraction=1e-4, max_depth=200):
+    """convert cProfile stats to call stacks in the "collapsed" format used to make flamegraphs,
+    where each line is the names of functions in a stack, separated by semicolons,
+    followed by a space and the time spent in the last function in microseconds.
+
+    cProfile only records time for pairs of caller and callee, not for entire stacks,
+    so time in each function is divided between the stacks that lead to it
+    in proportion to the time of calls from each caller,
+    as done by tools like flameprof. Calls that make up less than ``min_fraction``
+    of total time are dropped, and recursive calls are not expanded.
+
+    Parameters
+    ----------
+    stats : pstats.Stats
+        from cProfile
+    min_fraction : float
+        smallest fraction of total time for a stack to be included. Default is 1e-4.
+    max_depth : int
+        maximum depth of stacks. Default is 200.
+
+    Returns
+    -------
+    lines : list
+        of str, one per stack
+    """
+    callees = defaultdict(dict)
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, (caller_cc, caller_nc, caller_tt, caller_ct) in callers.items():
+            callees[caller][func] = caller_ct
+
+    min_time = stats.total_tt * min_fraction
+    stack_times = defaultdict(float)
+    roots = [func for func, (cc, nc, tt, ct, callers) in stats.stats.items() if not callers]
+    to_visit = [(root, (root,), stats.stats[root][3]) for root in roots]
+    while to_visit:
+        func, stack, func_time = to_visit.pop()
+        cc, nc, tt, ct, callers = stats.stats[func]
+        scale = func_time / ct if ct > 0 else 0.
+        self_time = tt * scale
+        if self_time > 0:
+            stack_times[stack] += self_time
+        if len(stack) >= max_depth:
+            continue
+        for callee, callee_time in callees[func].items():
+            callee_time = min(callee_time * scale, func_time)
+            if callee_time < min_time or callee in stack:
+                continue
+            to_visit.append((callee, stack + (callee,), callee_time))
+
+    return [
+        f'{";".join(_func_label(func) for func in stack)} {int(round(stack_time * 1e6))}'
+        for stack, stack_time in sorted(stack_times.items())
+        if stack_time * 1e6 >= 1
+    ]
+
+
+class Profiler:
+    """profiles code with cProfile and, optionally, torch.profiler.
+
+    While running, also makes ``vak.profiling.stop_training`` return True
+    once a model has trained for ``max_steps`` steps.
+
+    Parameters
+    ----------
+    max_steps : int
+        maximum number of training steps for each model. Default is None,
+        in which case training is not stopped.
+    torch_profiler : bool
+        if True, also profile with torch.profiler. Default is False.
+
+    Examples
+    --------
+    >>> with vak.profiling.Profiler(max_steps=50) as profiler:
+    ...     vak.cli.train(toml_path)
+    >>> profiler.save('./profile', name='train')
+    """
+    def __init__(self, max_steps=None, torch_profiler=False):
+        self.max_steps = max_steps
+        self.torch_profiler = torch_profiler
+        self.cprofile = None
+        self.torch_prof = None
+        self.stats = None
+        self.wall_time = None
+        self._tic = None
+
+    def start(self):
+        """start profiling, and make this the profiler checked by ``vak.profiling.stop_training``.
+        Returns self, so a profiler can be created and started in one line."""
+        global _ACTIVE_PROFILER
+        if self.torch_profiler:
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self.torch_prof = torch.profiler.profile(activities=activities, record_shapes=True)
+            self.torch_prof.start()
+        self.cprofile = cProfile.Profile()
+        _ACTIVE_PROFILER = self
+        self._tic = time.perf_counter()
+        self.cprofile.enable()
+        return self
+
+    def stop(self):
+        """stop profiling"""
+        global _ACTIVE_PROFILER
+        self.cprofile.disable()
+        self.wall_time = time.perf_counter() - self._tic
+        if _ACTIVE_PROFILER is self:
+            _ACTIVE_PROFILER = None
+        if self.torch_prof is not None:
+            self.torch_prof.stop()
+        self.stats = pstats.Stats(self.cprofile)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def report(self, top_n=30, sort_by='tottime'):
+        """returns a report of hotspots, as a str
+
+        Parameters
+        ----------
+        top_n : int
+            number of functions in each ranked list. Default is 30.
+        sort_by : str
+            how to rank functions from all modules,
+            'tottime' or 'cumtime'. Default is 'tottime'.
+        """
+        if self.stats is None:
+            raise ValueError('no profile to report, profiler has not been run')
+        hotspots_df = hotspots(self.stats)
+        modules_df = module_totals(self.stats)
+        vak_df = hotspots_df[hotspots_df['module'].str.startswith('vak')]
+
+        lines = [f'wall time: {self.wall_time:.2f} s, time in profiled functions: {self.stats.total_tt:.2f} s', '']
+
+        lines.append('time spent in each module, excluding calls to functions in other modules '
+                     'but including calls to built-in functions:')
+        lines.append(f'{"module":<40} {"tottime (s)":>12} {"%":>6} {"ncalls":>12}')
+        for record in modules_df.head(top_n).itertuples():
+            lines.append(f'{record.module:<40} {record.tottime:>12.3f} {record.percent:>6.1f} {record.ncalls:>12d}')
+        lines.append('')
+
+        def _add_functions(title, df, by):
+            lines.append(title)
+            lines.append(f'{"function":<70} {"ncalls":>10} {"tottime (s)":>12} {"cumtime (s)":>12}')
+            for record in df.sort_values(by=by, ascending=False).head(top_n).itertuples():
+                func = f'{record.module}:{record.function}:{record.lineno}'
+                lines.append(f'{func:<70} {record.ncalls:>10d} {record.tottime:>12.3f} {record.cumtime:>12.3f}')
+            lines.append('')
+
+        _add_functions(f'top {top_n} functions in vak, by cumulative time:', vak_df, 'cumtime')
+        _add_functions(f'top {top_n} functions in vak, by time in function itself:', vak_df, 'tottime')
+        _add_functions(f'top {top_n} functions in all modules, by {sort_by}:', hotspots_df, sort_by)
+
+        if self.torch_prof is not None:
+            sort_key = 'self_cuda_time_total' if torch.cuda.is_available() else 'self_cpu_time_total'
+            lines.append(f'top {top_n} torch operators, from torch.profiler:')
+            lines.append(self.torch_prof.key_averages().table(sort_by=sort_key, row_limit=top_n))
+
+        return '\n'.join(lines)
+
+    def save(self, output_dir, name='profile', top_n=30, sort_by='tottime', logger=None):
+        """save report and profiles in output_dir
+
+        Saves: ``{name}_hotspots.txt``, the report returned by ``Profiler.report``;
+        ``{name}_hotspots.csv`` and ``{name}_modules.csv``, tables of time
+        in each function and in each module; ``{name}.prof``, cProfile stats;
+        ``{name}.collapsed``, call stacks for making a flamegraph;
+        and ``{name}_torch_trace.json``, a Chrome trace, if torch_profiler is True.
+
+        Parameters
+        ----------
+        output_dir : str, pathlib.Path
+            directory where files are saved
+        name : str
+            prefix of file names. Default is 'profile'.
+        top_n : int
+            number of functions in each ranked list in report. Default is 30.
+        sort_by : str
+            how to rank functions from all modules in report,
+            'tottime' or 'cumtime'. Default is 'tottime'.
+        logger : logging.Logger
+            instance created by vak.logging.get_logger. Default is None.
+
+        Returns
+        -------
+        report : str
+            returned by ``Profiler.report``
+        """
+        output_dir = Path(output_dir)
+        report = self.report(top_n, sort_by)
+        output_dir.joinpath(f'{name}_hotspots.txt').write_text(report)
+
+        hotspots(self.stats).to_csv(output_dir.joinpath(f'{name}_hotspots.csv'), index=False)
+        module_totals(self.stats).to_csv(output_dir.joinpath(f'{name}_modules.csv'), index=False)
+
+        self.stats.dump_stats(os.fspath(output_dir.joinpath(f'{name}.prof')))
+        with output_dir.joinpath(f'{name}.collapsed').open('w') as fp:
+            fp.write('\n'.join(collapsed_stacks(self.stats)) + '\n')
+        if self.torch_prof is not None:
+            self.torch_prof.export_chrome_trace(os.fspath(output_dir.joinpath(f'{name}_torch_trace.json')))
+
+        log_or_print(f'saved profile in: {output_dir}', logger=logger, level='info')
+        return report
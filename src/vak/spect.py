@@ -5,10 +5,15 @@ https://scipy-cookbook.readthedocs.io/items/ButterworthBandpass.html
 spectrogram adapted from code by Kyle Kastner and Tim Sainburg
 https://github.com/timsainb/python_spectrograms_and_inversion
 """
+import functools
+
 import numpy as np
+import scipy.fft
+from scipy.signal import butter, sosfilt, sosfiltfilt
+import torch
 
-from scipy.signal import butter, lfilter
-from matplotlib.mlab import specgram
+# number of samples in each chunk of audio, when making spectrograms one chunk at a time
+STREAM_CHUNK_SIZE = 2 ** 18
 
 
 def butter_bandpass(lowcut, highcut, fs, order=5):
@@ -19,14 +24,373 @@ def butter_bandpass(lowcut, highcut, fs, order=5):
     return b, a
 
 
-def butter_bandpass_filter(data, lowcut, highcut, fs, order=5):
-    b, a = butter_bandpass(lowcut, highcut, fs, order=order)
-    y = lfilter(b, a, data)
+@functools.lru_cache(maxsize=128)
+def butter_bandpass_sos(lowcut, highcut, fs, order=5):
+    """design Butterworth bandpass filter as second-order sections.
+
+    Designs are cached by (lowcut, highcut, fs, order), so that a filter
+    is only designed once when filtering many audio files.
+    The returned array is shared by all callers, and should not be modified.
+
+    Returns
+    -------
+    sos : numpy.ndarray
+        with shape (number of sections, 6), as returned by ``scipy.signal.butter``
+    """
+    nyq = 0.5 * fs
+    low = lowcut / nyq
+    high = highcut / nyq
+    sos = butter(order, [low, high], btype='band', output='sos')
+    return sos
+
+
+def butter_bandpass_filter(data, lowcut, highcut, fs, order=5, zero_phase=False, axis=-1):
+    """filter data with a Butterworth bandpass filter,
+    in second-order sections, which is more numerically stable than
+    filtering with the transfer function coefficients (b, a).
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        signal to filter. Can have more than one dimension, e.g. channels or
+        a batch of signals, in which case each is filtered along ``axis``.
+    lowcut, highcut : int, float
+        lower and higher cutoff frequencies in Hz
+    fs : int
+        sampling frequency in Hz
+    order : int
+        order of filter. Default is 5.
+    zero_phase : bool
+        if True, filter forwards and backwards with ``scipy.signal.sosfiltfilt``,
+        so the filtered signal has no phase shift. Default is False,
+        in which case the signal is filtered once, with ``scipy.signal.sosfilt``.
+    axis : int
+        axis of data along which to filter. Default is -1.
+
+    Returns
+    -------
+    y : numpy.ndarray
+        filtered signal
+    """
+    sos = butter_bandpass_sos(lowcut, highcut, fs, order=order)
+    if zero_phase:
+        y = sosfiltfilt(sos, data, axis=axis)
+    else:
+        y = sosfilt(sos, data, axis=axis)
     return y
 
 
+def butter_bandpass_filter_chunks(chunks, lowcut, highcut, fs, order=5):
+    """filter a signal one chunk at a time with a Butterworth bandpass filter,
+    carrying the state of the filter from each chunk to the next,
+    so that a long recording can be filtered without loading it all into memory.
+
+    Concatenating the filtered chunks gives the same signal as
+    ``butter_bandpass_filter`` with ``zero_phase=False``. There is no
+    streaming version of the zero-phase filter, since it has to filter
+    the signal backwards starting from the end.
+
+    Parameters
+    ----------
+    chunks : iterable
+        of numpy.ndarray, consecutive one-dimensional chunks of a signal
+    lowcut, highcut : int, float
+        lower and higher cutoff frequencies in Hz
+    fs : int
+        sampling frequency in Hz
+    order : int
+        order of filter. Default is 5.
+
+    Yields
+    ------
+    y : numpy.ndarray
+        filtered chunk
+    """
+    sos = butter_bandpass_sos(lowcut, highcut, fs, order=order)
+    zi = np.zeros((sos.shape[0], 2))
+    for chunk in chunks:
+        y, zi = sosfilt(sos, chunk, zi=zi)
+        yield y
+
+
+def stft_power(dat, samp_freq, fft_size=512, step_size=64):
+    """computes power spectral density of overlapping windows of a signal,
+    the same as ``matplotlib.mlab.specgram`` with its defaults (a Hann window,
+    no detrending, one-sided spectrum scaled by frequency), but in float32.
+
+    Windows are strided views of the signal, so they are not copied before
+    the Fast Fourier transform, and only the non-negative frequencies are computed,
+    with ``scipy.fft.rfft``. Frequency and time bins are computed the same way as
+    by ``matplotlib.mlab.specgram``, so they are identical.
+
+    Parameters
+    ----------
+    dat : numpy.ndarray
+        audio signal
+    samp_freq : int
+        sampling frequency in Hz
+    fft_size : int
+        size of window for Fast Fourier transform, number of samples.
+    step_size : int
+        step size for Fast Fourier transform, number of samples between windows.
+
+    Returns
+    -------
+    power : numpy.ndarray
+        of float32, with shape (time bins, frequency bins). Note the axes are
+        transposed relative to the spectrogram returned by ``vak.spect.spectrogram``,
+        so that rows are contiguous in memory.
+    freqbins : numpy.ndarray
+        vector of centers of frequency bins from spectrogram
+    timebins : numpy.ndarray
+        vector of centers of time bins from spectrogram
+    """
+    if not 0 < step_size <= fft_size:
+        raise ValueError(
+            f'step_size must be greater than zero and less than or equal to fft_size, but was: {step_size}'
+        )
+
+    x = np.asarray(dat, dtype=np.float32)
+    if x.shape[0] < fft_size:
+        x = np.concatenate((x, np.zeros(fft_size - x.shape[0], dtype=np.float32)))
+
+    power = _power(x, samp_freq, fft_size, step_size)
+    freqbins = _freqbins(samp_freq, fft_size)
+    timebins = _timebins(x.shape[0], samp_freq, fft_size, step_size)
+
+    return power, freqbins, timebins
+
+
+def _power(x, samp_freq, fft_size, step_size):
+    """power spectral density of all windows of float32 signal x
+    that start at multiples of step_size and fit in x, with shape (time bins, frequency bins)"""
+    window = np.hanning(fft_size)
+    frames = np.lib.stride_tricks.sliding_window_view(x, fft_size)[::step_size]
+    windowed = frames * window.astype(np.float32)
+    spect = scipy.fft.rfft(windowed, axis=1, overwrite_x=True)
+    del windowed
+
+    power = np.empty(spect.shape, dtype=np.float32)
+    np.multiply(spect.real, spect.real, out=power)
+    power += spect.imag ** 2
+    del spect
+
+    # one-sided spectrum, so double power at all frequencies except zero and (for even fft_size) Nyquist
+    power *= 1 / (samp_freq * (window ** 2).sum())
+    if fft_size % 2 == 0:
+        power[:, 1:-1] *= 2
+    else:
+        power[:, 1:] *= 2
+    return power
+
+
+def stft_power_chunks(chunks, samp_freq, fft_size=512, step_size=64):
+    """computes power spectral density of overlapping windows of a signal
+    that is read one chunk at a time, e.g. from a memory-mapped audio file,
+    so that a long recording never has to be in memory all at once.
+
+    Samples at the end of each chunk that do not fill a window are kept,
+    and the next window starts with them, so windows span chunk boundaries
+    exactly as they do in the whole signal. Concatenating the blocks gives
+    the same power as ``vak.spect.stft_power`` on the whole signal, for any sizes of chunks.
+
+    Parameters
+    ----------
+    chunks : iterable
+        of numpy.ndarray, consecutive one-dimensional chunks of an audio signal
+    samp_freq : int
+        sampling frequency in Hz
+    fft_size : int
+        size of window for Fast Fourier transform, number of samples.
+    step_size : int
+        step size for Fast Fourier transform, number of samples between windows.
+
+    Yields
+    ------
+    power : numpy.ndarray
+        of float32, with shape (time bins, frequency bins), for all windows
+        that end in the chunk. Can have zero time bins, if a chunk is shorter than step_size.
+    """
+    if not 0 < step_size <= fft_size:
+        raise ValueError(
+            f'step_size must be greater than zero and less than or equal to fft_size, but was: {step_size}'
+        )
+
+    # samples from start of the next window to the end of the last chunk
+    remainder = np.zeros(0, dtype=np.float32)
+    n_samples = 0
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.float32)
+        n_samples += chunk.shape[0]
+        x = np.concatenate((remainder, chunk))
+        if x.shape[0] < fft_size:
+            remainder = x
+            continue
+        n_frames = (x.shape[0] - fft_size) // step_size + 1
+        yield _power(x[:(n_frames - 1) * step_size + fft_size], samp_freq, fft_size, step_size)
+        remainder = x[n_frames * step_size:]
+
+    if n_samples < fft_size:
+        # signal shorter than one window is padded with zeros, as in stft_power
+        x = np.concatenate((remainder, np.zeros(fft_size - remainder.shape[0], dtype=np.float32)))
+        yield _power(x, samp_freq, fft_size, step_size)
+
+
+def _freqbins(samp_freq, fft_size):
+    """centers of frequency bins, computed the same way as by ``matplotlib.mlab.specgram``"""
+    n_freqs = fft_size // 2 + 1
+    freqbins = np.fft.fftfreq(fft_size, 1 / samp_freq)[:n_freqs]
+    if fft_size % 2 == 0:
+        freqbins[-1] *= -1
+    return freqbins
+
+
+def _timebins(n_samples, samp_freq, fft_size, step_size):
+    """centers of time bins, computed the same way as by ``matplotlib.mlab.specgram``.
+    ``n_samples`` is the length of the signal after padding to at least ``fft_size``"""
+    return np.arange(fft_size / 2, n_samples - fft_size / 2 + 1, step_size) / samp_freq
+
+
+def _freq_inds(freqbins, freq_cutoffs):
+    """slice of frequency bins between freq_cutoffs, lower cutoff inclusive"""
+    f_inds = np.nonzero((freqbins >= freq_cutoffs[0]) &
+                        (freqbins < freq_cutoffs[1]))[0]  # returns tuple
+    if f_inds.size > 0:
+        return slice(f_inds[0], f_inds[-1] + 1)
+    else:
+        return slice(0, 0)
+
+
+VALID_FREQ_SCALES = {'mel', 'log'}
+
+
+def _hz_to_mel(hz):
+    return 2595. * np.log10(1. + hz / 700.)
+
+
+def _mel_to_hz(mel):
+    return 700. * (10. ** (mel / 2595.) - 1.)
+
+
+def freq_filterbank(samp_freq, fft_size=512, freq_cutoffs=None, freq_scale=None, num_freqbins=None,
+                    freq_decimate=None):
+    """weights that reduce the number of frequency bins in a spectrogram,
+    by averaging power in bins spaced on a mel or log scale, or in groups of adjacent bins.
+
+    Each row of weights sums to one, so each reduced frequency bin is a weighted average
+    of power in the frequency bins of the spectrogram, and has the same units.
+    Weights are applied to power before any transform, so that e.g. 'log_spect'
+    takes the log of average power in each reduced bin.
+
+    Parameters
+    ----------
+    samp_freq : int
+        sampling frequency in Hz
+    fft_size : int
+        size of window for Fast Fourier transform, number of samples.
+    freq_cutoffs : tuple
+        of two elements, lower and higher frequencies. Frequency bins outside
+        cutoffs are removed before they are reduced, as in ``vak.spect.spectrogram``.
+    freq_scale : str
+        one of {'mel', 'log'}. Average power with ``num_freqbins`` triangular filters,
+        with centers equally spaced on the mel scale or log scale between freq_cutoffs,
+        or between the lowest and highest frequency bins if freq_cutoffs is None.
+        Default is None.
+    num_freqbins : int
+        number of frequency bins after reducing with freq_scale.
+    freq_decimate : int
+        average power in groups of this many adjacent frequency bins.
+        The last group has fewer bins if the number of bins is not a multiple of freq_decimate.
+        Default is None. Can't be used with freq_scale.
+
+    Returns
+    -------
+    weights : numpy.ndarray
+        of float32, with shape (reduced frequency bins, frequency bins between freq_cutoffs),
+        or None if freq_scale and freq_decimate are None
+    freqbins : numpy.ndarray
+        vector of centers of reduced frequency bins, in Hz. For 'mel' and 'log', the
+        center of each filter; for freq_decimate, the mean of the frequency bins in each group.
+        None if freq_scale and freq_decimate are None.
+    """
+    if freq_scale is None and freq_decimate is None:
+        return None, None
+    weights, freqbins = _freq_filterbank(samp_freq, fft_size,
+                                         tuple(freq_cutoffs) if freq_cutoffs else None,
+                                         freq_scale, num_freqbins, freq_decimate)
+    return weights, freqbins.copy()
+
+
+@functools.lru_cache(maxsize=16)
+def _freq_filterbank(samp_freq, fft_size, freq_cutoffs, freq_scale, num_freqbins, freq_decimate):
+    """cached, so weights are computed once for each set of parameters, not for each spectrogram.
+    Returned weights are read-only"""
+    freqbins = _freqbins(samp_freq, fft_size)
+    if freq_cutoffs:
+        freqbins = freqbins[_freq_inds(freqbins, freq_cutoffs)]
+    n_in = freqbins.shape[0]
+    if n_in == 0:
+        raise ValueError(
+            f'no frequency bins between freq_cutoffs {freq_cutoffs} to reduce'
+        )
+
+    if freq_scale is not None and freq_decimate is not None:
+        raise ValueError(
+            'freq_scale and freq_decimate can not both be specified, unclear how to reduce frequency bins'
+        )
+
+    if freq_decimate is not None:
+        if freq_decimate < 1:
+            raise ValueError(
+                f'freq_decimate must be an integer greater than zero, but was: {freq_decimate}'
+            )
+        n_out = -(-n_in // freq_decimate)  # ceiling division, last group can be smaller
+        weights = np.zeros((n_out, n_in), dtype=np.float64)
+        for row in range(n_out):
+            group = slice(row * freq_decimate, (row + 1) * freq_decimate)
+            weights[row, group] = 1.
+        weights /= weights.sum(axis=1, keepdims=True)
+        reduced_freqbins = weights @ freqbins
+    else:
+        if freq_scale not in VALID_FREQ_SCALES:
+            raise ValueError(
+                f'freq_scale must be one of {VALID_FREQ_SCALES}, but was: {freq_scale}'
+            )
+        if num_freqbins is None or not 0 < num_freqbins <= n_in:
+            raise ValueError(
+                'num_freqbins must be greater than zero and less than or equal to the number '
+                f'of frequency bins, {n_in}, when freq_scale is specified, but was: {num_freqbins}'
+            )
+        low, high = freq_cutoffs if freq_cutoffs else (freqbins[0], freqbins[-1])
+        if freq_scale == 'mel':
+            edges = _mel_to_hz(np.linspace(_hz_to_mel(low), _hz_to_mel(high), num_freqbins + 2))
+        elif freq_scale == 'log':
+            if low <= 0:
+                # no log of zero frequency, start from lowest frequency bin above zero
+                if not np.any(freqbins > 0):
+                    raise ValueError('no frequency bins above zero, can not use freq_scale \'log\'')
+                low = freqbins[freqbins > 0][0]
+            edges = np.geomspace(low, high, num_freqbins + 2)
+        # triangular filters, each from center of filter below to center of filter above
+        lower, centers, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+        weights = np.maximum(0., np.minimum((freqbins - lower) / (centers - lower),
+                                            (upper - freqbins) / (upper - centers)))
+        # filters narrower than frequency bins, at low frequencies on mel and log scales,
+        # can fall between bins; use the bin nearest their center
+        empty = weights.sum(axis=1) == 0
+        weights[empty, np.argmin(np.abs(freqbins - centers[empty]), axis=1)] = 1.
+        weights /= weights.sum(axis=1, keepdims=True)
+        reduced_freqbins = edges[1:-1]
+
+    weights = weights.astype(np.float32)
+    weights.setflags(write=False)
+    reduced_freqbins.setflags(write=False)
+    return weights, reduced_freqbins
+
+
 def spectrogram(dat, samp_freq, fft_size=512, step_size=64, thresh=None, transform_type=None,
-                freq_cutoffs=None):
+                freq_cutoffs=None, zero_phase_filter=False, prefiltered=False,
+                freq_scale=None, num_freqbins=None, freq_decimate=None):
     """creates a spectrogram
 
     Parameters
@@ -48,46 +412,353 @@ def spectrogram(dat, samp_freq, fft_size=512, step_size=64, thresh=None, transfo
         threshold minimum power for log spectrogram
     freq_cutoffs : tuple
         of two elements, lower and higher frequencies.
+    zero_phase_filter : bool
+        if True, bandpass filter with no phase shift, by filtering forwards and backwards.
+        Only used if freq_cutoffs is specified. Default is False.
+    prefiltered : bool
+        if True, dat was already bandpass filtered with freq_cutoffs, e.g. by
+        ``vak.spect.butter_bandpass_filter``, and is not filtered again. Frequencies outside
+        freq_cutoffs are still removed from the spectrogram. Used to filter a signal once
+        and make spectrograms from it with different parameters. Default is False.
+    freq_scale : str
+        one of {'mel', 'log'}. If specified, reduce frequency bins to num_freqbins bins
+        spaced on the mel or log scale. See ``vak.spect.freq_filterbank``. Default is None.
+    num_freqbins : int
+        number of frequency bins in spectrogram, when freq_scale is specified.
+    freq_decimate : int
+        if specified, reduce frequency bins by averaging groups of this many adjacent bins.
+        See ``vak.spect.freq_filterbank``. Default is None.
 
     Return
     ------
     spect : numpy.ndarray
-        spectrogram
+        spectrogram, of float32
     freqbins : numpy.ndarray
         vector of centers of frequency bins from spectrogram
     timebins : numpy.ndarray
         vector of centers of time bins from spectrogram
     """
-    noverlap = fft_size - step_size
-
-    if freq_cutoffs:
+    if freq_cutoffs and not prefiltered:
         dat = butter_bandpass_filter(dat,
                                      freq_cutoffs[0],
                                      freq_cutoffs[1],
-                                     samp_freq)
+                                     samp_freq,
+                                     zero_phase=zero_phase_filter)
+
+    power, freqbins, timebins = stft_power(dat, samp_freq, fft_size, step_size)
+
+    power_max = None
+    if transform_type == 'log_spect':
+        # volume normalize to max 1, using max before removing frequencies outside cutoffs
+        power_max = power.max()
+
+    # remove frequencies before transforming, so the transforms operate on less data
+    if freq_cutoffs:
+        f_inds = _freq_inds(freqbins, freq_cutoffs)
+        power = power[:, f_inds]
+        freqbins = freqbins[f_inds]
+    weights, reduced_freqbins = freq_filterbank(samp_freq, fft_size, freq_cutoffs, freq_scale, num_freqbins,
+                                                freq_decimate)
+    if weights is not None:
+        # (frequency bins, time bins), contiguous in memory
+        spect = weights @ power.T
+        freqbins = reduced_freqbins
+    else:
+        # (frequency bins, time bins), contiguous in memory
+        spect = np.ascontiguousarray(power.T)
+    del power
+
+    _transform(spect, transform_type, thresh, power_max)
+    return spect, freqbins, timebins
 
-    # below only take [:3] from return of specgram because we don't need the image
-    spect, freqbins, timebins = specgram(dat, fft_size, samp_freq, noverlap=noverlap)[:3]
 
+def _transform(spect, transform_type, thresh, power_max=None):
+    """apply transform and threshold to spectrogram, in place, to avoid allocating more arrays.
+    power_max is the maximum power, used to normalize when transform_type is 'log_spect'"""
     if transform_type:
         if transform_type == 'log_spect':
-            spect /= spect.max()  # volume normalize to max 1
-            spect = np.log10(spect)  # take log
+            spect /= power_max
+            np.log10(spect, out=spect)  # take log
             if thresh:
                 # I know this is weird, maintaining 'legacy' behavior
-                spect[spect < -thresh] = -thresh
+                np.maximum(spect, -thresh, out=spect)
         elif transform_type == 'log_spect_plus_one':
-            spect = np.log10(spect + 1)
+            spect += 1
+            np.log10(spect, out=spect)
             if thresh:
-                spect[spect < thresh] = thresh
+                np.maximum(spect, thresh, out=spect)
     else:
         if thresh:
-            spect[spect < thresh] = thresh  # set anything less than the threshold as the threshold
+            np.maximum(spect, thresh, out=spect)  # set anything less than the threshold as the threshold
 
+
+def spectrogram_shape(n_samples, samp_freq, fft_size=512, step_size=64, freq_cutoffs=None,
+                      freq_scale=None, num_freqbins=None, freq_decimate=None):
+    """shape of the spectrogram made from a signal with n_samples by ``vak.spect.spectrogram``,
+    without making it, e.g. to allocate a memory-mapped array for ``vak.spect.spectrogram_chunked``
+
+    Returns
+    -------
+    shape : tuple
+        (number of frequency bins, number of time bins)
+    """
+    freqbins = _freqbins(samp_freq, fft_size)
     if freq_cutoffs:
-        f_inds = np.nonzero((freqbins >= freq_cutoffs[0]) &
-                            (freqbins < freq_cutoffs[1]))[0]  # returns tuple
-        spect = spect[f_inds, :]
-        freqbins = freqbins[f_inds]
+        freqbins = freqbins[_freq_inds(freqbins, freq_cutoffs)]
+    _, reduced_freqbins = freq_filterbank(samp_freq, fft_size, freq_cutoffs, freq_scale, num_freqbins,
+                                          freq_decimate)
+    if reduced_freqbins is not None:
+        freqbins = reduced_freqbins
+    timebins = _timebins(max(n_samples, fft_size), samp_freq, fft_size, step_size)
+    return freqbins.shape[0], timebins.shape[0]
 
-    return spect, freqbins, timebins
+
+def spectrogram_chunked(dat, samp_freq, fft_size=512, step_size=64, thresh=None, transform_type=None,
+                        freq_cutoffs=None, out=None, chunk_size=STREAM_CHUNK_SIZE,
+                        freq_scale=None, num_freqbins=None, freq_decimate=None):
+    """creates a spectrogram from an audio signal one chunk at a time,
+    so that memory used does not depend on the length of the signal.
+    For very long recordings, with ``dat`` a memory-mapped array,
+    e.g. from ``vak.files.audio.load_mmap``, and ``out`` another one,
+    e.g. from ``numpy.lib.format.open_memmap``.
+
+    The signal is bandpass filtered one chunk at a time with
+    ``vak.spect.butter_bandpass_filter_chunks``, and the power of windows that span
+    two chunks is computed by ``vak.spect.stft_power_chunks``, so the spectrogram
+    is the same as ``vak.spect.spectrogram`` with ``zero_phase_filter=False``.
+    Time bins of power are written to ``out`` as they are computed; then, since
+    'log_spect' normalizes by the maximum power in the whole spectrogram,
+    transforms are applied in place in a second pass through ``out``.
+
+    Parameters
+    ----------
+    dat : numpy.ndarray
+        one-dimensional audio signal, e.g. a numpy.memmap
+    samp_freq : int
+        sampling frequency in Hz
+    fft_size : int
+        size of window for Fast Fourier transform, number of time bins.
+    step_size : int
+        step size for Fast Fourier transform
+    thresh: int
+        threshold minimum power for log spectrogram
+    transform_type : str
+        one of {'log_spect', 'log_spect_plus_one'}. See ``vak.spect.spectrogram``.
+    freq_cutoffs : tuple
+        of two elements, lower and higher frequencies.
+    out : numpy.ndarray
+        of float32, with shape returned by ``vak.spect.spectrogram_shape``,
+        that the spectrogram is written to. Time bins are written in order, so an array
+        in Fortran order, where each time bin is contiguous, is written sequentially.
+        Default is None, in which case an array is allocated.
+    chunk_size : int
+        number of samples of the signal in each chunk. Default is ``vak.spect.STREAM_CHUNK_SIZE``.
+    freq_scale : str
+        one of {'mel', 'log'}. See ``vak.spect.spectrogram``. Default is None.
+    num_freqbins : int
+        number of frequency bins in spectrogram, when freq_scale is specified.
+    freq_decimate : int
+        See ``vak.spect.spectrogram``. Default is None.
+
+    Returns
+    -------
+    spect : numpy.ndarray
+        spectrogram, ``out`` if specified
+    freqbins : numpy.ndarray
+        vector of centers of frequency bins from spectrogram
+    timebins : numpy.ndarray
+        vector of centers of time bins from spectrogram
+    """
+    n_samples = dat.shape[0]
+    shape = spectrogram_shape(n_samples, samp_freq, fft_size, step_size, freq_cutoffs,
+                              freq_scale, num_freqbins, freq_decimate)
+    if out is None:
+        out = np.empty(shape, dtype=np.float32, order='F')
+    elif out.shape != shape:
+        raise ValueError(
+            f'shape of out must be the shape of the spectrogram, {shape}, but was: {out.shape}'
+        )
+
+    chunks = (dat[start:start + chunk_size] for start in range(0, n_samples, chunk_size))
+    if freq_cutoffs:
+        chunks = butter_bandpass_filter_chunks(chunks, freq_cutoffs[0], freq_cutoffs[1], samp_freq)
+
+    freqbins = _freqbins(samp_freq, fft_size)
+    f_inds = _freq_inds(freqbins, freq_cutoffs) if freq_cutoffs else slice(None)
+    weights, reduced_freqbins = freq_filterbank(samp_freq, fft_size, freq_cutoffs, freq_scale, num_freqbins,
+                                                freq_decimate)
+    power_max = 0.
+    start = 0
+    for power in stft_power_chunks(chunks, samp_freq, fft_size, step_size):
+        if power.shape[0] == 0:
+            continue
+        # max before removing frequencies outside cutoffs, as in spectrogram
+        power_max = max(power_max, float(power.max()))
+        if weights is not None:
+            out[:, start:start + power.shape[0]] = weights @ power[:, f_inds].T
+        else:
+            out[:, start:start + power.shape[0]] = power[:, f_inds].T
+        start += power.shape[0]
+
+    if transform_type or thresh:
+        # second pass, in blocks of time bins, after the maximum is known
+        block_size = max(1, chunk_size // step_size)
+        for block_start in range(0, shape[1], block_size):
+            _transform(out[:, block_start:block_start + block_size], transform_type, thresh,
+                       np.float32(power_max))
+
+    freqbins = freqbins[f_inds] if weights is None else reduced_freqbins
+    timebins = _timebins(max(n_samples, fft_size), samp_freq, fft_size, step_size)
+    return out, freqbins, timebins
+
+
+def spectrogram_batch(dats, samp_freq, fft_size=512, step_size=64, thresh=None, transform_type=None,
+                      freq_cutoffs=None, zero_phase_filter=False, num_threads=None,
+                      freq_scale=None, num_freqbins=None, freq_decimate=None):
+    """creates spectrograms from a batch of audio signals with the same sampling frequency,
+    using ``torch.stft``. Signals are zero-padded to the length of the longest,
+    so that all spectrograms are computed at once, and then each spectrogram is
+    cropped to the number of time bins it would have if it were computed by itself.
+
+    Gives the same result as calling ``vak.spect.spectrogram`` on each signal,
+    within float32 precision, but is faster for many short signals,
+    because the overhead of computing each spectrogram separately is avoided,
+    and because ``torch`` uses multiple threads for the Fast Fourier transform.
+
+    Parameters
+    ----------
+    dats : list
+        of numpy.ndarray, audio signals
+    samp_freq : int
+        sampling frequency in Hz, of all signals
+    fft_size : int
+        size of window for Fast Fourier transform, number of time bins.
+    step_size : int
+        step size for Fast Fourier transform
+    transform_type : str
+        one of {'log_spect', 'log_spect_plus_one'}.
+        'log_spect' transforms the spectrogram to log(spectrogram), and
+        'log_spect_plus_one' does the same thing but adds one to each element.
+        Default is None. If None, no transform is applied.
+    thresh: int
+        threshold minimum power for log spectrogram
+    freq_cutoffs : tuple
+        of two elements, lower and higher frequencies.
+    zero_phase_filter : bool
+        if True, bandpass filter with no phase shift, by filtering forwards and backwards.
+        Only used if freq_cutoffs is specified. Default is False.
+    num_threads : int
+        number of threads used by ``torch`` to compute spectrograms.
+        Default is None, in which case the number of threads is not changed.
+    freq_scale : str
+        one of {'mel', 'log'}. See ``vak.spect.spectrogram``. Default is None.
+    num_freqbins : int
+        number of frequency bins in spectrograms, when freq_scale is specified.
+    freq_decimate : int
+        See ``vak.spect.spectrogram``. Default is None.
+
+    Returns
+    -------
+    spects : list
+        of tuples (spect, freqbins, timebins), one for each signal in dats,
+        as returned by ``vak.spect.spectrogram``
+    """
+    if not 0 < step_size <= fft_size:
+        raise ValueError(
+            f'step_size must be greater than zero and less than or equal to fft_size, but was: {step_size}'
+        )
+
+    # length of each signal after padding to at least fft_size, as in stft_power
+    n_samples = [max(dat.shape[0], fft_size) for dat in dats]
+    batch = np.zeros((len(dats), max(n_samples)), dtype=np.float32)
+    for row, dat in enumerate(dats):
+        batch[row, :dat.shape[0]] = dat
+    if freq_cutoffs:
+        if zero_phase_filter:
+            # filtering backwards starts from the end of each signal, so filter them one at a time
+            for row, dat in enumerate(dats):
+                batch[row, :dat.shape[0]] = butter_bandpass_filter(batch[row, :dat.shape[0]],
+                                                                   freq_cutoffs[0],
+                                                                   freq_cutoffs[1],
+                                                                   samp_freq,
+                                                                   zero_phase=True)
+        else:
+            # filter is causal, so padding at the end of a signal does not change the filtered signal,
+            # and all signals can be filtered at once
+            batch = butter_bandpass_filter(batch,
+                                           freq_cutoffs[0],
+                                           freq_cutoffs[1],
+                                           samp_freq).astype(np.float32)
+            # but filtered signal rings into padding, and stft_power pads short signals with zeros after filtering
+            for row, dat in enumerate(dats):
+                batch[row, dat.shape[0]:] = 0.
+
+    freqbins = _freqbins(samp_freq, fft_size)
+    timebins = [_timebins(n, samp_freq, fft_size, step_size) for n in n_samples]
+
+    if num_threads is not None:
+        prev_num_threads = torch.get_num_threads()
+        torch.set_num_threads(num_threads)
+    try:
+        with torch.no_grad():
+            # same window as np.hanning, so we get the same result as stft_power
+            window = torch.hann_window(fft_size, periodic=False, dtype=torch.float64)
+            spect = torch.stft(torch.from_numpy(batch),
+                               n_fft=fft_size,
+                               hop_length=step_size,
+                               window=window.float(),
+                               center=False,
+                               onesided=True,
+                               return_complex=True)  # (batch, frequency bins, time bins)
+            power = torch.addcmul(spect.real.square(), spect.imag, spect.imag)
+            del spect
+
+            # one-sided spectrum, so double power at all frequencies except zero and (for even fft_size) Nyquist
+            power *= 1 / (samp_freq * float((window ** 2).sum()))
+            if fft_size % 2 == 0:
+                power[:, 1:-1, :] *= 2
+            else:
+                power[:, 1:, :] *= 2
+
+            if transform_type == 'log_spect':
+                # volume normalize to max 1, using max of each spectrogram,
+                # before removing frequencies outside cutoffs and ignoring time bins from padding
+                for row, t in enumerate(timebins):
+                    power[row, :, t.shape[0]:] = 0.
+                power_max = power.amax(dim=(1, 2))
+
+            if freq_cutoffs:
+                f_inds = _freq_inds(freqbins, freq_cutoffs)
+                power = power[:, f_inds, :]
+                freqbins = freqbins[f_inds]
+
+            weights, reduced_freqbins = freq_filterbank(samp_freq, fft_size, freq_cutoffs, freq_scale,
+                                                        num_freqbins, freq_decimate)
+            if weights is not None:
+                power = torch.matmul(torch.from_numpy(weights.copy()), power)
+                freqbins = reduced_freqbins
+
+            if transform_type:
+                if transform_type == 'log_spect':
+                    power /= power_max[:, None, None]
+                    power.log10_()
+                    if thresh:
+                        # I know this is weird, maintaining 'legacy' behavior
+                        power.clamp_(min=-thresh)
+                elif transform_type == 'log_spect_plus_one':
+                    power += 1
+                    power.log10_()
+                    if thresh:
+                        power.clamp_(min=thresh)
+            else:
+                if thresh:
+                    power.clamp_(min=thresh)  # set anything less than the threshold as the threshold
+            power = power.numpy()
+    finally:
+        if num_threads is not None:
+            torch.set_num_threads(prev_num_threads)
+
+    return [
+        (np.ascontiguousarray(power[row, :, :t.shape[0]]), freqbins.copy(), t)
+        for row, t in enumerate(timebins)
+    ]
@@ -0,0 +1,2 @@
+"""utilities for testing vak, e.g. at scale with synthetic datasets"""
+from . import synth
@@ -0,0 +1,379 @@
+"""generate synthetic datasets of annotated vocalizations,
+to test vak at scale without real recordings.
+
+Each audio file contains a sequence of "syllables" separated by silent gaps,
+on top of background noise. Each label in the label set is a syllable type
+with its own frequency and duration, and is either a pure tone or a
+linear chirp, so that a network can learn to segment and classify them.
+Labels are drawn independently for each syllable from a configurable
+distribution.
+
+Files are written in the layouts that ``vak prep`` expects:
+'wav' audio files with .phn annotation files next to them (annot_format 'phn'),
+or 'cbin' audio files with .rec and .cbin.not.mat annotation files next to them
+(annot_format 'notmat'), as made by EvTAF and evsonganaly.
+
+>>> audio_files, annot_files = vak.testing.synth.make_dataset('./synth', hours=10, audio_format='cbin')
+
+After that, set ``data_dir = "./synth"``, ``audio_format = "cbin"``, and ``annot_format = "notmat"``
+in the [PREP] section of a config file to use the dataset with any vak command.
+"""
+from pathlib import Path
+
+import numpy as np
+import scipy.io
+import scipy.signal
+from scipy.io import wavfile
+
+VALID_SYLLABLE_KINDS = ('tone', 'chirp', 'mixed')
+AUDIO_FORMAT_ANNOT_FORMAT_MAP = {
+    'wav': 'phn',
+    'cbin': 'notmat',
+}
+
+# fraction of int16 full scale used for the peak amplitude of syllables
+AMPLITUDE = 0.5
+
+
+def syllable_types(labelset,
+                   syllable_kind='mixed',
+                   freq_range=(1000, 10000),
+                   syl_dur_range=(0.03, 0.2),
+                   seed=0):
+    """make a syllable type for each label in a set of labels.
+
+    Frequencies are evenly spaced across ``freq_range``, so no two labels
+    have the same frequency; durations are drawn from ``syl_dur_range``.
+
+    Parameters
+    ----------
+    labelset : str, list
+        of str, labels. Each must be a single string without whitespace.
+    syllable_kind : str
+        one of {'tone', 'chirp', 'mixed'}. If 'mixed', every other label is a chirp.
+        Default is 'mixed'.
+    freq_range : tuple
+        of two numbers, lowest and highest frequency of syllables in Hz.
+        Default is (1000, 10000).
+    syl_dur_range : tuple
+        of two floats, shortest and longest duration of syllables in seconds.
+        Default is (0.03, 0.2).
+    seed : int
+        seed for random number generator. Default is 0.
+
+    Returns
+    -------
+    syl_types : dict
+        that maps each label to a dict with keys
+        'kind', 'freq_start', 'freq_stop', and 'dur'.
+    """
+    if syllable_kind not in VALID_SYLLABLE_KINDS:
+        raise ValueError(
+            f'syllable_kind must be one of {VALID_SYLLABLE_KINDS}, but was: {syllable_kind}'
+        )
+    labelset = list(labelset)
+    for label in labelset:
+        if len(label) == 0 or any(char.isspace() for char in label):
+            raise ValueError(
+                f'labels must be non-empty strings without whitespace, but found label: {label!r}'
+            )
+
+    rng = np.random.default_rng(seed)
+    freq_lo, freq_hi = freq_range
+    # one band per label; chirps sweep across most of their band
+    bandwidth = (freq_hi - freq_lo) / len(labelset)
+    syl_types = {}
+    for ind, label in enumerate(labelset):
+        if syllable_kind == 'mixed':
+            kind = 'chirp' if ind % 2 else 'tone'
+        else:
+            kind = syllable_kind
+        center = freq_lo + bandwidth * (ind + 0.5)
+        if kind == 'tone':
+            freq_start = freq_stop = center
+        else:
+            freq_start, freq_stop = center - bandwidth * 0.4, center + bandwidth * 0.4
+        syl_types[label] = {
+            'kind': kind,
+            'freq_start': freq_start,
+            'freq_stop': freq_stop,
+            'dur': float(rng.uniform(*syl_dur_range)),
+        }
+    return syl_types
+
+
+def syllable(syl_type, samp_freq, dur=None):
+    """make audio for one syllable, with a Hann window as its amplitude envelope
+
+    Parameters
+    ----------
+    syl_type : dict
+        returned by ``syllable_types``
+    samp_freq : int
+        sampling frequency in Hz
+    dur : float
+        duration in seconds. Default is None, in which case the duration of syl_type is used.
+
+    Returns
+    -------
+    audio : numpy.ndarray
+        1-d array of float32, with peak amplitude 1.
+    """
+    dur = syl_type['dur'] if dur is None else dur
+    t = np.arange(int(round(dur * samp_freq))) / samp_freq
+    if syl_type['kind'] == 'tone':
+        audio = np.sin(2 * np.pi * syl_type['freq_start'] * t)
+    else:
+        audio = scipy.signal.chirp(t, f0=syl_type['freq_start'], t1=dur, f1=syl_type['freq_stop'])
+    return (audio * np.hanning(t.shape[0])).astype(np.float32)
+
+
+def song(dur,
+         syl_types,
+         samp_freq=32000,
+         label_probs=None,
+         gap_dur_range=(0.01, 0.1),
+         dur_jitter=0.1,
+         noise_amp=0.01,
+         rng=None):
+    """make audio for one file, a sequence of syllables separated by silent gaps
+
+    Onsets and offsets fall on whole milliseconds,
+    so they are preserved exactly in annotation formats with millisecond precision.
+
+    Parameters
+    ----------
+    dur : float
+        duration of audio in seconds
+    syl_types : dict
+        returned by ``syllable_types``
+    samp_freq : int
+        sampling frequency in Hz. Default is 32000.
+    label_probs : dict
+        that maps labels to the probability of drawing that label for each syllable.
+        Probabilities are normalized to sum to one. Default is None, in which case
+        labels are drawn uniformly.
+    gap_dur_range : tuple
+        of two floats, shortest and longest duration of silent gaps between syllables in seconds.
+        Default is (0.01, 0.1).
+    dur_jitter : float
+        syllable durations vary uniformly by up to this fraction of the duration of their type.
+        Default is 0.1.
+    noise_amp : float
+        standard deviation of Gaussian background noise, relative to the peak amplitude of syllables.
+        Default is 0.01.
+    rng : numpy.random.Generator
+        used to draw labels, durations, and noise. Default is None,
+        in which case a new generator is created without a seed.
+
+    Returns
+    -------
+    audio : numpy.ndarray
+        1-d array of float32
+    labels : list
+        of str, label of each syllable
+    onsets_s : numpy.ndarray
+        onset of each syllable in seconds
+    offsets_s : numpy.ndarray
+        offset of each syllable in seconds
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    labelset = list(syl_types.keys())
+    if label_probs is None:
+        p = None
+    else:
+        missing = set(labelset) - set(label_probs.keys())
+        if missing:
+            raise ValueError(
+                f'label_probs does not have a probability for these labels: {missing}'
+            )
+        p = np.array([label_probs[label] for label in labelset], dtype=float)
+        p = p / p.sum()
+
+    n_samples = int(round(dur * samp_freq))
+    audio = rng.normal(scale=noise_amp, size=n_samples).astype(np.float32)
+
+    labels, onsets_ms, offsets_ms = [], [], []
+    dur_ms = int(dur * 1000)
+    # start after a gap, to leave silence at the start of the file
+    onset_ms = int(rng.integers(int(gap_dur_range[0] * 1000), int(gap_dur_range[1] * 1000) + 1))
+    while True:
+        label = labelset[rng.choice(len(labelset), p=p)]
+        syl_type = syl_types[label]
+        syl_dur_ms = int(round(syl_type['dur'] * 1000 * rng.uniform(1 - dur_jitter, 1 + dur_jitter)))
+        offset_ms = onset_ms + max(syl_dur_ms, 1)
+        if offset_ms >= dur_ms:
+            break
+        onset_ind = onset_ms * samp_freq // 1000
+        syl_audio = syllable(syl_type, samp_freq, dur=(offset_ms - onset_ms) / 1000)
+        audio[onset_ind:onset_ind + syl_audio.shape[0]] += syl_audio
+        labels.append(label)
+        onsets_ms.append(onset_ms)
+        offsets_ms.append(offset_ms)
+        onset_ms = offset_ms + int(rng.integers(int(gap_dur_range[0] * 1000), int(gap_dur_range[1] * 1000) + 1))
+
+    return audio, labels, np.array(onsets_ms) / 1000, np.array(offsets_ms) / 1000
+
+
+def _to_int16(audio):
+    return np.clip(audio * AMPLITUDE * np.iinfo(np.int16).max,
+                   np.iinfo(np.int16).min, np.iinfo(np.int16).max).astype(np.int16)
+
+
+def write_wav(audio_path, audio, samp_freq):
+    """write audio as a 16-bit .wav file"""
+    wavfile.write(audio_path, samp_freq, _to_int16(audio))
+
+
+def write_cbin(audio_path, audio, samp_freq):
+    """write audio as a .cbin file with big-endian 16-bit samples,
+    and the .rec file that ``evfuncs.load_cbin`` reads the sampling frequency from"""
+    audio_path = Path(audio_path)
+    _to_int16(audio).astype('>i2').tofile(audio_path)
+    rec_path = audio_path.parent.joinpath(audio_path.stem + '.rec')
+    rec_path.write_text(
+        # evfuncs.readrecf treats the four lines after 'File created' as part of the header
+        f'File created: synthetic\n\n'
+        f'     begin rec = 0 ms\n'
+        f'     trig time  = 0 ms\n'
+        f'     rec end = {int(audio.shape[0] / samp_freq * 1000)} ms\n\n'
+        f'ADFREQ =   {samp_freq}\n'
+        f'Chans = 1\n'
+        f'Samples = {audio.shape[0]}\n'
+        f'Catch = 0\n'
+        f'T Before = 0.0000000000E+0\n'
+        f'T After = 0.0000000000E+0\n'
+    )
+
+
+def write_phn(annot_path, labels, onsets_s, offsets_s, samp_freq):
+    """write a .phn annotation file, where onsets and offsets are in samples"""
+    with Path(annot_path).open('w') as fp:
+        for label, onset_s, offset_s in zip(labels, onsets_s, offsets_s):
+            fp.write(f'{int(round(onset_s * samp_freq))} {int(round(offset_s * samp_freq))} {label}\n')
+
+
+def write_notmat(annot_path, labels, onsets_s, offsets_s, samp_freq):
+    """write a .not.mat annotation file, like those made by evsonganaly,
+    where onsets and offsets are in milliseconds"""
+    annot_path = Path(annot_path)
+    scipy.io.savemat(annot_path, {
+        'Fs': samp_freq,
+        'fname': annot_path.name.replace('.not.mat', ''),
+        'labels': ''.join(labels),
+        'onsets': np.asarray(onsets_s, dtype=float)[:, np.newaxis] * 1000,
+        'offsets': np.asarray(offsets_s, dtype=float)[:, np.newaxis] * 1000,
+        'min_int': 5,
+        'min_dur': 20,
+        'threshold': 500,
+        'sm_win': 2,
+    })
+
+
+def make_dataset(output_dir,
+                 hours=1.,
+                 audio_format='wav',
+                 file_dur=10.,
+                 samp_freq=32000,
+                 labelset='abcdefghij',
+                 label_probs=None,
+                 syllable_kind='mixed',
+                 freq_range=(1000, 10000),
+                 syl_dur_range=(0.03, 0.2),
+                 gap_dur_range=(0.01, 0.1),
+                 noise_amp=0.01,
+                 prefix='synth',
+                 seed=0):
+    """write a synthetic dataset of annotated audio files.
+
+    Files are written one at a time, so memory used does not grow with ``hours``.
+    The same arguments always produce the same dataset.
+
+    Parameters
+    ----------
+    output_dir : str, pathlib.Path
+        directory where files are saved. Created if it does not exist.
+    hours : float
+        total duration of audio in hours. Default is 1.0.
+    audio_format : str
+        one of {'wav', 'cbin'}. 'wav' files are annotated with .phn files
+        (annot_format 'phn'), 'cbin' files with .not.mat files (annot_format 'notmat').
+        Default is 'wav'.
+    file_dur : float
+        duration of each audio file in seconds; the last file is shorter
+        if hours is not a multiple of file_dur. Default is 10.0.
+    samp_freq : int
+        sampling frequency in Hz. Default is 32000.
+    labelset : str, list
+        of str, labels. Default is 'abcdefghij'.
+    label_probs : dict
+        that maps labels to the probability of drawing that label for each syllable,
+        e.g. to make some classes rare. Default is None, in which case all labels are equally likely.
+    syllable_kind : str
+        one of {'tone', 'chirp', 'mixed'}. Default is 'mixed'.
+    freq_range : tuple
+        of two numbers, lowest and highest frequency of syllables in Hz.
+        Default is (1000, 10000).
+    syl_dur_range : tuple
+        of two floats, shortest and longest duration of syllable types in seconds.
+        Default is (0.03, 0.2).
+    gap_dur_range : tuple
+        of two floats, shortest and longest duration of silent gaps in seconds.
+        Default is (0.01, 0.1).
+    noise_amp : float
+        standard deviation of background noise, relative to the peak amplitude of syllables.
+        Default is 0.01.
+    prefix : str
+        prefix of file names. Default is 'synth'.
+    seed : int
+        seed for random number generator. Default is 0.
+
+    Returns
+    -------
+    audio_files : list
+        of pathlib.Path, audio files that were written
+    annot_files : list
+        of pathlib.Path, annotation files that were written
+    """
+    if audio_format not in AUDIO_FORMAT_ANNOT_FORMAT_MAP:
+        raise ValueError(
+            f'audio_format must be one of {list(AUDIO_FORMAT_ANNOT_FORMAT_MAP.keys())}, but was: {audio_format}'
+        )
+    if hours <= 0:
+        raise ValueError(f'hours must be greater than zero, but was: {hours}')
+    if file_dur <= gap_dur_range[1] + syl_dur_range[1] * 1.1:
+        raise ValueError(
+            f'file_dur of {file_dur} seconds is too short to contain a syllable'
+        )
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    syl_types = syllable_types(labelset, syllable_kind, freq_range, syl_dur_range, seed)
+    rng = np.random.default_rng(seed)
+
+    total_dur = hours * 3600
+    n_files = int(np.ceil(total_dur / file_dur))
+    n_digits = len(str(n_files))
+    audio_files, annot_files = [], []
+    for file_num in range(n_files):
+        this_file_dur = min(file_dur, total_dur - file_num * file_dur)
+        # make sure a short last file can still hold a syllable
+        this_file_dur = max(this_file_dur, gap_dur_range[1] + syl_dur_range[1] * 1.1 + 0.001)
+        audio, labels, onsets_s, offsets_s = song(this_file_dur, syl_types, samp_freq, label_probs,
+                                                  gap_dur_range, noise_amp=noise_amp, rng=rng)
+
+        audio_path = output_dir.joinpath(f'{prefix}_{file_num:0{n_digits}d}.{audio_format}')
+        if audio_format == 'wav':
+            write_wav(audio_path, audio, samp_freq)
+            annot_path = output_dir.joinpath(f'{prefix}_{file_num:0{n_digits}d}.phn')
+            write_phn(annot_path, labels, onsets_s, offsets_s, samp_freq)
+        elif audio_format == 'cbin':
+            write_cbin(audio_path, audio, samp_freq)
+            annot_path = audio_path.parent.joinpath(audio_path.name + '.not.mat')
+            write_notmat(annot_path, labels, onsets_s, offsets_s, samp_freq)
+        audio_files.append(audio_path)
+        annot_files.append(annot_path)
+
+    return audio_files, annot_files
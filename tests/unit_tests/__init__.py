@@ -1,5 +1,7 @@
 from . import test_cli_funcs
 from . import test_config
 from . import test_core
+from . import test_datasets
+from . import test_engine
 from . import test_io
 from . import test_utils
@@ -0,0 +1,53 @@
+"""tests for vak.cli.prep applying the [SPECT_PARAMS] section of config.toml files"""
+from pathlib import Path
+import tempfile
+import unittest
+
+import pandas as pd
+import toml
+
+import vak.files.spect
+import vak.testing.synth
+from vak.cli.prep import prep
+
+
+class TestPrepSpectParams(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_prep_uses_spect_params(self):
+        # prep used to parse a 'SPECTROGRAM' section that does not exist,
+        # so spectrograms were always made with the default parameters
+        data_dir = self.tmp_path.joinpath('data')
+        vak.testing.synth.make_dataset(data_dir, hours=10 / 3600, audio_format='cbin', file_dur=5.,
+                                       labelset='abc')
+        output_dir = self.tmp_path.joinpath('output')
+        output_dir.mkdir()
+        toml_path = self.tmp_path.joinpath('config.toml')
+        with toml_path.open('w') as fp:
+            toml.dump({
+                'PREP': {'data_dir': str(data_dir), 'output_dir': str(output_dir),
+                         'audio_format': 'cbin', 'annot_format': 'notmat', 'labelset': 'abc'},
+                'SPECT_PARAMS': {'fft_size': 256, 'step_size': 32},
+                'EVAL': {'models': 'TweetyNet', 'checkpoint_path': '/some/checkpoint.pt',
+                         'labelmap_path': '/some/labelmap.json', 'output_dir': str(output_dir)},
+            }, fp)
+
+        prep(toml_path)
+
+        with toml_path.open('r') as fp:
+            csv_path = toml.load(fp)['EVAL']['csv_path']
+        vak_df = pd.read_csv(csv_path)
+        self.assertTrue(len(vak_df) == 2)
+        for spect_path in vak_df['spect_path']:
+            spect_dict = vak.files.spect.load(spect_path)
+            # with the default fft_size of 512 there would be 257 frequency bins
+            self.assertTrue(spect_dict['s'].shape[0] == 256 // 2 + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""tests for vak.cli.profile module"""
+from pathlib import Path
+import tempfile
+import unittest
+
+import pandas as pd
+import toml
+
+import vak.config
+import vak.testing.synth
+from vak.cli.profile import bounded_config, subset_csv, subset_data_dir
+
+
+class TestProfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_subset_csv(self):
+        csv_path = self.tmp_path.joinpath('dataset.csv')
+        pd.DataFrame({
+            'spect_path': [f'{ind}.spect.npz' for ind in range(10)],
+            'split': ['train'] * 6 + ['val'] * 4,
+        }).to_csv(csv_path, index=False)
+        subset_csv_path = subset_csv(csv_path, 3, self.tmp_path.joinpath('subset.csv'))
+        subset_df = pd.read_csv(subset_csv_path)
+        self.assertTrue(subset_df['split'].value_counts().to_dict() == {'train': 3, 'val': 3})
+
+    def test_subset_data_dir(self):
+        data_dir = self.tmp_path.joinpath('data')
+        audio_files, annot_files = vak.testing.synth.make_dataset(data_dir, hours=30 / 3600,
+                                                                  audio_format='cbin', file_dur=5.)
+        subset_dir = subset_data_dir(data_dir, 'cbin', None, 2, self.tmp_path.joinpath('subset'))
+        # each .cbin file has a .rec file and a .not.mat annotation file
+        self.assertTrue(
+            sorted(path.name for path in subset_dir.iterdir()) ==
+            sorted(name for path in audio_files[:2]
+                   for name in (path.name, path.stem + '.rec', path.name + '.not.mat'))
+        )
+
+
+    def test_bounded_config(self):
+        csv_path = self.tmp_path.joinpath('dataset.csv')
+        pd.DataFrame({
+            'spect_path': [f'{ind}.spect.npz' for ind in range(10)],
+            'split': ['train'] * 6 + ['val'] * 4,
+        }).to_csv(csv_path, index=False)
+        profile_dir = self.tmp_path.joinpath('profile')
+        profile_dir.mkdir()
+        toml_path = self.tmp_path.joinpath('config.toml')
+        with toml_path.open('w') as fp:
+            toml.dump({
+                'TRAIN': {'models': 'TweetyNet', 'root_results_dir': '/some/dir', 'num_workers': 4,
+                          'profiler_trace_steps': [10, 20], 'csv_path': str(csv_path)},
+                'PROFILE': {'command': 'train', 'output_dir': str(self.tmp_path), 'max_files': 2},
+            }, fp)
+        profile_cfg = vak.config.parse.from_toml(toml_path, sections=['PROFILE']).profile
+
+        bounded_toml_path = bounded_config(toml_path, profile_cfg, profile_dir)
+        with bounded_toml_path.open('r') as fp:
+            bounded_toml = toml.load(fp)
+        self.assertTrue('PROFILE' not in bounded_toml)
+        self.assertTrue(bounded_toml['TRAIN']['root_results_dir'] == str(profile_dir))
+        self.assertTrue(bounded_toml['TRAIN']['num_workers'] == 0)
+        self.assertTrue('profiler_trace_steps' not in bounded_toml['TRAIN'])
+        self.assertTrue(len(pd.read_csv(bounded_toml['TRAIN']['csv_path'])) == 4)
+
+    def test_bounded_config_no_distributed(self):
+        # even when not single_process, other processes would not stop training after max_steps
+        profile_dir = self.tmp_path.joinpath('profile')
+        profile_dir.mkdir()
+        toml_path = self.tmp_path.joinpath('config.toml')
+        with toml_path.open('w') as fp:
+            toml.dump({
+                'TRAIN': {'models': 'TweetyNet', 'root_results_dir': '/some/dir', 'num_workers': 4,
+                          'num_processes': 4, 'csv_path': '/some/dataset.csv'},
+                'PROFILE': {'command': 'train', 'output_dir': str(self.tmp_path), 'single_process': False},
+            }, fp)
+        profile_cfg = vak.config.parse.from_toml(toml_path, sections=['PROFILE']).profile
+
+        bounded_toml_path = bounded_config(toml_path, profile_cfg, profile_dir)
+        with bounded_toml_path.open('r') as fp:
+            bounded_toml = toml.load(fp)
+        self.assertTrue(bounded_toml['TRAIN']['num_processes'] == 1)
+        self.assertTrue(bounded_toml['TRAIN']['num_workers'] == 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
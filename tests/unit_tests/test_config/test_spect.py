@@ -1,6 +1,7 @@
 """tests for vak.config.spectrogram module"""
-import unittest
 from configparser import ConfigParser
+from pathlib import Path
+import unittest
 
 import vak.config.spect_params
 import vak.split
@@ -41,6 +42,38 @@ class TestParseSpectParamsConfig(unittest.TestCase):
         spect_config_tup = vak.config.spect_params.parse_spect_params_config(config_obj)
         self.assertTrue(spect_config_tup.thresh is None)
 
+    def test_array_of_tables(self):
+        # [[SPECT_PARAMS]] tables, loaded by toml as a list of dicts
+        config_toml = {
+            'SPECT_PARAMS': [
+                {'fft_size': 512, 'step_size': 64},
+                {'fft_size': 256, 'step_size': 32, 'freq_cutoffs': [500, 10000]},
+            ]
+        }
+        spect_params = vak.config.spect_params.parse_spect_params_config(config_toml, Path('config.toml'))
+        self.assertTrue(type(spect_params) is list)
+        self.assertTrue(len(spect_params) == 2)
+        self.assertTrue(all(isinstance(params, vak.config.spect_params.SpectParamsConfig)
+                            for params in spect_params))
+        self.assertTrue(spect_params[1].fft_size == 256)
+        self.assertTrue(spect_params[1].freq_cutoffs == [500, 10000])
+
+        with self.assertRaises(ValueError):
+            vak.config.spect_params.parse_spect_params_config({'SPECT_PARAMS': []}, Path('config.toml'))
+
+    def test_freq_reduction(self):
+        spect_params = vak.config.spect_params.SpectParamsConfig(freq_scale='mel', num_freqbins='64')
+        self.assertTrue(spect_params.num_freqbins == 64)
+        spect_params = vak.config.spect_params.SpectParamsConfig(freq_decimate=2)
+        self.assertTrue(spect_params.freq_decimate == 2)
+        for kwargs in (dict(freq_scale='mel'),
+                       dict(num_freqbins=64),
+                       dict(freq_scale='mel', num_freqbins=64, freq_decimate=2),
+                       dict(freq_scale='bark', num_freqbins=64),
+                       dict(freq_decimate=0)):
+            with self.assertRaises(ValueError):
+                vak.config.spect_params.SpectParamsConfig(**kwargs)
+
 
 if __name__ == '__main__':
     unittest.main()
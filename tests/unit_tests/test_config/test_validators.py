@@ -33,6 +33,13 @@ class TestValidators(unittest.TestCase):
                                                     section_with_invalid_option,
                                                     invalid_option_config)
 
+    def test_are_options_valid_array_of_tables(self):
+        config_dict = {'SPECT_PARAMS': [{'fft_size': 512}, {'fft_size': 256, 'not_an_option': 1}]}
+        with self.assertRaises(ValueError):
+            vak.config.validators.are_options_valid(config_dict, 'SPECT_PARAMS', Path('config.toml'))
+        config_dict = {'SPECT_PARAMS': [{'fft_size': 512}, {'fft_size': 256, 'step_size': 32}]}
+        vak.config.validators.are_options_valid(config_dict, 'SPECT_PARAMS', Path('config.toml'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,3 @@
+from . import test_cached_dataset
+from . import test_samplers
+from . import test_window_dataset
@@ -0,0 +1,89 @@
+"""tests for vak.datasets.cached_dataset module"""
+import pickle
+import unittest
+
+import numpy as np
+import torch
+
+from vak.datasets.cached_dataset import CachedDataset
+
+
+class FakeVocalDataset:
+    """stand-in for VocalDataset, returns dicts; counts how many times items are computed"""
+    def __init__(self, n_items=5):
+        self.n_items = n_items
+        self.labelmap = {'a': 1, 'unlabeled': 0}
+        self.shape = (3, 1, 16, 10)
+        self.n_getitem = 0
+
+    def __getitem__(self, idx):
+        self.n_getitem += 1
+        return {
+            'source': torch.ones(3, 1, 16, 10) * idx,
+            'annot': torch.ones(30, dtype=torch.int64) * idx,
+            'padding_mask': torch.ones(30, dtype=torch.bool),
+            'spect_path': f'{idx}.spect.npz',
+        }
+
+    def __len__(self):
+        return self.n_items
+
+
+class FakeWindowDataset(FakeVocalDataset):
+    """stand-in for WindowDataset, returns tuples"""
+    def __getitem__(self, idx):
+        self.n_getitem += 1
+        return torch.ones(1, 16, 10) * idx, torch.ones(10, dtype=torch.int64) * idx
+
+
+class TestCachedDataset(unittest.TestCase):
+    def _assert_items_equal(self, item, expected):
+        if isinstance(expected, dict):
+            self.assertTrue(item.keys() == expected.keys())
+            for key in expected:
+                if torch.is_tensor(expected[key]):
+                    self.assertTrue(torch.equal(item[key], expected[key]))
+                else:
+                    self.assertTrue(item[key] == expected[key])
+        else:
+            for val, expected_val in zip(item, expected):
+                self.assertTrue(torch.equal(val, expected_val))
+
+    def test_items_computed_once(self):
+        for dataset in (FakeVocalDataset(), FakeWindowDataset()):
+            cached = CachedDataset(dataset)
+            self.assertTrue(dataset.n_getitem == len(dataset))
+            for _ in range(3):
+                for idx in range(len(cached)):
+                    self._assert_items_equal(cached[idx], dataset[idx])
+            self.assertTrue(cached.nbytes_memmap == 0)
+            self.assertTrue(cached.labelmap == dataset.labelmap)
+
+    def test_max_bytes_memmap(self):
+        dataset = FakeVocalDataset()
+        one_item_nbytes = sum([val.numpy().nbytes for val in dataset[0].values() if torch.is_tensor(val)])
+        cached = CachedDataset(dataset, max_bytes=2 * one_item_nbytes)
+        self.assertTrue(cached.nbytes_in_memory == 2 * one_item_nbytes)
+        self.assertTrue(cached.nbytes_memmap == 3 * one_item_nbytes)
+        self.assertTrue(len(list(cached.memmap_dir.iterdir())) == 3 * 3)
+        for idx in range(len(cached)):
+            self._assert_items_equal(cached[idx], dataset[idx])
+
+    def test_pickle(self):
+        dataset = FakeWindowDataset()
+        cached = CachedDataset(dataset, max_bytes=0)
+        unpickled = pickle.loads(pickle.dumps(cached))
+        for idx in range(len(cached)):
+            self._assert_items_equal(unpickled[idx], dataset[idx])
+
+    def test_dataloader(self):
+        dataset = FakeVocalDataset()
+        cached = CachedDataset(dataset)
+        data = torch.utils.data.DataLoader(cached, batch_size=1, shuffle=False)
+        for ind, batch in enumerate(data):
+            self.assertTrue(batch['source'].shape == (1, 3, 1, 16, 10))
+            self.assertTrue(np.all(batch['annot'].numpy() == ind))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""tests for vak.datasets.samplers module"""
+import unittest
+
+import numpy as np
+
+from vak.datasets.samplers import DistributedWindowSampler
+
+
+class FakeWindowDataset:
+    """stand-in for WindowDataset; sampler only needs __len__"""
+    def __init__(self, n_windows):
+        self.x_inds = np.arange(n_windows)
+
+    def __len__(self):
+        return len(self.x_inds)
+
+
+class TestDistributedWindowSampler(unittest.TestCase):
+    def test_ranks_cover_dataset(self):
+        dataset = FakeWindowDataset(n_windows=103)
+        num_replicas = 4
+        all_inds = []
+        for rank in range(num_replicas):
+            sampler = DistributedWindowSampler(dataset, num_replicas=num_replicas, rank=rank)
+            inds = list(sampler)
+            self.assertTrue(len(inds) == len(sampler))
+            all_inds.extend(inds)
+        # padded so every rank gets the same number of windows
+        self.assertTrue(len(all_inds) == 104)
+        self.assertTrue(set(all_inds) == set(range(103)))
+
+    def test_fewer_windows_than_replicas(self):
+        # every rank must yield the same number of windows, or ranks without windows
+        # stop training while the others wait for them
+        dataset = FakeWindowDataset(n_windows=2)
+        num_replicas = 5
+        all_inds = []
+        for rank in range(num_replicas):
+            sampler = DistributedWindowSampler(dataset, num_replicas=num_replicas, rank=rank)
+            inds = list(sampler)
+            self.assertTrue(len(inds) == sampler.num_samples == 1)
+            all_inds.extend(inds)
+        self.assertTrue(set(all_inds) == {0, 1})
+
+    def test_ranks_do_not_overlap_without_padding(self):
+        dataset = FakeWindowDataset(n_windows=100)
+        samplers = [DistributedWindowSampler(dataset, num_replicas=2, rank=rank) for rank in range(2)]
+        self.assertTrue(
+            set(samplers[0]).isdisjoint(set(samplers[1]))
+        )
+
+    def test_set_epoch_changes_order(self):
+        dataset = FakeWindowDataset(n_windows=100)
+        sampler = DistributedWindowSampler(dataset, num_replicas=2, rank=0)
+        sampler.set_epoch(1)
+        epoch_1 = list(sampler)
+        self.assertTrue(epoch_1 == list(sampler))  # same epoch, same order
+        sampler.set_epoch(2)
+        self.assertTrue(epoch_1 != list(sampler))
+
+    def test_no_shuffle(self):
+        dataset = FakeWindowDataset(n_windows=10)
+        sampler = DistributedWindowSampler(dataset, num_replicas=2, rank=1, shuffle=False)
+        self.assertTrue(list(sampler) == [1, 3, 5, 7, 9])
+
+    def test_invalid_rank_raises(self):
+        dataset = FakeWindowDataset(n_windows=10)
+        with self.assertRaises(ValueError):
+            DistributedWindowSampler(dataset, num_replicas=2, rank=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
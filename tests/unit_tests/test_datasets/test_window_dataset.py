@@ -0,0 +1,130 @@
+"""tests for vak.datasets.window_dataset module"""
+from pathlib import Path
+import tempfile
+import unittest
+
+import crowsetta
+import numpy as np
+import torch
+
+from vak.datasets.window_dataset import WindowDataset
+
+
+class TestWindowDataset(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.timebin_dur = 0.001
+        self.window_size = 10
+        self.labelmap = {'a': 1, 'b': 2, 'unlabeled': 0}
+
+        # two spectrograms; label 'b' is rare so it only appears in a few windows
+        spect_paths = []
+        annots = []
+        n_timebins = [500, 400]
+        seqs = [
+            (['a', 'a', 'b'], [0.05, 0.2, 0.45], [0.15, 0.3, 0.455]),
+            (['a', 'a'], [0.05, 0.2], [0.15, 0.3]),
+        ]
+        for ind, (n_tb, (labels, onsets, offsets)) in enumerate(zip(n_timebins, seqs)):
+            spect_path = Path(self.tmp_dir.name).joinpath(f'{ind}.spect.npz')
+            np.savez(spect_path,
+                     s=np.random.rand(16, n_tb),
+                     t=np.arange(n_tb) * self.timebin_dur,
+                     f=np.arange(16))
+            spect_paths.append(str(spect_path))
+            seq = crowsetta.Sequence.from_keyword(labels=labels,
+                                                  onsets_s=np.array(onsets),
+                                                  offsets_s=np.array(offsets))
+            annots.append(crowsetta.Annotation(seq=seq, annot_file='dummy.csv', audio_file=f'{ind}.wav'))
+
+        spect_id_vector = np.concatenate([np.ones(n_tb, dtype=np.int64) * ind
+                                          for ind, n_tb in enumerate(n_timebins)])
+        spect_inds_vector = np.concatenate([np.arange(n_tb) for n_tb in n_timebins])
+        x_inds = np.concatenate([np.arange(500 - self.window_size + 1),
+                                 np.arange(500, 900 - self.window_size + 1)])
+        self.dataset = WindowDataset(root='dummy.csv',
+                                     x_inds=x_inds,
+                                     spect_id_vector=spect_id_vector,
+                                     spect_inds_vector=spect_inds_vector,
+                                     spect_paths=np.array(spect_paths),
+                                     annots=annots,
+                                     labelmap=self.labelmap,
+                                     timebin_dur=self.timebin_dur,
+                                     window_size=self.window_size)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_stratified_x_inds(self):
+        num_windows = 60
+        x_inds_subset = self.dataset.stratified_x_inds(num_windows, seed=0)
+        self.assertTrue(x_inds_subset.shape[0] == num_windows)
+        self.assertTrue(np.all(np.isin(x_inds_subset, self.dataset.x_inds)))
+        self.assertTrue(np.unique(x_inds_subset).shape[0] == num_windows)
+
+        # rare class should be in subset, even though few windows contain it
+        has_b = [
+            np.any(self.dataset[np.where(self.dataset.x_inds == x_ind)[0][0]][1] == self.labelmap['b'])
+            for x_ind in x_inds_subset
+        ]
+        self.assertTrue(any(has_b))
+
+    def test_stratified_x_inds_same_seed_same_subset(self):
+        x_inds_subset1 = self.dataset.stratified_x_inds(60, seed=0)
+        x_inds_subset2 = self.dataset.stratified_x_inds(60, seed=0)
+        self.assertTrue(np.array_equal(x_inds_subset1, x_inds_subset2))
+
+    def test_stratified_x_inds_more_than_dataset(self):
+        x_inds_subset = self.dataset.stratified_x_inds(10000)
+        self.assertTrue(np.array_equal(x_inds_subset, self.dataset.x_inds))
+
+    def test_record_item_times(self):
+        item_times_dir = Path(self.tmp_dir.name).joinpath('getitem_times')
+        item_times_dir.mkdir()
+        self.dataset.record_item_times(item_times_dir)
+        window, labelvec = self.dataset[0]
+        self.assertTrue(window.shape == self.dataset.shape)
+
+        for num_workers in (0, 2):
+            loader = torch.utils.data.DataLoader(self.dataset,
+                                                 batch_size=8,
+                                                 sampler=range(32),
+                                                 num_workers=num_workers)
+            for _ in loader:
+                pass
+
+        summary = WindowDataset.summarize_item_times(item_times_dir)
+        self.assertTrue(
+            sorted(summary.index) == ['worker-0', 'worker-1', 'worker-main']
+        )
+        # 1 item above + 32 items from DataLoader without workers
+        self.assertTrue(summary.loc['worker-main', 'n_items'] == 33)
+        self.assertTrue(summary['n_items'].sum() == 65)
+        for field in WindowDataset.ITEM_TIMES_FIELDS[1:]:
+            self.assertTrue((summary[field] >= 0).all())
+
+    def test_close_item_times(self):
+        item_times_dir = Path(self.tmp_dir.name).joinpath('getitem_times')
+        item_times_dir.mkdir()
+        self.dataset.record_item_times(item_times_dir)
+        self.dataset[0]
+        item_times_file = self.dataset._item_times_file
+        self.dataset.close_item_times()
+        self.assertTrue(item_times_file.closed)
+        self.assertTrue(self.dataset._item_times_file is None)
+        # closing again does nothing
+        self.dataset.close_item_times()
+
+        # getting more items appends to the same file, without writing the header again
+        self.dataset[1]
+        self.dataset.close_item_times()
+        summary = WindowDataset.summarize_item_times(item_times_dir)
+        self.assertTrue(summary.loc['worker-main', 'n_items'] == 2)
+
+    def test_record_item_times_not_dir_raises(self):
+        with self.assertRaises(NotADirectoryError):
+            self.dataset.record_item_times(Path(self.tmp_dir.name).joinpath('does-not-exist'))
+
+
+if __name__ == '__main__':
+    unittest.main()
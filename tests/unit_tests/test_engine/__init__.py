@@ -0,0 +1,3 @@
+from . import test_background
+from . import test_lockstep
+from . import test_timing
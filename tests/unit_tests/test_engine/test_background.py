@@ -0,0 +1,69 @@
+"""tests for vak.engine.background module"""
+from pathlib import Path
+import tempfile
+import unittest
+
+import torch
+
+from vak.engine.background import BackgroundValidator
+from vak.engine.model import Model
+
+
+class FakeValDataset:
+    labelmap = {'a': 0}
+
+    def __getitem__(self, idx):
+        return torch.ones(1), torch.ones(1)
+
+    def __len__(self):
+        return 2
+
+
+class FakeModel(Model):
+    """'accuracy' is the value of the network's single weight,
+    so we can tell which snapshot was evaluated"""
+    def _eval(self, eval_data):
+        return {'avg_acc': self.network.weight.item(), 'acc': [self.network.weight.item()]}
+
+
+class TestBackgroundValidator(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.network = torch.nn.Linear(1, 1, bias=False)
+        val_data = torch.utils.data.DataLoader(FakeValDataset(), batch_size=1)
+        self.validator = BackgroundValidator(model_class=FakeModel,
+                                             network=self.network,
+                                             loss=torch.nn.CrossEntropyLoss(),
+                                             metrics={},
+                                             val_data={'val': val_data})
+
+    def tearDown(self):
+        self.validator.close()
+        self.tmp_dir.cleanup()
+
+    def test_submit_wait(self):
+        for global_step, weight in zip([10, 20], [0.25, 0.5]):
+            with torch.no_grad():
+                self.network.weight.fill_(weight)
+            ckpt_path = Path(self.tmp_dir.name).joinpath(f'val-snapshot-{global_step}.pt')
+            torch.save({'network_state_dict': self.network.state_dict()}, ckpt_path)
+            self.validator.submit(ckpt_path, epoch=1, global_step=global_step, splits=['val'])
+
+        results = self.validator.wait()
+        self.assertTrue(self.validator.n_pending == 0)
+        self.assertTrue([result[2] for result in results] == [10, 20])
+        self.assertTrue(
+            [result[3]['val'] for result in results] == [{'avg_acc': 0.25}, {'avg_acc': 0.5}]
+        )
+        # background process evaluates a copy of network, never the one being trained
+        self.assertTrue(self.network.weight.item() == 0.5)
+
+    def test_error_raised(self):
+        ckpt_path = Path(self.tmp_dir.name).joinpath('does-not-exist.pt')
+        self.validator.submit(ckpt_path, epoch=1, global_step=10, splits=['val'])
+        with self.assertRaises(RuntimeError):
+            self.validator.wait()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""tests for vak.engine.lockstep module"""
+from pathlib import Path
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import torch
+
+import vak.engine.lockstep
+from vak.engine.lockstep import fit_lockstep
+from vak.engine.model import Model
+from vak.engine.timing import ThroughputMeter
+
+
+class CountingDataset:
+    """counts how many times items are loaded"""
+    def __init__(self, n_items=8):
+        self.n_items = n_items
+        self.n_getitem = 0
+
+    def __getitem__(self, idx):
+        self.n_getitem += 1
+        return torch.ones(4) * idx, torch.ones(1) * idx
+
+    def __len__(self):
+        return self.n_items
+
+
+def make_model():
+    network = torch.nn.Linear(4, 1)
+    return Model(network=network,
+                 loss=torch.nn.MSELoss(),
+                 optimizer=torch.optim.SGD(network.parameters(), lr=0.001),
+                 metrics={})
+
+
+class TestFitLockstep(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fit_lockstep(self):
+        dataset = CountingDataset()
+        train_data = torch.utils.data.DataLoader(dataset, batch_size=2)
+        models_map = {'model1': make_model(), 'model2': make_model()}
+        ckpt_roots = {}
+        for model_name in models_map:
+            ckpt_roots[model_name] = Path(self.tmp_dir.name).joinpath(model_name)
+            ckpt_roots[model_name].mkdir()
+        num_epochs = 3
+        fit_lockstep(models_map,
+                     train_data,
+                     num_epochs=num_epochs,
+                     ckpt_roots=ckpt_roots,
+                     ckpt_step=100,
+                     device='cpu')
+
+        # data loaded once per epoch, not once per model per epoch
+        self.assertTrue(dataset.n_getitem == len(dataset) * num_epochs)
+        for model_name, model in models_map.items():
+            self.assertTrue(model.global_step == len(train_data) * num_epochs)
+            self.assertTrue(ckpt_roots[model_name].joinpath('checkpoint.pt').exists())
+
+    def test_throughput_excludes_after_train_step(self):
+        meters = []
+
+        class RecordingThroughputMeter(ThroughputMeter):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                meters.append(self)
+
+        def slow_after_train_step(*args, **kwargs):
+            # stands in for validating and saving checkpoints
+            time.sleep(0.2)
+            return False
+
+        train_data = torch.utils.data.DataLoader(CountingDataset(), batch_size=2)
+        models_map = {'model1': make_model(), 'model2': make_model()}
+        ckpt_roots = {}
+        for model_name, model in models_map.items():
+            ckpt_roots[model_name] = Path(self.tmp_dir.name).joinpath(model_name)
+            ckpt_roots[model_name].mkdir()
+            model._after_train_step = slow_after_train_step
+        with mock.patch.object(vak.engine.lockstep, 'ThroughputMeter', RecordingThroughputMeter):
+            fit_lockstep(models_map,
+                         train_data,
+                         num_epochs=1,
+                         ckpt_roots=ckpt_roots,
+                         ckpt_step=100,
+                         device='cpu')
+
+        self.assertTrue(len(meters) == 1)
+        self.assertTrue(len(meters[0].durations) == len(train_data))
+        self.assertTrue(all(duration < 0.2 for duration in meters[0].durations))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""tests for vak.engine.timing module"""
+from pathlib import Path
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+import torch
+
+from vak.engine.model import Model
+from vak.engine.timing import StepTimer, ThroughputMeter
+
+
+class FakeDataset:
+    def __getitem__(self, idx):
+        return torch.ones(4) * idx, torch.ones(1) * idx
+
+    def __len__(self):
+        return 8
+
+
+class TestStepTimer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fit_with_step_timer(self):
+        network = torch.nn.Linear(4, 1)
+        csv_path = self.tmp_path.joinpath('step_times.csv')
+        step_timer = StepTimer(csv_path=csv_path,
+                               trace_steps=[1, 3],
+                               trace_dir=self.tmp_path)
+        model = Model(network=network,
+                      loss=torch.nn.MSELoss(),
+                      optimizer=torch.optim.SGD(network.parameters(), lr=0.001),
+                      metrics={},
+                      step_timer=step_timer)
+        train_data = torch.utils.data.DataLoader(FakeDataset(), batch_size=2)
+        num_epochs = 2
+        model.fit(train_data,
+                  num_epochs=num_epochs,
+                  ckpt_root=self.tmp_path,
+                  ckpt_step=3,
+                  device='cpu')
+        step_timer.close()
+
+        step_times = pd.read_csv(csv_path)
+        self.assertTrue(
+            list(step_times.columns) == ['global_step'] + list(StepTimer.PHASES)
+        )
+        self.assertTrue(
+            step_times['global_step'].tolist() == list(range(len(train_data) * num_epochs))
+        )
+        self.assertTrue((step_times['forward'] > 0).all())
+        # checkpoint saved after step with global step 2 (global step 3 after increment), and at the end
+        self.assertTrue(step_times.loc[2, 'checkpoint'] > 0)
+        self.assertTrue(step_times.loc[1, 'checkpoint'] == 0)
+        self.assertTrue(self.tmp_path.joinpath('trace_steps_1-3.json').exists())
+
+    def test_trace_steps_invalid(self):
+        with self.assertRaises(ValueError):
+            StepTimer(trace_steps=[3, 1], trace_dir=self.tmp_path)
+        with self.assertRaises(ValueError):
+            StepTimer(trace_steps=[1, 3])
+
+
+class TestThroughputMeter(unittest.TestCase):
+    def test_throughput_meter(self):
+        meter = ThroughputMeter(window=4)
+        for _ in range(6):
+            meter.start()
+            time.sleep(0.02)
+            meter.data_loaded(n_windows=8)
+            time.sleep(0.01)
+            meter.step_end()
+        self.assertTrue(len(meter.durations) == 4)
+        # each step is ~0.03 s, of which ~0.02 s is waiting for data
+        self.assertTrue(0.5 < meter.data_wait_fraction < 1.)
+        self.assertTrue(meter.batches_per_sec < 1 / 0.03)
+        self.assertTrue(
+            abs(meter.windows_per_sec - meter.batches_per_sec * 8) < 1e-6
+        )
+        self.assertTrue(
+            sorted(meter.as_dict().keys()) == ['batches_per_sec', 'data_wait_fraction', 'windows_per_sec']
+        )
+
+    def test_throughput_meter_no_steps(self):
+        meter = ThroughputMeter()
+        self.assertTrue(meter.windows_per_sec == 0.)
+        self.assertTrue(meter.data_wait_fraction == 0.)
+
+    def test_fit_logs_throughput(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            network = torch.nn.Linear(4, 1)
+            model = Model(network=network,
+                          loss=torch.nn.MSELoss(),
+                          optimizer=torch.optim.SGD(network.parameters(), lr=0.001),
+                          metrics={})
+            model.THROUGHPUT_LOG_STEP = 2
+            logged = []
+            model._log_throughput = lambda throughput, split: logged.append((split, throughput))
+            train_data = torch.utils.data.DataLoader(FakeDataset(), batch_size=2)
+            model.fit(train_data,
+                      num_epochs=1,
+                      ckpt_root=Path(tmp_dir),
+                      ckpt_step=100,
+                      device='cpu')
+        self.assertTrue(len(logged) == 2)
+        self.assertTrue(all(split == 'train' for split, _ in logged))
+        self.assertTrue(all(throughput['windows_per_sec'] > 0 for _, throughput in logged))
+
+
+if __name__ == '__main__':
+    unittest.main()
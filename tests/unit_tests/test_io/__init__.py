@@ -3,3 +3,4 @@ from .test_spect import TestFindAudioFname
 from .test_audio import TestAudio
 from .test_dataframe import TestFromFiles
 from .test_dataframe import TestFromFiles
+from .test_spect_cache import TestSpectCache
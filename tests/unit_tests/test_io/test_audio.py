@@ -6,9 +6,16 @@ import shutil
 
 import numpy as np
 import crowsetta
+from scipy.io import wavfile
+import soundfile
 
 from vak.annotation import files_from_dir
+import vak.annotation
+import vak.constants
+import vak.files.audio
+import vak.files.spect
 import vak.io.audio
+import vak.spect
 
 
 HERE = Path(__file__).parent
@@ -308,6 +315,277 @@ class TestAudio(unittest.TestCase):
                                   timebins_key='t',
                                   spect_key='s')
 
+    def test_torch_backend(self):
+        numpy_output_dir = os.path.join(self.tmp_output_dir, 'numpy')
+        torch_output_dir = os.path.join(self.tmp_output_dir, 'torch')
+        os.makedirs(numpy_output_dir)
+        os.makedirs(torch_output_dir)
+        numpy_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                  spect_params=self.spect_params,
+                                                  output_dir=numpy_output_dir,
+                                                  audio_files=self.audio_files_cbin)
+        spect_params = dict(self.spect_params, backend='torch', batch_size=3)
+        torch_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                  spect_params=spect_params,
+                                                  output_dir=torch_output_dir,
+                                                  audio_files=self.audio_files_cbin)
+        self.assertTrue(len(torch_spect_files) == len(self.audio_files_cbin))
+        for numpy_spect_file, torch_spect_file in zip(numpy_spect_files, torch_spect_files):
+            self.assertTrue(os.path.basename(numpy_spect_file) == os.path.basename(torch_spect_file))
+            numpy_spect_dict = np.load(numpy_spect_file)
+            torch_spect_dict = np.load(torch_spect_file)
+            self.assertTrue(np.array_equal(numpy_spect_dict['f'], torch_spect_dict['f']))
+            self.assertTrue(np.array_equal(numpy_spect_dict['t'], torch_spect_dict['t']))
+            self.assertTrue(numpy_spect_dict['audio_path'] == torch_spect_dict['audio_path'])
+            self.assertTrue(np.allclose(numpy_spect_dict['s'], torch_spect_dict['s'], rtol=0, atol=1e-3))
+
+    def test_lean_schema(self):
+        full_output_dir = os.path.join(self.tmp_output_dir, 'full')
+        os.makedirs(full_output_dir)
+        full_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                 spect_params=self.spect_params,
+                                                 output_dir=full_output_dir,
+                                                 audio_files=self.audio_files_cbin)
+        for spect_dtype, atol in (('float32', 0), ('float16', 1e-2), ('uint8', 6.25 / 255)):
+            lean_output_dir = os.path.join(self.tmp_output_dir, spect_dtype)
+            os.makedirs(lean_output_dir)
+            spect_params = dict(self.spect_params, spect_dtype=spect_dtype, lean_schema=True, compress=True)
+            lean_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                     spect_params=spect_params,
+                                                     output_dir=lean_output_dir,
+                                                     audio_files=self.audio_files_cbin)
+            for full_spect_file, lean_spect_file in zip(full_spect_files, lean_spect_files):
+                self.assertTrue(os.path.getsize(lean_spect_file) < os.path.getsize(full_spect_file))
+                full_spect_dict = vak.files.spect.load(full_spect_file)
+                lean_spect_dict = vak.files.spect.load(lean_spect_file)
+                self.assertTrue(set(lean_spect_dict.keys()) == set(full_spect_dict.keys()))
+                self.assertTrue(np.array_equal(full_spect_dict['f'], lean_spect_dict['f']))
+                self.assertTrue(np.array_equal(full_spect_dict['t'], lean_spect_dict['t']))
+                self.assertTrue(full_spect_dict['audio_path'] == lean_spect_dict['audio_path'])
+                self.assertTrue(lean_spect_dict['s'].dtype == np.float32)
+                self.assertTrue(np.allclose(full_spect_dict['s'], lean_spect_dict['s'], rtol=0, atol=atol + 1e-6))
+
+    def test_multiple_spect_params(self):
+        spect_params_list = [
+            self.spect_params,
+            dict(self.spect_params, fft_size=256, step_size=32),
+            dict(self.spect_params, freq_cutoffs=(1000, 8000), spect_dtype='uint8'),
+            dict(self.spect_params, freq_cutoffs=None, transform_type='log_spect_plus_one', thresh=0.5),
+        ]
+        output_dirs = []
+        for ind in range(len(spect_params_list)):
+            output_dirs.append(os.path.join(self.tmp_output_dir, f'spect_params_{ind}'))
+            os.makedirs(output_dirs[-1])
+        spect_files_list = vak.io.audio.to_spect(audio_format='cbin',
+                                                 spect_params=spect_params_list,
+                                                 output_dir=output_dirs,
+                                                 audio_files=self.audio_files_cbin)
+        self.assertTrue(len(spect_files_list) == len(spect_params_list))
+        for ind, (spect_params, spect_files) in enumerate(zip(spect_params_list, spect_files_list)):
+            # same as making spectrograms with each set of parameters separately
+            expected_output_dir = os.path.join(self.tmp_output_dir, f'expected_{ind}')
+            os.makedirs(expected_output_dir)
+            expected_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                         spect_params=spect_params,
+                                                         output_dir=expected_output_dir,
+                                                         audio_files=self.audio_files_cbin)
+            self.assertTrue(len(spect_files) == len(expected_spect_files))
+            for spect_file, expected_spect_file in zip(spect_files, expected_spect_files):
+                self.assertTrue(os.path.dirname(spect_file) == output_dirs[ind])
+                self.assertTrue(os.path.basename(spect_file) == os.path.basename(expected_spect_file))
+                spect_dict = vak.files.spect.load(spect_file)
+                expected_spect_dict = vak.files.spect.load(expected_spect_file)
+                for key in ('s', 'f', 't', 'audio_path'):
+                    self.assertTrue(np.array_equal(spect_dict[key], expected_spect_dict[key]))
+
+    def test_multiple_spect_params_raises(self):
+        spect_params_list = [self.spect_params, dict(self.spect_params, fft_size=256)]
+        # not one output_dir for each set of parameters
+        with self.assertRaises(ValueError):
+            vak.io.audio.to_spect(audio_format='cbin',
+                                  spect_params=spect_params_list,
+                                  output_dir=self.tmp_output_dir,
+                                  audio_files=self.audio_files_cbin)
+        with self.assertRaises(ValueError):
+            vak.io.audio.to_spect(audio_format='cbin',
+                                  spect_params=spect_params_list,
+                                  output_dir=[self.tmp_output_dir],
+                                  audio_files=self.audio_files_cbin)
+        with self.assertRaises(ValueError):
+            vak.io.audio.to_spect(audio_format='cbin',
+                                  spect_params=[],
+                                  output_dir=[],
+                                  audio_files=self.audio_files_cbin)
+
+    def test_freq_reduction(self):
+        for freq_kwargs in (dict(freq_scale='mel', num_freqbins=64), dict(freq_decimate=3)):
+            spect_params = dict(self.spect_params, **freq_kwargs)
+            output_dir = os.path.join(self.tmp_output_dir, str(sorted(freq_kwargs)))
+            os.makedirs(output_dir)
+            spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                spect_params=spect_params,
+                                                output_dir=output_dir,
+                                                audio_files=self.audio_files_cbin[:3])
+            _, expected_freqbins = vak.spect.freq_filterbank(32000, 512, self.spect_params['freq_cutoffs'],
+                                                             **freq_kwargs)
+            # frequency bins can't be computed from fft_size, so they are saved with the lean schema
+            lean_output_dir = os.path.join(self.tmp_output_dir, str(sorted(freq_kwargs)) + '_lean')
+            os.makedirs(lean_output_dir)
+            lean_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                     spect_params=dict(spect_params, lean_schema=True),
+                                                     output_dir=lean_output_dir,
+                                                     audio_files=self.audio_files_cbin[:3])
+            for spect_file, lean_spect_file in zip(spect_files, lean_spect_files):
+                spect_dict = vak.files.spect.load(spect_file)
+                self.assertTrue(spect_dict['s'].shape[0] == expected_freqbins.shape[0])
+                self.assertTrue(np.allclose(spect_dict['f'], expected_freqbins))
+                self.assertTrue('f' in np.load(lean_spect_file).files)
+                lean_spect_dict = vak.files.spect.load(lean_spect_file)
+                for key in ('s', 'f', 't'):
+                    self.assertTrue(np.array_equal(spect_dict[key], lean_spect_dict[key]))
+
+    def test_stream(self):
+        expected_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                     spect_params=self.spect_params,
+                                                     output_dir=self.tmp_output_dir,
+                                                     audio_files=self.audio_files_cbin)
+        for spect_dtype in ('float32', 'uint8'):
+            stream_output_dir = os.path.join(self.tmp_output_dir, spect_dtype)
+            os.makedirs(stream_output_dir)
+            # stream all files
+            spect_params = dict(self.spect_params, stream_min_mb=0, spect_dtype=spect_dtype)
+            stream_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                       spect_params=spect_params,
+                                                       output_dir=stream_output_dir,
+                                                       audio_files=self.audio_files_cbin)
+            # temporary files are removed
+            self.assertTrue(sorted(os.listdir(stream_output_dir)) ==
+                            sorted(os.path.basename(spect_file) for spect_file in stream_spect_files))
+            for expected_spect_file, stream_spect_file in zip(expected_spect_files, stream_spect_files):
+                self.assertTrue(os.path.basename(expected_spect_file) == os.path.basename(stream_spect_file))
+                expected_spect_dict = vak.files.spect.load(expected_spect_file)
+                stream_spect_dict = vak.files.spect.load(stream_spect_file)
+                for key in ('f', 't', 'audio_path'):
+                    self.assertTrue(np.array_equal(expected_spect_dict[key], stream_spect_dict[key]))
+                if spect_dtype == 'float32':
+                    self.assertTrue(np.array_equal(expected_spect_dict['s'], stream_spect_dict['s']))
+                else:
+                    self.assertTrue(np.allclose(expected_spect_dict['s'], stream_spect_dict['s'],
+                                                rtol=0, atol=6.25 / 255 + 1e-6))
+
+    def test_load_mmap(self):
+        for audio_file in self.audio_files_cbin[:2]:
+            fs, dat = vak.files.audio.load_mmap(audio_file, 'cbin')
+            expected_fs, expected_dat = vak.constants.AUDIO_FORMAT_FUNC_MAP['cbin'](audio_file)
+            self.assertTrue(isinstance(dat, np.memmap))
+            self.assertTrue(fs == expected_fs)
+            self.assertTrue(np.array_equal(dat, expected_dat))
+
+        wav_path = os.path.join(self.tmp_output_dir, 'bird0.wav')
+        wavfile.write(wav_path, 32000, expected_dat)
+        fs, dat = vak.files.audio.load_mmap(wav_path, 'wav')
+        self.assertTrue(isinstance(dat, np.memmap))
+        self.assertTrue(fs == 32000)
+        self.assertTrue(np.array_equal(dat, expected_dat))
+        del dat
+
+        with self.assertRaises(ValueError):
+            vak.files.audio.load_mmap(wav_path, 'mp3')
+
+    def _write_flac(self, subtype='PCM_16'):
+        """write audio from .cbin files to .flac files"""
+        flac_dir = os.path.join(self.tmp_output_dir, 'flac')
+        os.makedirs(flac_dir)
+        flac_files = []
+        for audio_file in self.audio_files_cbin:
+            fs, dat = vak.constants.AUDIO_FORMAT_FUNC_MAP['cbin'](audio_file)
+            flac_file = os.path.join(flac_dir, Path(audio_file).stem + '.flac')
+            # .cbin samples are big-endian, soundfile only writes native byte order
+            soundfile.write(flac_file, dat.astype(np.int16), fs, subtype=subtype)
+            flac_files.append(flac_file)
+        return flac_dir, flac_files
+
+    def test_flac(self):
+        flac_dir, flac_files = self._write_flac()
+        self.assertTrue(vak.io.audio.files_from_dir(flac_dir, 'flac') == flac_files)
+        for audio_file, flac_file in zip(self.audio_files_cbin, flac_files):
+            fs, dat = vak.constants.AUDIO_FORMAT_FUNC_MAP['cbin'](audio_file)
+            flac_fs, flac_dat = vak.constants.AUDIO_FORMAT_FUNC_MAP['flac'](flac_file)
+            self.assertTrue(flac_fs == fs)
+            self.assertTrue(flac_dat.dtype == np.int16)
+            self.assertTrue(np.array_equal(flac_dat, dat))
+
+        # annotations for .cbin files map to .flac files with the same stem
+        audio_annot_map = vak.annotation.source_annot_map(flac_files, self.annot_list_cbin)
+        for flac_file, annot in audio_annot_map.items():
+            self.assertTrue(Path(annot.audio_file).stem == Path(flac_file).stem)
+
+        cbin_output_dir = os.path.join(self.tmp_output_dir, 'cbin_spect')
+        os.makedirs(cbin_output_dir)
+        cbin_spect_files = vak.io.audio.to_spect(audio_format='cbin',
+                                                 spect_params=self.spect_params,
+                                                 output_dir=cbin_output_dir,
+                                                 audio_files=self.audio_files_cbin,
+                                                 annot_list=self.annot_list_cbin,
+                                                 labelset=self.labelset_cbin)
+        for stream_min_mb in (None, 0):
+            flac_output_dir = os.path.join(self.tmp_output_dir, f'flac_spect_{stream_min_mb}')
+            os.makedirs(flac_output_dir)
+            spect_params = dict(self.spect_params, stream_min_mb=stream_min_mb)
+            flac_spect_files = vak.io.audio.to_spect(audio_format='flac',
+                                                     spect_params=spect_params,
+                                                     output_dir=flac_output_dir,
+                                                     audio_dir=flac_dir,
+                                                     annot_list=self.annot_list_cbin,
+                                                     labelset=self.labelset_cbin)
+            self.assertTrue(len(flac_spect_files) == len(cbin_spect_files))
+            for cbin_spect_file, flac_spect_file in zip(cbin_spect_files, flac_spect_files):
+                cbin_spect_dict = vak.files.spect.load(cbin_spect_file)
+                flac_spect_dict = vak.files.spect.load(flac_spect_file)
+                for key in ('s', 'f', 't'):
+                    self.assertTrue(np.array_equal(cbin_spect_dict[key], flac_spect_dict[key]))
+
+    def test_flac_8_bit(self):
+        # 8-bit .wav files have unsigned samples, offset by 128
+        fs, dat = vak.constants.AUDIO_FORMAT_FUNC_MAP['cbin'](self.audio_files_cbin[0])
+        wav_dat = ((dat.astype(np.int16) >> 8) + 128).astype(np.uint8)
+        wav_path = os.path.join(self.tmp_output_dir, 'bird0.wav')
+        wavfile.write(wav_path, fs, wav_dat)
+        flac_path = os.path.join(self.tmp_output_dir, 'bird0.flac')
+        soundfile.write(flac_path, soundfile.read(wav_path, dtype='int16')[0], fs, subtype='PCM_S8')
+
+        wav_fs, wav_dat = vak.constants.AUDIO_FORMAT_FUNC_MAP['wav'](wav_path)
+        flac_fs, flac_dat = vak.constants.AUDIO_FORMAT_FUNC_MAP['flac'](flac_path)
+        self.assertTrue(flac_fs == wav_fs)
+        self.assertTrue(flac_dat.dtype == wav_dat.dtype == np.uint8)
+        self.assertTrue(np.array_equal(flac_dat, wav_dat))
+
+        _, flac_blocks = vak.files.audio.load_mmap(flac_path, 'flac')
+        self.assertTrue(flac_blocks.dtype == np.uint8)
+        chunks = [flac_blocks[start:start + 1000] for start in range(0, len(flac_blocks), 1000)]
+        self.assertTrue(np.array_equal(np.concatenate(chunks), wav_dat))
+        flac_blocks.close()
+
+    def test_sound_file_array(self):
+        flac_dir, flac_files = self._write_flac(subtype='PCM_24')
+        flac_fs, flac_dat = vak.constants.AUDIO_FORMAT_FUNC_MAP['flac'](flac_files[0])
+        self.assertTrue(flac_dat.dtype == np.int32)
+        fs, dat = vak.files.audio.load_mmap(flac_files[0], 'flac')
+        self.assertTrue(isinstance(dat, vak.files.audio.SoundFileArray))
+        self.assertTrue(fs == flac_fs)
+        self.assertTrue(len(dat) == flac_dat.shape[0] and dat.dtype == np.int32)
+        # consecutive blocks, then out of order
+        chunks = [dat[start:start + 1000] for start in range(0, len(dat), 1000)]
+        self.assertTrue(np.array_equal(np.concatenate(chunks), flac_dat))
+        self.assertTrue(np.array_equal(dat[500:600], flac_dat[500:600]))
+        self.assertTrue(np.array_equal(dat[-10:], flac_dat[-10:]))
+        self.assertTrue(dat[10:5].shape == (0,))
+        with self.assertRaises(TypeError):
+            dat[::2]
+        with self.assertRaises(TypeError):
+            dat[0]
+        dat.close()
+
 
 if __name__ == '__main__':
     unittest.main()
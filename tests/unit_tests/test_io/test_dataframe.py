@@ -74,6 +74,44 @@ class TestFromFiles(unittest.TestCase):
 
         self.assertTrue(type(vak_df) == pd.DataFrame)
 
+    def test_from_files_with_audio_cbin_multiple_spect_params(self):
+        data_dir = os.path.join(TEST_DATA_DIR, 'cbins', 'gy6or6', '032312')
+        spect_params = [
+            SpectParamsConfig(fft_size=512, step_size=64, freq_cutoffs=(500, 10000), thresh=6.25,
+                              transform_type='log_spect'),
+            SpectParamsConfig(fft_size=256, step_size=32, freq_cutoffs=(500, 10000), thresh=6.25,
+                              transform_type='log_spect'),
+        ]
+        annot_format = 'notmat'
+        labelset = set(list('iabcdefghjk'))
+
+        for spect_container in (False, True):
+            vak_dfs = vak.io.dataframe.from_files(data_dir=data_dir,
+                                                  labelset=labelset,
+                                                  annot_format=annot_format,
+                                                  output_dir=self.tmp_output_dir,
+                                                  audio_format='cbin',
+                                                  spect_format=None,
+                                                  annot_file=None,
+                                                  spect_params=spect_params,
+                                                  spect_container=spect_container)
+
+            self.assertTrue(type(vak_dfs) == list)
+            self.assertTrue(len(vak_dfs) == len(spect_params))
+            self.assertTrue(all(type(vak_df) == pd.DataFrame for vak_df in vak_dfs))
+            # same audio files in each dataset, with spectrograms saved in different places
+            self.assertTrue(sorted(vak_dfs[0]['audio_path']) == sorted(vak_dfs[1]['audio_path']))
+            self.assertTrue(
+                not set(vak_dfs[0]['spect_path']).intersection(set(vak_dfs[1]['spect_path']))
+            )
+
+        with self.assertRaises(ValueError):
+            vak.io.dataframe.from_files(data_dir=os.path.join(TEST_DATA_DIR, 'mat', 'llb3', 'spect'),
+                                        labelset=labelset,
+                                        output_dir=self.tmp_output_dir,
+                                        spect_format='mat',
+                                        spect_params=spect_params)
+
     def test_from_files_with_spect_mat(self):
         data_dir = os.path.join(TEST_DATA_DIR, 'mat', 'llb3', 'spect')
         annot_file = os.path.join(TEST_DATA_DIR, 'mat', 'llb3', 'llb3_annot_subset.mat')
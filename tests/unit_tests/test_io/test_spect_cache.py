@@ -0,0 +1,156 @@
+"""tests for vak.io.spect_cache module"""
+import os
+from pathlib import Path
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+import vak.io.audio
+import vak.io.spect_cache
+import vak.testing.synth
+from vak.config.spect_params import SpectParamsConfig
+
+
+class TestSpectCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.audio_dir = self.tmp_path.joinpath('audio')
+        self.audio_dir.mkdir()
+        self.audio_files, _ = vak.testing.synth.make_dataset(self.audio_dir,
+                                                              hours=10 / 3600,
+                                                              audio_format='wav',
+                                                              file_dur=2.)
+        self.audio_files = [str(audio_file) for audio_file in self.audio_files]
+        self.cache_dir = self.tmp_path.joinpath('cache')
+        self.spect_params = SpectParamsConfig(freq_cutoffs=[500, 10000],
+                                              thresh=6.25,
+                                              transform_type='log_spect')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _output_dir(self, name):
+        output_dir = self.tmp_path.joinpath(name)
+        output_dir.mkdir()
+        return output_dir
+
+    def test_params_hash(self):
+        params_hash = vak.io.spect_cache.params_hash(self.spect_params)
+        self.assertTrue(
+            vak.io.spect_cache.params_hash(SpectParamsConfig(freq_cutoffs=[500, 10000],
+                                                             thresh=6.25,
+                                                             transform_type='log_spect',
+                                                             backend='torch'))
+            == params_hash
+        )
+        self.assertTrue(
+            vak.io.spect_cache.params_hash(SpectParamsConfig(freq_cutoffs=[500, 10000],
+                                                             thresh=6.25,
+                                                             transform_type='log_spect',
+                                                             step_size=32))
+            != params_hash
+        )
+        for freq_kwargs in (dict(freq_scale='mel', num_freqbins=64), dict(freq_decimate=2)):
+            self.assertTrue(
+                vak.io.spect_cache.params_hash(SpectParamsConfig(freq_cutoffs=[500, 10000],
+                                                                 thresh=6.25,
+                                                                 transform_type='log_spect',
+                                                                 **freq_kwargs))
+                != params_hash
+            )
+
+    def test_audio_hash(self):
+        audio_file = self.audio_files[0]
+        for key in ('stat', 'content'):
+            audio_hash = vak.io.spect_cache.audio_hash(audio_file, key)
+            self.assertTrue(audio_hash == vak.io.spect_cache.audio_hash(audio_file, key))
+            self.assertTrue(audio_hash != vak.io.spect_cache.audio_hash(self.audio_files[1], key))
+
+        # touching file changes 'stat' hash but not 'content' hash
+        stat_hash = vak.io.spect_cache.audio_hash(audio_file, 'stat')
+        content_hash = vak.io.spect_cache.audio_hash(audio_file, 'content')
+        stat = os.stat(audio_file)
+        os.utime(audio_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertTrue(vak.io.spect_cache.audio_hash(audio_file, 'stat') != stat_hash)
+        self.assertTrue(vak.io.spect_cache.audio_hash(audio_file, 'content') == content_hash)
+
+        with self.assertRaises(ValueError):
+            vak.io.spect_cache.audio_hash(audio_file, 'mtime')
+
+    def test_to_spect_reuses_cache(self):
+        output_dir1 = self._output_dir('spectrograms_generated_1')
+        spect_files1 = vak.io.audio.to_spect(audio_format='wav',
+                                             spect_params=self.spect_params,
+                                             output_dir=output_dir1,
+                                             audio_files=self.audio_files,
+                                             cache_dir=self.cache_dir)
+        cache = vak.io.spect_cache.SpectCache(self.cache_dir, self.spect_params)
+        self.assertTrue(len(cache.files()) == len(self.audio_files))
+        cached_mtimes = {path: path.stat().st_mtime_ns for path in cache.files()}
+
+        # simulate prep that was interrupted after making some spectrograms
+        os.remove(cache.path(self.audio_files[-1]))
+
+        output_dir2 = self._output_dir('spectrograms_generated_2')
+        spect_files2 = vak.io.audio.to_spect(audio_format='wav',
+                                             spect_params=self.spect_params,
+                                             output_dir=output_dir2,
+                                             audio_files=self.audio_files,
+                                             cache_dir=self.cache_dir)
+        self.assertTrue(
+            [os.path.basename(spect_file) for spect_file in spect_files1]
+            == [os.path.basename(spect_file) for spect_file in spect_files2]
+        )
+        for spect_file1, spect_file2 in zip(spect_files1, spect_files2):
+            spect_dict1, spect_dict2 = np.load(spect_file1), np.load(spect_file2)
+            for key in ('s', 'f', 't', 'audio_path'):
+                self.assertTrue(np.array_equal(spect_dict1[key], spect_dict2[key]))
+        # files that were cached were re-used, not written again
+        for audio_file in self.audio_files[:-1]:
+            cache_path = cache.path(audio_file)
+            self.assertTrue(
+                os.path.samefile(cache_path, output_dir2.joinpath(os.path.basename(audio_file) + '.spect.npz'))
+            )
+        self.assertTrue(cache.path(self.audio_files[-1]).exists())
+        self.assertTrue(len(cache.files()) == len(self.audio_files))
+        # no temporary files left behind
+        self.assertTrue(list(cache.params_dir.glob('*.tmp')) == [])
+
+        # different parameters give different spectrograms
+        output_dir3 = self._output_dir('spectrograms_generated_3')
+        vak.io.audio.to_spect(audio_format='wav',
+                              spect_params=SpectParamsConfig(),
+                              output_dir=output_dir3,
+                              audio_files=self.audio_files,
+                              cache_dir=self.cache_dir)
+        self.assertTrue(len(cache.files()) == 2 * len(self.audio_files))
+
+    def test_evict(self):
+        output_dir = self._output_dir('spectrograms_generated')
+        vak.io.audio.to_spect(audio_format='wav',
+                              spect_params=self.spect_params,
+                              output_dir=output_dir,
+                              audio_files=self.audio_files,
+                              cache_dir=self.cache_dir)
+        cache = vak.io.spect_cache.SpectCache(self.cache_dir, self.spect_params)
+        cache_paths = [cache.path(audio_file) for audio_file in self.audio_files]
+        # make first file least recently used
+        for ind, cache_path in enumerate(cache_paths):
+            os.utime(cache_path, ns=(time.time_ns(), time.time_ns() + ind * 10 ** 9))
+        file_size = cache_paths[0].stat().st_size
+
+        evicted = cache.evict(max_bytes=cache.size() - file_size, keep=[cache_paths[1]])
+        self.assertTrue(evicted == [cache_paths[0]])
+        self.assertFalse(cache_paths[0].exists())
+        # hard link made by to_spect is not removed
+        self.assertTrue(output_dir.joinpath(os.path.basename(self.audio_files[0]) + '.spect.npz').exists())
+
+        evicted = cache.evict(max_bytes=0, keep=[cache_paths[1]])
+        self.assertTrue(cache.files() == [cache_paths[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,14 @@
 from . import test_bruteforce
+from . import test_container
 from . import test_data
 from . import test_general
 from . import test_labels
+from . import test_manifest
+from . import test_memory
+from . import test_parallel
+from . import test_profiling
+from . import test_spect
+from . import test_spect_files
 from . import test_split
+from . import test_synth
 from . import test_utils
@@ -0,0 +1,117 @@
+"""tests for vak.files.container module"""
+import os
+import tempfile
+import unittest
+import shutil
+
+import numpy as np
+
+import vak.files.container
+import vak.files.spect
+import vak.io.spect
+import vak.parallel
+import vak.spect
+
+SAMP_FREQ = 32000
+
+
+class TestContainer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_output_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.spect_paths = []
+        for ind, n_samples in enumerate((SAMP_FREQ, SAMP_FREQ // 2, 5000)):
+            dat = rng.normal(scale=1000, size=n_samples).astype(np.int16)
+            s, f, t = vak.spect.spectrogram(dat, SAMP_FREQ, thresh=6.25, transform_type='log_spect',
+                                            freq_cutoffs=[500, 10000])
+            spect_path = os.path.join(self.tmp_output_dir, f'bird{ind}.wav.spect.npz')
+            np.savez(spect_path, s=s, f=f, t=t, audio_path=f'/data/bird{ind}.wav')
+            self.spect_paths.append(spect_path)
+        self.container_path = os.path.join(self.tmp_output_dir, 'dataset.spectpack')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_output_dir)
+
+    def test_pack_load(self):
+        container_spect_paths = vak.files.container.pack(self.spect_paths, self.container_path)
+        self.assertTrue(len(container_spect_paths) == len(self.spect_paths))
+        for spect_path, container_spect_path in zip(self.spect_paths, container_spect_paths):
+            self.assertTrue(vak.files.container.is_container_path(container_spect_path))
+            self.assertTrue(container_spect_path.name == os.path.basename(spect_path))
+            expected = vak.files.spect.load(spect_path)
+            spect_dict = vak.files.spect.load(container_spect_path)
+            self.assertTrue(set(spect_dict.keys()) == set(expected.keys()))
+            for key in ('s', 'f', 't'):
+                self.assertTrue(np.array_equal(spect_dict[key], expected[key]))
+            self.assertTrue(spect_dict['audio_path'].tolist() == expected['audio_path'].tolist())
+            self.assertTrue(spect_dict['s'].flags['C_CONTIGUOUS'])
+            # same when format is specified
+            spect_dict = vak.files.spect.load(container_spect_path, 'spectpack')
+            self.assertTrue(np.array_equal(spect_dict['s'], expected['s']))
+
+    def test_window(self):
+        container_spect_paths = vak.files.container.pack(self.spect_paths, self.container_path)
+        for spect_path, container_spect_path in zip(self.spect_paths, container_spect_paths):
+            s = vak.files.spect.load(spect_path)['s']
+            spect_dict = vak.files.spect.load(container_spect_path)
+            for start, stop in ((0, 88), (10, 20), (s.shape[1] - 5, s.shape[1] + 10), (3, 3)):
+                window = vak.files.spect.window(spect_dict, 's', start, stop)
+                self.assertTrue(np.array_equal(window, s[:, start:stop]))
+                self.assertTrue(np.array_equal(vak.files.spect.window(vak.files.spect.load(spect_path), 's',
+                                                                      start, stop),
+                                               s[:, start:stop]))
+
+    def test_spect_dtype(self):
+        container_spect_paths = vak.files.container.pack(self.spect_paths, self.container_path,
+                                                         spect_dtype='uint8')
+        for spect_path, container_spect_path in zip(self.spect_paths, container_spect_paths):
+            s = vak.files.spect.load(spect_path)['s']
+            loaded = vak.files.spect.load(container_spect_path)['s']
+            self.assertTrue(loaded.dtype == np.float32)
+            self.assertTrue(np.allclose(loaded, s, rtol=0, atol=6.25 / 255))
+        self.assertTrue(
+            os.path.getsize(self.container_path) < sum(os.path.getsize(path) for path in self.spect_paths) / 3
+        )
+
+    def test_open_container(self):
+        vak.files.container.pack(self.spect_paths, self.container_path)
+        container = vak.files.container.open_container(self.container_path)
+        self.assertTrue(container is vak.files.container.open_container(self.container_path))
+        self.assertTrue(len(container) == len(self.spect_paths))
+        self.assertTrue('bird0.wav.spect.npz' in container)
+        with self.assertRaises(KeyError):
+            container.read('bird10.wav.spect.npz')
+
+        # re-opened after container is modified
+        os.utime(self.container_path, ns=(0, 0))
+        self.assertTrue(container is not vak.files.container.open_container(self.container_path))
+
+    def test_to_dataframe(self):
+        vak.files.container.pack(self.spect_paths, self.container_path)
+        executor = vak.parallel.Executor(num_workers=0)
+        vak_df = vak.io.spect.to_dataframe('spectpack', spect_dir=self.tmp_output_dir, executor=executor)
+        npz_df = vak.io.spect.to_dataframe('npz', spect_files=self.spect_paths, executor=executor)
+        self.assertTrue(len(vak_df) == len(npz_df))
+        self.assertTrue(np.allclose(sorted(vak_df['duration']), sorted(npz_df['duration'])))
+        self.assertTrue(all(vak.files.container.is_container_path(path) for path in vak_df['spect_path']))
+
+    def test_pack_raises(self):
+        with self.assertRaises(ValueError):
+            vak.files.container.pack(self.spect_paths, os.path.join(self.tmp_output_dir, 'dataset.zip'))
+        with self.assertRaises(ValueError):
+            vak.files.container.pack([], self.container_path)
+        with self.assertRaises(ValueError):
+            vak.files.container.pack(self.spect_paths + self.spect_paths[:1], self.container_path)
+
+        spect_dict = dict(vak.files.spect.load(self.spect_paths[0]))
+        spect_dict['f'] = spect_dict['f'] + 1
+        np.savez(self.spect_paths[0], **spect_dict)
+        with self.assertRaises(ValueError):
+            vak.files.container.pack(self.spect_paths, self.container_path)
+
+        with self.assertRaises(ValueError):
+            vak.files.container.split_path(self.spect_paths[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
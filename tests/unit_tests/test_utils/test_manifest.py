@@ -0,0 +1,87 @@
+"""tests for vak.manifest module"""
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+import vak.manifest
+import vak.memory
+
+
+CONFIG_TOML = """[PREP]
+data_dir = "/some/dir"
+audio_format = "wav"
+
+[SPECT_PARAMS]
+fft_size = 512
+step_size = 64
+"""
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.toml_path = self.tmp_path.joinpath('config.toml')
+        self.toml_path.write_text(CONFIG_TOML)
+        self.file_paths = []
+        for ind, n_bytes in enumerate((10, 20, 30)):
+            file_path = self.tmp_path.joinpath(f'{ind}.wav')
+            file_path.write_bytes(b'0' * n_bytes)
+            self.file_paths.append(file_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_config_hashes(self):
+        hashes = vak.manifest.config_hashes(self.toml_path)
+        self.assertTrue(sorted(hashes['sections'].keys()) == ['PREP', 'SPECT_PARAMS'])
+
+        # changing one section only changes the hash of that section
+        other_toml_path = self.tmp_path.joinpath('other.toml')
+        other_toml_path.write_text(
+            '# a comment\n' + CONFIG_TOML.replace('step_size = 64', 'step_size = 32')
+        )
+        other_hashes = vak.manifest.config_hashes(other_toml_path)
+        self.assertTrue(hashes['sha256'] != other_hashes['sha256'])
+        self.assertTrue(hashes['sections']['PREP'] == other_hashes['sections']['PREP'])
+        self.assertTrue(hashes['sections']['SPECT_PARAMS'] != other_hashes['sections']['SPECT_PARAMS'])
+
+    def test_count_files_without_manifest_does_nothing(self):
+        vak.manifest.count_files('audio files', self.file_paths)
+
+    def test_record(self):
+        with vak.manifest.record('prep', self.toml_path, self.tmp_path, 'timestamp'):
+            with vak.memory.stage('find audio files'):
+                vak.manifest.count_files('audio files', self.file_paths[:2])
+            vak.manifest.count_files('audio files', self.file_paths[2:])
+
+        json_path = self.tmp_path.joinpath('manifest_prep_timestamp.json')
+        with json_path.open('r') as fp:
+            run_manifest = json.load(fp)
+        self.assertTrue(run_manifest['command'] == 'prep')
+        self.assertTrue(run_manifest['status'] == 'completed')
+        self.assertTrue(run_manifest['config'] == vak.manifest.config_hashes(self.toml_path))
+        self.assertTrue(
+            run_manifest['counts'] == {'audio files': {'n_files': 3, 'n_bytes': 60}}
+        )
+        self.assertTrue(
+            [stage['stage'] for stage in run_manifest['stages']] == ['find audio files', 'prep']
+        )
+        self.assertTrue(self.tmp_path.joinpath('memory_prep_timestamp.csv').exists())
+
+    def test_record_failed(self):
+        with self.assertRaises(ValueError):
+            with vak.manifest.record('train', self.toml_path, self.tmp_path, 'timestamp'):
+                raise ValueError('oops')
+
+        with self.tmp_path.joinpath('manifest_train_timestamp.json').open('r') as fp:
+            run_manifest = json.load(fp)
+        self.assertTrue(run_manifest['status'] == 'failed')
+        self.assertTrue('oops' in run_manifest['error'])
+        # files counted after a run don't go into its manifest
+        vak.manifest.count_files('audio files', self.file_paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
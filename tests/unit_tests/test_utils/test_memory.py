@@ -0,0 +1,76 @@
+"""tests for vak.memory module"""
+from pathlib import Path
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import vak.memory
+
+
+class TestMemory(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_stage_without_tracker_does_nothing(self):
+        self.assertTrue(vak.memory.get_tracker() is None)
+        with vak.memory.stage('nothing'):
+            x = 1
+        self.assertTrue(x == 1)
+
+    def test_tracker(self):
+        csv_path = self.tmp_path.joinpath('memory.csv')
+        tracker = vak.memory.MemoryTracker(csv_path=csv_path).start()
+        self.assertTrue(vak.memory.get_tracker() is tracker)
+        n_bytes = 200 * 1024 ** 2
+        with vak.memory.stage('outer'):
+            with vak.memory.stage('allocate'):
+                # write to every page so they are resident
+                big = np.ones(n_bytes, dtype=np.uint8)
+                del big
+            with vak.memory.stage('small'):
+                small = np.ones(10)
+        tracker.stop()
+        self.assertTrue(vak.memory.get_tracker() is None)
+
+        self.assertTrue(
+            [record['stage'] for record in tracker.records] == ['allocate', 'small', 'outer']
+        )
+        records = {record['stage']: record for record in tracker.records}
+        if vak.memory.current_rss() is not None:
+            n_mb = n_bytes / 1024 ** 2
+            # peak of a stage includes its nested stages
+            self.assertTrue(records['allocate']['peak_rss_mb'] - records['allocate']['start_rss_mb'] > 0.9 * n_mb)
+            self.assertTrue(records['outer']['peak_rss_mb'] >= records['allocate']['peak_rss_mb'])
+            self.assertTrue(records['small']['peak_rss_mb'] - records['small']['start_rss_mb'] < 0.5 * n_mb)
+
+        df = pd.read_csv(csv_path)
+        self.assertTrue(list(df.columns) == list(vak.memory.MemoryTracker.FIELDS))
+        self.assertTrue(df['stage'].tolist() == ['allocate', 'small', 'outer'])
+        summary = tracker.summary()
+        for stage in ('allocate', 'small', 'outer'):
+            self.assertTrue(stage in summary)
+
+    def test_track(self):
+        csv_path = self.tmp_path.joinpath('memory.csv')
+        with self.assertRaises(ValueError):
+            with vak.memory.track('command', csv_path=csv_path) as tracker:
+                with vak.memory.stage('fails'):
+                    raise ValueError
+        self.assertTrue(vak.memory.get_tracker() is None)
+        # stages are recorded even when there's an error
+        self.assertTrue(
+            [record['stage'] for record in tracker.records] == ['fails', 'command']
+        )
+        self.assertTrue(
+            pd.read_csv(csv_path)['stage'].tolist() == ['fails', 'command']
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""tests for vak.parallel module"""
+import os
+import unittest
+
+import threadpoolctl
+import torch
+
+import vak.parallel
+
+
+def _square(x):
+    return x ** 2
+
+
+def _load(x):
+    return x, os.getpid()
+
+
+def _compute(loaded):
+    x, pid = loaded
+    return x + 1, pid
+
+
+def _save(computed):
+    return computed[0] * 10
+
+
+def _num_threads(x):
+    return torch.get_num_threads(), [info['num_threads'] for info in threadpoolctl.threadpool_info()]
+
+
+def _fails(x):
+    if x == 3:
+        raise ValueError('fails on 3')
+    return x
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.items = list(range(10))
+
+    def test_map(self):
+        for num_workers in (0, 2):
+            for chunksize in (None, 1, 3, 20):
+                executor = vak.parallel.Executor(num_workers=num_workers, chunksize=chunksize)
+                results = executor.map(_square, self.items)
+                self.assertTrue(results == [x ** 2 for x in self.items])
+
+    def test_map_sizes(self):
+        # results are returned in order of items, even though largest items are processed first
+        sizes = [(x * 7) % 10 for x in self.items]
+        for num_workers in (0, 2):
+            executor = vak.parallel.Executor(num_workers=num_workers, chunksize=2)
+            self.assertTrue(executor.map(_square, self.items, sizes=sizes) == [x ** 2 for x in self.items])
+            self.assertTrue(executor.map(_square, self.items, sizes=_square) == [x ** 2 for x in self.items])
+
+    def test_map_empty(self):
+        executor = vak.parallel.Executor(num_workers=2)
+        self.assertTrue(executor.map(_square, []) == [])
+
+    def test_chunks(self):
+        executor = vak.parallel.Executor(num_workers=2, chunksize=4)
+        chunks = executor._chunks(self.items, sizes=self.items)
+        self.assertTrue(chunks == [[9, 8, 7, 6], [5, 4, 3, 2], [1, 0]])
+
+        executor = vak.parallel.Executor(num_workers=1)
+        chunks = executor._chunks(self.items, sizes=None)
+        self.assertTrue(chunks == [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]])
+
+    def test_pipeline(self):
+        for num_workers in (0, 2):
+            for chunksize in (1, 3, None):
+                executor = vak.parallel.Executor(num_workers=num_workers, chunksize=chunksize)
+                results = executor.pipeline(_load, _compute, _save, self.items, sizes=self.items)
+                self.assertTrue(results == [(x + 1) * 10 for x in self.items])
+
+    def test_map_num_workers_0_in_process(self):
+        executor = vak.parallel.Executor(num_workers=0)
+        results = executor.pipeline(_load, _compute, lambda computed: computed[1], self.items)
+        self.assertTrue(all(pid == os.getpid() for pid in results))
+
+    def test_error_propagates(self):
+        for num_workers in (0, 2):
+            executor = vak.parallel.Executor(num_workers=num_workers)
+            with self.assertRaises(ValueError):
+                executor.map(_fails, self.items)
+            with self.assertRaises(ValueError):
+                executor.pipeline(_fails, _square, _square, self.items)
+
+    def test_threads_per_worker(self):
+        executor = vak.parallel.Executor(num_workers=1, threads_per_worker=None)
+        self.assertTrue(executor.threads_per_worker == max(1, os.cpu_count() or 1))
+        executor = vak.parallel.Executor(num_workers=2, threads_per_worker=3)
+        self.assertTrue(executor.threads_per_worker == 3)
+
+        # limits apply to libraries already loaded in worker processes
+        executor = vak.parallel.Executor(num_workers=2, threads_per_worker=1)
+        for torch_num_threads, pool_num_threads in executor.map(_num_threads, self.items):
+            self.assertTrue(torch_num_threads == 1)
+            self.assertTrue(all(num_threads == 1 for num_threads in pool_num_threads))
+
+    def test_not_forked(self):
+        # forking a process that has loaded torch can deadlock
+        self.assertTrue(vak.parallel._mp_context().get_start_method() != 'fork')
+
+    def test_raises(self):
+        with self.assertRaises(ValueError):
+            vak.parallel.Executor(num_workers=-1)
+        with self.assertRaises(ValueError):
+            vak.parallel.Executor(chunksize=0)
+        with self.assertRaises(ValueError):
+            vak.parallel.Executor(threads_per_worker=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""tests for vak.profiling module"""
+from pathlib import Path
+import pstats
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+
+import vak.profiling
+
+
+def _work():
+    total = 0.
+    for _ in range(20):
+        total += np.linalg.norm(np.random.rand(100, 100))
+    return total
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_module_name(self):
+        self.assertTrue(vak.profiling.module_name(vak.io.audio.__file__) == 'vak.io.audio')
+        self.assertTrue(vak.profiling.module_name(vak.io.__file__) == 'vak.io')
+        self.assertTrue(vak.profiling.module_name(np.__file__) == 'numpy')
+        self.assertTrue(vak.profiling.module_name(tempfile.__file__) == 'tempfile')
+        self.assertTrue(vak.profiling.module_name('~') == '<built-in>')
+
+    def test_stop_training(self):
+        self.assertFalse(vak.profiling.stop_training(10 ** 6))
+        with vak.profiling.Profiler(max_steps=5):
+            self.assertFalse(vak.profiling.stop_training(4))
+            self.assertTrue(vak.profiling.stop_training(5))
+        self.assertFalse(vak.profiling.stop_training(5))
+
+    def test_profiler(self):
+        with vak.profiling.Profiler() as profiler:
+            _work()
+
+        hotspots_df = vak.profiling.hotspots(profiler.stats)
+        self.assertTrue('_work' in hotspots_df['function'].values)
+        self.assertTrue(np.all(np.diff(hotspots_df['tottime'].values) <= 0))
+
+        modules_df = vak.profiling.module_totals(profiler.stats)
+        self.assertTrue('numpy' in modules_df['module'].values)
+        self.assertTrue(np.isclose(modules_df['tottime'].sum(), profiler.stats.total_tt))
+
+        lines = vak.profiling.collapsed_stacks(profiler.stats)
+        self.assertTrue(len(lines) > 0)
+        for line in lines:
+            stack, microseconds = line.rsplit(' ', 1)
+            self.assertTrue(int(microseconds) > 0)
+        self.assertTrue(any('_work' in line for line in lines))
+
+        report = profiler.save(self.tmp_path, name='test', top_n=5)
+        self.assertTrue('numpy' in report)
+        for filename in ('test_hotspots.txt', 'test_hotspots.csv', 'test_modules.csv',
+                         'test.prof', 'test.collapsed'):
+            self.assertTrue(self.tmp_path.joinpath(filename).exists())
+        stats = pstats.Stats(str(self.tmp_path.joinpath('test.prof')))
+        self.assertTrue(stats.total_tt > 0)
+
+    def test_torch_profiler(self):
+        with vak.profiling.Profiler(torch_profiler=True) as profiler:
+            torch.randn(10, 10) @ torch.randn(10, 10)
+        profiler.save(self.tmp_path, name='test')
+        self.assertTrue(self.tmp_path.joinpath('test_torch_trace.json').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+"""tests for vak.spect module"""
+import os
+import tempfile
+import tracemalloc
+import unittest
+import warnings
+
+from matplotlib.mlab import specgram
+import numpy as np
+from scipy.signal import lfilter
+
+import vak.spect
+
+SAMP_FREQ = 32000
+
+
+def _mlab_spectrogram(dat, samp_freq, fft_size=512, step_size=64, thresh=None, transform_type=None,
+                      freq_cutoffs=None):
+    """spectrogram made with matplotlib.mlab.specgram, as vak did before it had its own implementation"""
+    if freq_cutoffs:
+        dat = vak.spect.butter_bandpass_filter(dat, freq_cutoffs[0], freq_cutoffs[1], samp_freq)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # warns if signal is shorter than fft_size
+        spect, freqbins, timebins = specgram(dat, fft_size, samp_freq, noverlap=fft_size - step_size)[:3]
+    if transform_type == 'log_spect':
+        spect /= spect.max()
+        spect = np.log10(spect)
+        if thresh:
+            spect[spect < -thresh] = -thresh
+    elif transform_type == 'log_spect_plus_one':
+        spect = np.log10(spect + 1)
+        if thresh:
+            spect[spect < thresh] = thresh
+    elif thresh:
+        spect[spect < thresh] = thresh
+    if freq_cutoffs:
+        f_inds = np.nonzero((freqbins >= freq_cutoffs[0]) & (freqbins < freq_cutoffs[1]))[0]
+        spect = spect[f_inds, :]
+        freqbins = freqbins[f_inds]
+    return spect, freqbins, timebins
+
+
+class TestSpect(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        t = np.arange(SAMP_FREQ * 2) / SAMP_FREQ
+        song = np.sin(2 * np.pi * 3000 * t) * (np.sin(2 * np.pi * 4 * t) > 0) + rng.normal(scale=0.01, size=t.shape)
+        self.dat = (song * 10000).astype(np.int16)  # like audio loaded from .wav or .cbin files
+
+    def test_butter_bandpass_sos(self):
+        sos = vak.spect.butter_bandpass_sos(500, 10000, SAMP_FREQ)
+        self.assertTrue(sos.shape == (5, 6))
+        self.assertTrue(sos is vak.spect.butter_bandpass_sos(500, 10000, SAMP_FREQ))  # cached
+        self.assertTrue(sos is not vak.spect.butter_bandpass_sos(500, 8000, SAMP_FREQ))
+
+    def test_butter_bandpass_filter(self):
+        # same as filtering with transfer function coefficients
+        b, a = vak.spect.butter_bandpass(500, 10000, SAMP_FREQ)
+        expected = lfilter(b, a, self.dat)
+        filtered = vak.spect.butter_bandpass_filter(self.dat, 500, 10000, SAMP_FREQ)
+        self.assertTrue(np.allclose(filtered, expected, rtol=0, atol=1e-6 * np.abs(expected).max()))
+
+        # filters each row of a batch
+        batch = np.stack([self.dat, self.dat[::-1]])
+        filtered_batch = vak.spect.butter_bandpass_filter(batch, 500, 10000, SAMP_FREQ)
+        self.assertTrue(np.array_equal(filtered_batch[0], filtered))
+
+        zero_phase = vak.spect.butter_bandpass_filter(self.dat, 500, 10000, SAMP_FREQ, zero_phase=True)
+        self.assertTrue(zero_phase.shape == self.dat.shape)
+        self.assertFalse(np.allclose(zero_phase, filtered))
+
+    def test_butter_bandpass_filter_chunks(self):
+        expected = vak.spect.butter_bandpass_filter(self.dat, 500, 10000, SAMP_FREQ)
+        chunks = (self.dat[start:start + 1000] for start in range(0, self.dat.shape[0], 1000))
+        filtered = np.concatenate(
+            list(vak.spect.butter_bandpass_filter_chunks(chunks, 500, 10000, SAMP_FREQ))
+        )
+        self.assertTrue(np.allclose(filtered, expected))
+
+    def test_spectrogram_same_as_mlab(self):
+        for kwargs in (
+            dict(),
+            dict(thresh=6.25, transform_type='log_spect', freq_cutoffs=[500, 10000]),
+            dict(thresh=6.25, transform_type='log_spect'),
+            dict(thresh=0.5, transform_type='log_spect_plus_one'),
+            dict(fft_size=511, step_size=32),
+            dict(fft_size=256, step_size=256, thresh=1e-3),
+        ):
+            for dat in (self.dat, self.dat[:300], self.dat.astype(np.float64) / 10000):
+                expected_spect, expected_freqbins, expected_timebins = _mlab_spectrogram(dat, SAMP_FREQ, **kwargs)
+                spect, freqbins, timebins = vak.spect.spectrogram(dat, SAMP_FREQ, **kwargs)
+                self.assertTrue(spect.dtype == np.float32)
+                self.assertTrue(spect.flags['C_CONTIGUOUS'])
+                self.assertTrue(spect.shape == expected_spect.shape)
+                # frequency and time bins are identical
+                self.assertTrue(np.array_equal(freqbins, expected_freqbins))
+                self.assertTrue(np.array_equal(timebins, expected_timebins))
+                if kwargs.get('transform_type'):
+                    self.assertTrue(np.allclose(spect, expected_spect, rtol=0, atol=1e-3))
+                else:
+                    self.assertTrue(np.allclose(spect, expected_spect, rtol=1e-3, atol=expected_spect.max() * 1e-6))
+
+    def test_spectrogram_batch(self):
+        # different lengths, including shorter than fft_size, so some signals are padded
+        dats = [self.dat[:300], self.dat, self.dat[:4000], self.dat[:100], self.dat.astype(np.float64) / 10000]
+        for kwargs in (
+            dict(),
+            dict(thresh=6.25, transform_type='log_spect', freq_cutoffs=[500, 10000]),
+            dict(thresh=0.5, transform_type='log_spect_plus_one'),
+            dict(fft_size=511, step_size=32, thresh=1e-3),
+            dict(thresh=6.25, transform_type='log_spect', freq_cutoffs=[500, 10000], zero_phase_filter=True),
+        ):
+            spects = vak.spect.spectrogram_batch(dats, SAMP_FREQ, num_threads=2, **kwargs)
+            self.assertTrue(len(spects) == len(dats))
+            for dat, (spect, freqbins, timebins) in zip(dats, spects):
+                expected_spect, expected_freqbins, expected_timebins = vak.spect.spectrogram(dat, SAMP_FREQ, **kwargs)
+                self.assertTrue(spect.dtype == np.float32)
+                self.assertTrue(spect.flags['C_CONTIGUOUS'])
+                self.assertTrue(spect.shape == expected_spect.shape)
+                self.assertTrue(np.array_equal(freqbins, expected_freqbins))
+                self.assertTrue(np.array_equal(timebins, expected_timebins))
+                self.assertTrue(np.allclose(spect, expected_spect, rtol=1e-4, atol=1e-4 * np.abs(expected_spect).max()))
+
+    def test_spectrogram_prefiltered(self):
+        filtered = vak.spect.butter_bandpass_filter(self.dat, 500, 10000, SAMP_FREQ)
+        expected_spect, expected_freqbins, expected_timebins = vak.spect.spectrogram(
+            self.dat, SAMP_FREQ, thresh=6.25, transform_type='log_spect', freq_cutoffs=[500, 10000]
+        )
+        spect, freqbins, timebins = vak.spect.spectrogram(filtered, SAMP_FREQ, thresh=6.25,
+                                                          transform_type='log_spect', freq_cutoffs=[500, 10000],
+                                                          prefiltered=True)
+        # not filtered again, but frequencies are still cropped
+        self.assertTrue(np.array_equal(spect, expected_spect))
+        self.assertTrue(np.array_equal(freqbins, expected_freqbins))
+        self.assertTrue(np.array_equal(timebins, expected_timebins))
+
+    def test_stft_power_chunks(self):
+        # windows that span chunk boundaries are the same as in the whole signal
+        for fft_size, step_size in ((512, 64), (511, 32), (256, 256)):
+            for dat in (self.dat, self.dat[:300], self.dat[:fft_size], self.dat[:fft_size + 1]):
+                expected = vak.spect.stft_power(dat, SAMP_FREQ, fft_size, step_size)[0]
+                for chunk_size in (7, step_size, fft_size + 1, 5000, dat.shape[0]):
+                    chunks = (dat[start:start + chunk_size] for start in range(0, dat.shape[0], chunk_size))
+                    power = np.concatenate(
+                        list(vak.spect.stft_power_chunks(chunks, SAMP_FREQ, fft_size, step_size))
+                    )
+                    self.assertTrue(np.array_equal(power, expected))
+
+    def test_spectrogram_chunked(self):
+        for kwargs in (
+            dict(),
+            dict(thresh=6.25, transform_type='log_spect', freq_cutoffs=[500, 10000]),
+            dict(thresh=0.5, transform_type='log_spect_plus_one'),
+            dict(fft_size=511, step_size=32, thresh=1e-3),
+        ):
+            for dat in (self.dat, self.dat[:300]):
+                expected_spect, expected_freqbins, expected_timebins = vak.spect.spectrogram(dat, SAMP_FREQ, **kwargs)
+                for chunk_size in (1000, 2 ** 18):
+                    spect, freqbins, timebins = vak.spect.spectrogram_chunked(dat, SAMP_FREQ, chunk_size=chunk_size,
+                                                                              **kwargs)
+                    self.assertTrue(spect.dtype == np.float32)
+                    self.assertTrue(np.array_equal(spect, expected_spect))
+                    self.assertTrue(np.array_equal(freqbins, expected_freqbins))
+                    self.assertTrue(np.array_equal(timebins, expected_timebins))
+
+        # written to out
+        shape = vak.spect.spectrogram_shape(self.dat.shape[0], SAMP_FREQ, freq_cutoffs=[500, 10000])
+        out = np.empty(shape, dtype=np.float32)
+        spect = vak.spect.spectrogram_chunked(self.dat, SAMP_FREQ, freq_cutoffs=[500, 10000], out=out)[0]
+        self.assertTrue(spect is out)
+        with self.assertRaises(ValueError):
+            vak.spect.spectrogram_chunked(self.dat[:1000], SAMP_FREQ, out=out)
+
+    def test_spectrogram_chunked_memory(self):
+        # memory used depends on size of chunks, not length of signal
+        dat = np.tile(self.dat, 10)
+        shape = vak.spect.spectrogram_shape(dat.shape[0], SAMP_FREQ, freq_cutoffs=[500, 10000])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out = np.lib.format.open_memmap(os.path.join(tmp_dir, 's.npy'), mode='w+', dtype=np.float32,
+                                            shape=shape, fortran_order=True)
+            tracemalloc.start()
+            try:
+                vak.spect.spectrogram_chunked(dat, SAMP_FREQ, thresh=6.25, transform_type='log_spect',
+                                              freq_cutoffs=[500, 10000], out=out, chunk_size=4096)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            self.assertTrue(peak < out.nbytes / 4)
+            del out
+
+    def test_freq_filterbank(self):
+        freqbins = vak.spect._freqbins(SAMP_FREQ, 512)
+        freqbins = freqbins[vak.spect._freq_inds(freqbins, [500, 10000])]
+        for freq_scale in ('mel', 'log'):
+            weights, reduced_freqbins = vak.spect.freq_filterbank(SAMP_FREQ, 512, [500, 10000],
+                                                                  freq_scale=freq_scale, num_freqbins=64)
+            self.assertTrue(weights.shape == (64, freqbins.shape[0]))
+            self.assertTrue(weights.dtype == np.float32)
+            self.assertTrue(np.allclose(weights.sum(axis=1), 1.))
+            self.assertTrue(reduced_freqbins.shape == (64,))
+            # centers of filters increase, and are spaced further apart at higher frequencies
+            self.assertTrue(np.all(np.diff(reduced_freqbins) > 0))
+            self.assertTrue(np.all(np.diff(reduced_freqbins, n=2) > 0))
+            self.assertTrue(500 < reduced_freqbins[0] and reduced_freqbins[-1] < 10000)
+
+        weights, reduced_freqbins = vak.spect.freq_filterbank(SAMP_FREQ, 512, [500, 10000], freq_decimate=4)
+        n_groups = -(-freqbins.shape[0] // 4)
+        self.assertTrue(weights.shape == (n_groups, freqbins.shape[0]))
+        self.assertTrue(np.allclose(reduced_freqbins[:-1], freqbins[:(n_groups - 1) * 4].reshape(-1, 4).mean(axis=1)))
+        self.assertTrue(np.allclose(reduced_freqbins[-1], freqbins[(n_groups - 1) * 4:].mean()))
+
+        self.assertTrue(vak.spect.freq_filterbank(SAMP_FREQ, 512, [500, 10000]) == (None, None))
+        # log scale starts from lowest frequency bin above zero when there are no freq_cutoffs
+        weights, reduced_freqbins = vak.spect.freq_filterbank(SAMP_FREQ, 512, freq_scale='log', num_freqbins=32)
+        self.assertTrue(weights.shape == (32, 257))
+        self.assertTrue(reduced_freqbins[0] > 0)
+
+        for kwargs in (dict(freq_scale='bark', num_freqbins=64),
+                       dict(freq_scale='mel'),
+                       dict(freq_scale='mel', num_freqbins=1000),
+                       dict(freq_scale='mel', num_freqbins=64, freq_decimate=2),
+                       dict(freq_decimate=0)):
+            with self.assertRaises(ValueError):
+                vak.spect.freq_filterbank(SAMP_FREQ, 512, [500, 10000], **kwargs)
+
+    def test_spectrogram_freq_reduction(self):
+        for freq_kwargs in (dict(freq_scale='mel', num_freqbins=64),
+                            dict(freq_scale='log', num_freqbins=48),
+                            dict(freq_decimate=3)):
+            for kwargs in (dict(thresh=6.25, transform_type='log_spect', freq_cutoffs=[500, 10000]),
+                           dict(thresh=0.5, transform_type='log_spect_plus_one')):
+                spect, freqbins, timebins = vak.spect.spectrogram(self.dat, SAMP_FREQ, **kwargs, **freq_kwargs)
+                weights, reduced_freqbins = vak.spect.freq_filterbank(SAMP_FREQ, 512, kwargs.get('freq_cutoffs'),
+                                                                      **freq_kwargs)
+                self.assertTrue(spect.dtype == np.float32)
+                self.assertTrue(spect.flags['C_CONTIGUOUS'])
+                self.assertTrue(spect.shape[0] == weights.shape[0])
+                self.assertTrue(spect.shape == vak.spect.spectrogram_shape(self.dat.shape[0], SAMP_FREQ,
+                                                                           freq_cutoffs=kwargs.get('freq_cutoffs'),
+                                                                           **freq_kwargs))
+                self.assertTrue(np.array_equal(freqbins, reduced_freqbins))
+
+                if kwargs['transform_type'] == 'log_spect_plus_one':
+                    # transform is applied to weighted average of power
+                    power, _, _ = vak.spect.stft_power(self.dat, SAMP_FREQ)
+                    expected = np.maximum(np.log10(weights @ power.T + 1), kwargs['thresh'])
+                    self.assertTrue(np.allclose(spect, expected, rtol=1e-5, atol=1e-6))
+
+                # same when made one chunk at a time, or in a batch
+                chunked_spect, chunked_freqbins, _ = vak.spect.spectrogram_chunked(self.dat, SAMP_FREQ,
+                                                                                   chunk_size=10000,
+                                                                                   **kwargs, **freq_kwargs)
+                self.assertTrue(np.array_equal(chunked_spect, spect))
+                self.assertTrue(np.array_equal(chunked_freqbins, freqbins))
+                batch_spect, batch_freqbins, _ = vak.spect.spectrogram_batch([self.dat, self.dat[:4000]], SAMP_FREQ,
+                                                                             **kwargs, **freq_kwargs)[0]
+                self.assertTrue(np.allclose(batch_spect, spect, rtol=1e-4, atol=1e-4 * np.abs(spect).max()))
+                self.assertTrue(np.array_equal(batch_freqbins, freqbins))
+
+    def test_stft_power_raises(self):
+        with self.assertRaises(ValueError):
+            vak.spect.stft_power(self.dat, SAMP_FREQ, fft_size=512, step_size=0)
+        with self.assertRaises(ValueError):
+            vak.spect.stft_power(self.dat, SAMP_FREQ, fft_size=512, step_size=513)
+        with self.assertRaises(ValueError):
+            vak.spect.spectrogram_batch([self.dat], SAMP_FREQ, fft_size=512, step_size=0)
+        with self.assertRaises(ValueError):
+            list(vak.spect.stft_power_chunks([self.dat], SAMP_FREQ, fft_size=512, step_size=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
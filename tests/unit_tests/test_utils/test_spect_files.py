@@ -0,0 +1,201 @@
+"""tests for vak.files.spect module"""
+import os
+from pathlib import Path
+import tempfile
+import unittest
+import shutil
+
+import numpy as np
+
+import vak.files.container
+import vak.files.spect
+import vak.io.dataframe
+import vak.io.spect
+import vak.parallel
+import vak.spect
+
+HERE = Path(__file__).parent
+MAT_SPECT_DIR = HERE.joinpath('..', '..', 'test_data', 'mat', 'llb3', 'spect')
+
+SAMP_FREQ = 32000
+
+
+class TestSpectFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp_output_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.dat = rng.normal(scale=1000, size=SAMP_FREQ).astype(np.int16)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_output_dir)
+
+    def _spect_dict(self, **kwargs):
+        s, f, t = vak.spect.spectrogram(self.dat, SAMP_FREQ, **kwargs)
+        return {'s': s, 'f': f, 't': t, 'audio_path': 'bird0.wav'}
+
+    def test_encode_decode(self):
+        s = self._spect_dict(thresh=6.25, transform_type='log_spect')['s']
+        encoded, scale, offset = vak.files.spect.encode(s, 'float32')
+        self.assertTrue(np.array_equal(vak.files.spect.decode(encoded, scale, offset), s))
+
+        encoded, scale, offset = vak.files.spect.encode(s, 'float16')
+        self.assertTrue(encoded.dtype == np.float16)
+        self.assertTrue(np.allclose(vak.files.spect.decode(encoded, scale, offset), s, rtol=1e-3, atol=1e-3))
+
+        encoded, scale, offset = vak.files.spect.encode(s, 'uint8')
+        self.assertTrue(encoded.dtype == np.uint8)
+        self.assertTrue(encoded.min() == 0 and encoded.max() == 255)
+        decoded = vak.files.spect.decode(encoded, scale, offset)
+        self.assertTrue(decoded.dtype == np.float32)
+        self.assertTrue(np.abs(decoded - s).max() <= scale / 2 + 1e-5)
+
+        # constant spectrogram
+        encoded, scale, offset = vak.files.spect.encode(np.full((3, 4), 2.5, dtype=np.float32), 'uint8')
+        self.assertTrue(np.array_equal(vak.files.spect.decode(encoded, scale, offset), np.full((3, 4), 2.5)))
+
+    def test_encode_raises(self):
+        s = np.array([[1e5, 1.0]], dtype=np.float32)  # e.g. power that was not log transformed
+        with self.assertRaises(ValueError):
+            vak.files.spect.encode(s, 'float16')
+        with self.assertRaises(ValueError):
+            vak.files.spect.encode(s, 'int8')
+
+    def test_save_load(self):
+        for kwargs in (dict(thresh=6.25, transform_type='log_spect', freq_cutoffs=[500, 10000]),
+                       dict(fft_size=511, step_size=33, thresh=0.5, transform_type='log_spect_plus_one')):
+            spect_dict = self._spect_dict(**kwargs)
+            fft_size, step_size = kwargs.get('fft_size', 512), kwargs.get('step_size', 64)
+            for spect_dtype in ('float32', 'float16', 'uint8'):
+                for lean in (True, False):
+                    for compress in (True, False):
+                        spect_path = os.path.join(self.tmp_output_dir,
+                                                  f'bird0.wav.{spect_dtype}.{lean}.{compress}.spect.npz')
+                        vak.files.spect.save(spect_path, spect_dict, spect_dtype=spect_dtype, lean=lean,
+                                             compress=compress, samp_freq=SAMP_FREQ,
+                                             fft_size=fft_size, step_size=step_size)
+                        loaded = vak.files.spect.load(spect_path)
+                        self.assertTrue(set(loaded.keys()) == set(spect_dict.keys()))
+                        self.assertTrue('s' in loaded and vak.files.spect.SCHEMA_KEY not in loaded)
+                        self.assertTrue(np.array_equal(loaded['f'], spect_dict['f']))
+                        self.assertTrue(np.array_equal(loaded['t'], spect_dict['t']))
+                        self.assertTrue(loaded['audio_path'] == 'bird0.wav')
+                        self.assertTrue(loaded['s'].dtype == np.float32)
+                        self.assertTrue(loaded['s'].shape == spect_dict['s'].shape)
+                        if spect_dtype == 'float32':
+                            self.assertTrue(np.array_equal(loaded['s'], spect_dict['s']))
+                        if lean:
+                            npz = np.load(spect_path)
+                            self.assertTrue('f' not in npz and 't' not in npz)
+
+    def test_save_lean_keeps_bins_that_cannot_be_computed(self):
+        spect_dict = self._spect_dict(thresh=6.25, transform_type='log_spect')
+        spect_dict['t'] = spect_dict['t'] + 0.1  # e.g., spectrogram of a segment from a longer file
+        spect_path = os.path.join(self.tmp_output_dir, 'bird0.wav.spect.npz')
+        vak.files.spect.save(spect_path, spect_dict, lean=True,
+                             samp_freq=SAMP_FREQ, fft_size=512, step_size=64)
+        npz = np.load(spect_path)
+        self.assertTrue('f' not in npz and 't' in npz)
+        loaded = vak.files.spect.load(spect_path)
+        self.assertTrue(np.array_equal(loaded['t'], spect_dict['t']))
+
+    def test_save_lean_raises(self):
+        spect_path = os.path.join(self.tmp_output_dir, 'bird0.wav.spect.npz')
+        with self.assertRaises(ValueError):
+            vak.files.spect.save(spect_path, self._spect_dict(), lean=True)
+
+    def test_metadata(self):
+        spect_dict = self._spect_dict(thresh=6.25, transform_type='log_spect', freq_cutoffs=[500, 10000])
+        spect_paths = []
+        for lean in (False, True):
+            spect_path = os.path.join(self.tmp_output_dir, f'bird{int(lean)}.wav.spect.npz')
+            vak.files.spect.save(spect_path, spect_dict, spect_dtype='uint8' if lean else 'float32', lean=lean,
+                                 samp_freq=SAMP_FREQ, fft_size=512, step_size=64)
+            spect_paths.append(spect_path)
+        container_path = os.path.join(self.tmp_output_dir, 'dataset.spectpack')
+        spect_paths.extend(vak.files.container.pack(spect_paths, container_path))
+
+        for spect_path in spect_paths:
+            spect_metadata = vak.files.spect.metadata(spect_path)
+            self.assertTrue(spect_metadata['shape'] == spect_dict['s'].shape)
+            self.assertTrue(np.array_equal(spect_metadata['freqbins'], spect_dict['f']))
+            self.assertTrue(np.array_equal(spect_metadata['timebins'], spect_dict['t']))
+            self.assertTrue(spect_metadata['audio_path'] == 'bird0.wav')
+            with self.assertRaises(KeyError):
+                vak.files.spect.metadata(spect_path, spect_key='spect')
+
+    def test_metadata_mat(self):
+        spect_paths = sorted(MAT_SPECT_DIR.glob('*.mat'))[:3]
+        for spect_path in spect_paths:
+            spect_dict = vak.files.spect.load(spect_path)
+            spect_metadata = vak.files.spect.metadata(spect_path)
+            self.assertTrue(spect_metadata['shape'] == spect_dict['s'].shape)
+            self.assertTrue(np.array_equal(spect_metadata['freqbins'], spect_dict['f']))
+            self.assertTrue(np.array_equal(spect_metadata['timebins'], spect_dict['t']))
+            self.assertTrue(spect_metadata['audio_path'] is None)
+
+    def test_validate(self):
+        spect_dict = self._spect_dict(thresh=6.25, transform_type='log_spect')
+        spect_path = os.path.join(self.tmp_output_dir, 'bird0.wav.spect.npz')
+        vak.files.spect.save(spect_path, spect_dict)
+        spect_metadata = vak.files.spect.validate(spect_path, 'npz')
+        self.assertTrue(spect_metadata['timebin_dur'] == 0.002)
+
+        for key in ('f', 't'):
+            bad_spect_dict = dict(spect_dict)
+            bad_spect_dict[key] = bad_spect_dict[key][:-1]
+            vak.files.spect.save(spect_path, bad_spect_dict)
+            with self.assertRaises(ValueError):
+                vak.files.spect.validate(spect_path, 'npz')
+
+        f = spect_dict['f']
+        self.assertTrue(vak.files.spect.validate_across_files([f, f.copy()], [0.002, 0.002]) == 0.002)
+        with self.assertRaises(ValueError):
+            vak.files.spect.validate_across_files([f, f + 1], [0.002, 0.002])
+        with self.assertRaises(ValueError):
+            vak.files.spect.validate_across_files([f, f], [0.002, 0.001])
+
+    def test_to_dataframe(self):
+        # records made from metadata are the same as from loading each file
+        spect_paths = [str(spect_path) for spect_path in sorted(MAT_SPECT_DIR.glob('*.mat'))[:5]]
+        vak_df = vak.io.spect.to_dataframe('mat', spect_files=spect_paths,
+                                           executor=vak.parallel.Executor(num_workers=0))
+        for spect_path, (_, row) in zip(spect_paths, vak_df.iterrows()):
+            spect_dict = vak.files.spect.load(spect_path)
+            timebin_dur = vak.files.spect.timebin_dur(spect_path, 'mat', 't')
+            self.assertTrue(row['spect_path'] == str(Path(spect_path).absolute()))
+            self.assertTrue(row['timebin_dur'] == timebin_dur)
+            self.assertTrue(row['duration'] == spect_dict['s'].shape[-1] * timebin_dur)
+
+    def test_convert(self):
+        spect_paths = [str(spect_path) for spect_path in sorted(MAT_SPECT_DIR.glob('*.mat'))[:3]]
+        executor = vak.parallel.Executor(num_workers=0)
+        converted_paths = vak.files.spect.convert(spect_paths, 'mat', self.tmp_output_dir, executor=executor)
+        for spect_path, converted_path in zip(spect_paths, converted_paths):
+            self.assertTrue(Path(converted_path).name == Path(spect_path).stem + '.spect.npz')
+            spect_dict = vak.files.spect.load(spect_path)
+            converted = vak.files.spect.load(converted_path)
+            # only spectrogram, frequency bins, and time bins are kept; no audio_path in these .mat files
+            self.assertTrue(set(converted.keys()) == {'s', 'f', 't'})
+            for key in ('s', 'f', 't'):
+                self.assertTrue(np.array_equal(converted[key], spect_dict[key]))
+
+        with self.assertRaises(ValueError):
+            vak.files.spect.convert(spect_paths + spect_paths[:1], 'mat', self.tmp_output_dir, executor=executor)
+
+    def test_from_files_convert(self):
+        executor = vak.parallel.Executor(num_workers=0)
+        for convert_spect_format in ('npz', 'spectpack'):
+            vak_df = vak.io.dataframe.from_files(str(MAT_SPECT_DIR), spect_format='mat',
+                                                 output_dir=self.tmp_output_dir, executor=executor,
+                                                 convert_spect_format=convert_spect_format)
+            mat_df = vak.io.dataframe.from_files(str(MAT_SPECT_DIR), spect_format='mat',
+                                                 output_dir=self.tmp_output_dir, executor=executor)
+            self.assertTrue(len(vak_df) == len(mat_df))
+            self.assertTrue(np.allclose(sorted(vak_df['duration']), sorted(mat_df['duration'])))
+            for spect_path in vak_df['spect_path']:
+                self.assertTrue(str(spect_path).startswith(self.tmp_output_dir))
+                self.assertTrue(str(spect_path).endswith('.spect.npz'))
+
+
+if __name__ == '__main__':
+    unittest.main()
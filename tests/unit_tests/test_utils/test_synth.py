@@ -0,0 +1,109 @@
+"""tests for vak.testing.synth module"""
+from pathlib import Path
+import tempfile
+import unittest
+
+import crowsetta
+import numpy as np
+
+import vak.io.audio
+import vak.testing.synth
+from vak.config.spect_params import SpectParamsConfig
+from vak.constants import AUDIO_FORMAT_FUNC_MAP
+
+
+class TestSynth(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_syllable_types(self):
+        syl_types = vak.testing.synth.syllable_types('abcd', syllable_kind='mixed')
+        self.assertTrue(list(syl_types.keys()) == ['a', 'b', 'c', 'd'])
+        self.assertTrue(
+            [syl_type['kind'] for syl_type in syl_types.values()] == ['tone', 'chirp', 'tone', 'chirp']
+        )
+        freqs = [syl_type['freq_start'] for syl_type in syl_types.values()]
+        self.assertTrue(len(set(freqs)) == 4)
+
+        with self.assertRaises(ValueError):
+            vak.testing.synth.syllable_types('abc', syllable_kind='whistle')
+        with self.assertRaises(ValueError):
+            vak.testing.synth.syllable_types(['a', 'b c'])
+
+    def test_song(self):
+        syl_types = vak.testing.synth.syllable_types('ab')
+        rng = np.random.default_rng(0)
+        audio, labels, onsets_s, offsets_s = vak.testing.synth.song(5., syl_types, samp_freq=32000,
+                                                                    label_probs={'a': 1., 'b': 0.}, rng=rng)
+        self.assertTrue(audio.shape == (5 * 32000,))
+        self.assertTrue(len(labels) > 0)
+        self.assertTrue(all(label == 'a' for label in labels))
+        self.assertTrue(np.all(onsets_s < offsets_s))
+        self.assertTrue(np.all(onsets_s[1:] > offsets_s[:-1]))
+        self.assertTrue(offsets_s[-1] < 5.)
+
+        with self.assertRaises(ValueError):
+            vak.testing.synth.song(5., syl_types, label_probs={'a': 1.})
+
+    def _test_make_dataset(self, audio_format, annot_format):
+        hours = 25 / 3600
+        audio_files, annot_files = vak.testing.synth.make_dataset(self.tmp_path, hours=hours,
+                                                                  audio_format=audio_format,
+                                                                  file_dur=10., labelset='abc')
+        self.assertTrue(len(audio_files) == 3)
+        self.assertTrue(all(path.exists() for path in audio_files + annot_files))
+        self.assertTrue(
+            sorted(vak.io.audio.files_from_dir(self.tmp_path, audio_format)) == sorted(str(path) for path in audio_files)
+        )
+
+        durs = []
+        for audio_file in audio_files:
+            samp_freq, audio = AUDIO_FORMAT_FUNC_MAP[audio_format](audio_file)
+            self.assertTrue(samp_freq == 32000)
+            durs.append(audio.shape[0] / samp_freq)
+        self.assertTrue(np.isclose(sum(durs), 25.))
+
+        scribe = crowsetta.Transcriber(annot_format=annot_format)
+        annots = scribe.from_file([str(path) for path in annot_files])
+        for annot, audio_file, dur in zip(annots, audio_files, durs):
+            self.assertTrue(Path(annot.audio_file).name == audio_file.name)
+            self.assertTrue(set(annot.seq.labels) <= {'a', 'b', 'c'})
+            self.assertTrue(annot.seq.offsets_s[-1] < dur)
+
+        # same arguments make the same dataset
+        other_dir = self.tmp_path.joinpath('other')
+        other_audio_files, _ = vak.testing.synth.make_dataset(other_dir, hours=hours, audio_format=audio_format,
+                                                              file_dur=10., labelset='abc')
+        for audio_file, other_audio_file in zip(audio_files, other_audio_files):
+            self.assertTrue(audio_file.read_bytes() == other_audio_file.read_bytes())
+
+        # spectrograms can be made from dataset, as vak prep does
+        spect_dir = self.tmp_path.joinpath('spect')
+        spect_dir.mkdir()
+        spect_files = vak.io.audio.to_spect(audio_format=audio_format,
+                                            spect_params=SpectParamsConfig(),
+                                            output_dir=spect_dir,
+                                            audio_files=[str(path) for path in audio_files],
+                                            annot_list=annots,
+                                            labelset={'a', 'b', 'c'})
+        self.assertTrue(len(spect_files) == 3)
+
+    def test_make_dataset_wav(self):
+        self._test_make_dataset('wav', 'phn')
+
+    def test_make_dataset_cbin(self):
+        self._test_make_dataset('cbin', 'notmat')
+
+    def test_make_dataset_raises(self):
+        with self.assertRaises(ValueError):
+            vak.testing.synth.make_dataset(self.tmp_path, audio_format='flac')
+        with self.assertRaises(ValueError):
+            vak.testing.synth.make_dataset(self.tmp_path, hours=0)
+
+
+if __name__ == '__main__':
+    unittest.main()